@@ -16,6 +16,7 @@ from .tasks import router as tasks_router
 from .queue import router as queue_router
 from .system import router as system_router
 from .unified_tasks import router as unified_tasks_router
+from .benchmarks import router as benchmarks_router
 
 api_router = APIRouter()
 
@@ -35,3 +36,4 @@ api_router.include_router(tiles_router, tags=["tiles"])
 api_router.include_router(queue_router, prefix="/queue", tags=["queue"])
 api_router.include_router(system_router, prefix="", tags=["system"])
 api_router.include_router(unified_tasks_router, prefix="", tags=["unified-tasks"])
+api_router.include_router(benchmarks_router, prefix="/benchmarks", tags=["benchmarks"])
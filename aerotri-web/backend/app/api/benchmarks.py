@@ -0,0 +1,113 @@
+"""Pipeline benchmark history, regression comparison and runtime prediction."""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Block, ReconVersion, get_db
+from ..services.benchmark_store import BENCHMARK_PIPELINES, REGRESSION_THRESHOLD, benchmark_store
+
+router = APIRouter()
+
+
+def _check_pipeline(pipeline: Optional[str]) -> None:
+    if pipeline is not None and pipeline not in BENCHMARK_PIPELINES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown pipeline '{pipeline}', expected one of: {', '.join(BENCHMARK_PIPELINES)}",
+        )
+
+
+@router.get("")
+async def list_benchmarks(
+    pipeline: Optional[str] = Query(None),
+    block_id: Optional[str] = Query(None),
+    algorithm: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+):
+    """List recorded runs, newest first."""
+    _check_pipeline(pipeline)
+    runs = await benchmark_store.list_runs(db, pipeline=pipeline, block_id=block_id, algorithm=algorithm, limit=limit)
+    return {"runs": [run.to_dict() for run in runs], "total": len(runs)}
+
+
+@router.get("/predict")
+async def predict_runtime(
+    block_id: str,
+    pipeline: str = Query("sfm"),
+    version_id: Optional[str] = Query(None),
+    quality_preset: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """Predict the runtime of a pipeline on a block from similar past runs.
+
+    SfM and 3DGS use the block's current parameters; OpenMVS uses ``version_id``'s
+    parameters, or ``quality_preset`` without custom overrides.
+    """
+    _check_pipeline(pipeline)
+    result = await db.execute(select(Block).where(Block.id == block_id))
+    block = result.scalar_one_or_none()
+    if not block:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Block not found: {block_id}"
+        )
+
+    version = None
+    if version_id:
+        result = await db.execute(
+            select(ReconVersion)
+            .where(ReconVersion.id == version_id)
+            .where(ReconVersion.block_id == block_id)
+        )
+        version = result.scalar_one_or_none()
+        if not version:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail=f"Version not found: {version_id}"
+            )
+
+    params = None
+    if pipeline == "openmvs" and version is None and quality_preset:
+        params = {"quality_preset": quality_preset, "custom_params": None}
+    return await benchmark_store.predict(db, pipeline, block, version=version, params=params)
+
+
+@router.get("/{run_id}")
+async def get_benchmark(run_id: int, db: AsyncSession = Depends(get_db)):
+    """Get a recorded run."""
+    run = await benchmark_store.get(db, run_id)
+    if not run:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Benchmark run not found: {run_id}"
+        )
+    return run.to_dict()
+
+
+@router.get("/{run_id}/compare")
+async def compare_benchmark(
+    run_id: int,
+    baseline_id: Optional[int] = Query(None, description="Compare against this run instead of the automatic baseline"),
+    threshold: float = Query(REGRESSION_THRESHOLD, gt=0, le=10),
+    db: AsyncSession = Depends(get_db),
+):
+    """Compare a run with earlier runs of the same parameters and flag regressions.
+
+    The automatic baseline is the latest runs with the same pipeline, algorithm and
+    parameters whose input size is within a factor of two.
+    """
+    run = await benchmark_store.get(db, run_id)
+    if not run:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Benchmark run not found: {run_id}"
+        )
+    if baseline_id is not None and await benchmark_store.get(db, baseline_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Benchmark run not found: {baseline_id}"
+        )
+    try:
+        comparison = await benchmark_store.compare(db, run, baseline_id=baseline_id, threshold=threshold)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    comparison["run"] = run.to_dict()
+    return comparison
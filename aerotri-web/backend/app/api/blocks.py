@@ -11,7 +11,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models import Block, BlockStatus, get_db
 from ..schemas import BlockCreate, BlockUpdate, BlockResponse, BlockListResponse
+from ..services.image_catalog import ImageCatalogService
+from ..services.thumbnail_service import thumbnail_service
 from ..services.workspace_service import WorkspaceService
+from ..services.progress_hub import progress_hub
+from ..services.resource_profiler import resource_profiler
 from ..conf.settings import get_settings
 
 
@@ -56,7 +60,6 @@ async def create_block(block_data: BlockCreate, db: AsyncSession = Depends(get_d
     block_id = str(uuid.uuid4())
     # Create per-block working dir (safe to delete inside)
     working_dir = WorkspaceService.populate_working_dir(block_id, block_data.image_path)
-    num_images = _count_images_in_dir(working_dir)
 
     # Create block (store original path as source, use working_dir for processing & preview)
     block = Block(
@@ -75,12 +78,18 @@ async def create_block(block_data: BlockCreate, db: AsyncSession = Depends(get_d
         else None,
         mapper_params=block_data.mapper_params,
         openmvg_params=block_data.openmvg_params,
-        statistics={"num_images": num_images},
+        statistics={"num_images": 0},
     )
 
     db.add(block)
     await db.commit()
+
+    # Fill the image catalog once; later listings refresh it incrementally
+    await ImageCatalogService.refresh(db, block, force=True)
+    block.statistics = {"num_images": await ImageCatalogService.count(db, block_id)}
+    await db.commit()
     await db.refresh(block)
+    thumbnail_service.warm_block(block_id)
 
     return block
 
@@ -90,6 +99,7 @@ async def list_blocks(db: AsyncSession = Depends(get_db)):
     """List all blocks."""
     result = await db.execute(select(Block).order_by(Block.created_at.desc()))
     blocks = result.scalars().all()
+    catalog_counts = await ImageCatalogService.counts_by_block(db)
 
     responses: List[BlockResponse] = []
     for b in blocks:
@@ -97,7 +107,7 @@ async def list_blocks(db: AsyncSession = Depends(get_db)):
         # Backfill num_images for older blocks that don't have it in statistics yet
         stats = dict(resp.statistics or {})
         if "num_images" not in stats:
-            stats["num_images"] = _ensure_num_images(b)
+            stats["num_images"] = catalog_counts.get(b.id) or _ensure_num_images(b)
             resp.statistics = stats
         responses.append(resp)
 
@@ -118,11 +128,44 @@ async def get_block(block_id: str, db: AsyncSession = Depends(get_db)):
     resp = BlockResponse.model_validate(block)
     stats = dict(resp.statistics or {})
     if "num_images" not in stats:
-        stats["num_images"] = _ensure_num_images(block)
+        stats["num_images"] = await ImageCatalogService.count(db, block_id) or _ensure_num_images(block)
         resp.statistics = stats
     return resp
 
 
+# Block statistics column holding each pipeline's resource profile
+_PROFILE_FIELDS = {
+    "sfm": "statistics",
+    "openmvs": "recon_statistics",
+    "gs": "gs_statistics",
+    "gs_tiles": "gs_tiles_statistics",
+    "tiles": "tiles_statistics",
+}
+
+
+@router.get("/{block_id}/resource-profile")
+async def get_block_resource_profile(block_id: str, db: AsyncSession = Depends(get_db)):
+    """Per-stage CPU / memory / I/O / GPU profile of the block's pipelines.
+
+    Running pipelines report live data (``running`` lists the processes still
+    being sampled); finished ones the profile stored with their statistics.
+    """
+    result = await db.execute(select(Block).where(Block.id == block_id))
+    block = result.scalar_one_or_none()
+
+    if not block:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Block not found: {block_id}"
+        )
+
+    pipelines = {}
+    for pipeline, field in _PROFILE_FIELDS.items():
+        profile = resource_profiler.current(pipeline, block_id, getattr(block, field, None))
+        if profile:
+            pipelines[pipeline] = profile
+    return {"block_id": block_id, "pipelines": pipelines}
+
+
 @router.patch("/{block_id}", response_model=BlockResponse)
 async def update_block(
     block_id: str, block_data: BlockUpdate, db: AsyncSession = Depends(get_db)
@@ -239,6 +282,10 @@ async def delete_block(block_id: str, db: AsyncSession = Depends(get_db)):
         except Exception as e:
             print(f"Warning: Failed to delete output directory {outputs_dir}: {e}")
 
-    # Delete from database
+    thumbnail_service.remove_block(block_id)
+
+    # Delete from database (SQLite does not enforce the catalog's FK cascade)
+    await ImageCatalogService.remove(db, block_id)
     await db.delete(block)
     await db.commit()
+    progress_hub.clear_snapshot(block_id)
@@ -8,7 +8,7 @@ from fastapi.responses import FileResponse
 from sqlalchemy import select
 
 from ..models.block import Block
-from ..models.database import AsyncSessionLocal
+from ..models.database import ApiSessionLocal
 
 router = APIRouter()
 
@@ -20,7 +20,7 @@ async def download_geo_ref(block_id: str):
     The file is generated when mapper_params.georef_enabled is enabled and the
     georef pipeline succeeds.
     """
-    async with AsyncSessionLocal() as db:
+    async with ApiSessionLocal() as db:
         result = await db.execute(select(Block).where(Block.id == block_id))
         block = result.scalar_one_or_none()
         if not block or not block.output_path:
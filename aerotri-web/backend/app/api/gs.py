@@ -14,23 +14,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from ..models import Block, BlockStatus, get_db
 from ..schemas import GSFilesResponse, GSFileInfo, GSLogResponse, GSStatusResponse, GSTrainRequest
 from ..services.gs_runner import gs_runner
+from ..services.log_tail import tail_or_follow
 
 
 router = APIRouter()
 
 
-def _tail_file(path: Path, lines: int) -> List[str]:
-    if not path.exists() or not path.is_file():
-        return []
-    # naive but safe for V1: read last N lines (files are not expected to be huge for tail)
-    try:
-        with path.open("r", encoding="utf-8", errors="replace") as f:
-            data = f.readlines()
-        return [x.rstrip("\n") for x in data[-lines:]]
-    except Exception:
-        return []
-
-
 @router.post(
     "/blocks/{block_id}/gs/train",
     response_model=GSStatusResponse,
@@ -292,6 +281,7 @@ async def download_gs_file(
 async def get_gs_log_tail(
     block_id: str,
     lines: int = Query(200, ge=1, le=2000),
+    since_offset: Optional[int] = Query(None, ge=0),
     db: AsyncSession = Depends(get_db),
 ):
     result = await db.execute(select(Block).where(Block.id == block_id))
@@ -299,14 +289,8 @@ async def get_gs_log_tail(
     if not block:
         raise HTTPException(status_code=404, detail=f"Block not found: {block_id}")
 
-    mem_tail = gs_runner.get_log_tail(block_id, lines)
-    if mem_tail:
-        return GSLogResponse(block_id=block_id, lines=mem_tail)
-
-    if block.gs_output_path:
-        file_tail = _tail_file(Path(block.gs_output_path) / "run_gs.log", lines)
-        return GSLogResponse(block_id=block_id, lines=file_tail)
-
-    return GSLogResponse(block_id=block_id, lines=[])
+    log_path = Path(block.gs_output_path) / "run_gs.log" if block.gs_output_path else None
+    chunk = tail_or_follow(log_path, lines, since_offset, gs_runner.get_log_tail(block_id, lines))
+    return GSLogResponse(block_id=block_id, lines=chunk.lines, offset=chunk.offset, reset=chunk.reset)
 
 
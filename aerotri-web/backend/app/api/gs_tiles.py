@@ -3,7 +3,7 @@
 import os
 from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from fastapi.responses import FileResponse, JSONResponse
@@ -20,6 +20,7 @@ from ..schemas import (
     GSTilesetUrlResponse,
 )
 from ..services.gs_tiles_runner import gs_tiles_runner
+from ..services.log_tail import tail_or_follow
 from ..conf.settings import get_settings
 
 
@@ -360,9 +361,13 @@ async def download_gs_tiles_file(
 async def get_gs_tiles_log_tail(
     block_id: str,
     lines: int = Query(200, ge=1, le=2000),
+    since_offset: Optional[int] = Query(None, ge=0),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get the last N lines of 3D GS Tiles conversion logs for a block."""
+    """Get the last N lines of 3D GS Tiles conversion logs for a block.
+
+    Pass the returned ``offset`` as ``since_offset`` to only get new lines.
+    """
     result = await db.execute(select(Block).where(Block.id == block_id))
     block = result.scalar_one_or_none()
     if not block:
@@ -371,8 +376,9 @@ async def get_gs_tiles_log_tail(
             detail=f"Block not found: {block_id}",
         )
 
-    log_lines = gs_tiles_runner.get_log_tail(block_id, lines) or []
-    return GSTilesLogResponse(block_id=block_id, lines=log_lines)
+    log_path = Path(block.gs_output_path) / "run_3dtiles.log" if block.gs_output_path else None
+    chunk = tail_or_follow(log_path, lines, since_offset, gs_tiles_runner.get_log_tail(block_id, lines))
+    return GSTilesLogResponse(block_id=block_id, lines=chunk.lines, offset=chunk.offset, reset=chunk.reset)
 
 
 @router.get(
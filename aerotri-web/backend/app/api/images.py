@@ -1,15 +1,15 @@
 """Image management API endpoints."""
 import os
-from pathlib import Path
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
 from fastapi.responses import FileResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models import Block, get_db
 from ..schemas import ImageInfo, ImageListResponse
-from ..services.image_service import ImageService
+from ..services.image_catalog import ImageCatalogService
+from ..services.thumbnail_service import PYRAMID_LEVELS, thumbnail_service
 from ..services.workspace_service import WorkspaceService
 
 router = APIRouter()
@@ -18,19 +18,6 @@ router = APIRouter()
 IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.tif', '.tiff', '.bmp'}
 
 
-def get_image_files(directory: str) -> list:
-    """Get list of image files in directory."""
-    path = Path(directory)
-    if not path.exists():
-        return []
-    
-    images = []
-    for f in sorted(path.iterdir()):
-        if f.is_file() and f.suffix.lower() in IMAGE_EXTENSIONS:
-            images.append(f)
-    return images
-
-
 def _get_block_image_dir(block: Block) -> str:
     # Prefer safe per-block working directory
     return block.working_image_path or block.image_path
@@ -54,25 +41,30 @@ async def list_images(
         )
     
     image_dir = _get_block_image_dir(block)
-    # Get all image files
-    all_images = get_image_files(image_dir)
-    total = len(all_images)
-    
-    # Paginate
-    start = (page - 1) * page_size
-    end = start + page_size
-    page_images = all_images[start:end]
+    # Indexed catalog query; the directory is only rescanned when it changed
+    await ImageCatalogService.refresh(db, block)
+    total = await ImageCatalogService.count(db, block_id)
+    rows = await ImageCatalogService.list_page(db, block_id, (page - 1) * page_size, page_size)
+    # Build missing thumbnail pyramids in the background
+    thumbnail_service.warm_block(block_id)
     
     # Build response
-    images = []
-    for img_path in page_images:
-        stat = img_path.stat()
-        images.append(ImageInfo(
-            name=img_path.name,
-            path=str(img_path),
-            size=stat.st_size,
-            thumbnail_url=f"/api/blocks/{block_id}/images/{img_path.name}/thumbnail"
-        ))
+    images = [
+        ImageInfo(
+            name=row.name,
+            path=os.path.join(image_dir, row.name),
+            size=row.size,
+            thumbnail_url=f"/api/blocks/{block_id}/images/{row.name}/thumbnail",
+            width=row.width,
+            height=row.height,
+            gps_lat=row.gps_lat,
+            gps_lon=row.gps_lon,
+            gps_alt=row.gps_alt,
+            captured_at=row.captured_at,
+            camera_model=row.camera_model,
+        )
+        for row in rows
+    ]
     
     return ImageListResponse(
         images=images,
@@ -111,8 +103,11 @@ async def get_image_thumbnail(
             detail=f"Image not found: {image_name}"
         )
     
-    # Generate or get cached thumbnail
-    thumbnail_path = await ImageService.get_thumbnail(str(image_path), size)
+    # Served from the pyramid level covering `size`
+    try:
+        thumbnail_path = await thumbnail_service.get_thumbnail(block_id, str(image_path), size)
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
     
     return FileResponse(
         thumbnail_path,
@@ -121,6 +116,44 @@ async def get_image_thumbnail(
     )
 
 
+@router.get("/{block_id}/images/sprite")
+async def get_image_sprite(
+    block_id: str,
+    request: Request,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=200),
+    cell: int = Query(PYRAMID_LEVELS[0], ge=32, le=PYRAMID_LEVELS[-1]),
+    columns: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the thumbnails of one image-list page as a single sprite sheet.
+
+    Tiles are `cell` x `cell` (center-cropped), in the same order as
+    `GET /{block_id}/images`, laid out row-major over `columns` columns.
+    The URL does not change with the page content, so clients revalidate
+    with the ETag (the page content hash) on every use.
+    """
+    result = await db.execute(select(Block).where(Block.id == block_id))
+    block = result.scalar_one_or_none()
+    
+    if not block:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Block not found: {block_id}"
+        )
+    
+    sprite_path = await thumbnail_service.get_sprite(
+        db, block, (page - 1) * page_size, page_size, cell, columns
+    )
+    if not sprite_path:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No images on this page")
+
+    headers = {"Cache-Control": "no-cache", "ETag": thumbnail_service.sprite_etag(sprite_path)}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return FileResponse(sprite_path, media_type="image/jpeg", headers=headers)
+
+
 @router.get("/{block_id}/images/{image_name}")
 async def get_image(
     block_id: str,
@@ -202,3 +235,6 @@ async def delete_image(
     
     # Delete the image file
     image_path.unlink()
+    thumbnail_service.remove_image(block_id, image_name)
+    await ImageCatalogService.remove(db, block_id, [image_name])
+    await db.commit()
@@ -1,6 +1,6 @@
 """Partition management API endpoints."""
+import asyncio
 import os
-import struct
 import tempfile
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy import select
@@ -14,6 +14,8 @@ from ..schemas import (
     PartitionPreviewResponse,
     PartitionInfo,
 )
+from ..services import colmap_io
+from ..services.image_catalog import ImageCatalogService
 from ..services.partition_service import PartitionService, PartitionDefinition
 
 router = APIRouter()
@@ -95,7 +97,7 @@ async def update_partition_config(
         partition_size = config.partition_params.get("partition_size", 1000)
         overlap = config.partition_params.get("overlap", 150)
         
-        image_names = PartitionService.get_image_list(block)
+        image_names = await PartitionService.list_image_names(db, block)
         if not image_names:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -174,14 +176,15 @@ async def preview_partitions(
             overlap=preview.overlap,
         )
         
-        image_names = PartitionService.get_image_list(block)
+        # preview_partitions has just refreshed the catalog
+        total_images = await ImageCatalogService.count(db, block_id)
         
         return PartitionPreviewResponse(
             partitions=[
                 PartitionInfo(**p)
                 for p in partitions
             ],
-            total_images=len(image_names),
+            total_images=total_images,
         )
     except ValueError as e:
         raise HTTPException(
@@ -553,57 +556,11 @@ async def download_partition_points3d_ply(
     # Generate temporary PLY
     ply_temp_path = None
     try:
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".ply", delete=False) as ply_file:
+        with tempfile.NamedTemporaryFile(suffix=".ply", delete=False) as ply_file:
             ply_temp_path = ply_file.name
-
-            if os.path.exists(points_bin):
-                # Read points from binary file and convert to PLY
-                points_data = []
-                with open(points_bin, "rb") as f:
-                    num_points = struct.unpack("<Q", f.read(8))[0]
-                    for _ in range(num_points):
-                        _point_id = struct.unpack("<Q", f.read(8))[0]
-                        x, y, z = struct.unpack("<3d", f.read(24))
-                        r, g, b = struct.unpack("<3B", f.read(3))
-                        _error = struct.unpack("<d", f.read(8))[0]
-                        track_length = struct.unpack("<Q", f.read(8))[0]
-                        f.read(track_length * 8)
-                        points_data.append((x, y, z, r, g, b))
-            else:
-                # Read points from text file
-                points_data = []
-                with open(points_txt, "r", encoding="utf-8", errors="replace") as f:
-                    for line in f:
-                        line = line.strip()
-                        if not line or line.startswith("#"):
-                            continue
-                        parts = line.split()
-                        if len(parts) < 7:
-                            continue
-                        try:
-                            x = float(parts[1])
-                            y = float(parts[2])
-                            z = float(parts[3])
-                            r = int(parts[4])
-                            g = int(parts[5])
-                            b = int(parts[6])
-                        except Exception:
-                            continue
-                        points_data.append((x, y, z, r, g, b))
-
-            # Write PLY header
-            ply_file.write("ply\n")
-            ply_file.write("format ascii 1.0\n")
-            ply_file.write(f"element vertex {len(points_data)}\n")
-            ply_file.write("property float x\n")
-            ply_file.write("property float y\n")
-            ply_file.write("property float z\n")
-            ply_file.write("property uchar red\n")
-            ply_file.write("property uchar green\n")
-            ply_file.write("property uchar blue\n")
-            ply_file.write("end_header\n")
-            for x, y, z, r, g, b in points_data:
-                ply_file.write(f"{x} {y} {z} {r} {g} {b}\n")
+        points_file = points_bin if os.path.exists(points_bin) else points_txt
+        points = await asyncio.to_thread(colmap_io.read_points3d, points_file)
+        await asyncio.to_thread(colmap_io.write_points_ply, points.xyz, points.rgb, ply_temp_path)
 
         return FileResponse(
             path=ply_temp_path,
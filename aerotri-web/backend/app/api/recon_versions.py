@@ -3,7 +3,7 @@
 import os
 from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.responses import FileResponse
@@ -19,6 +19,8 @@ from ..schemas import (
     ReconstructionFileInfo,
 )
 from ..services.openmvs_runner import openmvs_runner, QUALITY_PRESETS
+from ..services.log_tail import tail_or_follow
+from ..services.resource_profiler import resource_profiler
 from ..conf.settings import get_settings
 
 
@@ -424,9 +426,13 @@ async def get_recon_version_log_tail(
     block_id: str,
     version_id: str,
     lines: int = Query(200, ge=1, le=2000),
+    since_offset: Optional[int] = Query(None, ge=0),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get the last N lines of reconstruction logs for a version."""
+    """Get the last N lines of reconstruction logs for a version.
+
+    Pass the returned ``offset`` as ``since_offset`` to only get new lines.
+    """
     result = await db.execute(
         select(ReconVersion)
         .where(ReconVersion.id == version_id)
@@ -439,8 +445,41 @@ async def get_recon_version_log_tail(
             detail=f"Version not found: {version_id}",
         )
     
-    log_lines = openmvs_runner.get_version_log_tail(version_id, lines) or []
-    return {"version_id": version_id, "lines": log_lines}
+    log_path = Path(version.output_path) / "run_recon.log" if version.output_path else None
+    chunk = tail_or_follow(log_path, lines, since_offset, openmvs_runner.get_version_log_tail(version_id, lines))
+    return {"version_id": version_id, "lines": chunk.lines, "offset": chunk.offset, "reset": chunk.reset}
+
+
+@router.get(
+    "/blocks/{block_id}/recon-versions/{version_id}/resource-profile",
+)
+async def get_recon_version_resource_profile(
+    block_id: str,
+    version_id: str,
+    db: AsyncSession = Depends(get_db),
+):
+    """Per-stage resource profile of a version's reconstruction and tiles conversion."""
+    result = await db.execute(
+        select(ReconVersion)
+        .where(ReconVersion.id == version_id)
+        .where(ReconVersion.block_id == block_id)
+    )
+    version = result.scalar_one_or_none()
+    if not version:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Version not found: {version_id}",
+        )
+
+    pipelines = {}
+    for pipeline, stats in (
+        ("openmvs_version", version.statistics),
+        ("tiles_version", version.tiles_statistics),
+    ):
+        profile = resource_profiler.current(pipeline, version_id, stats)
+        if profile:
+            pipelines[pipeline] = profile
+    return {"version_id": version_id, "pipelines": pipelines}
 
 
 # ==================== Texture File Static Serving ====================
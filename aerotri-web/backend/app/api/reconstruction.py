@@ -3,7 +3,7 @@
 import os
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.responses import FileResponse
@@ -26,6 +26,7 @@ from ..services.openmvs_runner import (
     PARAMS_SCHEMA,
     STAGE_LABELS,
 )
+from ..services.log_tail import tail_or_follow
 from ..conf.settings import get_settings
 
 
@@ -401,6 +402,7 @@ async def download_reconstruction_file(
 async def get_reconstruction_log_tail(
     block_id: str,
     lines: int = Query(200, ge=1, le=2000),
+    since_offset: Optional[int] = Query(None, ge=0),
     db: AsyncSession = Depends(get_db),
 ):
     """Get the last N lines of reconstruction logs for a block.
@@ -409,6 +411,9 @@ async def get_reconstruction_log_tail(
     1. If a version is running, get logs from that version's buffer
     2. If no running version, get logs from the latest version's log file
     3. Fallback to legacy log path (<output>/recon/run_recon.log)
+
+    With ``since_offset`` (the ``offset`` of a previous response) only lines
+    appended to the selected log file since then are returned.
     """
     result = await db.execute(select(Block).where(Block.id == block_id))
     block = result.scalar_one_or_none()
@@ -420,7 +425,6 @@ async def get_reconstruction_log_tail(
 
     # Try to get logs from versions
     from ..models.recon_version import ReconVersion, ReconVersionStatus
-    from sqlalchemy import func
     
     # 1. Check for running version
     result = await db.execute(
@@ -434,7 +438,11 @@ async def get_reconstruction_log_tail(
         # Get logs from running version's in-memory buffer
         log_lines = openmvs_runner.get_version_log_tail(running_version.id, lines)
         if log_lines:
-            return ReconstructionLogResponse(block_id=block_id, lines=log_lines)
+            version_log_path = (
+                Path(running_version.output_path) / "run_recon.log" if running_version.output_path else None
+            )
+            chunk = tail_or_follow(version_log_path, lines, since_offset, log_lines)
+            return ReconstructionLogResponse(lines=chunk.lines, offset=chunk.offset, reset=chunk.reset)
     
     # 2. No running version - get latest version's log from disk
     result = await db.execute(
@@ -448,24 +456,16 @@ async def get_reconstruction_log_tail(
     if latest_version and latest_version.output_path:
         version_log_path = Path(latest_version.output_path) / "run_recon.log"
         if version_log_path.is_file():
-            log_lines = _read_log_tail(str(version_log_path), lines)
-            if log_lines:
-                return ReconstructionLogResponse(block_id=block_id, lines=log_lines)
+            chunk = tail_or_follow(version_log_path, lines, since_offset)
+            if chunk.lines or since_offset is not None:
+                return ReconstructionLogResponse(lines=chunk.lines, offset=chunk.offset, reset=chunk.reset)
     
     # 3. Fallback to legacy log path
-    log_lines = openmvs_runner.get_log_tail(block_id, lines) or []
-    return ReconstructionLogResponse(block_id=block_id, lines=log_lines)
-
-
-def _read_log_tail(log_path: str, lines: int) -> List[str]:
-    """Read the last N lines from a log file."""
-    from collections import deque
-    dq: deque[str] = deque(maxlen=lines)
-    try:
-        with open(log_path, "r", encoding="utf-8", errors="replace") as fp:
-            for line in fp:
-                dq.append(line.rstrip("\n"))
-    except Exception:
-        return []
-    return list(dq)
+    chunk = tail_or_follow(
+        openmvs_runner.get_log_path(block_id),
+        lines,
+        since_offset,
+        openmvs_runner.get_log_tail(block_id, lines),
+    )
+    return ReconstructionLogResponse(lines=chunk.lines, offset=chunk.offset, reset=chunk.reset)
 
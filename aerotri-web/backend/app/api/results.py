@@ -1,8 +1,8 @@
 """Reconstruction results API endpoints."""
+import asyncio
 import os
-import struct
 import tempfile
-from typing import List
+from typing import List, Optional
 from pathlib import Path
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from fastapi.responses import FileResponse
@@ -10,8 +10,10 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models import Block, BlockStatus, get_db
-from ..schemas import CameraInfo, Point3D, ReconstructionStats
+from ..schemas import CameraInfo, Point3D, QualityMetricResponse, ReconstructionStats
+from ..services import colmap_io
 from ..services.result_reader import ResultReader
+from ..services.quality_analytics import QUALITY_METRICS, load_quality_arrays, quality_keys, query_quality
 
 IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".tif", ".tiff", ".bmp", ".gif"}
 
@@ -277,6 +279,79 @@ async def get_stats(
     return ReconstructionStats(**merged)
 
 
+@router.get("/{block_id}/result/quality", response_model=QualityMetricResponse)
+async def get_quality(
+    block_id: str,
+    metric: str = Query("track_length", description=f"One of: {', '.join(QUALITY_METRICS)}"),
+    bins: int = Query(64, ge=1, le=1024),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(0, ge=0, le=10000, description="Return up to N per-point/per-image values sorted by value"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    grid: int = Query(32, ge=1, le=256, description="Heatmap resolution for residual_heatmap"),
+    image_id: Optional[int] = Query(None, description="Restrict image metrics / heatmap to one image"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get binned / paged quality metrics of the sparse model.
+
+    Metrics are computed once per model and cached next to it, so repeated
+    queries only bin or page the cached arrays.
+    """
+    if metric not in QUALITY_METRICS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown metric '{metric}', expected one of: {', '.join(QUALITY_METRICS)}"
+        )
+
+    result = await db.execute(select(Block).where(Block.id == block_id))
+    block = result.scalar_one_or_none()
+    
+    if not block:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Block not found: {block_id}"
+        )
+    
+    if not block.output_path and not block.output_colmap_path:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No output path available"
+        )
+    
+    # Prioritize block.output_colmap_path if set (e.g. for openMVG)
+    sparse_dir = None
+    if block.output_colmap_path and os.path.isdir(block.output_colmap_path):
+        sparse_dir = ResultReader._find_sparse_dir(block.output_colmap_path)
+    if not sparse_dir and block.output_path:
+        sparse_dir = ResultReader._find_sparse_dir(block.output_path)
+    if not sparse_dir:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No reconstruction found"
+        )
+    
+    try:
+        arrays = await asyncio.to_thread(load_quality_arrays, sparse_dir, keys=quality_keys(metric))
+        return query_quality(
+            arrays, metric, bins=bins, offset=offset, limit=limit,
+            order=order, grid=grid, image_id=image_id,
+        )
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No reconstruction found"
+        )
+    except KeyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e.args[0]) if e.args else "Image not found"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to compute quality metrics: {str(e)}"
+        )
+
+
 @router.get("/{block_id}/result/points3d/ply")
 async def download_points3d_ply(
     block_id: str,
@@ -348,39 +423,10 @@ async def download_points3d_ply(
     # Read all points from binary file and convert to PLY
     try:
         # Create temporary PLY file
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.ply', delete=False) as ply_file:
+        with tempfile.NamedTemporaryFile(suffix='.ply', delete=False) as ply_file:
             ply_temp_path = ply_file.name
-            
-            # Read points from binary file
-            points_data = []
-            with open(points_bin, "rb") as f:
-                num_points = struct.unpack("<Q", f.read(8))[0]
-                
-                for _ in range(num_points):
-                    point_id = struct.unpack("<Q", f.read(8))[0]
-                    x, y, z = struct.unpack("<3d", f.read(24))
-                    r, g, b = struct.unpack("<3B", f.read(3))
-                    error = struct.unpack("<d", f.read(8))[0]
-                    track_length = struct.unpack("<Q", f.read(8))[0]
-                    f.read(track_length * 8)  # Skip track data
-                    
-                    points_data.append((x, y, z, r, g, b))
-            
-            # Write PLY header
-            ply_file.write("ply\n")
-            ply_file.write("format ascii 1.0\n")
-            ply_file.write(f"element vertex {len(points_data)}\n")
-            ply_file.write("property float x\n")
-            ply_file.write("property float y\n")
-            ply_file.write("property float z\n")
-            ply_file.write("property uchar red\n")
-            ply_file.write("property uchar green\n")
-            ply_file.write("property uchar blue\n")
-            ply_file.write("end_header\n")
-            
-            # Write point data
-            for x, y, z, r, g, b in points_data:
-                ply_file.write(f"{x} {y} {z} {r} {g} {b}\n")
+        points = await asyncio.to_thread(colmap_io.read_points3d_bin, points_bin)
+        await asyncio.to_thread(colmap_io.write_points_ply, points.xyz, points.rgb, ply_temp_path)
         
         # Return the temporary file
         # Note: We'll keep the temp file and let the OS clean it up later
@@ -1,9 +1,10 @@
 """System monitoring API endpoints."""
 
+import asyncio
 from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -11,6 +12,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from ..models import Block, BlockStatus, get_db
 from ..schemas import GPUInfo
 from ..services.system_monitor import system_monitor
+from ..services.telemetry import downsample, telemetry_sampler
 
 router = APIRouter()
 
@@ -96,3 +98,43 @@ async def get_system_status(db: AsyncSession = Depends(get_db)):
         queued_tasks=queued_count,
         timestamp=datetime.utcnow(),
     )
+
+
+@router.get("/system/telemetry/current")
+async def get_telemetry_current():
+    """Latest telemetry sample, including per-task process attribution."""
+    sample = telemetry_sampler.latest()
+    if sample is None:
+        sample = await asyncio.get_running_loop().run_in_executor(None, telemetry_sampler.sample_once)
+    return {
+        "interval_seconds": telemetry_sampler.interval,
+        "sample": sample.to_dict(),
+    }
+
+
+@router.get("/system/telemetry/history")
+async def get_telemetry_history(
+    window_seconds: Optional[float] = Query(3600, gt=0, description="时间窗口（秒）"),
+    max_points: int = Query(360, ge=1, le=5000, description="最多返回的点数（超出时按桶平均）"),
+):
+    """Host/GPU time series from the in-memory ring buffer, for capacity planning."""
+    samples = telemetry_sampler.window(window_seconds)
+    return {
+        "interval_seconds": telemetry_sampler.interval,
+        "history_size": telemetry_sampler.history.maxlen,
+        "count": len(samples),
+        "points": downsample(samples, max_points),
+    }
+
+
+@router.get("/system/telemetry/tasks/{task_key}")
+async def get_task_telemetry(
+    task_key: str,
+    window_seconds: Optional[float] = Query(None, gt=0, description="时间窗口（秒）"),
+):
+    """CPU/RSS/GPU-memory time series of one running task's process tree (block or version id)."""
+    return {
+        "task_key": task_key,
+        "interval_seconds": telemetry_sampler.interval,
+        "points": telemetry_sampler.task_history(task_key, window_seconds),
+    }
@@ -21,6 +21,7 @@ from ..schemas import (
     TilesetUrlResponse,
 )
 from ..services.tiles_runner import tiles_runner
+from ..services.log_tail import tail_or_follow
 from ..conf.settings import get_settings
 
 
@@ -383,9 +384,13 @@ async def download_tiles_file(
 async def get_tiles_log_tail(
     block_id: str,
     lines: int = Query(200, ge=1, le=2000),
+    since_offset: Optional[int] = Query(None, ge=0),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get the last N lines of 3D Tiles conversion logs for a block."""
+    """Get the last N lines of 3D Tiles conversion logs for a block.
+
+    Pass the returned ``offset`` as ``since_offset`` to only get new lines.
+    """
     result = await db.execute(select(Block).where(Block.id == block_id))
     block = result.scalar_one_or_none()
     if not block:
@@ -394,8 +399,12 @@ async def get_tiles_log_tail(
             detail=f"Block not found: {block_id}",
         )
 
-    log_lines = tiles_runner.get_log_tail(block_id, lines) or []
-    return TilesLogResponse(block_id=block_id, lines=log_lines)
+    if block.recon_output_path:
+        log_path = Path(block.recon_output_path) / "tiles" / "run_tiles.log"
+    else:
+        log_path = tiles_runner.get_log_path(block_id)
+    chunk = tail_or_follow(log_path, lines, since_offset, tiles_runner.get_log_tail(block_id, lines))
+    return TilesLogResponse(block_id=block_id, lines=chunk.lines, offset=chunk.offset, reset=chunk.reset)
 
 
 @router.get(
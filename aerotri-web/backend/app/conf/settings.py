@@ -70,11 +70,47 @@ class PathsConfig(BaseModel):
 # ============================================================================
 
 class DatabaseConfig(BaseModel):
-    """数据库配置"""
+    """数据库配置
+
+    默认使用 SQLite 单文件。``url`` 设置后（如 ``postgresql+asyncpg://...``）
+    将忽略 ``path`` 与 SQLite PRAGMA 调优，适用于多节点部署。
+    """
     path: Path = Field(default=Path("./data/aerotri.db"), description="数据库路径")
+    url: Optional[str] = Field(default=None, description="完整数据库 URL（可选，优先于 path）")
     pool_size: int = Field(default=5, ge=1, le=100, description="连接池大小")
     max_overflow: int = Field(default=10, ge=0, le=100, description="最大溢出连接数")
 
+    # SQLite 性能模式（连接建立时执行 PRAGMA）
+    performance_mode: bool = Field(default=True, description="是否启用 SQLite 性能模式")
+    journal_mode: str = Field(default="WAL", description="SQLite journal_mode")
+    synchronous: str = Field(default="NORMAL", description="SQLite synchronous 级别")
+    busy_timeout_ms: int = Field(default=30000, ge=0, description="SQLite busy_timeout（毫秒）")
+    cache_size_kb: int = Field(default=65536, ge=0, description="SQLite 页缓存大小（KB）")
+    mmap_size_mb: int = Field(default=256, ge=0, description="SQLite mmap 大小（MB）")
+    writer_max_overflow: int = Field(
+        default=2, ge=0, le=100,
+        description="后台连接池额外溢出数（在按最大并发任务数计算的下限之上）"
+    )
+
+    @field_validator("journal_mode", "synchronous")
+    @classmethod
+    def validate_pragma_keyword(cls, v: str) -> str:
+        # PRAGMA 值会被拼接进 SQL，只允许纯字母关键字
+        if not v.isalpha():
+            raise ValueError(f"Invalid SQLite PRAGMA value: {v!r}")
+        return v.upper()
+
+    @property
+    def is_sqlite(self) -> bool:
+        """是否使用 SQLite 后端"""
+        return not self.url or self.url.startswith("sqlite")
+
+    def get_url(self) -> str:
+        """获取 SQLAlchemy 异步连接 URL"""
+        if self.url:
+            return self.url
+        return f"sqlite+aiosqlite:///{self.path}"
+
     def resolve_path(self, project_root: Path) -> None:
         """解析数据库路径（如果为相对路径）"""
         if not isinstance(self.path, Path):
@@ -263,11 +299,18 @@ class MonitoringSystemMonitor(BaseModel):
     interval_seconds: int = Field(default=60, ge=1, description="监控间隔（秒）")
 
 
+class MonitoringTelemetry(BaseModel):
+    """后台遥测采样配置"""
+    interval_seconds: float = Field(default=2.0, gt=0, description="采样间隔（秒）")
+    history_size: int = Field(default=1800, ge=1, description="内存中保留的采样点数")
+
+
 class MonitoringConfig(BaseModel):
     """监控配置"""
     gpu: MonitoringGPUMonitor = Field(default_factory=MonitoringGPUMonitor)
     queue: MonitoringQueueMonitor = Field(default_factory=MonitoringQueueMonitor)
     system: MonitoringSystemMonitor = Field(default_factory=MonitoringSystemMonitor)
+    telemetry: MonitoringTelemetry = Field(default_factory=MonitoringTelemetry)
 
 
 # ============================================================================
@@ -472,7 +515,7 @@ class AppSettings(BaseModel):
         """加载环境变量覆盖
 
         支持以下环境变量（优先级高于 YAML）:
-        - AEROTRI_DB_PATH
+        - AEROTRI_DB_PATH, AEROTRI_DB_URL, AEROTRI_DB_PERFORMANCE_MODE
         - COLMAP_PATH, GLOMAP_PATH, INSTANTSFM_PATH
         - OPENMVG_BIN_DIR, OPENMVG_SENSOR_DB
         - OPENMVS_BIN_DIR
@@ -492,6 +535,12 @@ class AppSettings(BaseModel):
         # 数据库路径
         if "AEROTRI_DB_PATH" in os.environ:
             overrides.setdefault("database", {})["path"] = os.getenv("AEROTRI_DB_PATH")
+        if "AEROTRI_DB_URL" in os.environ:
+            overrides.setdefault("database", {})["url"] = os.getenv("AEROTRI_DB_URL")
+        if "AEROTRI_DB_PERFORMANCE_MODE" in os.environ:
+            overrides.setdefault("database", {})["performance_mode"] = (
+                os.getenv("AEROTRI_DB_PERFORMANCE_MODE", "true").lower() == "true"
+            )
 
         # 算法路径
         if "COLMAP_PATH" in os.environ:
@@ -39,28 +39,29 @@ def validate_on_startup() -> List[str]:
         errors.append(error_msg)
         logger.error(error_msg)
 
-    # 2. 验证数据库路径可写
-    try:
-        db_path = settings.database.path
-        # 确保数据库目录存在
-        db_path.parent.mkdir(parents=True, exist_ok=True)
-        # 尝试创建/打开数据库文件以验证可写性
-        if db_path.exists():
-            # 文件已存在，检查是否可读
-            if not db_path.is_file():
-                errors.append(f"Database path exists but is not a file: {db_path}")
+    # 2. 验证数据库路径可写（配置外部数据库 URL 时跳过）
+    if settings.database.is_sqlite:
+        try:
+            db_path = settings.database.path
+            # 确保数据库目录存在
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            # 尝试创建/打开数据库文件以验证可写性
+            if db_path.exists():
+                # 文件已存在，检查是否可读
+                if not db_path.is_file():
+                    errors.append(f"Database path exists but is not a file: {db_path}")
+                else:
+                    logger.debug(f"Database file exists: {db_path}")
             else:
-                logger.debug(f"Database file exists: {db_path}")
-        else:
-            # 文件不存在，尝试创建空文件验证可写性
-            try:
-                db_path.touch()
-                db_path.unlink()  # 删除测试文件
-                logger.debug(f"Database path is writable: {db_path}")
-            except Exception as e:
-                errors.append(f"Database path is not writable: {db_path} - {e}")
-    except Exception as e:
-        errors.append(f"Database validation failed: {e}")
+                # 文件不存在，尝试创建空文件验证可写性
+                try:
+                    db_path.touch()
+                    db_path.unlink()  # 删除测试文件
+                    logger.debug(f"Database path is writable: {db_path}")
+                except Exception as e:
+                    errors.append(f"Database path is not writable: {db_path} - {e}")
+        except Exception as e:
+            errors.append(f"Database validation failed: {e}")
 
     # 3. 验证图像根路径
     try:
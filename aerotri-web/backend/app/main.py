@@ -10,13 +10,15 @@ from fastapi.staticfiles import StaticFiles
 
 from .api import api_router
 from .ws import progress_router, visualization_router
-from .models.database import init_db
+from .models.database import init_db, dispose_engines
 from .conf.validation import validate_on_startup
 from .services.task_runner import task_runner
 from .services.openmvs_runner import openmvs_runner
 from .services.gs_runner import gs_runner
 from .services.tiles_runner import tiles_runner
 from .services.queue_scheduler import queue_scheduler
+from .services.thumbnail_service import thumbnail_service
+from .services.telemetry import telemetry_sampler
 from .services.notification import notification_manager, periodic_scheduler
 from .conf.settings import get_settings
 
@@ -55,6 +57,9 @@ async def lifespan(app: FastAPI):
     
     # Start queue scheduler for automatic task dispatching
     await queue_scheduler.start()
+
+    # Background CPU/RAM/disk/GPU sampling (served from memory by /api/system/*)
+    await telemetry_sampler.start()
     
     # Send startup notification (safe to call, no-ops if disabled)
     try:
@@ -86,6 +91,11 @@ async def lifespan(app: FastAPI):
         logger.warning(f"Failed to send shutdown notification: {e}")
     
     await queue_scheduler.stop()
+    await telemetry_sampler.stop()
+    thumbnail_service.shutdown()
+
+    # Release pooled DB connections (checkpoints the SQLite WAL)
+    await dispose_engines()
 
 
 app = FastAPI(
@@ -1,7 +1,9 @@
 from .block import Block, BlockStatus, AlgorithmType, MatchingMethod, GlomapMode
-from .database import get_db, init_db, AsyncSessionLocal
+from .database import get_db, init_db, AsyncSessionLocal, ApiSessionLocal
 from .partition import BlockPartition
+from .image_catalog import BlockImage, ThumbnailState
 from .recon_version import ReconVersion, ReconVersionStatus
+from .benchmark import BenchmarkRun
 
 __all__ = [
     "Block",
@@ -12,7 +14,11 @@ __all__ = [
     "get_db",
     "init_db",
     "AsyncSessionLocal",
+    "ApiSessionLocal",
     "BlockPartition",
+    "BlockImage",
+    "ThumbnailState",
     "ReconVersion",
     "ReconVersionStatus",
+    "BenchmarkRun",
 ]
@@ -0,0 +1,73 @@
+"""Historical pipeline benchmarks.
+
+One row per completed pipeline run (SfM, OpenMVS, 3DGS) with its inputs,
+per-stage times/resources and output metrics, so runs can be compared across
+parameter sets and tool builds. Rows are not tied to the block's lifetime:
+deleting a block keeps its history.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, Float, Index, Integer, JSON, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .database import Base
+
+
+class BenchmarkRun(Base):
+    """A completed pipeline run."""
+
+    __tablename__ = "benchmark_runs"
+    # Comparisons/predictions look up runs of one pipeline + algorithm, newest first
+    __table_args__ = (Index("ix_benchmark_runs_pipeline_algorithm", "pipeline", "algorithm", "created_at"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+
+    # sfm / openmvs / gs
+    pipeline: Mapped[str] = mapped_column(String(32), nullable=False)
+    block_id: Mapped[str] = mapped_column(String(36), nullable=False, index=True)
+    version_id: Mapped[Optional[str]] = mapped_column(String(36), nullable=True)
+    block_name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+
+    # colmap / glomap / instantsfm / openmvg, or the pipeline name for OpenMVS / 3DGS
+    algorithm: Mapped[str] = mapped_column(String(64), nullable=False)
+    # Parameters that change the work done, and their hash
+    params: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    params_hash: Mapped[str] = mapped_column(String(32), nullable=False)
+    # Fingerprint of the tool build (executable size/mtime), see benchmark_store.tool_version
+    tool_version: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+
+    # Inputs
+    num_images: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    megapixels: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+    # Timing and resources
+    total_time: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    stage_times: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    # resource_profile summary: per-stage CPU / RSS / I/O / GPU peaks
+    resources: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+
+    # Output metrics (registered images, points, reprojection error, splats, ...)
+    outputs: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "pipeline": self.pipeline,
+            "block_id": self.block_id,
+            "version_id": self.version_id,
+            "block_name": self.block_name,
+            "algorithm": self.algorithm,
+            "params": self.params,
+            "params_hash": self.params_hash,
+            "tool_version": self.tool_version,
+            "num_images": self.num_images,
+            "megapixels": self.megapixels,
+            "total_time": self.total_time,
+            "stage_times": self.stage_times or {},
+            "resources": self.resources,
+            "outputs": self.outputs or {},
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
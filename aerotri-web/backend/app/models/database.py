@@ -1,27 +1,146 @@
-"""Database configuration and session management."""
+"""Database configuration and session management.
+
+Two engines share the same database:
+
+- ``engine`` serves API requests (``get_db``) through a regular connection pool.
+- ``writer_engine`` is used by background work (``AsyncSessionLocal``): runners,
+  schedulers, the thumbnail warmer and the benchmark recorder. It has its own pool
+  so long-lived runner sessions never take connections from API requests. The pool
+  is sized for every queue slot holding a nested session on top of its outer one
+  (see ``writer_pool_limits``).
+
+Background writes are not funneled through a single connection: runner sessions
+keep transactions open across nested sessions and long awaits, which a one-connection
+pool turns into pool timeouts. Concurrent background writers therefore still compete
+for the SQLite write lock; WAL keeps API reads off that lock and ``busy_timeout``
+makes writers wait instead of failing. ``scripts/bench_db_concurrency.py`` compares
+this pool with a single writer connection.
+
+For SQLite, every new connection is tuned with WAL journaling, ``synchronous=NORMAL``,
+a ``busy_timeout`` and larger page cache / mmap window (see ``DatabaseConfig``).
+Setting ``database.url`` (or ``AEROTRI_DB_URL``) to e.g. a PostgreSQL URL skips the
+SQLite-specific tuning; both engines then point at the external server.
+"""
 import os
+import logging
 from pathlib import Path
-from sqlalchemy import text
+from sqlalchemy import event, inspect, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 
-from ..conf.settings import get_settings
+from ..conf.settings import get_settings, DatabaseConfig
+
+logger = logging.getLogger(__name__)
 
 # Load database path from configuration system
 _settings = get_settings()
 DATABASE_PATH = str(_settings.database.path)
-DATABASE_URL = f"sqlite+aiosqlite:///{DATABASE_PATH}"
+DATABASE_URL = _settings.database.get_url()
+IS_SQLITE = _settings.database.is_sqlite
+
+
+def sqlite_pragmas(config: DatabaseConfig) -> list:
+    """Build the PRAGMA statements applied to each new SQLite connection."""
+    pragmas = [f"PRAGMA busy_timeout={int(config.busy_timeout_ms)}"]
+    if config.performance_mode:
+        pragmas.extend([
+            f"PRAGMA journal_mode={config.journal_mode}",
+            f"PRAGMA synchronous={config.synchronous}",
+            # Negative cache_size is interpreted by SQLite as KiB
+            f"PRAGMA cache_size=-{int(config.cache_size_kb)}",
+            f"PRAGMA mmap_size={int(config.mmap_size_mb) * 1024 * 1024}",
+            "PRAGMA temp_store=MEMORY",
+        ])
+    return pragmas
+
+
+def _install_sqlite_pragmas(async_engine, config: DatabaseConfig) -> None:
+    """Run tuning PRAGMAs whenever the pool opens a new DBAPI connection."""
+    pragmas = sqlite_pragmas(config)
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for stmt in pragmas:
+                cursor.execute(stmt)
+        finally:
+            cursor.close()
+
+
+# Upper bound of queue.max_concurrent (it can be raised at runtime up to this)
+MAX_CONCURRENT_TASKS = 10
+# Sessions one running task may hold at once (task_runner opens a nested
+# session while its outer one is still open)
+SESSIONS_PER_TASK = 2
+# Schedulers, thumbnail warmer, benchmark recorder, runners started outside the queue
+BACKGROUND_SESSIONS = 6
+
+
+def writer_pool_limits(config: DatabaseConfig, max_tasks: int = MAX_CONCURRENT_TASKS) -> tuple:
+    """(pool_size, max_overflow) of the background engine.
 
-# Create async engine
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=False,
-    future=True,
+    Never smaller than the API pool, and large enough that ``max_tasks`` runners
+    plus the background services can all hold their sessions at the same time.
+    """
+    required = SESSIONS_PER_TASK * max_tasks + BACKGROUND_SESSIONS
+    pool_size = config.pool_size
+    max_overflow = max(config.max_overflow, required - pool_size) + config.writer_max_overflow
+    return pool_size, max_overflow
+
+
+def _create_engines(config: DatabaseConfig, max_tasks: int = MAX_CONCURRENT_TASKS, pool_timeout: float = 30.0):
+    """Create (api_engine, writer_engine) for the configured backend."""
+    url = config.get_url()
+    writer_pool_size, writer_max_overflow = writer_pool_limits(config, max_tasks)
+    if not config.is_sqlite:
+        # External server (e.g. PostgreSQL): one pooled engine handles both roles,
+        # sized for API requests and background work together.
+        api = create_async_engine(
+            url,
+            echo=False,
+            future=True,
+            pool_size=config.pool_size,
+            max_overflow=config.max_overflow + writer_pool_size + writer_max_overflow,
+            pool_timeout=pool_timeout,
+            pool_pre_ping=True,
+        )
+        return api, api
+
+    api = create_async_engine(
+        url,
+        echo=False,
+        future=True,
+        pool_size=config.pool_size,
+        max_overflow=config.max_overflow,
+        pool_timeout=pool_timeout,
+    )
+    writer = create_async_engine(
+        url,
+        echo=False,
+        future=True,
+        pool_size=writer_pool_size,
+        max_overflow=writer_max_overflow,
+        pool_timeout=pool_timeout,
+    )
+    _install_sqlite_pragmas(api, config)
+    _install_sqlite_pragmas(writer, config)
+    return api, writer
+
+
+# Create async engines
+engine, writer_engine = _create_engines(_settings.database)
+
+# Session factory for API requests (reader pool)
+ApiSessionLocal = async_sessionmaker(
+    engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
 )
 
-# Create async session factory
+# Session factory for background runners/schedulers (separate pool)
 AsyncSessionLocal = async_sessionmaker(
-    engine,
+    writer_engine,
     class_=AsyncSession,
     expire_on_commit=False,
 )
@@ -34,18 +153,20 @@ class Base(DeclarativeBase):
 
 async def init_db():
     """Initialize database tables."""
-    # Ensure data directory exists
-    os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
+    if IS_SQLITE:
+        # Ensure data directory exists
+        os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
     
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
-        # Lightweight schema migration for SQLite (no Alembic).
+        # Lightweight schema migration (no Alembic).
         # Keep this minimal: only ADD COLUMN when missing.
         # NOTE: SQLite supports ADD COLUMN but not DROP/ALTER existing.
         try:
-            res = await conn.execute(text("PRAGMA table_info(blocks)"))
-            existing_cols = {row[1] for row in res.fetchall()}  # row[1] = name
+            existing_cols = await conn.run_sync(
+                lambda sync_conn: {c["name"] for c in inspect(sync_conn).get_columns("blocks")}
+            )
 
             # New columns added after initial scaffold.
             migrations = [
@@ -111,9 +232,25 @@ async def init_db():
             pass
 
 
+    if IS_SQLITE:
+        try:
+            async with engine.connect() as conn:
+                mode = (await conn.execute(text("PRAGMA journal_mode"))).scalar()
+            logger.info(f"SQLite journal_mode={mode}, performance_mode={_settings.database.performance_mode}")
+        except Exception as e:
+            logger.warning(f"Failed to query SQLite journal mode: {e}")
+
+
+async def dispose_engines():
+    """Close pooled connections (called on application shutdown)."""
+    await engine.dispose()
+    if writer_engine is not engine:
+        await writer_engine.dispose()
+
+
 async def get_db():
     """Dependency for getting database session."""
-    async with AsyncSessionLocal() as session:
+    async with ApiSessionLocal() as session:
         try:
             yield session
             await session.commit()
@@ -0,0 +1,78 @@
+"""Per-block image catalog.
+
+One row per image file of a block's image directory, so listing, paging,
+counting and partition range lookups are indexed queries instead of
+directory scans. Rows are refreshed incrementally by (size, mtime).
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import BigInteger, DateTime, Float, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .database import Base
+
+
+class ThumbnailState:
+    """Thumbnail generation state of a catalog entry."""
+    NONE = "none"
+    READY = "ready"
+    FAILED = "failed"
+
+
+class BlockImage(Base):
+    """Image file belonging to a block, with indexed metadata."""
+
+    __tablename__ = "block_images"
+    # (block_id, name) is unique and doubles as the index for ordered listing / range queries
+    __table_args__ = (UniqueConstraint("block_id", "name", name="uq_block_images_block_name"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+
+    block_id: Mapped[str] = mapped_column(
+        String(36),
+        ForeignKey("blocks.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    # File name inside the block image directory (catalog order = sorted by name)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+
+    # File state used for incremental refresh
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    mtime: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+    # Image header metadata
+    width: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    height: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+
+    # EXIF metadata
+    gps_lat: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    gps_lon: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    gps_alt: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    captured_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    camera_make: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    camera_model: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+
+    thumbnail_state: Mapped[str] = mapped_column(String(16), nullable=False, default=ThumbnailState.NONE)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+    )
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "size": self.size,
+            "width": self.width,
+            "height": self.height,
+            "gps_lat": self.gps_lat,
+            "gps_lon": self.gps_lon,
+            "gps_alt": self.gps_alt,
+            "captured_at": self.captured_at.isoformat() if self.captured_at else None,
+            "camera_make": self.camera_make,
+            "camera_model": self.camera_model,
+            "thumbnail_state": self.thumbnail_state,
+        }
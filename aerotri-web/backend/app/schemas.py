@@ -168,6 +168,9 @@ class DensifyParams(BaseModel):
     resolution_level: Optional[int] = Field(None, ge=0, le=4, description="分辨率级别 (0=原始)")
     number_views: Optional[int] = Field(None, ge=2, le=12, description="每点使用视图数")
     number_views_fuse: Optional[int] = Field(None, ge=2, le=8, description="融合时最小视图数")
+    sub_scene_memory_gb: Optional[int] = Field(None, ge=0, le=256, description="子场景内存预算 (GB, 0=整场景)")
+    max_parallel: Optional[int] = Field(None, ge=1, le=16, description="子场景并行数")
+    gpu_indices: Optional[List[int]] = Field(None, description="子场景轮流使用的 GPU 列表")
 
     class Config:
         extra = "allow"
@@ -251,6 +254,8 @@ class ReconstructionStatusResponse(BaseModel):
 class ReconstructionLogResponse(BaseModel):
     """Schema for reconstruction log response."""
     lines: List[str]
+    offset: Optional[int] = None  # pass back as since_offset to follow
+    reset: bool = False
 
 
 class ReconstructionPresetsResponse(BaseModel):
@@ -348,6 +353,8 @@ class GSStatusResponse(BaseModel):
 class GSLogResponse(BaseModel):
     """Schema for 3DGS log response."""
     lines: List[str]
+    offset: Optional[int] = None  # pass back as since_offset to follow
+    reset: bool = False
 
 
 class GSTrainParams(BaseModel):
@@ -437,6 +444,8 @@ class TilesLogResponse(BaseModel):
     """Schema for 3D Tiles log response."""
     block_id: str
     lines: List[str]
+    offset: Optional[int] = None  # pass back as since_offset to follow
+    reset: bool = False
 
 
 class TilesConvertRequest(BaseModel):
@@ -482,6 +491,8 @@ class GSTilesLogResponse(BaseModel):
     """Schema for 3D GS Tiles log response."""
     block_id: str
     lines: List[str]
+    offset: Optional[int] = None  # pass back as since_offset to follow
+    reset: bool = False
 
 
 class GSTilesConvertRequest(BaseModel):
@@ -592,6 +603,39 @@ class ReconstructionStats(BaseModel):
     algorithm_params: Optional[Dict[str, Any]] = None
 
 
+class QualityHistogram(BaseModel):
+    """Histogram of a quality metric (len(edges) == len(counts) + 1)."""
+    edges: List[float] = []
+    counts: List[int] = []
+
+
+class QualityItem(BaseModel):
+    """One per-point / per-image value of a quality metric."""
+    id: int
+    value: float
+    name: Optional[str] = None
+
+
+class QualityHeatmap(BaseModel):
+    """Mean residual over a grid in normalized image coordinates (row-major [y][x])."""
+    grid: int
+    num_observations: int
+    counts: List[List[int]]
+    mean_error: List[List[Optional[float]]]
+
+
+class QualityMetricResponse(BaseModel):
+    """Schema for /result/quality responses."""
+    metric: str
+    image_id: Optional[int] = None
+    stats: Optional[Dict[str, float]] = None
+    histogram: Optional[QualityHistogram] = None
+    total: int = 0
+    offset: int = 0
+    items: List[QualityItem] = []
+    heatmap: Optional[QualityHeatmap] = None
+
+
 # ===== Image Schemas =====
 
 class ImageInfo(BaseModel):
@@ -600,6 +644,14 @@ class ImageInfo(BaseModel):
     path: str
     size: int
     thumbnail_url: str
+    # Catalog metadata (None when the header / EXIF has no such field)
+    width: Optional[int] = None
+    height: Optional[int] = None
+    gps_lat: Optional[float] = None
+    gps_lon: Optional[float] = None
+    gps_alt: Optional[float] = None
+    captured_at: Optional[datetime] = None
+    camera_model: Optional[str] = None
 
 
 class ImageListResponse(BaseModel):
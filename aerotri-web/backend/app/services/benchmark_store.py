@@ -0,0 +1,498 @@
+"""Historical benchmark store for pipeline runs.
+
+Every completed SfM / OpenMVS / 3DGS run is recorded as a ``BenchmarkRun``:
+
+- inputs: image count and total megapixels (from the image catalog), the
+  parameters that change the work done and their hash, and a fingerprint of
+  the tool build (executable path/size/mtime, so a rebuilt COLMAP shows up as
+  a different ``tool_version``);
+- per-stage wall times (``stage_times``) and the ``resource_profile`` summary
+  the runners already store;
+- output metrics: registered images, 3D points, reprojection error (SfM),
+  dense points (OpenMVS), splat count (3DGS).
+
+Times are compared per megapixel (per image when the catalog has no image
+sizes), which assumes roughly linear scaling; baselines and prediction
+neighbours are therefore picked close in input size.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import statistics
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..conf.settings import get_settings
+from ..models.benchmark import BenchmarkRun
+from ..models.block import Block
+from ..models.database import AsyncSessionLocal
+from ..models.image_catalog import BlockImage
+from ..models.recon_version import ReconVersion
+from .image_catalog import ImageCatalogService
+from .result_reader import ResultReader
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_PIPELINES = ("sfm", "openmvs", "gs")
+# Relative slowdown (per megapixel) flagged as a regression
+REGRESSION_THRESHOLD = 0.2
+# Past runs a run is compared against
+BASELINE_RUNS = 5
+# Baseline runs may differ at most this factor in input size
+MAX_SIZE_RATIO = 2.0
+# Baseline stages shorter than this are too noisy to flag
+MIN_STAGE_SECONDS = 5.0
+PREDICTION_NEIGHBOURS = 5
+
+# Output metric -> (better direction, relative tolerance)
+OUTPUT_CHECKS: Dict[str, Tuple[str, float]] = {
+    "registered_ratio": ("higher", 0.02),
+    "points_per_image": ("higher", 0.2),
+    "mean_reprojection_error": ("lower", 0.2),
+}
+# resource_profile summary totals -> relative tolerance (lower is better)
+RESOURCE_CHECKS: Dict[str, float] = {
+    "peak_rss_mb": 0.2,
+    "gpu_memory_peak_mb": 0.2,
+}
+
+# Block columns that define the work of an SfM run
+_SFM_PARAM_FIELDS = (
+    "matching_method", "feature_params", "matching_params", "mapper_params",
+    "glomap_mode", "glomap_params", "openmvg_params",
+    "partition_enabled", "partition_params", "sfm_pipeline_mode", "merge_strategy",
+)
+
+_PLY_VERTEX = re.compile(rb"^element vertex (\d+)")
+
+
+def params_hash(params: Any) -> str:
+    data = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.md5(data.encode("utf-8")).hexdigest()[:16]
+
+
+def tool_version(path: Optional[str]) -> Optional[str]:
+    """``<name>@<hash of real path, size and mtime>`` of an executable, None if not found."""
+    if not path:
+        return None
+    resolved = shutil.which(str(path)) or str(path)
+    try:
+        real = os.path.realpath(resolved)
+        st = os.stat(real)
+    except OSError:
+        return None
+    digest = hashlib.md5(f"{real}:{st.st_size}:{int(st.st_mtime)}".encode("utf-8")).hexdigest()[:12]
+    return f"{os.path.basename(str(path))}@{digest}"
+
+
+def _tool_path(pipeline: str, algorithm: str) -> Optional[str]:
+    settings = get_settings()
+    algorithms = settings.algorithms
+    if pipeline == "sfm":
+        if algorithm == "openmvg_global":
+            return os.path.join(str(algorithms.openmvg.bin_dir or "/usr/local/bin"), "openMVG_main_SfM")
+        config = getattr(algorithms, algorithm, None)
+        return str(config.path) if config is not None and config.path else algorithm
+    if pipeline == "openmvs":
+        return os.path.join(str(algorithms.openmvs.bin_dir or ""), "DensifyPointCloud")
+    if pipeline == "gs":
+        return os.path.join(str(settings.gaussian_splatting.repo_path), "train.py")
+    return None
+
+
+def ply_vertex_count(path: str) -> Optional[int]:
+    """Vertex count from a PLY header (the body is not read)."""
+    try:
+        with open(path, "rb") as f:
+            for _ in range(64):
+                line = f.readline()
+                if not line or line.startswith(b"end_header"):
+                    break
+                match = _PLY_VERTEX.match(line.strip())
+                if match:
+                    return int(match.group(1))
+    except OSError:
+        pass
+    return None
+
+
+def _latest_gs_ply(gs_output_path: str) -> Tuple[Optional[str], Optional[int]]:
+    """(path, iteration) of the newest ``model/point_cloud/iteration_*/point_cloud.ply``."""
+    root = os.path.join(gs_output_path, "model", "point_cloud")
+    best: Tuple[Optional[str], Optional[int]] = (None, None)
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return best
+    for name in names:
+        _, _, suffix = name.partition("iteration_")
+        ply = os.path.join(root, name, "point_cloud.ply")
+        if suffix.isdigit() and os.path.exists(ply) and (best[1] is None or int(suffix) > best[1]):
+            best = (ply, int(suffix))
+    return best
+
+
+def run_params(pipeline: str, block: Block, version: Optional[ReconVersion] = None) -> Tuple[str, Dict[str, Any]]:
+    """(algorithm, params) of a run; identical for recording and for predicting a new run."""
+    if pipeline == "sfm":
+        params: Dict[str, Any] = {}
+        for name in _SFM_PARAM_FIELDS:
+            value = getattr(block, name, None)
+            params[name] = getattr(value, "value", value)
+        algorithm = getattr(block.algorithm, "value", block.algorithm)
+        return str(algorithm), params
+    if pipeline == "openmvs":
+        if version is not None:
+            return "openmvs", {"quality_preset": version.quality_preset, "custom_params": version.custom_params}
+        recorded = (block.recon_statistics or {}).get("params") or {}
+        return "openmvs", {
+            "quality_preset": recorded.get("quality_preset"),
+            "custom_params": recorded.get("custom_params"),
+        }
+    if pipeline == "gs":
+        return "3dgs", dict(block.gs_params or {})
+    raise ValueError(f"Unknown benchmark pipeline '{pipeline}', expected one of: {', '.join(BENCHMARK_PIPELINES)}")
+
+
+def collect_outputs(pipeline: str, block: Block, version: Optional[ReconVersion], num_images: int) -> Dict[str, Any]:
+    """Output metrics of a finished run (reads result files; call from a worker thread)."""
+    outputs: Dict[str, Any] = {}
+    if pipeline == "sfm" and block.output_path:
+        stats = ResultReader.get_stats(block.output_path)
+        for name in ("num_registered_images", "num_points3d", "num_observations",
+                     "mean_reprojection_error", "mean_track_length"):
+            if name in stats:
+                outputs[name] = stats[name]
+        registered = stats.get("num_registered_images") or 0
+        if num_images > 0:
+            outputs["registered_ratio"] = round(registered / num_images, 4)
+        if registered > 0:
+            outputs["points_per_image"] = round((stats.get("num_points3d") or 0) / registered, 2)
+    elif pipeline == "openmvs":
+        recon_dir = version.output_path if version is not None else block.recon_output_path
+        if recon_dir:
+            dense_points = ply_vertex_count(os.path.join(recon_dir, "dense", "scene_dense.ply"))
+            if dense_points is not None:
+                outputs["dense_points"] = dense_points
+    elif pipeline == "gs" and block.gs_output_path:
+        ply, iteration = _latest_gs_ply(block.gs_output_path)
+        if ply:
+            outputs["num_splats"] = ply_vertex_count(ply)
+            outputs["iterations"] = iteration
+    return outputs
+
+
+def _basis(run: Dict[str, Any], others: List[Dict[str, Any]]) -> str:
+    """Size measure times are normalized by: megapixels when every run has them."""
+    if run.get("megapixels", 0) > 0 and all(o.get("megapixels", 0) > 0 for o in others):
+        return "megapixels"
+    return "num_images"
+
+
+def _check(metric: str, value: float, baseline: List[float], better: str, tolerance: float) -> Dict[str, Any]:
+    reference = statistics.median(baseline)
+    change = value / reference - 1.0 if reference else 0.0
+    regression = change < -tolerance if better == "higher" else change > tolerance
+    return {
+        "metric": metric,
+        "value": round(value, 6),
+        "baseline": round(reference, 6),
+        "change": round(change, 4),
+        "regression": bool(regression),
+    }
+
+
+def compare_runs(
+    run: Dict[str, Any], baseline: List[Dict[str, Any]], threshold: float = REGRESSION_THRESHOLD
+) -> Dict[str, Any]:
+    """Compare ``run`` (a ``BenchmarkRun.to_dict()``) with baseline runs.
+
+    Times are compared per unit of input size against the baseline median;
+    a stage is flagged when it is ``threshold`` slower. Output metrics and
+    resource peaks use their own tolerances (``OUTPUT_CHECKS``/``RESOURCE_CHECKS``).
+    """
+    result: Dict[str, Any] = {
+        "run_id": run.get("id"),
+        "baseline_runs": [b.get("id") for b in baseline],
+        "basis": None,
+        "tool_changed": False,
+        "checks": [],
+        "regressions": [],
+        "status": "no_baseline",
+    }
+    basis = _basis(run, baseline)
+    baseline = [b for b in baseline if b.get(basis, 0) > 0]
+    if not baseline or run.get(basis, 0) <= 0:
+        return result
+
+    checks = []
+    size = run[basis]
+    if run.get("total_time"):
+        base = [b["total_time"] / b[basis] for b in baseline if b.get("total_time")]
+        if base:
+            checks.append(_check("time:total", run["total_time"] / size, base, "lower", threshold))
+    for stage, seconds in (run.get("stage_times") or {}).items():
+        pairs = [(b["stage_times"][stage], b[basis]) for b in baseline if (b.get("stage_times") or {}).get(stage)]
+        if not pairs or statistics.median(s for s, _ in pairs) < MIN_STAGE_SECONDS:
+            continue
+        checks.append(_check(f"time:{stage}", seconds / size, [s / n for s, n in pairs], "lower", threshold))
+
+    outputs = run.get("outputs") or {}
+    for metric, (better, tolerance) in OUTPUT_CHECKS.items():
+        base = [b["outputs"][metric] for b in baseline if (b.get("outputs") or {}).get(metric) is not None]
+        if outputs.get(metric) is not None and base:
+            checks.append(_check(metric, outputs[metric], base, better, tolerance))
+
+    totals = (run.get("resources") or {}).get("total") or {}
+    for metric, tolerance in RESOURCE_CHECKS.items():
+        base = [
+            ((b.get("resources") or {}).get("total") or {}).get(metric) for b in baseline
+        ]
+        base = [v for v in base if v]
+        if totals.get(metric) and base:
+            checks.append(_check(f"resource:{metric}", totals[metric], base, "lower", tolerance))
+
+    regressions = [c for c in checks if c["regression"]]
+    result.update({
+        "basis": basis,
+        "tool_changed": run.get("tool_version") not in {b.get("tool_version") for b in baseline},
+        "checks": checks,
+        "regressions": regressions,
+        "status": "regression" if regressions else "ok",
+    })
+    return result
+
+
+def predict_runtime(
+    target: Dict[str, Any], history: List[Dict[str, Any]], neighbours: int = PREDICTION_NEIGHBOURS
+) -> Dict[str, Any]:
+    """Predict total and per-stage seconds for ``target`` (num_images, megapixels, params_hash).
+
+    Runs with the same parameters are preferred; among them the ones closest
+    in input size (log ratio), newest first, give a median time per unit size.
+    """
+    basis = "megapixels" if target.get("megapixels", 0) > 0 else "num_images"
+    size = target.get(basis, 0)
+    prediction: Dict[str, Any] = {
+        "basis": basis,
+        "predicted_seconds": None,
+        "low_seconds": None,
+        "high_seconds": None,
+        "stage_seconds": {},
+        "based_on": 0,
+        "matched_params": False,
+        "runs": [],
+    }
+    candidates = [r for r in history if r.get(basis, 0) > 0 and r.get("total_time", 0) > 0]
+    if size <= 0 or not candidates:
+        return prediction
+
+    same = [r for r in candidates if r.get("params_hash") == target.get("params_hash")]
+    pool = same or candidates
+    pool = sorted(pool, key=lambda r: r.get("created_at") or "", reverse=True)
+    nearest = sorted(pool, key=lambda r: abs(math.log(r[basis] / size)))[:neighbours]
+
+    rates = [r["total_time"] / r[basis] for r in nearest]
+    stage_rates: Dict[str, List[float]] = {}
+    for r in nearest:
+        for stage, seconds in (r.get("stage_times") or {}).items():
+            if seconds:
+                stage_rates.setdefault(stage, []).append(seconds / r[basis])
+    prediction.update({
+        "predicted_seconds": round(statistics.median(rates) * size, 1),
+        "low_seconds": round(min(rates) * size, 1),
+        "high_seconds": round(max(rates) * size, 1),
+        "stage_seconds": {stage: round(statistics.median(v) * size, 1) for stage, v in stage_rates.items()},
+        "based_on": len(nearest),
+        "matched_params": bool(same),
+        "runs": [r.get("id") for r in nearest],
+    })
+    return prediction
+
+
+class BenchmarkStore:
+    """Records completed runs and answers comparison / prediction queries."""
+
+    def __init__(self):
+        self._tasks: set = set()
+
+    @staticmethod
+    async def image_inputs(db: AsyncSession, block: Block) -> Tuple[int, float]:
+        """(image count, total megapixels) of a block from its (refreshed) image catalog."""
+        await ImageCatalogService.refresh(db, block)
+        result = await db.execute(
+            select(func.count(), func.sum(BlockImage.width * BlockImage.height))
+            .where(BlockImage.block_id == block.id)
+        )
+        count, pixels = result.one()
+        return int(count or 0), round(float(pixels or 0) / 1e6, 2)
+
+    async def record(
+        self, db: AsyncSession, pipeline: str, block: Block, version: Optional[ReconVersion] = None
+    ) -> BenchmarkRun:
+        """Store the finished run of ``pipeline`` on ``block`` (``version`` for OpenMVS versions)."""
+        algorithm, params = run_params(pipeline, block, version)
+        if pipeline == "sfm":
+            stats = block.statistics
+        elif pipeline == "openmvs":
+            stats = version.statistics if version is not None else block.recon_statistics
+        else:
+            stats = block.gs_statistics
+        stats = stats or {}
+
+        num_images, megapixels = await self.image_inputs(db, block)
+        outputs = await asyncio.to_thread(collect_outputs, pipeline, block, version, num_images)
+        stage_times = {k: round(float(v), 2) for k, v in (stats.get("stage_times") or {}).items()}
+        run = BenchmarkRun(
+            pipeline=pipeline,
+            block_id=block.id,
+            version_id=version.id if version is not None else None,
+            block_name=block.name,
+            algorithm=algorithm,
+            params=params,
+            params_hash=params_hash(params),
+            tool_version=tool_version(_tool_path(pipeline, algorithm)),
+            num_images=num_images,
+            megapixels=megapixels,
+            total_time=round(float(stats.get("total_time") or sum(stage_times.values())), 2),
+            stage_times=stage_times,
+            resources=(stats.get("resource_profile") or {}).get("summary"),
+            outputs=outputs,
+        )
+        db.add(run)
+        await db.commit()
+        return run
+
+    async def record_completed(self, pipeline: str, block_id: str, version_id: Optional[str] = None) -> None:
+        """Record a run in its own session; failures are logged, never raised."""
+        try:
+            async with AsyncSessionLocal() as db:
+                block = (await db.execute(select(Block).where(Block.id == block_id))).scalar_one_or_none()
+                if not block:
+                    return
+                version = None
+                if version_id:
+                    version = (
+                        await db.execute(select(ReconVersion).where(ReconVersion.id == version_id))
+                    ).scalar_one_or_none()
+                    if not version:
+                        return
+                await self.record(db, pipeline, block, version)
+        except Exception as e:
+            logger.warning(f"Failed to record {pipeline} benchmark for {version_id or block_id}: {e}")
+
+    def schedule(self, pipeline: str, block_id: str, version_id: Optional[str] = None) -> None:
+        """Record a run in the background (the runner does not wait for result parsing)."""
+        task = asyncio.create_task(self.record_completed(pipeline, block_id, version_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    async def list_runs(
+        db: AsyncSession,
+        pipeline: Optional[str] = None,
+        block_id: Optional[str] = None,
+        algorithm: Optional[str] = None,
+        limit: int = 50,
+    ) -> List[BenchmarkRun]:
+        query = select(BenchmarkRun)
+        if pipeline:
+            query = query.where(BenchmarkRun.pipeline == pipeline)
+        if block_id:
+            query = query.where(BenchmarkRun.block_id == block_id)
+        if algorithm:
+            query = query.where(BenchmarkRun.algorithm == algorithm)
+        result = await db.execute(query.order_by(BenchmarkRun.id.desc()).limit(limit))
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def get(db: AsyncSession, run_id: int) -> Optional[BenchmarkRun]:
+        result = await db.execute(select(BenchmarkRun).where(BenchmarkRun.id == run_id))
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def baseline(db: AsyncSession, run: BenchmarkRun, limit: int = BASELINE_RUNS) -> List[BenchmarkRun]:
+        """Latest earlier runs with the same pipeline, algorithm and parameters, similar in size."""
+        result = await db.execute(
+            select(BenchmarkRun)
+            .where(BenchmarkRun.pipeline == run.pipeline)
+            .where(BenchmarkRun.algorithm == run.algorithm)
+            .where(BenchmarkRun.params_hash == run.params_hash)
+            .where(BenchmarkRun.id < run.id)
+            .order_by(BenchmarkRun.id.desc())
+            .limit(limit * 10)
+        )
+        similar = []
+        for other in result.scalars().all():
+            a, b = (run.megapixels, other.megapixels) if run.megapixels > 0 and other.megapixels > 0 \
+                else (run.num_images, other.num_images)
+            if a > 0 and b > 0 and max(a, b) / min(a, b) <= MAX_SIZE_RATIO:
+                similar.append(other)
+                if len(similar) >= limit:
+                    break
+        return similar
+
+    async def compare(
+        self,
+        db: AsyncSession,
+        run: BenchmarkRun,
+        baseline_id: Optional[int] = None,
+        threshold: float = REGRESSION_THRESHOLD,
+    ) -> Dict[str, Any]:
+        """Compare a run with an explicit baseline run, or with its automatic baseline.
+
+        Raises:
+            ValueError: ``baseline_id`` is a run of another pipeline or algorithm
+        """
+        if baseline_id is not None:
+            other = await self.get(db, baseline_id)
+            if other is not None and (other.pipeline, other.algorithm) != (run.pipeline, run.algorithm):
+                raise ValueError(
+                    f"Baseline run {baseline_id} is a {other.pipeline}/{other.algorithm} run, "
+                    f"not {run.pipeline}/{run.algorithm}"
+                )
+            baseline = [other] if other is not None else []
+        else:
+            baseline = await self.baseline(db, run)
+        return compare_runs(run.to_dict(), [b.to_dict() for b in baseline], threshold)
+
+    async def predict(
+        self,
+        db: AsyncSession,
+        pipeline: str,
+        block: Block,
+        version: Optional[ReconVersion] = None,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Predict the runtime of ``pipeline`` on ``block``.
+
+        Uses the block's (or version's) current parameters unless ``params`` is given.
+        """
+        algorithm, current = run_params(pipeline, block, version)
+        params = current if params is None else params
+        num_images, megapixels = await self.image_inputs(db, block)
+        history = await self.list_runs(db, pipeline=pipeline, algorithm=algorithm, limit=500)
+        target = {"num_images": num_images, "megapixels": megapixels, "params_hash": params_hash(params)}
+        prediction = predict_runtime(target, [r.to_dict() for r in history])
+        prediction.update({
+            "pipeline": pipeline,
+            "algorithm": algorithm,
+            "num_images": num_images,
+            "megapixels": megapixels,
+            "params_hash": target["params_hash"],
+        })
+        return prediction
+
+
+# Singleton instance
+benchmark_store = BenchmarkStore()
@@ -0,0 +1,893 @@
+"""Shared COLMAP sparse model I/O (cameras / images / points3D, bin + txt).
+
+Instead of one Python object per observation, models are loaded into a few
+NumPy arrays:
+
+- ``ImageColumns``: one row per image, plus all 2D observations concatenated
+  (``xy``, ``point3d_ids``) with ``obs_offsets`` marking each image's slice.
+- ``PointColumns``: one row per 3D point (``ids``, ``xyz``, ``rgb``, ``error``,
+  ``track_lengths``), plus the concatenated tracks when requested.
+
+Binary files are memory-mapped. Records are variable-length, so each file is
+walked once to find record offsets (a light loop reading a single length
+field per record); every header field is then gathered for all records at
+once with NumPy (``_gather``), and per-image observation blocks, which are
+contiguous, are copied as whole slices. Writers do the reverse with
+``_scatter`` into one preallocated buffer.
+
+Column groups can be loaded separately (``LazySparseModel``): poses/names
+without observations, points without tracks, tracks on demand.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+# COLMAP camera model id -> (name, number of params)
+# Reference: colmap/src/colmap/sensor/models.h
+CAMERA_MODELS: Dict[int, tuple] = {
+    0: ("SIMPLE_PINHOLE", 3),
+    1: ("PINHOLE", 4),
+    2: ("SIMPLE_RADIAL", 4),
+    3: ("RADIAL", 5),
+    4: ("OPENCV", 8),
+    5: ("OPENCV_FISHEYE", 8),
+    6: ("FULL_OPENCV", 12),
+    7: ("FOV", 5),
+    8: ("SIMPLE_RADIAL_FISHEYE", 4),
+    9: ("RADIAL_FISHEYE", 5),
+    10: ("THIN_PRISM_FISHEYE", 12),
+    11: ("RAD_TAN_THIN_PRISM_FISHEYE", 16),
+}
+CAMERA_MODEL_IDS: Dict[str, int] = {name: mid for mid, (name, _) in CAMERA_MODELS.items()}
+
+# Observation record in images.bin: x (f8), y (f8), point3D_id (i8, -1 = none)
+OBS_DTYPE = np.dtype([("x", "<f8"), ("y", "<f8"), ("point3d_id", "<i8")])
+# point3D_id of keypoints without a 3D point (UINT64_MAX on disk)
+INVALID_POINT3D_ID = -1
+MAX_UINT32 = 2**32 - 1
+
+_IMAGE_HEAD = struct.Struct("<I4d3dI")
+_CAMERA_HEAD = struct.Struct("<IiQQ")
+_POINT_HEAD = struct.Struct("<Q3d3BdQ")
+_U64 = struct.Struct("<Q")
+
+# Byte offsets inside an images.bin record header
+_IMAGE_QVEC_OFFSET = 4
+_IMAGE_TVEC_OFFSET = 36
+_IMAGE_CAMERA_OFFSET = 60
+# Byte offsets inside a points3D.bin record header
+_POINT_XYZ_OFFSET = 8
+_POINT_RGB_OFFSET = 32
+_POINT_ERROR_OFFSET = 35
+_POINT_TRACK_LEN_OFFSET = 43
+
+Buffer = Union[bytes, bytearray, mmap.mmap]
+
+
+@dataclass
+class Camera:
+    camera_id: int
+    model: str
+    width: int
+    height: int
+    params: np.ndarray
+
+    @property
+    def model_id(self) -> int:
+        return CAMERA_MODEL_IDS.get(self.model.upper(), -1)
+
+
+@dataclass
+class ImageColumns:
+    """All registered images of a model in columnar form.
+
+    When loaded without observations, ``xy`` / ``point3d_ids`` are empty but
+    ``obs_offsets`` still holds every image's keypoint count.
+    """
+    image_ids: np.ndarray  # (N,) int64
+    qvecs: np.ndarray  # (N, 4) float64, (qw, qx, qy, qz), world->camera
+    tvecs: np.ndarray  # (N, 3) float64
+    camera_ids: np.ndarray  # (N,) int64
+    names: List[str]
+    obs_offsets: np.ndarray  # (N+1,) int64, image i owns obs[offsets[i]:offsets[i+1]]
+    xy: np.ndarray  # (M, 2) float64
+    point3d_ids: np.ndarray  # (M,) int64, -1 when the keypoint has no 3D point
+
+    def __len__(self) -> int:
+        return len(self.image_ids)
+
+    @property
+    def num_points2d(self) -> np.ndarray:
+        return np.diff(self.obs_offsets)
+
+    @property
+    def has_observations(self) -> bool:
+        return len(self.point3d_ids) == int(self.obs_offsets[-1])
+
+    def obs_image_index(self) -> np.ndarray:
+        """Row index into the image arrays for every observation."""
+        return np.repeat(np.arange(len(self.image_ids)), self.num_points2d)
+
+    def num_points3d(self) -> np.ndarray:
+        """Observations with a 3D point, per image."""
+        valid = self.point3d_ids != INVALID_POINT3D_ID
+        return np.bincount(self.obs_image_index()[valid], minlength=len(self.image_ids))
+
+
+@dataclass
+class PointColumns:
+    """All 3D points of a model in columnar form.
+
+    Tracks (``track_offsets`` / ``track_image_ids`` / ``track_point2d_idx``)
+    are only filled when loaded with ``tracks=True``.
+    """
+    ids: np.ndarray  # (P,) int64
+    xyz: np.ndarray  # (P, 3) float64
+    rgb: np.ndarray  # (P, 3) uint8
+    error: np.ndarray  # (P,) float64
+    track_lengths: np.ndarray  # (P,) int64
+    track_offsets: Optional[np.ndarray] = None  # (P+1,) int64
+    track_image_ids: Optional[np.ndarray] = None  # (T,) int64
+    track_point2d_idx: Optional[np.ndarray] = None  # (T,) int64
+    _order: Optional[np.ndarray] = field(default=None, repr=False)
+    _sorted_ids: Optional[np.ndarray] = field(default=None, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def has_tracks(self) -> bool:
+        return self.track_offsets is not None
+
+    def lookup(self, point3d_ids: np.ndarray) -> np.ndarray:
+        """Row index for each point id, -1 when the id is unknown."""
+        out = np.full(len(point3d_ids), -1, dtype=np.int64)
+        if len(self.ids) == 0:
+            return out
+        if self._order is None:
+            self._order = np.argsort(self.ids, kind="stable")
+            self._sorted_ids = self.ids[self._order]
+        pos = np.minimum(np.searchsorted(self._sorted_ids, point3d_ids), len(self._sorted_ids) - 1)
+        found = self._sorted_ids[pos] == point3d_ids
+        out[found] = self._order[pos[found]]
+        return out
+
+
+def qvecs_to_rotmats(qvecs: np.ndarray) -> np.ndarray:
+    """(N, 4) quaternions (qw, qx, qy, qz) -> (N, 3, 3) world->camera rotations."""
+    q = np.asarray(qvecs, dtype=np.float64)
+    norm = np.linalg.norm(q, axis=1, keepdims=True)
+    q = q / np.where(norm > 0, norm, 1.0)
+    w, x, y, z = q[:, 0], q[:, 1], q[:, 2], q[:, 3]
+    R = np.empty((len(q), 3, 3), dtype=np.float64)
+    R[:, 0, 0] = 1 - 2 * (y * y + z * z)
+    R[:, 0, 1] = 2 * (x * y - z * w)
+    R[:, 0, 2] = 2 * (x * z + y * w)
+    R[:, 1, 0] = 2 * (x * y + z * w)
+    R[:, 1, 1] = 1 - 2 * (x * x + z * z)
+    R[:, 1, 2] = 2 * (y * z - x * w)
+    R[:, 2, 0] = 2 * (x * z - y * w)
+    R[:, 2, 1] = 2 * (y * z + x * w)
+    R[:, 2, 2] = 1 - 2 * (x * x + y * y)
+    return R
+
+
+# ---------------------------------------------------------------------------
+# Buffers
+# ---------------------------------------------------------------------------
+
+def _open_buffer(path: str) -> Buffer:
+    """Read-only memory map of a file (plain bytes for empty files)."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _read_bytes(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _gather(buf: Buffer, dtype, positions: np.ndarray) -> np.ndarray:
+    """Read one ``dtype`` value at every byte position of ``buf``.
+
+    Records are not aligned, so the buffer is viewed once per alignment class
+    (position % itemsize) and each view is indexed with NumPy.
+    """
+    dt = np.dtype(dtype)
+    size = dt.itemsize
+    out = np.empty(len(positions), dtype=dt)
+    if len(positions) == 0:
+        return out
+    if size == 1:
+        out[:] = np.frombuffer(buf, dtype=dt)[positions]
+        return out
+    rem = positions % size
+    for k in np.unique(rem).tolist():
+        sel = rem == k
+        view = np.frombuffer(buf, dtype=dt, offset=k, count=(len(buf) - k) // size)
+        out[sel] = view[(positions[sel] - k) // size]
+    return out
+
+
+def _scatter(buf: bytearray, dtype, positions: np.ndarray, values) -> None:
+    """Write one ``dtype`` value at every byte position of a writable buffer."""
+    dt = np.dtype(dtype)
+    size = dt.itemsize
+    if len(positions) == 0:
+        return
+    values = np.broadcast_to(np.asarray(values).astype(dt, copy=False), positions.shape)
+    if size == 1:
+        np.frombuffer(buf, dtype=dt)[positions] = values
+        return
+    rem = positions % size
+    for k in np.unique(rem).tolist():
+        sel = rem == k
+        view = np.frombuffer(buf, dtype=dt, offset=k, count=(len(buf) - k) // size)
+        view[(positions[sel] - k) // size] = values[sel]
+
+
+def _gather_rows(buf: Buffer, dtype, offsets: np.ndarray, start: int, n: int) -> np.ndarray:
+    """(N, n) values at ``offset + start + i * itemsize`` of every record."""
+    size = np.dtype(dtype).itemsize
+    out = np.empty((len(offsets), n), dtype=dtype)
+    for i in range(n):
+        out[:, i] = _gather(buf, dtype, offsets + start + i * size)
+    return out
+
+
+def _scatter_rows(buf: bytearray, dtype, offsets: np.ndarray, start: int, values: np.ndarray) -> None:
+    size = np.dtype(dtype).itemsize
+    values = np.asarray(values).reshape(len(offsets), -1)
+    for i in range(values.shape[1]):
+        _scatter(buf, dtype, offsets + start + i * size, values[:, i])
+
+
+def _expand_ranges(starts: np.ndarray, counts: np.ndarray, stride: int) -> np.ndarray:
+    """Byte positions ``starts[r] + stride * j`` for ``j < counts[r]`` of every record r."""
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    first = np.zeros(len(counts), dtype=np.int64)
+    np.cumsum(counts[:-1], out=first[1:])
+    local = np.arange(total, dtype=np.int64) - np.repeat(first, counts)
+    return np.repeat(starts, counts) + stride * local
+
+
+def _record_offsets(sizes: np.ndarray) -> np.ndarray:
+    """Start offsets of consecutive records of ``sizes`` bytes after the 8-byte count."""
+    offsets = np.full(len(sizes), 8, dtype=np.int64)
+    if len(sizes) > 1:
+        offsets[1:] += np.cumsum(sizes[:-1])
+    return offsets
+
+
+def read_num_records(path: str) -> int:
+    """Record count stored in the 8-byte header of any COLMAP ``*.bin`` file."""
+    with open(path, "rb") as f:
+        head = f.read(8)
+    return _U64.unpack(head)[0] if len(head) == 8 else 0
+
+
+# ---------------------------------------------------------------------------
+# Binary read
+# ---------------------------------------------------------------------------
+
+def read_cameras_bin(path: str) -> Dict[int, Camera]:
+    buf = _read_bytes(path)
+    (num,) = _U64.unpack_from(buf, 0)
+    pos = 8
+    cams: Dict[int, Camera] = {}
+    for _ in range(num):
+        camera_id, model_id, width, height = _CAMERA_HEAD.unpack_from(buf, pos)
+        pos += _CAMERA_HEAD.size
+        if model_id not in CAMERA_MODELS:
+            raise ValueError(f"Unknown COLMAP camera model id {model_id} in {path}")
+        name, n_params = CAMERA_MODELS[model_id]
+        params = np.frombuffer(buf, dtype="<f8", count=n_params, offset=pos).copy()
+        pos += 8 * n_params
+        cams[camera_id] = Camera(camera_id, name, int(width), int(height), params)
+    return cams
+
+
+def _walk_images(buf: Buffer):
+    """Record offsets, name end offsets and keypoint counts of an ``images.bin`` buffer."""
+    (num,) = _U64.unpack_from(buf, 0)
+    offsets = np.empty(num, dtype=np.int64)
+    name_ends = np.empty(num, dtype=np.int64)
+    counts = np.empty(num, dtype=np.int64)
+    find = buf.find
+    unpack = _U64.unpack_from
+    obs_size = OBS_DTYPE.itemsize
+    pos = 8
+    for i in range(num):
+        offsets[i] = pos
+        end = find(b"\x00", pos + _IMAGE_HEAD.size)
+        if end < 0:
+            raise ValueError("Truncated images.bin: unterminated image name")
+        (n_obs,) = unpack(buf, end + 1)
+        name_ends[i] = end
+        counts[i] = n_obs
+        pos = end + 9 + obs_size * n_obs
+    return offsets, name_ends, counts
+
+
+def image_record_offsets(buf: Buffer) -> np.ndarray:
+    """Start offset of every image record in an ``images.bin`` buffer."""
+    return _walk_images(buf)[0]
+
+
+def read_images_bin(path: str, observations: bool = True) -> ImageColumns:
+    """Read ``images.bin``; ``observations=False`` loads poses and names only."""
+    buf = _open_buffer(path)
+    if len(buf) == 0:
+        return _empty_images()
+    offsets, name_ends, counts = _walk_images(buf)
+    names = [
+        bytes(buf[s:e]).decode("utf-8", errors="replace")
+        for s, e in zip((offsets + _IMAGE_HEAD.size).tolist(), name_ends.tolist())
+    ]
+    obs_offsets = np.zeros(len(offsets) + 1, dtype=np.int64)
+    np.cumsum(counts, out=obs_offsets[1:])
+    if observations:
+        # Each image's keypoints are one contiguous block: join them and parse once
+        starts = (name_ends + 9).tolist()
+        ends = (name_ends + 9 + OBS_DTYPE.itemsize * counts).tolist()
+        obs = np.frombuffer(b"".join([buf[s:e] for s, e in zip(starts, ends)]), dtype=OBS_DTYPE)
+        xy = np.empty((len(obs), 2), dtype=np.float64)
+        xy[:, 0] = obs["x"]
+        xy[:, 1] = obs["y"]
+        point3d_ids = obs["point3d_id"].astype(np.int64)
+    else:
+        xy = np.empty((0, 2), dtype=np.float64)
+        point3d_ids = np.empty(0, dtype=np.int64)
+
+    return ImageColumns(
+        image_ids=_gather(buf, "<u4", offsets).astype(np.int64),
+        qvecs=_gather_rows(buf, "<f8", offsets, _IMAGE_QVEC_OFFSET, 4),
+        tvecs=_gather_rows(buf, "<f8", offsets, _IMAGE_TVEC_OFFSET, 3),
+        camera_ids=_gather(buf, "<u4", offsets + _IMAGE_CAMERA_OFFSET).astype(np.int64),
+        names=names,
+        obs_offsets=obs_offsets,
+        xy=xy,
+        point3d_ids=point3d_ids,
+    )
+
+
+def point_record_offsets(buf: Buffer) -> np.ndarray:
+    """Start offset of every point record in a ``points3D.bin`` buffer."""
+    (num,) = _U64.unpack_from(buf, 0)
+    offsets = np.empty(num, dtype=np.int64)
+    unpack = _U64.unpack_from
+    head_size = _POINT_HEAD.size
+    pos = 8
+    for i in range(num):
+        offsets[i] = pos
+        pos += head_size + 8 * unpack(buf, pos + _POINT_TRACK_LEN_OFFSET)[0]
+    return offsets
+
+
+def read_points3d_bin(path: str, tracks: bool = False) -> PointColumns:
+    """Read ``points3D.bin``; tracks are only expanded when ``tracks=True``."""
+    buf = _open_buffer(path)
+    if len(buf) == 0:
+        return _empty_points(tracks)
+    offsets = point_record_offsets(buf)
+    track_lengths = _gather(buf, "<u8", offsets + _POINT_TRACK_LEN_OFFSET).astype(np.int64)
+    points = PointColumns(
+        ids=_gather(buf, "<u8", offsets).astype(np.int64),
+        xyz=_gather_rows(buf, "<f8", offsets, _POINT_XYZ_OFFSET, 3),
+        rgb=_gather_rows(buf, "u1", offsets, _POINT_RGB_OFFSET, 3),
+        error=_gather(buf, "<f8", offsets + _POINT_ERROR_OFFSET),
+        track_lengths=track_lengths,
+    )
+    if tracks:
+        # Track entries: image_id (u4) + point2D_idx (u4)
+        pos = _expand_ranges(offsets + _POINT_HEAD.size, track_lengths, 8)
+        points.track_offsets = np.zeros(len(offsets) + 1, dtype=np.int64)
+        np.cumsum(track_lengths, out=points.track_offsets[1:])
+        points.track_image_ids = _gather(buf, "<u4", pos).astype(np.int64)
+        points.track_point2d_idx = _gather(buf, "<u4", pos + 4).astype(np.int64)
+    return points
+
+
+def _empty_images() -> ImageColumns:
+    return ImageColumns(
+        image_ids=np.empty(0, dtype=np.int64),
+        qvecs=np.empty((0, 4)),
+        tvecs=np.empty((0, 3)),
+        camera_ids=np.empty(0, dtype=np.int64),
+        names=[],
+        obs_offsets=np.zeros(1, dtype=np.int64),
+        xy=np.empty((0, 2)),
+        point3d_ids=np.empty(0, dtype=np.int64),
+    )
+
+
+def _empty_points(tracks: bool = False) -> PointColumns:
+    empty = np.empty(0, dtype=np.int64)
+    return PointColumns(
+        ids=empty,
+        xyz=np.empty((0, 3)),
+        rgb=np.empty((0, 3), dtype=np.uint8),
+        error=np.empty(0),
+        track_lengths=empty,
+        track_offsets=np.zeros(1, dtype=np.int64) if tracks else None,
+        track_image_ids=empty if tracks else None,
+        track_point2d_idx=empty if tracks else None,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Binary write
+# ---------------------------------------------------------------------------
+
+def _check_uint32(name: str, values: np.ndarray) -> None:
+    if len(values) and (values.min() < 0 or values.max() > MAX_UINT32):
+        raise ValueError(f"Cannot write {name}: exceeds 32-bit unsigned integer range")
+
+
+def _write_atomic(path: str, data: Buffer) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def write_cameras_bin(cameras: Dict[int, Camera], path: str) -> None:
+    """Write ``cameras.bin`` (params follow the header directly, no count field)."""
+    _check_uint32("camera_id", np.array(sorted(cameras), dtype=np.int64))
+    parts = [_U64.pack(len(cameras))]
+    for cam_id in sorted(cameras):
+        cam = cameras[cam_id]
+        if cam.model_id < 0:
+            raise ValueError(f"Unknown COLMAP camera model {cam.model}")
+        parts.append(_CAMERA_HEAD.pack(cam_id, cam.model_id, int(cam.width), int(cam.height)))
+        parts.append(np.asarray(cam.params, dtype="<f8").tobytes())
+    _write_atomic(path, b"".join(parts))
+
+
+def write_images_bin(images: ImageColumns, path: str) -> None:
+    """Write ``images.bin`` (requires observations)."""
+    if not images.has_observations:
+        raise ValueError("write_images_bin requires images loaded with observations")
+    _check_uint32("image_id", images.image_ids)
+    _check_uint32("camera_id", images.camera_ids)
+    name_bytes = [n.encode("utf-8") + b"\x00" for n in images.names]
+    name_lens = np.array([len(n) for n in name_bytes], dtype=np.int64)
+    counts = images.num_points2d
+    sizes = _IMAGE_HEAD.size + name_lens + 8 + OBS_DTYPE.itemsize * counts
+    offsets = _record_offsets(sizes)
+    buf = bytearray(8 + int(sizes.sum()))
+    _U64.pack_into(buf, 0, len(images))
+
+    _scatter(buf, "<u4", offsets, images.image_ids)
+    _scatter_rows(buf, "<f8", offsets, _IMAGE_QVEC_OFFSET, images.qvecs)
+    _scatter_rows(buf, "<f8", offsets, _IMAGE_TVEC_OFFSET, images.tvecs)
+    _scatter(buf, "<u4", offsets + _IMAGE_CAMERA_OFFSET, images.camera_ids)
+    for start, name in zip((offsets + _IMAGE_HEAD.size).tolist(), name_bytes):
+        buf[start:start + len(name)] = name
+    counts_pos = offsets + _IMAGE_HEAD.size + name_lens
+    _scatter(buf, "<u8", counts_pos, counts.astype(np.uint64))
+
+    obs = np.empty(len(images.point3d_ids), dtype=OBS_DTYPE)
+    obs["x"] = images.xy[:, 0]
+    obs["y"] = images.xy[:, 1]
+    obs["point3d_id"] = images.point3d_ids
+    raw = obs.tobytes()
+    obs_size = OBS_DTYPE.itemsize
+    for start, lo, hi in zip((counts_pos + 8).tolist(), images.obs_offsets[:-1].tolist(), images.obs_offsets[1:].tolist()):
+        buf[start:start + obs_size * (hi - lo)] = raw[obs_size * lo:obs_size * hi]
+    _write_atomic(path, buf)
+
+
+def write_points3d_bin(points: PointColumns, path: str) -> None:
+    """Write ``points3D.bin`` (requires tracks)."""
+    if not points.has_tracks:
+        raise ValueError("write_points3d_bin requires points loaded with tracks")
+    _check_uint32("track image_id", points.track_image_ids)
+    _check_uint32("track point2d_idx", points.track_point2d_idx)
+    track_lengths = np.diff(points.track_offsets)
+    sizes = _POINT_HEAD.size + 8 * track_lengths
+    offsets = _record_offsets(sizes)
+    buf = bytearray(8 + int(sizes.sum()))
+    _U64.pack_into(buf, 0, len(points))
+
+    _scatter(buf, "<u8", offsets, points.ids.astype(np.uint64))
+    _scatter_rows(buf, "<f8", offsets, _POINT_XYZ_OFFSET, points.xyz)
+    _scatter_rows(buf, "u1", offsets, _POINT_RGB_OFFSET, points.rgb)
+    _scatter(buf, "<f8", offsets + _POINT_ERROR_OFFSET, points.error)
+    _scatter(buf, "<u8", offsets + _POINT_TRACK_LEN_OFFSET, track_lengths.astype(np.uint64))
+    pos = _expand_ranges(offsets + _POINT_HEAD.size, track_lengths, 8)
+    _scatter(buf, "<u4", pos, points.track_image_ids)
+    _scatter(buf, "<u4", pos + 4, points.track_point2d_idx)
+    _write_atomic(path, buf)
+
+
+# ---------------------------------------------------------------------------
+# Binary record editing
+#
+# Pose / point edits that keep every other byte intact (tracks, keypoints,
+# names, colors) are applied directly to a copy of the raw file buffer.
+# ---------------------------------------------------------------------------
+
+def shift_model_origin_bin(src_dir: str, dst_dir: str, origin) -> Dict[str, int]:
+    """Write a copy of a binary model translated so that ``origin`` becomes (0, 0, 0).
+
+    points: X' = X - O
+    images: t' = t + R * O (camera centers shift by -O, rotations unchanged)
+
+    Only ``cameras.bin``, ``images.bin`` and ``points3D.bin`` are written;
+    everything except the translated fields is copied byte for byte.
+
+    Returns:
+        {"num_images": ..., "num_points3d": ...}
+    """
+    src = model_files(src_dir, "bin")
+    dst = model_files(dst_dir, "bin")
+    O = np.asarray(origin, dtype=np.float64).reshape(3)
+    os.makedirs(dst_dir, exist_ok=True)
+
+    cameras = _read_bytes(src["cameras"])
+
+    images = bytearray(_read_bytes(src["images"]))
+    img_offsets = image_record_offsets(images)
+    R = qvecs_to_rotmats(_gather_rows(images, "<f8", img_offsets, _IMAGE_QVEC_OFFSET, 4))
+    t = _gather_rows(images, "<f8", img_offsets, _IMAGE_TVEC_OFFSET, 3)
+    _scatter_rows(images, "<f8", img_offsets, _IMAGE_TVEC_OFFSET, t + R @ O)
+
+    points = bytearray(_read_bytes(src["points3D"]))
+    pt_offsets = point_record_offsets(points)
+    xyz = _gather_rows(points, "<f8", pt_offsets, _POINT_XYZ_OFFSET, 3)
+    _scatter_rows(points, "<f8", pt_offsets, _POINT_XYZ_OFFSET, xyz - O)
+
+    _write_atomic(dst["cameras"], cameras)
+    _write_atomic(dst["images"], images)
+    _write_atomic(dst["points3D"], points)
+    return {"num_images": int(len(img_offsets)), "num_points3d": int(len(pt_offsets))}
+
+
+# ---------------------------------------------------------------------------
+# Text
+# ---------------------------------------------------------------------------
+
+def _data_lines(path: str) -> List[str]:
+    """Non-empty, non-comment lines of a text model file."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        lines = f.read().splitlines()
+    return [line for line in (ln.strip() for ln in lines) if line and not line.startswith("#")]
+
+
+def read_cameras_txt(path: str) -> Dict[int, Camera]:
+    cams: Dict[int, Camera] = {}
+    for line in _data_lines(path):
+        parts = line.split()
+        if len(parts) < 5:
+            continue
+        try:
+            cam_id = int(parts[0])
+            cams[cam_id] = Camera(cam_id, parts[1].upper(), int(parts[2]), int(parts[3]),
+                                  np.array(parts[4:], dtype=np.float64))
+        except ValueError:
+            continue
+    return cams
+
+
+def read_images_txt(path: str, observations: bool = True) -> ImageColumns:
+    """Read ``images.txt``; ``observations=False`` skips parsing the keypoint lines.
+
+    Tokens of all records are collected first and converted to arrays in one
+    call per column, which is where most of the time of a text read goes.
+    """
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        lines = f.read().splitlines()
+
+    heads: List[List[str]] = []
+    counts: List[int] = []
+    obs_tokens: List[str] = []
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        i += 1
+        if not line or line.startswith("#"):
+            continue
+        parts = line.split()
+        if len(parts) < 10:
+            continue
+        # The keypoint line always follows the image line (empty when there are none)
+        obs_line = lines[i].strip() if i < len(lines) else ""
+        i += 1
+        obs = obs_line.split() if obs_line and not obs_line.startswith("#") else []
+        n_obs = len(obs) // 3
+        heads.append(parts)
+        counts.append(n_obs)
+        if observations:
+            obs_tokens.extend(obs[: n_obs * 3])
+
+    offsets = np.zeros(len(heads) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    pose = np.array([t for h in heads for t in h[1:8]], dtype=np.float64).reshape(-1, 7)
+    xy = np.array(obs_tokens[0::3] + obs_tokens[1::3], dtype=np.float64).reshape(2, -1).T
+    return ImageColumns(
+        image_ids=np.array([h[0] for h in heads], dtype=np.int64),
+        qvecs=np.ascontiguousarray(pose[:, :4]),
+        tvecs=np.ascontiguousarray(pose[:, 4:]),
+        camera_ids=np.array([h[8] for h in heads], dtype=np.int64),
+        names=[" ".join(h[9:]) for h in heads],
+        obs_offsets=offsets,
+        xy=np.ascontiguousarray(xy),
+        point3d_ids=np.array(obs_tokens[2::3], dtype=np.int64),
+    )
+
+
+# Defaults for the optional R, G, B, ERROR columns of short points3D.txt rows
+_POINT_TXT_DEFAULTS = ["0", "0", "0", "0"]
+
+
+def read_points3d_txt(path: str, tracks: bool = False) -> PointColumns:
+    """Read ``points3D.txt``; tracks are only kept when ``tracks=True``.
+
+    Rows with fewer than 4 columns are skipped; missing color / error columns
+    default to 0.
+    """
+    rows = [parts for parts in (line.split() for line in _data_lines(path)) if len(parts) >= 4]
+    head = [
+        t
+        for parts in rows
+        for t in (parts[1:8] if len(parts) >= 8 else parts[1:] + _POINT_TXT_DEFAULTS[len(parts) - 4:])
+    ]
+    values = np.array(head, dtype=np.float64).reshape(-1, 7)
+    track_lengths = np.array([max(0, (len(parts) - 8) // 2) for parts in rows], dtype=np.int64)
+    points = PointColumns(
+        ids=np.array([parts[0] for parts in rows], dtype=np.int64),
+        xyz=np.ascontiguousarray(values[:, :3]),
+        rgb=values[:, 3:6].astype(np.uint8),
+        error=np.ascontiguousarray(values[:, 6]),
+        track_lengths=track_lengths,
+    )
+    if tracks:
+        flat = np.array(
+            [t for parts, n in zip(rows, track_lengths.tolist()) for t in parts[8:8 + 2 * n]],
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        points.track_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(track_lengths, out=points.track_offsets[1:])
+        points.track_image_ids = flat[:, 0].copy()
+        points.track_point2d_idx = flat[:, 1].copy()
+    return points
+
+
+def write_cameras_txt(cameras: Dict[int, Camera], path: str) -> None:
+    lines = [
+        "# Camera list with one line of data per camera:",
+        "#   CAMERA_ID, MODEL, WIDTH, HEIGHT, PARAMS[]",
+        f"# Number of cameras: {len(cameras)}",
+    ]
+    for cam_id in sorted(cameras):
+        cam = cameras[cam_id]
+        params = " ".join(repr(float(p)) for p in cam.params)
+        lines.append(f"{cam_id} {cam.model} {int(cam.width)} {int(cam.height)} {params}")
+    _write_atomic(path, ("\n".join(lines) + "\n").encode("utf-8"))
+
+
+def write_images_txt(images: ImageColumns, path: str) -> None:
+    """Write ``images.txt`` (keypoint lines are empty when observations were not loaded)."""
+    with_obs = images.has_observations
+    mean_obs = (len(images.point3d_ids) / len(images)) if len(images) and with_obs else 0.0
+    lines = [
+        "# Image list with two lines of data per image:",
+        "#   IMAGE_ID, QW, QX, QY, QZ, TX, TY, TZ, CAMERA_ID, NAME",
+        "#   POINTS2D[] as (X, Y, POINT3D_ID)",
+        f"# Number of images: {len(images)}, mean observations per image: {mean_obs}",
+    ]
+    ids = images.image_ids.tolist()
+    poses = np.hstack([images.qvecs, images.tvecs]).tolist()
+    cam_ids = images.camera_ids.tolist()
+    offsets = images.obs_offsets.tolist()
+    xy = images.xy.tolist()
+    pids = images.point3d_ids.tolist()
+    for i, name in enumerate(images.names):
+        pose = " ".join(repr(v) for v in poses[i])
+        lines.append(f"{ids[i]} {pose} {cam_ids[i]} {name}")
+        if with_obs:
+            lines.append(" ".join(
+                f"{xy[j][0]!r} {xy[j][1]!r} {pids[j]}" for j in range(offsets[i], offsets[i + 1])
+            ))
+        else:
+            lines.append("")
+    _write_atomic(path, ("\n".join(lines) + "\n").encode("utf-8"))
+
+
+def write_points3d_txt(points: PointColumns, path: str) -> None:
+    """Write ``points3D.txt`` (track columns are omitted when tracks were not loaded)."""
+    mean_track = float(points.track_lengths.mean()) if len(points) else 0.0
+    lines = [
+        "# 3D point list with one line of data per point:",
+        "#   POINT3D_ID, X, Y, Z, R, G, B, ERROR, TRACK[] as (IMAGE_ID, POINT2D_IDX)",
+        f"# Number of points: {len(points)}, mean track length: {mean_track}",
+    ]
+    ids = points.ids.tolist()
+    xyz = points.xyz.tolist()
+    rgb = points.rgb.tolist()
+    err = points.error.tolist()
+    if points.has_tracks:
+        offsets = points.track_offsets.tolist()
+        t_img = points.track_image_ids.tolist()
+        t_idx = points.track_point2d_idx.tolist()
+    for i in range(len(ids)):
+        x, y, z = xyz[i]
+        r, g, b = rgb[i]
+        line = f"{ids[i]} {x!r} {y!r} {z!r} {r} {g} {b} {err[i]!r}"
+        if points.has_tracks and offsets[i + 1] > offsets[i]:
+            line += " " + " ".join(f"{t_img[j]} {t_idx[j]}" for j in range(offsets[i], offsets[i + 1]))
+        lines.append(line)
+    _write_atomic(path, ("\n".join(lines) + "\n").encode("utf-8"))
+
+
+def write_points_ply(xyz: np.ndarray, rgb: np.ndarray, path: str) -> None:
+    """Write an ASCII PLY point cloud (x, y, z float; red, green, blue uchar)."""
+    header = (
+        "ply\n"
+        "format ascii 1.0\n"
+        f"element vertex {len(xyz)}\n"
+        "property float x\n"
+        "property float y\n"
+        "property float z\n"
+        "property uchar red\n"
+        "property uchar green\n"
+        "property uchar blue\n"
+        "end_header\n"
+    )
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(header)
+        if len(xyz):
+            table = np.column_stack([np.asarray(xyz, dtype=np.float64), np.asarray(rgb, dtype=np.float64)])
+            np.savetxt(f, table, fmt="%.17g %.17g %.17g %d %d %d")
+
+
+# ---------------------------------------------------------------------------
+# Model
+# ---------------------------------------------------------------------------
+
+@dataclass
+class SparseModel:
+    cameras: Dict[int, Camera]
+    images: ImageColumns
+    points: PointColumns
+    format: str  # "bin" or "txt"
+
+
+def model_files(sparse_dir: str, fmt: str) -> Dict[str, str]:
+    return {name: os.path.join(sparse_dir, f"{name}.{fmt}") for name in ("cameras", "images", "points3D")}
+
+
+def detect_format(sparse_dir: str, prefer: str = "bin") -> Optional[str]:
+    """Return "bin" or "txt" if a complete model exists in ``sparse_dir``."""
+    order = [prefer, "txt" if prefer == "bin" else "bin"]
+    for fmt in order:
+        if all(os.path.exists(p) for p in model_files(sparse_dir, fmt).values()):
+            return fmt
+    return None
+
+
+def read_cameras(path: str) -> Dict[int, Camera]:
+    """Read ``cameras.bin`` or ``cameras.txt`` depending on the extension."""
+    return read_cameras_bin(path) if path.endswith(".bin") else read_cameras_txt(path)
+
+
+def read_images(path: str, observations: bool = True) -> ImageColumns:
+    """Read ``images.bin`` or ``images.txt`` depending on the extension."""
+    return read_images_bin(path, observations) if path.endswith(".bin") else read_images_txt(path, observations)
+
+
+def read_points3d(path: str, tracks: bool = False) -> PointColumns:
+    """Read ``points3D.bin`` or ``points3D.txt`` depending on the extension."""
+    return read_points3d_bin(path, tracks) if path.endswith(".bin") else read_points3d_txt(path, tracks)
+
+
+def read_model(sparse_dir: str, fmt: Optional[str] = None, tracks: bool = False) -> SparseModel:
+    """Load a full sparse model in columnar form."""
+    fmt = fmt or detect_format(sparse_dir)
+    if fmt is None:
+        raise FileNotFoundError(f"No complete COLMAP model in {sparse_dir}")
+    files = model_files(sparse_dir, fmt)
+    return SparseModel(read_cameras(files["cameras"]), read_images(files["images"]),
+                       read_points3d(files["points3D"], tracks), fmt)
+
+
+def write_model(model: SparseModel, sparse_dir: str, fmt: str = "bin") -> None:
+    """Write cameras/images/points3D in ``fmt`` ("bin" or "txt"); binary points need tracks."""
+    os.makedirs(sparse_dir, exist_ok=True)
+    files = model_files(sparse_dir, fmt)
+    if fmt == "bin":
+        write_cameras_bin(model.cameras, files["cameras"])
+        write_images_bin(model.images, files["images"])
+        write_points3d_bin(model.points, files["points3D"])
+    else:
+        write_cameras_txt(model.cameras, files["cameras"])
+        write_images_txt(model.images, files["images"])
+        write_points3d_txt(model.points, files["points3D"])
+
+
+class LazySparseModel:
+    """Sparse model whose column groups are read on first access.
+
+    - ``cameras``: intrinsics
+    - ``poses`` / ``names``: image poses and names without keypoints
+    - ``images``: poses plus all observations
+    - ``points``: 3D points without tracks
+    - ``tracks``: 3D points with tracks
+    """
+
+    def __init__(self, sparse_dir: str, fmt: Optional[str] = None):
+        fmt = fmt or detect_format(sparse_dir)
+        if fmt is None:
+            raise FileNotFoundError(f"No complete COLMAP model in {sparse_dir}")
+        self.sparse_dir = sparse_dir
+        self.format = fmt
+        self.files = model_files(sparse_dir, fmt)
+
+    @cached_property
+    def cameras(self) -> Dict[int, Camera]:
+        return read_cameras(self.files["cameras"])
+
+    @cached_property
+    def poses(self) -> ImageColumns:
+        # Full images already loaded -> reuse them
+        if "images" in self.__dict__:
+            return self.__dict__["images"]
+        return read_images(self.files["images"], observations=False)
+
+    @property
+    def names(self) -> List[str]:
+        return self.poses.names
+
+    @cached_property
+    def images(self) -> ImageColumns:
+        return read_images(self.files["images"], observations=True)
+
+    @cached_property
+    def points(self) -> PointColumns:
+        if "tracks" in self.__dict__:
+            return self.__dict__["tracks"]
+        return read_points3d(self.files["points3D"], tracks=False)
+
+    @cached_property
+    def tracks(self) -> PointColumns:
+        return read_points3d(self.files["points3D"], tracks=True)
+
+    def num_images(self) -> int:
+        if self.format == "bin":
+            return read_num_records(self.files["images"])
+        return len(self.poses)
+
+    def num_points3d(self) -> int:
+        if self.format == "bin":
+            return read_num_records(self.files["points3D"])
+        return len(self.points)
+
+    def to_model(self, tracks: bool = False) -> SparseModel:
+        return SparseModel(self.cameras, self.images, self.tracks if tracks else self.points, self.format)
+
+
+def open_model(sparse_dir: str, fmt: Optional[str] = None) -> LazySparseModel:
+    """Lazily opened sparse model (see ``LazySparseModel``)."""
+    return LazySparseModel(sparse_dir, fmt)
+
+
+def file_signature(paths: List[str]) -> List[Dict[str, Any]]:
+    """(name, mtime, size) of input files, used to key on-disk caches."""
+    sig = []
+    for p in paths:
+        st = os.stat(p)
+        sig.append({"path": os.path.basename(p), "mtime": st.st_mtime, "size": st.st_size})
+    return sig
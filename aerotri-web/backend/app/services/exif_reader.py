@@ -0,0 +1,147 @@
+"""Minimal native JPEG EXIF reader.
+
+Walks the JPEG marker segments up to start-of-scan and only reads the
+payloads that matter: APP1 (``Exif``) and SOFn (image size). Everything
+else — thumbnails, XMP, maker notes, ICC profiles, entropy-coded data — is
+skipped with a seek, so the cost per image is a few small reads regardless
+of file size. Only the IFD0, Exif and GPS directories are decoded.
+
+Returns None for anything that is not a well-formed JPEG so callers can
+fall back to PIL.
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import Any, Dict, Optional, Tuple
+
+# IFD pointers in IFD0
+_TAG_EXIF_IFD = 0x8769
+_TAG_GPS_IFD = 0x8825
+
+# TIFF field type -> byte size of one value
+_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8, 11: 4, 12: 8}
+
+# SOFn markers carrying the frame size (excluding DHT/JPG/DAC which share the range)
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+_SOS = 0xDA
+_EOI = 0xD9
+_APP1 = 0xE1
+
+
+def _decode_value(data: bytes, bo: str, ftype: int, count: int, offset: int) -> Any:
+    if ftype == 2:
+        return data[offset:offset + count].split(b"\x00", 1)[0].decode("latin-1").strip()
+    if ftype in (1, 7):
+        raw = data[offset:offset + count]
+        return raw[0] if count == 1 and ftype == 1 else raw
+    if ftype in (5, 10):
+        fmt = "I" if ftype == 5 else "i"
+        vals = struct.unpack_from(f"{bo}{2 * count}{fmt}", data, offset)
+        out = tuple(vals[i] / vals[i + 1] if vals[i + 1] else 0.0 for i in range(0, 2 * count, 2))
+        return out[0] if count == 1 else out
+    fmt = {3: "H", 4: "I", 8: "h", 9: "i", 11: "f", 12: "d"}.get(ftype)
+    if fmt is None:
+        return None
+    vals = struct.unpack_from(f"{bo}{count}{fmt}", data, offset)
+    return vals[0] if count == 1 else vals
+
+
+def _read_ifd(data: bytes, bo: str, offset: int) -> Dict[int, Any]:
+    """Decode one IFD of a TIFF block. Malformed entries are skipped."""
+    tags: Dict[int, Any] = {}
+    if offset <= 0 or offset + 2 > len(data):
+        return tags
+    (n,) = struct.unpack_from(f"{bo}H", data, offset)
+    for i in range(n):
+        entry = offset + 2 + 12 * i
+        if entry + 12 > len(data):
+            break
+        tag, ftype, count = struct.unpack_from(f"{bo}HHI", data, entry)
+        size = _TYPE_SIZES.get(ftype)
+        if size is None or count == 0:
+            continue
+        if size * count <= 4:
+            value_offset = entry + 8
+        else:
+            (value_offset,) = struct.unpack_from(f"{bo}I", data, entry + 8)
+            if value_offset + size * count > len(data):
+                continue
+        try:
+            tags[tag] = _decode_value(data, bo, ftype, count, value_offset)
+        except struct.error:
+            continue
+    return tags
+
+
+def parse_exif_tiff(data: bytes) -> Optional[Tuple[Dict[int, Any], Dict[int, Any], Dict[int, Any]]]:
+    """(IFD0, Exif IFD, GPS IFD) of an EXIF TIFF block (APP1 payload without the ``Exif\\0\\0`` prefix)."""
+    if len(data) < 8:
+        return None
+    if data[:2] == b"II":
+        bo = "<"
+    elif data[:2] == b"MM":
+        bo = ">"
+    else:
+        return None
+    magic, ifd0_offset = struct.unpack_from(f"{bo}HI", data, 2)
+    if magic != 42:
+        return None
+    ifd0 = _read_ifd(data, bo, ifd0_offset)
+    exif_ifd = _read_ifd(data, bo, ifd0[_TAG_EXIF_IFD]) if isinstance(ifd0.get(_TAG_EXIF_IFD), int) else {}
+    gps_ifd = _read_ifd(data, bo, ifd0[_TAG_GPS_IFD]) if isinstance(ifd0.get(_TAG_GPS_IFD), int) else {}
+    return ifd0, exif_ifd, gps_ifd
+
+
+def read_jpeg_exif(path: str) -> Optional[Dict[str, Any]]:
+    """Image size and raw IFD0 / Exif / GPS tags of a JPEG.
+
+    Returns ``{"size": (w, h) | None, "ifd0": {...}, "exif": {...}, "gps": {...}}``,
+    or None when the file is not a readable JPEG.
+    """
+    result: Dict[str, Any] = {"size": None, "ifd0": {}, "exif": {}, "gps": {}}
+    try:
+        with open(path, "rb") as f:
+            if f.read(2) != b"\xff\xd8":
+                return None
+            while True:
+                byte = f.read(1)
+                if not byte:
+                    break
+                if byte != b"\xff":
+                    return None
+                marker = f.read(1)
+                # Fill bytes: any number of 0xFF may precede a marker
+                while marker == b"\xff":
+                    marker = f.read(1)
+                if not marker:
+                    break
+                code = marker[0]
+                if code in (_SOS, _EOI):
+                    break
+                if 0xD0 <= code <= 0xD7 or code == 0x01:
+                    continue
+                raw_len = f.read(2)
+                if len(raw_len) != 2:
+                    break
+                length = struct.unpack(">H", raw_len)[0] - 2
+                if length < 0:
+                    return None
+                if code == _APP1 and not result["ifd0"]:
+                    payload = f.read(length)
+                    if payload[:6] == b"Exif\x00\x00":
+                        parsed = parse_exif_tiff(payload[6:])
+                        if parsed:
+                            result["ifd0"], result["exif"], result["gps"] = parsed
+                elif code in _SOF_MARKERS:
+                    payload = f.read(length)
+                    if len(payload) >= 5:
+                        height, width = struct.unpack_from(">HH", payload, 1)
+                        result["size"] = (width, height)
+                    # EXIF precedes the frame header in valid files
+                    break
+                else:
+                    f.seek(length, 1)
+    except (OSError, struct.error):
+        return None
+    return result
@@ -31,6 +31,8 @@ class GPUService:
     """Service for GPU monitoring."""
     
     _initialized = False
+    # NVML handles by index (looked up once; devices do not change at runtime)
+    _handles: dict = {}
     
     @classmethod
     def _ensure_initialized(cls):
@@ -76,7 +78,9 @@ class GPUService:
             _, pynvml = _ensure_pynvml()
             GPUInfo = _get_gpu_info_schema()
             
-            handle = pynvml.nvmlDeviceGetHandleByIndex(index)
+            handle = cls._handles.get(index)
+            if handle is None:
+                handle = cls._handles[index] = pynvml.nvmlDeviceGetHandleByIndex(index)
             
             # Get name
             name = pynvml.nvmlDeviceGetName(handle)
@@ -0,0 +1,137 @@
+"""Pre-resized image pyramids for 3DGS training.
+
+gaussian-splatting's ``--resolution 2/4/8`` resizes every full-resolution image
+each time the dataloader touches it; with ``data_device=cpu`` image loading then
+dominates training time. Instead the dataset gets ``images_2``, ``images_4`` and
+``images_8`` (the layout the reference implementation expects with
+``--images images_N``), built once per block in a process pool:
+
+- each image is decoded once and every level is resized from the one above it
+  (``image_workers.write_levels``, shared with the thumbnail pyramids);
+- level sizes follow 3DGS' own rounding (``round(w / N)``, ``round(h / N)``);
+- files are kept when newer than their source, so a re-run only redoes
+  changed images.
+
+Layout: ``<block output>/gs_pyramid/<md5(source dir)>/images_<N>/<name>``. A block
+keeps one pyramid: building for a new source (e.g. a new undistort cache entry
+after SfM was re-run) removes the pyramids of earlier sources.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import shutil
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from .image_workers import batched, run_batches, write_levels_batch
+from .workspace_service import IMAGE_EXTENSIONS
+
+PYRAMID_DIRNAME = "gs_pyramid"
+PYRAMID_FACTORS = (2, 4, 8)
+PYRAMID_JPEG_QUALITY = 95
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+# Images handed to one pool task
+_BATCH_SIZE = 16
+# RGBA is kept: 3DGS uses the alpha channel as a mask
+_KEEP_MODES = ("RGB", "RGBA", "L")
+
+
+def pyramid_factor(resolution) -> Optional[int]:
+    """Pyramid level for a 3DGS ``resolution`` parameter (None if it is not 2/4/8)."""
+    try:
+        factor = int(resolution)
+    except (TypeError, ValueError):
+        return None
+    return factor if factor in PYRAMID_FACTORS else None
+
+
+def pyramid_root(cache_root: str, images_dir: str) -> str:
+    key = hashlib.md5(os.path.realpath(images_dir).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_root, key)
+
+
+def prune_pyramids(cache_root: str, keep: str) -> List[str]:
+    """Remove every pyramid under ``cache_root`` except ``keep``; returns the removed dirs."""
+    removed = []
+    try:
+        entries = list(os.scandir(cache_root))
+    except OSError:
+        return removed
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False) and entry.path != keep:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed.append(entry.path)
+    return removed
+
+
+def list_images(images_dir: str) -> List[str]:
+    """Image paths under ``images_dir`` relative to it (sub directories included), sorted."""
+    names = []
+    for root, _dirs, files in os.walk(images_dir, followlinks=True):
+        for name in files:
+            if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                names.append(os.path.relpath(os.path.join(root, name), images_dir))
+    return sorted(names)
+
+
+def factor_size(width: int, height: int, factor: int) -> Tuple[int, int]:
+    """Size of level ``factor``, rounded like 3DGS' own ``--resolution`` resize."""
+    return max(1, round(width / factor)), max(1, round(height / factor))
+
+
+def _is_current(src: str, out: str) -> bool:
+    try:
+        return os.path.getmtime(out) >= os.path.getmtime(src)
+    except OSError:
+        return False
+
+
+def _pending_jobs(images_dir: str, out_root: str, factors: Sequence[int]) -> List[tuple]:
+    """``write_levels`` arguments of the images whose levels are missing or older than the source."""
+    jobs = []
+    for name in list_images(images_dir):
+        src = os.path.join(images_dir, name)
+        out_paths = {factor: os.path.join(out_root, f"images_{factor}", name) for factor in factors}
+        if not all(_is_current(src, out) for out in out_paths.values()):
+            jobs.append((src, out_paths, factor_size, _KEEP_MODES, PYRAMID_JPEG_QUALITY))
+    return jobs
+
+
+async def build_pyramid(
+    images_dir: str,
+    out_root: str,
+    factors: Sequence[int] = PYRAMID_FACTORS,
+    max_workers: int = DEFAULT_WORKERS,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    is_cancelled: Optional[Callable[[], bool]] = None,
+) -> Tuple[int, int]:
+    """Bring ``out_root/images_<N>`` up to date for every image of ``images_dir``.
+
+    ``is_cancelled`` is checked between batches; once it returns True the
+    remaining images are skipped (the caller decides what a cancel means).
+
+    Returns:
+        (images resized this run, images that failed)
+    """
+    jobs = await asyncio.to_thread(_pending_jobs, images_dir, out_root, factors)
+    if not jobs:
+        return 0, 0
+
+    done = failed = 0
+
+    def on_batch(_batch, oks) -> None:
+        if oks is None:
+            return
+        nonlocal done, failed
+        done += len(oks)
+        failed += oks.count(False)
+        if on_progress:
+            on_progress(done, len(jobs))
+
+    await run_batches(
+        write_levels_batch, batched(jobs, _BATCH_SIZE), max_workers,
+        on_batch=on_batch, is_cancelled=is_cancelled,
+    )
+    return done, failed
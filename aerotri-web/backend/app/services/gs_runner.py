@@ -13,11 +13,11 @@ from __future__ import annotations
 
 import asyncio
 import os
-import re
 import shutil
 import socket
 import time
 from collections import deque
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Deque, Dict, List, Optional, Tuple
@@ -28,9 +28,16 @@ from ..models.block import Block
 from ..models.database import AsyncSessionLocal
 from ..conf.settings import get_settings
 
+from . import colmap_io
 from .gs_tiles_runner import gs_tiles_runner  # 用于复用 PLY → SPZ 转换逻辑
 from .task_notifier import task_notifier
+from .progress_hub import progress_hub
+from .log_parser import LogParser
 from .task_runner_integration import on_task_failure
+from .resource_profiler import resource_profiler
+from .benchmark_store import benchmark_store
+from .gs_pyramid import PYRAMID_DIRNAME, PYRAMID_FACTORS, build_pyramid, prune_pyramids, pyramid_factor, pyramid_root
+from .undistort_cache import UNDISTORT_CACHE_DIRNAME, cache_sparse_dir, link_dataset, undistort_cache
 
 # Load 3DGS configuration from new system
 _settings = get_settings()
@@ -67,18 +74,12 @@ class GSProcessError(Exception):
         return msg
 
 
-_TQDM_PERCENT_RE = re.compile(r"Training progress:\s*(\d+)%")
-
-
-def _list_image_files(images_dir: str) -> List[str]:
+def _has_image_files(images_dir: str) -> bool:
+    """True if ``images_dir`` contains at least one image; stops at the first match."""
     if not os.path.isdir(images_dir):
-        return []
-    out: List[str] = []
-    for name in os.listdir(images_dir):
-        lower = name.lower()
-        if lower.endswith((".jpg", ".jpeg", ".png")):
-            out.append(name)
-    return out
+        return False
+    with os.scandir(images_dir) as it:
+        return any(entry.name.lower().endswith((".jpg", ".jpeg", ".png")) for entry in it)
 
 
 def _check_camera_model(sparse0_dir: str) -> Optional[str]:
@@ -87,56 +88,16 @@ def _check_camera_model(sparse0_dir: str) -> Optional[str]:
     Returns:
         Camera model string (e.g., "OPENCV", "PINHOLE", "SIMPLE_PINHOLE") or None if cannot determine.
     """
-    import struct
-    
     # Try to read cameras.bin first
     cameras_bin = os.path.join(sparse0_dir, "cameras.bin")
     if os.path.exists(cameras_bin):
         try:
-            with open(cameras_bin, "rb") as f:
-                num_cameras = struct.unpack("<Q", f.read(8))[0]
-                if num_cameras > 0:
-                    # Read first camera
-                    camera_id = struct.unpack("<I", f.read(4))[0]
-                    model_id = struct.unpack("<I", f.read(4))[0]
-                    width = struct.unpack("<Q", f.read(8))[0]
-                    height = struct.unpack("<Q", f.read(8))[0]
-                    num_params = struct.unpack("<Q", f.read(8))[0]
-                    
-                    # Skip params (we only need model_id)
-                    # Params are doubles (8 bytes each)
-                    # Note: num_params should be small (typically 1-8), but we read it as uint64
-                    # So we need to convert to int safely
-                    try:
-                        num_params_int = int(num_params)
-                        if 0 < num_params_int < 100:  # Sanity check
-                            f.read(8 * num_params_int)
-                    except (ValueError, OverflowError):
-                        # If num_params is invalid, just skip (we already have model_id)
-                        pass
-                    
-                    # Map model_id to model name
-                    # COLMAP model IDs: 0=SIMPLE_PINHOLE, 1=PINHOLE, 2=SIMPLE_RADIAL, 3=RADIAL, 4=OPENCV, etc.
-                    model_map = {
-                        0: "SIMPLE_PINHOLE",
-                        1: "PINHOLE",
-                        2: "SIMPLE_RADIAL",
-                        3: "RADIAL",
-                        4: "OPENCV",
-                        5: "OPENCV_FISHEYE",
-                        6: "FULL_OPENCV",
-                        7: "FOV",
-                        8: "SIMPLE_RADIAL_FISHEYE",
-                        9: "RADIAL_FISHEYE",
-                        10: "THIN_PRISM_FISHEYE",
-                    }
-                    return model_map.get(model_id, "UNKNOWN")
+            cameras = colmap_io.read_cameras_bin(cameras_bin)
+            if cameras:
+                return next(iter(cameras.values())).model
         except Exception as e:
             # Log error for debugging but don't fail
-            import traceback
             print(f"[_check_camera_model] Error reading cameras.bin: {e}")
-            traceback.print_exc()
-            pass
     
     # Fallback: try to read cameras.txt
     cameras_txt = os.path.join(sparse0_dir, "cameras.txt")
@@ -402,13 +363,17 @@ class GSRunner:
             )
         )
 
-    def _prepare_dataset(self, block: Block, dataset_dir: str, log_func=None) -> Tuple[str, str]:
+    async def _prepare_dataset(
+        self, block: Block, dataset_dir: str, log_func=None, resolution=None
+    ) -> Tuple[str, str]:
         """Prepare dataset for 3DGS training.
         
         Args:
             block: Block instance
             dataset_dir: Dataset directory to prepare
             log_func: Optional logging function (for async context)
+            resolution: 3DGS ``resolution`` parameter; 2/4/8 also links pre-resized
+                ``images_2/4/8`` into the dataset
         
         Returns:
             Tuple of (images_source_path, sparse0_source_path)
@@ -508,122 +473,62 @@ class GSRunner:
                     log_func(f"[GSRunner] Running COLMAP image_undistorter to ensure PINHOLE model...")
         
         if needs_undistort:
-            # Need to undistort: use COLMAP image_undistorter
-            # This will create undistorted images and PINHOLE camera model
-            undistorted_dir = os.path.join(dataset_dir, "undistorted")
-            os.makedirs(undistorted_dir, exist_ok=True)
-            
-            # Run COLMAP image_undistorter
-            cmd = [
-                COLMAP_PATH,
-                "image_undistorter",
-                "--image_path", images_src,
-                "--input_path", sparse0_src,
-                "--output_path", undistorted_dir,
-                "--output_type", "COLMAP",
-            ]
-            
-            import subprocess
-            if log_func:
-                log_func(f"[GSRunner] Running: {' '.join(cmd)}")
-            
-            # Set up environment with library paths (same as task_runner)
-            env = os.environ.copy()
-            # Add Ceres library path (contains all required libraries including absl)
+            # Undistorted images + PINHOLE model come from the block-level cache shared
+            # with OpenMVS versions (full resolution), so re-training does not undistort again.
             from .task_runner import CERES_LIB_PATH
+
+            env = os.environ.copy()
             current_ld_path = env.get("LD_LIBRARY_PATH", "")
             if CERES_LIB_PATH not in current_ld_path:
                 env["LD_LIBRARY_PATH"] = f"{CERES_LIB_PATH}:{current_ld_path}" if current_ld_path else CERES_LIB_PATH
-            
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                cwd=dataset_dir,
-                env=env,
-            )
-            
-            # After undistortion, check output (even if return code is non-zero)
-            # COLMAP image_undistorter has known SIGSEGV issues but may still produce valid output
-            undistorted_images = os.path.join(undistorted_dir, "images")
-            undistorted_sparse_candidates = [
-                os.path.join(undistorted_dir, "sparse", "0"),  # Standard path
-                os.path.join(undistorted_dir, "sparse"),       # Alternative path
-            ]
-            
-            # Check if output was actually generated
-            has_images = os.path.exists(undistorted_images) and len(_list_image_files(undistorted_images)) > 0
-            has_sparse = False
-            actual_sparse = None
-            
-            for candidate in undistorted_sparse_candidates:
-                if os.path.exists(candidate):
-                    cameras_file = os.path.join(candidate, "cameras.bin")
-                    if os.path.exists(cameras_file):
-                        has_sparse = True
-                        actual_sparse = candidate
-                        break
-            
-            if result.returncode != 0:
-                # Even with non-zero return code, check if output was generated
-                if has_images and has_sparse:
-                    # Output exists, treat as success (known COLMAP SIGSEGV issue)
-                    if log_func:
-                        log_func(
-                            f"[GSRunner] Image undistortion completed (output validated despite exit code {result.returncode})"
-                        )
-                else:
-                    # True failure: no output generated
-                    error_msg = result.stderr[:500] if result.stderr else result.stdout[:500] if result.stdout else "Unknown error"
-                    if log_func:
-                        log_func(f"[GSRunner] COLMAP image_undistorter failed: {error_msg}")
-                    raise RuntimeError(
-                        f"COLMAP image_undistorter failed (camera model: {camera_model}). "
-                        f"Error: {error_msg}"
-                    )
-            else:
-                # Return code is 0, but still verify output exists
-                if not has_images or not has_sparse:
-                    raise RuntimeError(
-                        f"COLMAP image_undistorter returned success but did not produce expected output. "
-                        f"Expected images at {undistorted_images} and sparse at one of {undistorted_sparse_candidates}"
-                    )
+
+            def on_progress(pct: float, line: str) -> None:
+                progress_hub.publish_stage(block.id, "gs", "dataset_prepare", pct, line)
+
+            @asynccontextmanager
+            async def track(proc: asyncio.subprocess.Process):
+                # Cancellable and profiled like the training process
+                self._processes[block.id] = proc
+                profiler = resource_profiler.start("gs", block.id, "undistort", proc.pid, tool="colmap")
+                try:
+                    yield
+                finally:
+                    self._processes.pop(block.id, None)
+                    await resource_profiler.finish("gs", block.id, profiler, proc.returncode)
+
+            async def run(cmd: List[str]) -> None:
+                await undistort_cache.run_subprocess(
+                    cmd, env=env, log=log_func, on_progress=on_progress, track=track
+                )
+
+            try:
+                cache_dir = await undistort_cache.ensure(
+                    cache_root=os.path.join(output_path or dataset_dir, UNDISTORT_CACHE_DIRNAME),
+                    image_dir=images_src,
+                    sparse_dir=sparse0_src,
+                    run=run,
+                    colmap_path=str(COLMAP_PATH),
+                    log=log_func,
+                    is_cancelled=lambda: bool(self._cancelled.get(block.id)),
+                )
+            except Exception as e:
+                if self._cancelled.get(block.id):
+                    raise asyncio.CancelledError() from e
                 if log_func:
-                    log_func(f"[GSRunner] Image undistortion completed successfully")
-            
-            # Standardize directory structure: ensure we use sparse/0
-            target_sparse = os.path.join(undistorted_dir, "sparse", "0")
-            if actual_sparse != target_sparse:
-                # Move files from sparse/ to sparse/0/
-                os.makedirs(target_sparse, exist_ok=True)
-                for f in ["cameras.bin", "images.bin", "points3D.bin"]:
-                    src = os.path.join(actual_sparse, f)
-                    dst = os.path.join(target_sparse, f)
-                    if os.path.exists(src) and not os.path.exists(dst):
-                        shutil.move(src, dst)
-                        if log_func:
-                            log_func(f"[GSRunner] Moved {f} from sparse/ to sparse/0/")
-                actual_sparse = target_sparse
-            
-            # Final verification
-            if not os.path.exists(undistorted_images) or not os.path.exists(actual_sparse):
+                    log_func(f"[GSRunner] COLMAP image_undistorter failed: {e}")
                 raise RuntimeError(
-                    f"COLMAP image_undistorter did not produce expected output. "
-                    f"Expected: {undistorted_images} and {actual_sparse}"
-                )
-            
-            # Link to undistorted images and sparse
-            images_link = os.path.join(dataset_dir, "images")
-            if os.path.lexists(images_link):
-                os.unlink(images_link)
-            os.symlink(undistorted_images, images_link)
-            
-            sparse_dir = os.path.join(dataset_dir, "sparse")
-            os.makedirs(sparse_dir, exist_ok=True)
-            sparse0_link = os.path.join(sparse_dir, "0")
-            if os.path.lexists(sparse0_link):
-                os.unlink(sparse0_link)
-            os.symlink(actual_sparse, sparse0_link)
+                    f"COLMAP image_undistorter failed (camera model: {camera_model}). Error: {e}"
+                ) from e
+
+            if cache_dir is None:
+                # Cancelled while undistorting
+                raise asyncio.CancelledError()
+
+            undistorted_images = os.path.join(cache_dir, "images")
+            actual_sparse = cache_sparse_dir(cache_dir)
+
+            # Link to undistorted images and sparse (registered so the entry is not evicted)
+            link_dataset(cache_dir, dataset_dir)
             
             # Update source paths for return value
             images_src = undistorted_images
@@ -644,8 +549,7 @@ class GSRunner:
 
         # validations
         final_images_dir = images_src if needs_undistort else (block.working_image_path or block.image_path)
-        images = _list_image_files(final_images_dir)
-        if not images:
+        if not _has_image_files(final_images_dir):
             raise ValueError(f"No images found under: {final_images_dir}")
 
         ok, msg = _validate_sparse0(sparse0_src)
@@ -660,8 +564,53 @@ class GSRunner:
                 "but 3DGS requires PINHOLE or SIMPLE_PINHOLE"
             )
 
+        if pyramid_factor(resolution):
+            await self._prepare_pyramid(block, images_src, dataset_dir, log_func=log_func)
+
         return images_src, sparse0_src
 
+    async def _prepare_pyramid(self, block: Block, images_src: str, dataset_dir: str, log_func=None) -> bool:
+        """Build (or reuse) the block's images_2/4/8 and link them into ``dataset_dir``.
+
+        Returns False if any image could not be resized; training then falls back to
+        resizing on the fly with ``--resolution``. Pyramids built for earlier sources
+        of this block are removed first, so the block keeps a single pyramid.
+        """
+        cache_root = os.path.join(block.output_path or dataset_dir, PYRAMID_DIRNAME)
+        out_root = pyramid_root(cache_root, images_src)
+        removed = await asyncio.to_thread(prune_pyramids, cache_root, out_root)
+        if removed and log_func:
+            log_func(f"[GSRunner] Removed {len(removed)} outdated image pyramid(s)")
+
+        def on_progress(done: int, total: int) -> None:
+            progress_hub.publish_stage(
+                block.id, "gs", "dataset_prepare", done * 100.0 / total, f"Resizing images {done}/{total}"
+            )
+
+        t0 = time.time()
+        resized, failed = await build_pyramid(
+            images_src, out_root, on_progress=on_progress,
+            is_cancelled=lambda: bool(self._cancelled.get(block.id)),
+        )
+        if self._cancelled.get(block.id):
+            raise asyncio.CancelledError()
+        if failed:
+            if log_func:
+                log_func(f"[GSRunner] {failed} image(s) could not be resized; using on-the-fly resizing")
+            return False
+        if log_func:
+            if resized:
+                log_func(f"[GSRunner] Built image pyramid for {resized} image(s) in {time.time() - t0:.1f}s: {out_root}")
+            else:
+                log_func(f"[GSRunner] Reusing image pyramid: {out_root}")
+
+        for factor in PYRAMID_FACTORS:
+            link = os.path.join(dataset_dir, f"images_{factor}")
+            if os.path.lexists(link):
+                os.unlink(link)
+            os.symlink(os.path.join(out_root, f"images_{factor}"), link)
+        return True
+
     async def _run_training(
         self,
         block_id: str,
@@ -676,6 +625,7 @@ class GSRunner:
         buf = self._get_buffer(block_id)
 
         stage_times: Dict[str, float] = {}
+        resource_profiler.begin_run("gs", block_id)
 
         def log(line: str) -> None:
             buf.append(line)
@@ -695,9 +645,12 @@ class GSRunner:
                 # Stage: dataset_prepare
                 block.gs_current_stage = "dataset_prepare"
                 await db.commit()
+                progress_hub.publish_stage(block_id, "gs", "dataset_prepare", 0.0, "Preparing dataset")
 
                 t0 = time.time()
-                self._prepare_dataset(block, dataset_dir, log_func=log)
+                await self._prepare_dataset(
+                    block, dataset_dir, log_func=log, resolution=train_params.get("resolution")
+                )
                 stage_times["dataset_prepare"] = time.time() - t0
 
                 os.makedirs(model_dir, exist_ok=True)
@@ -714,6 +667,7 @@ class GSRunner:
                 # Stage: training
                 block.gs_current_stage = "training"
                 await db.commit()
+                progress_hub.publish_stage(block_id, "gs", "training", block.gs_progress or 0.0, "Training started")
 
                 # Build command arguments
                 args = [
@@ -728,7 +682,11 @@ class GSRunner:
                 # Basic parameters
                 if "iterations" in train_params and train_params["iterations"] is not None:
                     args.extend(["--iterations", str(int(train_params["iterations"]))])
-                if "resolution" in train_params and train_params["resolution"] is not None:
+                factor = pyramid_factor(train_params.get("resolution"))
+                if factor and os.path.isdir(os.path.join(dataset_dir, f"images_{factor}")):
+                    # Pre-resized level: load it as-is instead of resizing every pass
+                    args.extend(["--images", f"images_{factor}", "--resolution", "1"])
+                elif "resolution" in train_params and train_params["resolution"] is not None:
                     args.extend(["--resolution", str(int(train_params["resolution"]))])
                 if "data_device" in train_params and train_params["data_device"] is not None:
                     args.extend(["--data_device", str(train_params["data_device"])])
@@ -835,38 +793,45 @@ class GSRunner:
                     limit=10 * 1024 * 1024,  # 10MB buffer limit
                 )
                 self._processes[block_id] = proc
+                profiler = resource_profiler.start("gs", block_id, "training", proc.pid, tool="train.py")
+                try:
+                    t_train = time.time()
+                    last_progress_commit = 0.0
+                    parser = LogParser("gs")
+
+                    assert proc.stdout is not None
+                    while True:
+                        if self._cancelled.get(block_id):
+                            raise asyncio.CancelledError()
+
+                        line_b = await proc.stdout.readline()
+                        if not line_b:
+                            break
+                        line = line_b.decode("utf-8", errors="replace").rstrip("\n")
+                        log(line)
+
+                        # tqdm redraws with '\r'; only the last redraw is current
+                        parsed = parser.parse_line(line.rsplit("\r", 1)[-1])
+                        if parsed and parsed.stage == "training":
+                            pct = parsed.progress
+                            # commit throttling: at most once per 0.5s to reduce DB writes
+                            now = time.time()
+                            if now - last_progress_commit > 0.5:
+                                block.gs_progress = max(block.gs_progress or 0.0, pct)
+                                await db.commit()
+                                last_progress_commit = now
+                                progress_hub.publish_stage(block_id, "gs", "training", block.gs_progress, line)
 
-                t_train = time.time()
-                last_progress_commit = 0.0
-
-                assert proc.stdout is not None
-                while True:
-                    if self._cancelled.get(block_id):
-                        raise asyncio.CancelledError()
-
-                    line_b = await proc.stdout.readline()
-                    if not line_b:
-                        break
-                    line = line_b.decode("utf-8", errors="replace").rstrip("\n")
-                    log(line)
-
-                    m = _TQDM_PERCENT_RE.search(line)
-                    if m:
-                        pct = float(m.group(1))
-                        # commit throttling: at most once per 0.5s to reduce DB writes
-                        now = time.time()
-                        if now - last_progress_commit > 0.5:
-                            block.gs_progress = max(block.gs_progress or 0.0, pct)
-                            await db.commit()
-                            last_progress_commit = now
-
-                rc = await proc.wait()
+                    rc = await proc.wait()
+                finally:
+                    await resource_profiler.finish("gs", block_id, profiler, proc.returncode)
                 stage_times["training"] = time.time() - t_train
 
                 if self._cancelled.get(block_id):
                     block.gs_status = "CANCELLED"
                     block.gs_current_stage = "cancelled"
                     await db.commit()
+                    progress_hub.publish_stage(block_id, "gs", "cancelled", block.gs_progress or 0.0, "3DGS training cancelled", status="CANCELLED")
                     return
 
                 if rc != 0:
@@ -875,13 +840,15 @@ class GSRunner:
                 block.gs_status = "COMPLETED"
                 block.gs_current_stage = "completed"
                 block.gs_progress = 100.0
+                progress_hub.publish_stage(block_id, "gs", "completed", 100.0, "3DGS training completed", status="COMPLETED")
                 # update statistics
                 stats = block.gs_statistics or {}
                 stats["stage_times"] = stage_times
                 total_time = time.time() - start_ts
                 stats["total_time"] = total_time
-                block.gs_statistics = stats
+                block.gs_statistics = resource_profiler.attach(stats, "gs", block_id)
                 await db.commit()
+                benchmark_store.schedule("gs", block_id)
                 
                 # Send task completed notification
                 await task_notifier.on_task_completed(
@@ -945,6 +912,7 @@ class GSRunner:
                     block.gs_status = "CANCELLED"
                     block.gs_current_stage = "cancelled"
                     await db.commit()
+            progress_hub.publish_stage(block_id, "gs", "cancelled", 0.0, "3DGS training cancelled", status="CANCELLED")
         except Exception as e:
             log(f"[GSRunner] Error: {e}")
             # Stop TensorBoard on error
@@ -956,11 +924,12 @@ class GSRunner:
                     block.gs_status = "FAILED"
                     block.gs_current_stage = "failed"
                     block.gs_error_message = str(e)
+                    progress_hub.publish_stage(block_id, "gs", "failed", block.gs_progress or 0.0, str(e), status="FAILED")
                     stats = block.gs_statistics or {}
                     stats["stage_times"] = stage_times
                     total_time = time.time() - start_ts
                     stats["total_time"] = total_time
-                    block.gs_statistics = stats
+                    block.gs_statistics = resource_profiler.attach(stats, "gs", block_id)
                     await db.commit()
                     
                     # Send task failed notification
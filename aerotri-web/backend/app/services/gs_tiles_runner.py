@@ -26,9 +26,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from ..models.block import Block
 from ..models.database import AsyncSessionLocal
 from .ply_parser import parse_ply_file
+from .progress_hub import progress_hub
 from .gltf_gaussian_builder import build_gltf_gaussian
 from .spz_loader import load_spz_file, check_spz_available
 from .tiles_slicer import TilesSlicer, TileInfo
+from .resource_profiler import resource_profiler
 
 
 # Compatibility helper for Python < 3.9
@@ -211,6 +213,7 @@ class GSTilesRunner:
             # If log file setup fails, continue without file logging
             self._log_files[block_id] = None
         
+        resource_profiler.begin_run("gs_tiles", block_id)
         try:
             self._log(block_id, "开始 3D GS PLY 转 3D Tiles 转换")
             
@@ -238,6 +241,7 @@ class GSTilesRunner:
                 setattr(update_block, 'gs_tiles_progress', 10.0)
                 setattr(update_block, 'gs_tiles_current_stage', "准备转换工具")
                 await update_db.commit()
+            progress_hub.publish_stage(block_id, "gs_tiles", "准备转换工具", 10.0)
             
             # Stage 1: Parse PLY or convert to SPZ
             self._log(block_id, "阶段 1: 处理输入文件")
@@ -297,6 +301,7 @@ class GSTilesRunner:
                 setattr(update_block, 'gs_tiles_progress', 20.0)
                 setattr(update_block, 'gs_tiles_current_stage', "生成 glTF Gaussian")
                 await update_db.commit()
+            progress_hub.publish_stage(block_id, "gs_tiles", "生成 glTF Gaussian", 20.0)
             
             # Stage 2: Generate glTF Gaussian
             self._log(block_id, "阶段 2: 生成 glTF Gaussian")
@@ -325,6 +330,7 @@ class GSTilesRunner:
                 setattr(update_block, 'gs_tiles_progress', 40.0)
                 setattr(update_block, 'gs_tiles_current_stage', "空间切片")
                 await update_db.commit()
+            progress_hub.publish_stage(block_id, "gs_tiles", "空间切片", 40.0)
             
             # Stage 3: Spatial slicing
             self._log(block_id, "阶段 3: 空间切片")
@@ -344,6 +350,7 @@ class GSTilesRunner:
                 setattr(update_block, 'gs_tiles_progress', 60.0)
                 setattr(update_block, 'gs_tiles_current_stage', "生成 LOD")
                 await update_db.commit()
+            progress_hub.publish_stage(block_id, "gs_tiles", "生成 LOD", 60.0)
             
             # Stage 4: Generate LOD levels (optional)
             generate_lod = convert_params.get("generate_lod", True)
@@ -377,6 +384,9 @@ class GSTilesRunner:
                     setattr(update_block, 'gs_tiles_current_stage', "B3DM 转换")
                 setattr(update_block, 'gs_tiles_progress', 70.0)
                 await update_db.commit()
+            progress_hub.publish_stage(
+                block_id, "gs_tiles", "生成 GLB tiles" if use_3dtiles_1_1 else "B3DM 转换", 70.0
+            )
             
             # Stage 5: Generate GLB tiles (3D Tiles 1.1) or Convert to B3DM (3D Tiles 1.0)
             if use_3dtiles_1_1:
@@ -442,6 +452,7 @@ class GSTilesRunner:
                                     setattr(update_block, 'gs_tiles_progress', progress)
                                     setattr(update_block, 'gs_tiles_current_stage', f"生成 GLB tiles ({processed_tiles}/{total_tiles})")
                                     await update_db.commit()
+                                progress_hub.publish_stage(block_id, "gs_tiles", f"生成 GLB tiles ({processed_tiles}/{total_tiles})", progress)
                         else:
                             # 3D Tiles 1.0: 转换为 B3DM
                             tile_b3dm = output_dir / f"tile_{tile.tile_id}_L{lod_level}.b3dm"
@@ -459,6 +470,7 @@ class GSTilesRunner:
                                     setattr(update_block, 'gs_tiles_progress', progress)
                                     setattr(update_block, 'gs_tiles_current_stage', f"B3DM 转换 ({processed_tiles}/{total_tiles})")
                                     await update_db.commit()
+                                progress_hub.publish_stage(block_id, "gs_tiles", f"B3DM 转换 ({processed_tiles}/{total_tiles})", progress)
                             
                             # Clean up intermediate GLB file (only for B3DM mode)
                             if tile_glb.exists():
@@ -496,6 +508,7 @@ class GSTilesRunner:
                 setattr(update_block, 'gs_tiles_progress', 90.0)
                 setattr(update_block, 'gs_tiles_current_stage', "生成 tileset.json")
                 await update_db.commit()
+            progress_hub.publish_stage(block_id, "gs_tiles", "生成 tileset.json", 90.0)
             
             # Stage 6: Generate tileset.json
             self._log(block_id, "阶段 6: 生成 tileset.json")
@@ -545,8 +558,9 @@ class GSTilesRunner:
                 output_size = sum(f.stat().st_size for f in output_dir.rglob('*') if f.is_file())
                 stats['output_size_mb'] = output_size / (1024 * 1024)
                 
-                setattr(update_block, 'gs_tiles_statistics', stats)
+                setattr(update_block, 'gs_tiles_statistics', resource_profiler.attach(stats, "gs_tiles", block_id))
                 await update_db.commit()
+            progress_hub.publish_stage(block_id, "gs_tiles", "完成", 100.0, status="COMPLETED")
             
             self._log(block_id, "转换完成")
             self._log(block_id, f"统计信息: {len(b3dm_tiles)} 个 tiles, {gaussian_data['num_points']} 个 splats")
@@ -561,6 +575,7 @@ class GSTilesRunner:
                 setattr(update_block, 'gs_tiles_status', "FAILED")
                 setattr(update_block, 'gs_tiles_error_message', error_msg)
                 await update_db.commit()
+            progress_hub.publish_stage(block_id, "gs_tiles", "failed", 0.0, error_msg, status="FAILED")
         
         finally:
             # Clean up
@@ -616,8 +631,11 @@ class GSTilesRunner:
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
             )
-            
-            stdout, stderr = await process.communicate()
+            profiler = resource_profiler.start("gs_tiles", block_id, "ply_to_spz", process.pid, tool=ply_to_spz_exe)
+            try:
+                stdout, stderr = await process.communicate()
+            finally:
+                await resource_profiler.finish("gs_tiles", block_id, profiler, process.returncode)
             
             if process.returncode != 0:
                 error_msg = stderr.decode('utf-8', errors='ignore')
@@ -0,0 +1,371 @@
+"""Per-block image catalog service.
+
+The catalog (``BlockImage`` rows) is filled once when a block is created and
+refreshed incrementally afterwards:
+
+- the directory's own mtime is remembered per block, so an unchanged
+  directory costs one ``stat`` instead of a scan;
+- when it changed, one ``os.scandir`` pass is diffed against the stored
+  (size, mtime) of every row and only added / modified files are re-read.
+
+Metadata (dimensions, EXIF GPS / capture time / camera) comes from image
+headers only: JPEGs go through the native APP1/SOF reader in ``exif_reader``,
+other formats through PIL. Large batches are read in a process pool.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from PIL import Image
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Block, BlockImage, ThumbnailState
+from .exif_reader import read_jpeg_exif
+from .image_workers import use_pool
+from .workspace_service import IMAGE_EXTENSIONS
+
+# EXIF tag ids
+_TAG_MAKE = 271
+_TAG_MODEL = 272
+_TAG_DATETIME = 306
+_TAG_DATETIME_ORIGINAL = 36867
+_IFD_EXIF = 0x8769
+_IFD_GPS = 0x8825
+
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+
+
+def block_image_dir(block: Block) -> Optional[str]:
+    # Prefer safe per-block working directory
+    return block.working_image_path or block.image_path
+
+
+def scan_image_files(directory: str) -> Dict[str, Tuple[int, float]]:
+    """name -> (size, mtime) of the image files in ``directory`` (non-recursive, unsorted)."""
+    files: Dict[str, Tuple[int, float]] = {}
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if os.path.splitext(entry.name)[1].lower() not in IMAGE_EXTENSIONS:
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                files[entry.name] = (st.st_size, st.st_mtime)
+    except OSError:
+        return {}
+    return files
+
+
+def _rational(value: Any) -> float:
+    if isinstance(value, tuple) and len(value) == 2:
+        return float(value[0]) / float(value[1]) if value[1] else 0.0
+    return float(value)
+
+
+def _dms_to_degrees(dms: Any, ref: Any) -> Optional[float]:
+    try:
+        d, m, s = (_rational(v) for v in dms)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    deg = d + m / 60.0 + s / 3600.0
+    if isinstance(ref, bytes):
+        ref = ref.decode("ascii", errors="ignore")
+    return -deg if str(ref).strip().upper() in ("S", "W") else deg
+
+
+def _exif_text(value: Any, limit: int = 64) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, bytes):
+        value = value.decode("utf-8", errors="ignore")
+    text = str(value).strip("\x00 ").strip()
+    return text[:limit] or None
+
+
+def _parse_exif_time(value: Any) -> Optional[datetime]:
+    text = _exif_text(value)
+    if not text:
+        return None
+    try:
+        return datetime.strptime(text[:19], "%Y:%m:%d %H:%M:%S")
+    except ValueError:
+        return None
+
+
+def _read_header_pil(path: str) -> Optional[Tuple[Tuple[int, int], Any, Any, Any]]:
+    try:
+        with Image.open(path) as img:
+            size = img.size
+            exif = img.getexif()
+    except Exception:
+        return None
+    try:
+        exif_ifd = exif.get_ifd(_IFD_EXIF) if exif else {}
+        gps = exif.get_ifd(_IFD_GPS) if exif else {}
+    except Exception:
+        exif_ifd, gps = {}, {}
+    return size, exif, exif_ifd, gps
+
+
+def read_image_metadata(path: str) -> Dict[str, Any]:
+    """Dimensions and EXIF GPS / capture time / camera from the image header.
+
+    Missing or unreadable fields are None; never raises for a bad image.
+    """
+    meta: Dict[str, Any] = {
+        "width": None, "height": None,
+        "gps_lat": None, "gps_lon": None, "gps_alt": None,
+        "captured_at": None, "camera_make": None, "camera_model": None,
+    }
+    header = None
+    if os.path.splitext(path)[1].lower() in (".jpg", ".jpeg"):
+        native = read_jpeg_exif(path)
+        if native and native["size"]:
+            header = native["size"], native["ifd0"], native["exif"], native["gps"]
+    if header is None:
+        header = _read_header_pil(path)
+    if header is None:
+        return meta
+    (meta["width"], meta["height"]), ifd0, exif_ifd, gps = header
+
+    meta["camera_make"] = _exif_text(ifd0.get(_TAG_MAKE))
+    meta["camera_model"] = _exif_text(ifd0.get(_TAG_MODEL))
+    meta["captured_at"] = _parse_exif_time(exif_ifd.get(_TAG_DATETIME_ORIGINAL) or ifd0.get(_TAG_DATETIME))
+
+    if gps and 2 in gps and 4 in gps:
+        meta["gps_lat"] = _dms_to_degrees(gps[2], gps.get(1, "N"))
+        meta["gps_lon"] = _dms_to_degrees(gps[4], gps.get(3, "E"))
+        if 6 in gps:
+            try:
+                alt = _rational(gps[6])
+                # GPSAltitudeRef 1 = below sea level
+                meta["gps_alt"] = -alt if gps.get(5) in (1, b"\x01") else alt
+            except (TypeError, ValueError, ZeroDivisionError):
+                pass
+    return meta
+
+
+# Names per IN (...) clause, well below SQLite's bound-parameter limit
+_IN_CHUNK = 500
+
+
+def _chunks(names: List[str]) -> List[List[str]]:
+    return [names[i:i + _IN_CHUNK] for i in range(0, len(names), _IN_CHUNK)]
+
+
+def read_metadata_batch(
+    directory: str,
+    names: List[str],
+    max_workers: int = DEFAULT_WORKERS,
+) -> List[Dict[str, Any]]:
+    """``read_image_metadata`` for ``names`` in ``directory``, in input order."""
+    paths = [os.path.join(directory, name) for name in names]
+    if use_pool(len(paths), max_workers):
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            chunksize = max(1, len(paths) // (max_workers * 4))
+            return list(pool.map(read_image_metadata, paths, chunksize=chunksize))
+    return [read_image_metadata(p) for p in paths]
+
+
+def read_gps_positions(directory: str) -> List[Tuple[str, float, float, Optional[float]]]:
+    """(name, lat, lon, alt) of the GPS-tagged images of a directory, sorted by name.
+
+    For directories without a catalog (e.g. images outside the block workspace).
+    """
+    names = sorted(scan_image_files(directory))
+    positions = []
+    for name, meta in zip(names, read_metadata_batch(directory, names)):
+        if meta["gps_lat"] is not None and meta["gps_lon"] is not None:
+            positions.append((name, meta["gps_lat"], meta["gps_lon"], meta["gps_alt"]))
+    return positions
+
+
+@dataclass
+class CatalogRefresh:
+    """Outcome of one catalog refresh."""
+    scanned: bool
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+
+
+class ImageCatalogService:
+    """Indexed access to the images of a block."""
+
+    # block_id -> (image dir, dir mtime_ns) at the last successful refresh
+    _dir_state: Dict[str, Tuple[str, int]] = {}
+    # block_id -> lock serializing refreshes of that block (concurrent
+    # refreshes would insert the same names twice)
+    _locks: Dict[str, asyncio.Lock] = {}
+
+    @staticmethod
+    def forget(block_id: str) -> None:
+        """Drop the in-memory state of a block (call when the block is deleted)."""
+        ImageCatalogService._dir_state.pop(block_id, None)
+        lock = ImageCatalogService._locks.get(block_id)
+        if lock is not None and not lock.locked():
+            ImageCatalogService._locks.pop(block_id, None)
+
+    @staticmethod
+    def _dir_mtime(directory: str) -> Optional[int]:
+        try:
+            return os.stat(directory).st_mtime_ns
+        except OSError:
+            return None
+
+    @staticmethod
+    async def refresh(db: AsyncSession, block: Block, force: bool = False) -> CatalogRefresh:
+        """Bring the catalog of ``block`` in sync with its image directory.
+
+        Skips the scan when the directory mtime is unchanged since the last
+        refresh (unless ``force``); files rewritten in place without a rename
+        therefore need ``force=True``. Commits when rows changed. Refreshes of
+        the same block are serialized.
+        """
+        directory = block_image_dir(block)
+        if not directory or not os.path.isdir(directory):
+            return CatalogRefresh(scanned=False)
+        lock = ImageCatalogService._locks.setdefault(block.id, asyncio.Lock())
+        async with lock:
+            # Re-checked under the lock: a refresh we waited for may have done the work
+            dir_mtime = ImageCatalogService._dir_mtime(directory)
+            if not force and ImageCatalogService._dir_state.get(block.id) == (directory, dir_mtime):
+                return CatalogRefresh(scanned=False)
+            return await ImageCatalogService._refresh(db, block, directory, dir_mtime)
+
+    @staticmethod
+    async def _refresh(db: AsyncSession, block: Block, directory: str, dir_mtime: Optional[int]) -> CatalogRefresh:
+        files = await asyncio.to_thread(scan_image_files, directory)
+        result = await db.execute(
+            select(BlockImage.name, BlockImage.size, BlockImage.mtime).where(BlockImage.block_id == block.id)
+        )
+        existing = {name: (size, mtime) for name, size, mtime in result.all()}
+
+        removed = [name for name in existing if name not in files]
+        changed = sorted(name for name, state in files.items() if existing.get(name) != state)
+        stats = CatalogRefresh(scanned=True, removed=len(removed))
+
+        for chunk in _chunks(removed):
+            await db.execute(
+                delete(BlockImage).where(BlockImage.block_id == block.id, BlockImage.name.in_(chunk))
+            )
+        if changed:
+            metas = await asyncio.to_thread(read_metadata_batch, directory, changed)
+            rows: Dict[str, BlockImage] = {}
+            for chunk in _chunks([n for n in changed if n in existing]):
+                result = await db.execute(
+                    select(BlockImage).where(BlockImage.block_id == block.id, BlockImage.name.in_(chunk))
+                )
+                rows.update((row.name, row) for row in result.scalars().all())
+            for name, meta in zip(changed, metas):
+                size, mtime = files[name]
+                row = rows.get(name)
+                if row is None:
+                    row = BlockImage(block_id=block.id, name=name)
+                    db.add(row)
+                    stats.added += 1
+                else:
+                    stats.updated += 1
+                row.size = size
+                row.mtime = mtime
+                # File content changed: previously generated thumbnails are stale
+                row.thumbnail_state = ThumbnailState.NONE
+                for key, value in meta.items():
+                    setattr(row, key, value)
+
+        if removed or changed:
+            await db.commit()
+        ImageCatalogService._dir_state[block.id] = (directory, dir_mtime)
+        return stats
+
+    @staticmethod
+    async def count(db: AsyncSession, block_id: str) -> int:
+        result = await db.execute(
+            select(func.count()).select_from(BlockImage).where(BlockImage.block_id == block_id)
+        )
+        return int(result.scalar() or 0)
+
+    @staticmethod
+    async def counts_by_block(db: AsyncSession) -> Dict[str, int]:
+        """Image count of every catalogued block in one grouped query."""
+        result = await db.execute(
+            select(BlockImage.block_id, func.count()).group_by(BlockImage.block_id)
+        )
+        return {block_id: int(n) for block_id, n in result.all()}
+
+    @staticmethod
+    async def list_page(db: AsyncSession, block_id: str, offset: int, limit: int) -> List[BlockImage]:
+        result = await db.execute(
+            select(BlockImage)
+            .where(BlockImage.block_id == block_id)
+            .order_by(BlockImage.name)
+            .offset(offset)
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def list_names(db: AsyncSession, block_id: str) -> List[str]:
+        """All image names of a block, sorted."""
+        result = await db.execute(
+            select(BlockImage.name).where(BlockImage.block_id == block_id).order_by(BlockImage.name)
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def names_in_range(db: AsyncSession, block_id: str, start_name: str, end_name: str) -> List[str]:
+        """Sorted image names in [start_name, end_name]."""
+        result = await db.execute(
+            select(BlockImage.name)
+            .where(
+                BlockImage.block_id == block_id,
+                BlockImage.name >= start_name,
+                BlockImage.name <= end_name,
+            )
+            .order_by(BlockImage.name)
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def gps_positions(db: AsyncSession, block_id: str) -> List[Tuple[str, float, float, Optional[float]]]:
+        """(name, lat, lon, alt) of the GPS-tagged images of a block, sorted by name."""
+        result = await db.execute(
+            select(BlockImage.name, BlockImage.gps_lat, BlockImage.gps_lon, BlockImage.gps_alt)
+            .where(
+                BlockImage.block_id == block_id,
+                BlockImage.gps_lat.is_not(None),
+                BlockImage.gps_lon.is_not(None),
+            )
+            .order_by(BlockImage.name)
+        )
+        return [tuple(row) for row in result.all()]
+
+    @staticmethod
+    async def get(db: AsyncSession, block_id: str, name: str) -> Optional[BlockImage]:
+        result = await db.execute(
+            select(BlockImage).where(BlockImage.block_id == block_id, BlockImage.name == name)
+        )
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def remove(db: AsyncSession, block_id: str, names: Optional[List[str]] = None) -> None:
+        """Delete catalog rows of a block (all of them when ``names`` is None). Does not commit."""
+        if names is None:
+            await db.execute(delete(BlockImage).where(BlockImage.block_id == block_id))
+            ImageCatalogService.forget(block_id)
+            return
+        for chunk in _chunks(names):
+            await db.execute(
+                delete(BlockImage).where(BlockImage.block_id == block_id, BlockImage.name.in_(chunk))
+            )
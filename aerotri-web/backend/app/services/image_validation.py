@@ -0,0 +1,172 @@
+"""Image validation before dense reconstruction.
+
+Checks every registered image of a sparse model before undistortion:
+
+- the header is parsed (``Image.open`` does not decode pixel data) and the
+  format must be one COLMAP/OpenMVS can read;
+- JPEGs are only decoded when the end-of-image marker is missing, i.e. when
+  the file may be truncated;
+- DJI MPO files (JPEG + stereo/preview frames) are rewritten in place as a
+  plain JPEG of their first frame.
+
+Work is spread over a process pool since decoding and MPO re-encoding are
+CPU bound. Results are cached in a JSON file keyed by each file's
+(inode, mtime, size), so re-running a reconstruction on unchanged images
+skips validation entirely.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image
+
+from .image_workers import use_pool
+
+# Formats accepted by the undistortion / OpenMVS stages
+ALLOWED_FORMATS = ("JPEG", "PNG", "TIFF", "BMP")
+VALIDATION_CACHE_NAME = ".image_validation_cache.json"
+# Bump when the validation rules change so cached results are recomputed
+VALIDATION_CACHE_VERSION = 1
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+
+STATUS_OK = "ok"
+STATUS_CONVERTED = "converted"
+STATUS_INVALID = "invalid"
+
+# JPEG end-of-image marker, searched for in the file tail (some cameras pad after it)
+_JPEG_EOI = b"\xff\xd9"
+_JPEG_TAIL_BYTES = 4096
+
+
+@dataclass
+class ImageCheck:
+    """Validation outcome of one image."""
+    status: str  # ok | converted | invalid
+    reason: str = ""
+
+
+def _file_key(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def _has_jpeg_eoi(path: str) -> bool:
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - _JPEG_TAIL_BYTES))
+        return _JPEG_EOI in f.read()
+
+
+def _convert_mpo(path: str, img: Image.Image) -> None:
+    """Replace an MPO file by a JPEG of its first frame."""
+    img.seek(0)
+    frame = img.convert("RGB") if img.mode != "RGB" else img.copy()
+    exif = img.info.get("exif")
+    tmp = path + ".mpo_tmp.jpg"
+    try:
+        if exif:
+            frame.save(tmp, "JPEG", quality=95, exif=exif)
+        else:
+            frame.save(tmp, "JPEG", quality=95)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def check_image(path: str) -> ImageCheck:
+    """Validate (and if needed convert) a single image. Runs in worker processes."""
+    if not os.path.isfile(path):
+        return ImageCheck(STATUS_INVALID, "file not found")
+    try:
+        with Image.open(path) as img:
+            fmt = img.format
+            if fmt == "MPO":
+                _convert_mpo(path, img)
+                return ImageCheck(STATUS_CONVERTED)
+            if fmt not in ALLOWED_FORMATS:
+                return ImageCheck(STATUS_INVALID, f"unsupported format {fmt}")
+            if fmt == "JPEG":
+                # Complete JPEGs end with EOI; only decode the suspicious ones
+                if not _has_jpeg_eoi(path):
+                    img.load()
+            else:
+                img.verify()
+    except Exception as e:
+        return ImageCheck(STATUS_INVALID, str(e) or type(e).__name__)
+    return ImageCheck(STATUS_OK)
+
+
+def _load_cache(cache_path: Optional[str]) -> Dict[str, dict]:
+    if not cache_path or not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != VALIDATION_CACHE_VERSION:
+        return {}
+    return data.get("entries") or {}
+
+
+def _save_cache(cache_path: Optional[str], entries: Dict[str, dict]) -> None:
+    if not cache_path:
+        return
+    tmp = cache_path + ".tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": VALIDATION_CACHE_VERSION, "entries": entries}, f)
+        os.replace(tmp, cache_path)
+    except OSError:
+        pass
+
+
+def validate_images(
+    images_dir: str,
+    names: Iterable[str],
+    cache_path: Optional[str] = None,
+    max_workers: int = DEFAULT_WORKERS,
+) -> Dict[str, ImageCheck]:
+    """Validate ``names`` (relative to ``images_dir``), reusing cached results.
+
+    Returns a result for every name. Converted MPO files are cached with their
+    new (inode, mtime, size), so the next run reports them as ``ok``.
+    """
+    entries = _load_cache(cache_path)
+    results: Dict[str, ImageCheck] = {}
+    todo: List[str] = []
+    for name in names:
+        path = os.path.abspath(os.path.join(images_dir, name))
+        key = _file_key(path)
+        cached = entries.get(path)
+        if key is not None and cached and tuple(cached["key"]) == key:
+            results[name] = ImageCheck(cached["status"], cached.get("reason", ""))
+        else:
+            todo.append(name)
+
+    paths = [os.path.abspath(os.path.join(images_dir, name)) for name in todo]
+    if use_pool(len(paths), max_workers):
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            checks = list(pool.map(check_image, paths, chunksize=max(1, len(paths) // (max_workers * 4))))
+    else:
+        checks = [check_image(p) for p in paths]
+
+    for name, path, check in zip(todo, paths, checks):
+        results[name] = check
+        key = _file_key(path)
+        if key is not None:
+            cached_status = STATUS_OK if check.status == STATUS_CONVERTED else check.status
+            entries[path] = {"key": list(key), **asdict(ImageCheck(cached_status, check.reason))}
+    if todo:
+        _save_cache(cache_path, entries)
+    return results
@@ -0,0 +1,121 @@
+"""Process-pool helpers for CPU-bound per-image work.
+
+Thumbnail pyramids, 3DGS training pyramids, image validation and catalog
+metadata all do the same kind of work: many small, independent, CPU-bound
+jobs on image files. This module holds what they share:
+
+- ``MIN_PARALLEL_IMAGES`` / ``use_pool``: when a process pool is worth it;
+- ``write_levels``: one image -> several downscaled copies, decoded once
+  (JPEGs via ``Image.draft``, i.e. downscaled by libjpeg in the DCT domain)
+  with every level resized from the one above it;
+- ``run_batches``: runs a batch function off the event loop, one pool task
+  per batch, in a private or caller-owned pool, or in a thread for small jobs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+# Below this many images a process pool costs more to start than it saves
+MIN_PARALLEL_IMAGES = 32
+
+# (width, height, level key) -> (width, height) of that level
+SizeFn = Callable[[int, int, Any], Tuple[int, int]]
+
+
+def use_pool(count: int, max_workers: int) -> bool:
+    """Whether ``count`` images are worth a process pool of ``max_workers``."""
+    return count >= MIN_PARALLEL_IMAGES and max_workers > 1
+
+
+def write_levels(
+    src: str,
+    out_paths: Dict[Any, str],
+    size_of: SizeFn,
+    keep_modes: Sequence[str] = ("RGB",),
+    jpeg_quality: int = 95,
+) -> bool:
+    """Write every level of ``out_paths`` (level key -> path) for one image.
+
+    ``size_of`` must be a module-level function (it is pickled into worker
+    processes). Modes outside ``keep_modes`` are converted to RGB. JPEG outputs
+    use ``jpeg_quality``; other extensions are saved in their own format.
+    Runs in worker processes; returns False instead of raising.
+    """
+    try:
+        with Image.open(src) as img:
+            width, height = img.size
+            sizes = {key: size_of(width, height, key) for key in out_paths}
+            largest = max(sizes.values(), key=lambda s: s[0] * s[1])
+            # JPEG: let the decoder downscale (result is still >= the largest level)
+            img.draft(img.mode if img.mode in keep_modes else "RGB", largest)
+            current = img.copy() if img.mode in keep_modes else img.convert("RGB")
+        for key in sorted(out_paths, key=lambda k: sizes[k][0] * sizes[k][1], reverse=True):
+            if current.size != sizes[key]:
+                current = current.resize(sizes[key], Image.Resampling.LANCZOS)
+            out = out_paths[key]
+            os.makedirs(os.path.dirname(out), exist_ok=True)
+            ext = os.path.splitext(out)[1].lower()
+            tmp = out + ".tmp" + ext
+            if ext in (".jpg", ".jpeg"):
+                current.save(tmp, "JPEG", quality=jpeg_quality)
+            else:
+                current.save(tmp)
+            os.replace(tmp, out)
+        return True
+    except Exception:
+        return False
+
+
+def write_levels_batch(jobs: Sequence[tuple]) -> List[bool]:
+    """``write_levels`` over argument tuples; one pool task per batch."""
+    return [write_levels(*job) for job in jobs]
+
+
+def batched(items: Sequence[Any], size: int) -> List[List[Any]]:
+    return [list(items[i:i + size]) for i in range(0, len(items), size)]
+
+
+async def run_batches(
+    fn: Callable[[List[Any]], Any],
+    batches: Sequence[List[Any]],
+    max_workers: int,
+    executor: Optional[Executor] = None,
+    on_batch: Optional[Callable[[List[Any], Any], None]] = None,
+    is_cancelled: Optional[Callable[[], bool]] = None,
+) -> List[Any]:
+    """``fn(batch)`` for every batch without blocking the event loop; results in batch order.
+
+    Uses ``executor`` when given (e.g. a long-lived service pool), otherwise a
+    private process pool when ``use_pool`` says it pays off, otherwise a thread.
+    ``on_batch(batch, result)`` is called as batches complete. At most
+    ``max_workers`` batches are submitted at a time; once ``is_cancelled()``
+    returns True no further batch is started and their results are None.
+    """
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(max(1, max_workers))
+
+    async def run(submit, batch):
+        async with slots:
+            if is_cancelled and is_cancelled():
+                return None
+            result = await submit(batch)
+        if on_batch:
+            on_batch(batch, result)
+        return result
+
+    if executor is not None:
+        return await asyncio.gather(*(
+            run(lambda b: loop.run_in_executor(executor, fn, b), batch) for batch in batches
+        ))
+    if not use_pool(sum(len(b) for b in batches), max_workers):
+        return [await run(lambda b: asyncio.to_thread(fn, b), batch) for batch in batches]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return await asyncio.gather(*(
+            run(lambda b: loop.run_in_executor(pool, fn, b), batch) for batch in batches
+        ))
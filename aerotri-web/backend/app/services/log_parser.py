@@ -1,6 +1,17 @@
-"""Log parser for COLMAP/GLOMAP output."""
+"""Log parser for COLMAP/GLOMAP/OpenMVS/3DGS/openMVG output.
+
+Each tool has a ``ToolProfile``: a list of ``ProgressRule`` entries. A profile is
+compiled once into
+
+- a keyword prefilter (literal substrings, checked with ``in``), and
+- a single alternation regex with one named group per rule,
+
+so a typical log line that carries no progress information costs a handful of
+substring checks instead of ~25 ``re.search`` calls.
+"""
+import os
 import re
-from typing import Optional, Tuple, Dict
+from typing import Optional, Tuple, Dict, List
 from dataclasses import dataclass, field
 from datetime import datetime
 
@@ -24,165 +35,359 @@ class StageInfo:
     elapsed_seconds: float = 0.0
 
 
+@dataclass
+class ProgressRule:
+    """One recognizable log line.
+
+    Attributes:
+        pattern: Regex (searched anywhere in the line)
+        stage: Stage entered when the line is seen (for stage timings)
+        progress_stage: Detail stage reported with the progress value
+        kind: How captured groups are interpreted:
+            - "ratio":   (current, total)
+            - "percent": last group is a percentage
+            - "block":   (i, n, j, m) nested block counters, e.g. exhaustive matching
+            - "done":    stage completed, first group is elapsed seconds
+            - "stage":   stage transition only, no progress
+        keyword: Literal substring used by the prefilter; derived from the
+            pattern's literal prefix when empty
+    """
+    pattern: str
+    stage: Optional[str] = None
+    progress_stage: Optional[str] = None
+    kind: str = "ratio"
+    keyword: str = ""
+
+
+@dataclass
+class ToolProfile:
+    """Log format description for one external tool."""
+    name: str
+    rules: List[ProgressRule]
+    stage_weights: Dict[str, int] = field(default_factory=dict)
+
+
+_REGEX_META = set(".^$*+?{}[]\\|()")
+
+
+def _literal_prefix(pattern: str) -> str:
+    """Longest leading literal substring of a regex (used as prefilter keyword)."""
+    out = []
+    for ch in pattern:
+        if ch in _REGEX_META:
+            break
+        out.append(ch)
+    # A trailing quantifier would make the last literal char optional
+    if len(out) < len(pattern) and pattern[len(out)] in "*?{":
+        out = out[:-1]
+    return "".join(out)
+
+
+class CompiledProfile:
+    """Prefilter + combined alternation regex for a ``ToolProfile``."""
+
+    def __init__(self, profile: ToolProfile):
+        self.profile = profile
+        keywords = []
+        parts = []
+        self._slots: List[Tuple[ProgressRule, int, int]] = []
+        for i, rule in enumerate(profile.rules):
+            kw = rule.keyword or _literal_prefix(rule.pattern)
+            if not kw:
+                raise ValueError(f"Rule {rule.pattern!r} needs an explicit keyword for the prefilter")
+            keywords.append(kw)
+            parts.append(f"(?P<r{i}>{rule.pattern})")
+        # Drop keywords that contain a shorter keyword: the shorter one already admits the line
+        uniq = sorted(set(keywords), key=len)
+        self.keywords: Tuple[str, ...] = tuple(
+            k for idx, k in enumerate(uniq) if not any(s in k for s in uniq[:idx])
+        )
+        self.regex = re.compile("|".join(parts))
+        for i, rule in enumerate(profile.rules):
+            outer = self.regex.groupindex[f"r{i}"]
+            n_inner = re.compile(rule.pattern).groups
+            self._slots.append((rule, outer + 1, outer + 1 + n_inner))
+
+    def match(self, line: str) -> Optional[Tuple[ProgressRule, Tuple[Optional[str], ...]]]:
+        """Return (rule, captured groups) for the first matching rule, if any."""
+        for kw in self.keywords:
+            if kw in line:
+                break
+        else:
+            return None
+        m = self.regex.search(line)
+        if not m:
+            return None
+        rule, start, end = self._slots[int(m.lastgroup[1:])]
+        return rule, m.groups()[start - 1:end - 1]
+
+
+# ---------------------------------------------------------------------------
+# Built-in tool profiles
+# ---------------------------------------------------------------------------
+
+_GLOBAL_SFM_RULES = [
+    ProgressRule(r"Running preprocessing", stage="preprocessing", kind="stage"),
+    ProgressRule(r"Running view graph calibration", stage="view_graph_calibration", kind="stage"),
+    ProgressRule(r"Running relative pose estimation", stage="relative_pose_estimation", kind="stage"),
+    ProgressRule(r"Estimating relative pose: (\d+)%", stage="relative_pose_estimation",
+                 progress_stage="relative_pose", kind="percent"),
+    ProgressRule(r"Running rotation averaging", stage="rotation_averaging", kind="stage"),
+    ProgressRule(r"Running track establishment", stage="track_establishment", kind="stage"),
+    ProgressRule(r"Establishing tracks (\d+) / (\d+)", stage="track_establishment",
+                 progress_stage="track_establishment"),
+    ProgressRule(r"Running global positioning", stage="global_positioning", kind="stage"),
+    ProgressRule(r"Running bundle adjustment", stage="bundle_adjustment", kind="stage"),
+    ProgressRule(r"Global bundle adjustment iteration (\d+) / (\d+)", stage="bundle_adjustment",
+                 progress_stage="bundle_adjustment"),
+    ProgressRule(r"Running retriangulation", stage="retriangulation", kind="stage"),
+    ProgressRule(r"Triangulating image (\d+) / (\d+)", stage="retriangulation",
+                 progress_stage="retriangulation"),
+    ProgressRule(r"Loading Images (\d+) / (\d+)", progress_stage="loading"),
+    ProgressRule(r"Loading Image Pair (\d+) / (\d+)", progress_stage="loading_pairs"),
+    ProgressRule(r"Initializing pairs (\d+) / (\d+)", progress_stage="initializing_pairs"),
+    ProgressRule(r"Establishing pairs (\d+) / (\d+)", progress_stage="establishing_pairs"),
+    ProgressRule(r"Reconstruction done in ([\d.]+) seconds", stage="completed",
+                 progress_stage="completed", kind="done"),
+]
+
+_SFM_STAGE_WEIGHTS = {
+    "loading": 5,
+    "feature_extraction": 15,
+    "matching": 15,
+    "preprocessing": 5,
+    "view_graph_calibration": 2,
+    "relative_pose_estimation": 10,
+    "rotation_averaging": 5,
+    "track_establishment": 8,
+    "global_positioning": 15,
+    "bundle_adjustment": 15,
+    "retriangulation": 5,
+}
+
+COLMAP_PROFILE = ToolProfile(
+    name="colmap",
+    rules=[
+        ProgressRule(r"Running feature extraction", stage="feature_extraction", kind="stage"),
+        ProgressRule(r"Processed image (\d+) of (\d+)", stage="feature_extraction",
+                     progress_stage="feature_extraction"),
+        ProgressRule(r"Running feature matching", stage="matching", kind="stage"),
+        # sequential/spatial/vocab_tree matchers: "Matching image [12/500]"
+        ProgressRule(r"Matching image \[(\d+)/(\d+)\]", stage="matching", progress_stage="matching"),
+        # exhaustive matcher: "Matching block [2/4, 3/4]"
+        ProgressRule(r"Matching block \[(\d+)/(\d+), (\d+)/(\d+)\]", stage="matching",
+                     progress_stage="matching", kind="block"),
+        ProgressRule(r"Matching images", stage="matching", kind="stage"),
+        # image_undistorter: "Undistorting image [12/500]"
+        ProgressRule(r"Undistorting image \[(\d+)/(\d+)\]", stage="undistortion",
+                     progress_stage="undistortion"),
+        *_GLOBAL_SFM_RULES,
+    ],
+    stage_weights=_SFM_STAGE_WEIGHTS,
+)
+
+GLOMAP_PROFILE = ToolProfile(name="glomap", rules=list(_GLOBAL_SFM_RULES), stage_weights=_SFM_STAGE_WEIGHTS)
+
+INSTANTSFM_PROFILE = ToolProfile(
+    name="instantsfm",
+    rules=[
+        *_GLOBAL_SFM_RULES,
+        # tqdm bars, e.g. "Bundle adjustment:  40%|####      | 4/10"
+        ProgressRule(r"([A-Za-z][\w ]{0,40}?):\s+(\d+)%\|", progress_stage="instantsfm",
+                     kind="percent", keyword="%|"),
+    ],
+    stage_weights=_SFM_STAGE_WEIGHTS,
+)
+
+# OpenMVS Util::Progress: "<msg> <done> (<pct>%, <elapsed>, ETA <eta>)..." / "<msg> <total> (100%, <elapsed>)"
+_MVS_PCT = r" (\d+) \((\d+(?:\.\d+)?)%"
+
+OPENMVS_PROFILE = ToolProfile(
+    name="openmvs",
+    rules=[
+        ProgressRule(r"Geometric-consistent estimated depth-maps" + _MVS_PCT, stage="depth_geometric",
+                     progress_stage="depth_geometric", kind="percent"),
+        ProgressRule(r"Estimated depth-maps" + _MVS_PCT, stage="depth_estimation",
+                     progress_stage="depth_estimation", kind="percent"),
+        ProgressRule(r"Filtered depth-maps" + _MVS_PCT, stage="depth_filtering",
+                     progress_stage="depth_filtering", kind="percent"),
+        ProgressRule(r"(?:Dense fused|Fused|Merged) depth-maps" + _MVS_PCT, stage="fusion",
+                     progress_stage="fusion", kind="percent", keyword="depth-maps"),
+        ProgressRule(r"Point visibility checks" + _MVS_PCT, stage="fusion",
+                     progress_stage="visibility", kind="percent"),
+        ProgressRule(r"Points inserted" + _MVS_PCT, stage="delaunay",
+                     progress_stage="delaunay", kind="percent"),
+        ProgressRule(r"Points weighted" + _MVS_PCT, stage="graph_cut",
+                     progress_stage="graph_cut", kind="percent"),
+        ProgressRule(r"Decimated faces" + _MVS_PCT, stage="mesh_cleaning",
+                     progress_stage="mesh_decimation", kind="percent"),
+        ProgressRule(r"Processed iterations" + _MVS_PCT, stage="refine",
+                     progress_stage="refine", kind="percent"),
+        ProgressRule(r"Initialized views" + _MVS_PCT, stage="texture",
+                     progress_stage="texture_views", kind="percent"),
+        ProgressRule(r"Processed (?:images|points)" + _MVS_PCT, stage="import",
+                     progress_stage="import", kind="percent"),
+    ],
+)
+
+GS_PROFILE = ToolProfile(
+    name="gs",
+    rules=[
+        ProgressRule(r"Reading camera (\d+)/(\d+)", stage="loading", progress_stage="loading_cameras"),
+        ProgressRule(r"Loading Training Cameras", stage="loading", kind="stage"),
+        ProgressRule(r"Training progress:\s*(\d+)%", stage="training", progress_stage="training", kind="percent"),
+        ProgressRule(r"\[ITER (\d+)\] Saving Gaussians", stage="training", kind="stage", keyword="Saving Gaussians"),
+        ProgressRule(r"Training complete", stage="completed", kind="stage"),
+    ],
+)
+
+OPENMVG_PROFILE = ToolProfile(
+    name="openmvg",
+    rules=[
+        # system::LoggerProgress: "[ 42%] ..." style counters
+        ProgressRule(r"\[\s*(\d+)%\]", progress_stage="openmvg", kind="percent", keyword="%]"),
+        ProgressRule(r"- EXTRACT FEATURES -|Compute features", stage="feature_extraction", kind="stage",
+                     keyword="FEATURES"),
+        ProgressRule(r"Putative matches|PutativeMatching", stage="matching", kind="stage", keyword="utative"),
+        ProgressRule(r"Geometric filtering", stage="geometric_filter", kind="stage"),
+        ProgressRule(r"Relative rotations computation|Relative_rotation", stage="rotation_averaging",
+                     kind="stage", keyword="elative"),
+        ProgressRule(r"Translation averaging", stage="global_positioning", kind="stage"),
+        ProgressRule(r"Bundle Adjustment|Bundle adjustment", stage="bundle_adjustment", kind="stage",
+                     keyword="undle "),
+    ],
+)
+
+TOOL_PROFILES: Dict[str, ToolProfile] = {}
+_COMPILED: Dict[str, CompiledProfile] = {}
+
+
+def register_tool_profile(profile: ToolProfile) -> None:
+    """Register (or replace) the profile used for a tool name."""
+    TOOL_PROFILES[profile.name] = profile
+    _COMPILED[profile.name] = CompiledProfile(profile)
+
+
+for _p in (COLMAP_PROFILE, GLOMAP_PROFILE, INSTANTSFM_PROFILE, OPENMVS_PROFILE, GS_PROFILE, OPENMVG_PROFILE):
+    register_tool_profile(_p)
+
+
+_OPENMVS_EXES = {
+    "interfacecolmap", "densifypointcloud", "reconstructmesh", "refinemesh", "texturemesh",
+    "transformscene", "interfaceopenmvg",
+}
+
+
+def detect_tool(cmd: List[str]) -> str:
+    """Guess the tool profile name from a command line (defaults to colmap)."""
+    if not cmd:
+        return "colmap"
+    exe = os.path.basename(str(cmd[0])).lower()
+    if exe.startswith("openmvg_"):
+        return "openmvg"
+    if exe in _OPENMVS_EXES:
+        return "openmvs"
+    if "glomap" in exe:
+        return "glomap"
+    if "ins-" in exe or "instantsfm" in exe:
+        return "instantsfm"
+    if exe.startswith("python") and any(os.path.basename(str(a)) == "train.py" for a in cmd[1:3]):
+        return "gs"
+    return "colmap"
+
+
 class LogParser:
-    """Parser for COLMAP/GLOMAP log output."""
-    
-    # Stage patterns
-    STAGE_PATTERNS = {
-        "feature_extraction": [
-            r"Running feature extraction",
-            r"Processed image (\d+) of (\d+)",
-        ],
-        "matching": [
-            r"Running feature matching",
-            r"Matching images",
-        ],
-        "preprocessing": [
-            r"Running preprocessing",
-        ],
-        "view_graph_calibration": [
-            r"Running view graph calibration",
-        ],
-        "relative_pose_estimation": [
-            r"Running relative pose estimation",
-            r"Estimating relative pose: (\d+)%",
-        ],
-        "rotation_averaging": [
-            r"Running rotation averaging",
-        ],
-        "track_establishment": [
-            r"Running track establishment",
-            r"Establishing tracks (\d+) / (\d+)",
-        ],
-        "global_positioning": [
-            r"Running global positioning",
-        ],
-        "bundle_adjustment": [
-            r"Running bundle adjustment",
-            r"Global bundle adjustment iteration (\d+) / (\d+)",
-        ],
-        "retriangulation": [
-            r"Running retriangulation",
-            r"Triangulating image (\d+) / (\d+)",
-        ],
-        "completed": [
-            r"Reconstruction done in ([\d.]+) seconds",
-        ],
-    }
-    
-    # Progress extraction patterns
-    PROGRESS_PATTERNS = [
-        # Feature extraction: "Processed image X of Y"
-        (r"Processed image (\d+) of (\d+)", "feature_extraction"),
-        # Loading images: "Loading Images X / Y"
-        (r"Loading Images (\d+) / (\d+)", "loading"),
-        # Relative pose: "Estimating relative pose: X%"
-        (r"Estimating relative pose: (\d+)%", "relative_pose"),
-        # Track establishment: "Establishing tracks X / Y"
-        (r"Establishing tracks (\d+) / (\d+)", "track_establishment"),
-        # Triangulation: "Triangulating image X / Y"
-        (r"Triangulating image (\d+) / (\d+)", "retriangulation"),
-        # Bundle adjustment iteration: "Global bundle adjustment iteration X / Y"
-        (r"Global bundle adjustment iteration (\d+) / (\d+)", "bundle_adjustment"),
-        # Image pair loading: "Loading Image Pair X / Y"
-        (r"Loading Image Pair (\d+) / (\d+)", "loading_pairs"),
-        # Initializing pairs: "Initializing pairs X / Y"
-        (r"Initializing pairs (\d+) / (\d+)", "initializing_pairs"),
-        # Establishing pairs: "Establishing pairs X / Y"
-        (r"Establishing pairs (\d+) / (\d+)", "establishing_pairs"),
-    ]
-    
-    def __init__(self):
+    """Parser for external tool log output (COLMAP profile by default)."""
+
+    def __init__(self, tool: str = "colmap"):
         self.current_stage: Optional[str] = None
         self.stages: Dict[str, StageInfo] = {}
         self.last_progress: float = 0.0
-        
+        self.tool = tool
+        self._compiled = _COMPILED[tool]
+
+    def use_tool(self, tool: str) -> None:
+        """Switch the active profile, keeping accumulated stage timings."""
+        if tool not in _COMPILED:
+            raise KeyError(f"Unknown log profile: {tool}")
+        self.tool = tool
+        self._compiled = _COMPILED[tool]
+
+    def use_command(self, cmd: List[str]) -> str:
+        """Switch the active profile based on the command about to be run."""
+        tool = detect_tool(cmd)
+        self.use_tool(tool)
+        return tool
+
     def parse_line(self, line: str) -> Optional[ParsedProgress]:
         """Parse a single log line.
-        
+
         Args:
             line: Log line to parse
-            
+
         Returns:
             ParsedProgress if progress info found, else None
         """
-        line = line.strip()
-        if not line:
+        hit = self._compiled.match(line)
+        if hit is None:
             return None
-        
-        # Check for stage transitions
-        new_stage = self._detect_stage(line)
-        if new_stage and new_stage != self.current_stage:
+        rule, groups = hit
+        line = line.strip()
+
+        # Stage transitions
+        if rule.stage and rule.stage != self.current_stage:
+            now = datetime.now()
             # End previous stage
             if self.current_stage and self.current_stage in self.stages:
-                self.stages[self.current_stage].end_time = datetime.now()
-            
+                self.stages[self.current_stage].end_time = now
             # Start new stage
-            self.current_stage = new_stage
-            self.stages[new_stage] = StageInfo(
-                name=new_stage,
-                start_time=datetime.now()
-            )
-        
-        # Extract progress
-        progress = self._extract_progress(line)
+            self.current_stage = rule.stage
+            self.stages[rule.stage] = StageInfo(name=rule.stage, start_time=now)
+
+        progress = self._to_progress(rule, groups, line)
         if progress:
             self.last_progress = progress.progress
-            return progress
-        
-        # Check for completion
-        completion_match = re.search(r"Reconstruction done in ([\d.]+) seconds", line)
-        if completion_match:
-            elapsed = float(completion_match.group(1))
-            return ParsedProgress(
-                stage="completed",
-                progress=100.0,
-                message=f"Completed in {elapsed:.1f} seconds"
-            )
-        
-        return None
-    
+        return progress
+
+    @staticmethod
+    def _to_progress(rule: ProgressRule, groups, line: str) -> Optional[ParsedProgress]:
+        """Turn the captured groups of a rule into ParsedProgress."""
+        kind = rule.kind
+        stage = rule.progress_stage or rule.stage or "unknown"
+        if kind == "stage":
+            return None
+        if kind == "done":
+            elapsed = float(groups[0])
+            return ParsedProgress(stage=stage, progress=100.0, message=f"Completed in {elapsed:.1f} seconds")
+        if kind == "percent":
+            return ParsedProgress(stage=stage, progress=min(100.0, float(groups[-1])), message=line)
+        if kind == "block":
+            i, n, j, m = (int(g) for g in groups[:4])
+            total = n * m
+            current = (i - 1) * m + j
+            progress = (current / total) * 100 if total > 0 else 0
+            return ParsedProgress(stage=stage, progress=progress, current=current, total=total, message=line)
+        # ratio
+        current = int(groups[0])
+        total = int(groups[1])
+        progress = (current / total) * 100 if total > 0 else 0
+        return ParsedProgress(stage=stage, progress=progress, current=current, total=total, message=line)
+
     def _detect_stage(self, line: str) -> Optional[str]:
         """Detect current processing stage from log line."""
-        for stage, patterns in self.STAGE_PATTERNS.items():
-            for pattern in patterns:
-                if re.search(pattern, line):
-                    return stage
-        return None
-    
+        hit = self._compiled.match(line)
+        return hit[0].stage if hit else None
+
     def _extract_progress(self, line: str) -> Optional[ParsedProgress]:
         """Extract progress information from log line."""
-        for pattern, stage in self.PROGRESS_PATTERNS:
-            match = re.search(pattern, line)
-            if match:
-                groups = match.groups()
-                
-                if len(groups) == 1:
-                    # Percentage pattern (e.g., "X%")
-                    progress = float(groups[0])
-                    return ParsedProgress(
-                        stage=stage,
-                        progress=progress,
-                        message=line
-                    )
-                elif len(groups) == 2:
-                    # Current/Total pattern (e.g., "X / Y")
-                    current = int(groups[0])
-                    total = int(groups[1])
-                    progress = (current / total) * 100 if total > 0 else 0
-                    return ParsedProgress(
-                        stage=stage,
-                        progress=progress,
-                        current=current,
-                        total=total,
-                        message=line
-                    )
-        
-        return None
-    
+        hit = self._compiled.match(line)
+        if hit is None:
+            return None
+        return self._to_progress(hit[0], hit[1], line.strip())
+
     def get_stage_times(self) -> Dict[str, float]:
         """Get elapsed time for each stage.
-        
+
         Returns:
             Dict of stage name to elapsed seconds
         """
@@ -193,38 +398,26 @@ class LogParser:
                 elapsed = (end - info.start_time).total_seconds()
                 times[name] = elapsed
         return times
-    
+
     def get_overall_progress(self) -> float:
         """Calculate overall progress based on stages completed.
-        
+
         Returns:
             Progress percentage (0-100)
         """
-        # Define stage weights (approximate time proportions)
-        stage_weights = {
-            "loading": 5,
-            "feature_extraction": 15,
-            "matching": 15,
-            "preprocessing": 5,
-            "view_graph_calibration": 2,
-            "relative_pose_estimation": 10,
-            "rotation_averaging": 5,
-            "track_establishment": 8,
-            "global_positioning": 15,
-            "bundle_adjustment": 15,
-            "retriangulation": 5,
-        }
-        
+        # Stage weights (approximate time proportions) come from the active profile
+        stage_weights = TOOL_PROFILES[self.tool].stage_weights or _SFM_STAGE_WEIGHTS
+
         total_weight = sum(stage_weights.values())
         completed_weight = 0
-        
+
         for stage, info in self.stages.items():
             if info.end_time and stage in stage_weights:
                 completed_weight += stage_weights[stage]
-        
+
         # Add partial progress for current stage
         if self.current_stage and self.current_stage in stage_weights:
             stage_weight = stage_weights[self.current_stage]
             completed_weight += (self.last_progress / 100) * stage_weight
-        
+
         return (completed_weight / total_weight) * 100
@@ -0,0 +1,186 @@
+"""Log tail helpers shared by all ``log_tail`` endpoints.
+
+Run logs grow to hundreds of MB and the frontend polls every second, so the
+tail is read by seeking backwards from the end of the file in fixed-size
+blocks instead of iterating every line.
+
+``read_since()`` supports incremental follow: the client passes back the byte
+offset returned by the previous call (``?since_offset=``) and only receives
+complete lines appended after it.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from typing import List, Optional, Union
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+# Bytes read per backward seek
+TAIL_BLOCK_SIZE = 64 * 1024
+# Upper bound on bytes returned by one incremental read
+MAX_FOLLOW_BYTES = 1024 * 1024
+
+
+@dataclass
+class LogChunk:
+    """Result of an incremental read.
+
+    Attributes:
+        lines: Complete lines appended since the requested offset
+        offset: Byte offset to pass as ``since_offset`` next time
+        reset: True when the lines are not a continuation of the previous
+            read (file truncated/recreated, or the backlog was skipped)
+    """
+    lines: List[str] = field(default_factory=list)
+    offset: int = 0
+    reset: bool = False
+
+
+def _decode_lines(data: bytes) -> List[str]:
+    return [ln.rstrip("\r") for ln in data.decode("utf-8", errors="replace").split("\n")]
+
+
+def file_size(path: Optional[PathLike]) -> Optional[int]:
+    """Current size of a log file, or None if it does not exist."""
+    if not path:
+        return None
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+def tail_lines(
+    path: Optional[PathLike],
+    lines: int,
+    block_size: int = TAIL_BLOCK_SIZE,
+    end: Optional[int] = None,
+) -> Optional[List[str]]:
+    """Return the last ``lines`` lines of a text file (of its first ``end`` bytes if given).
+
+    Reads backwards in ``block_size`` chunks until enough newlines were seen,
+    so the cost depends on the tail length, not the file size.
+
+    Returns:
+        List of lines (without trailing newline), or None if the file is missing/unreadable
+    """
+    if not path:
+        return None
+    if lines <= 0:
+        return []
+    try:
+        with open(path, "rb") as fp:
+            fp.seek(0, os.SEEK_END)
+            pos = fp.tell() if end is None else min(end, fp.tell())
+            if pos == 0:
+                return []
+            chunks: List[bytes] = []
+            newlines = 0
+            # One extra newline is needed: the last byte is usually "\n"
+            while pos > 0 and newlines <= lines:
+                step = min(block_size, pos)
+                pos -= step
+                fp.seek(pos)
+                chunk = fp.read(step)
+                chunks.append(chunk)
+                newlines += chunk.count(b"\n")
+    except OSError:
+        return None
+
+    data = b"".join(reversed(chunks))
+    result = _decode_lines(data)
+    if result and result[-1] == "":
+        result.pop()
+    # When we stopped mid-file, the first element may be a partial line
+    if pos > 0:
+        result = result[1:]
+    return result[-lines:]
+
+
+def read_since(
+    path: Optional[PathLike],
+    offset: int,
+    lines: int = 200,
+    max_bytes: int = MAX_FOLLOW_BYTES,
+) -> Optional[LogChunk]:
+    """Read complete lines appended after ``offset``.
+
+    Only whole lines are returned; a trailing partial line is left for the
+    next call. If the file is smaller than ``offset`` it was truncated or
+    recreated, so a fresh tail of ``lines`` lines is returned with
+    ``reset=True``. At most ``max_bytes`` are returned per call; when more
+    data is pending, only its last ``lines`` lines are kept.
+
+    Returns:
+        LogChunk, or None if the file is missing/unreadable
+    """
+    size = file_size(path)
+    if size is None:
+        return None
+    if offset > size:
+        chunk = read_since(path, 0, lines, max_bytes)
+        if chunk is not None:
+            chunk.reset = True
+        return chunk
+    if offset == size:
+        return LogChunk(lines=[], offset=size)
+
+    start = offset
+    if size - start > max_bytes:
+        # Client is far behind: skip ahead instead of streaming the whole backlog
+        start = size - max_bytes
+    try:
+        with open(path, "rb") as fp:
+            fp.seek(start)
+            data = fp.read(size - start)
+    except OSError:
+        return None
+
+    if start > offset:
+        # Drop the partial line we landed in
+        cut = data.find(b"\n")
+        data = data[cut + 1:] if cut >= 0 else b""
+    end = data.rfind(b"\n")
+    if end < 0:
+        # No complete line yet
+        return LogChunk(lines=[], offset=offset if start == offset else size - len(data))
+    complete = data[:end]
+    next_offset = size - len(data) + end + 1
+    result = _decode_lines(complete)
+    return LogChunk(lines=result[-lines:], offset=next_offset, reset=start > offset)
+
+
+def tail_or_follow(
+    path: Optional[PathLike],
+    lines: int,
+    since_offset: Optional[int] = None,
+    memory_lines: Optional[List[str]] = None,
+) -> LogChunk:
+    """Common logic of the ``log_tail`` endpoints.
+
+    - ``since_offset`` given and the file exists: incremental read from the file
+    - otherwise the file tail, or the in-memory buffer of a running task while
+      there is no log file yet
+
+    The returned ``offset`` is the file position to follow from next time
+    (0 when there is no log file yet). The tail is served from the file even
+    when a memory buffer exists: the buffer also holds lines the background
+    writer has not flushed yet, which the next incremental read would return
+    a second time.
+    """
+    if since_offset is not None:
+        chunk = read_since(path, since_offset, lines)
+        if chunk is not None:
+            if since_offset == 0 and chunk.lines:
+                # Offset 0 may follow a view served from memory: replace it
+                chunk.reset = True
+            return chunk
+    reset = since_offset is not None
+    size = file_size(path)
+    if size is not None:
+        return LogChunk(lines=tail_lines(path, lines, end=size) or [], offset=size, reset=reset)
+    if memory_lines:
+        return LogChunk(lines=list(memory_lines)[-lines:], offset=0, reset=reset)
+    return LogChunk(lines=[], offset=0, reset=reset)
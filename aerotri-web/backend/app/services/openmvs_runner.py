@@ -11,10 +11,9 @@ import os
 import shlex
 import tempfile
 import time
-from collections import deque
 from datetime import datetime
 from pathlib import Path
-from typing import Deque, Dict, List, Optional
+from typing import Deque, Dict, List, Optional, Set
 
 logger = logging.getLogger(__name__)
 
@@ -27,7 +26,15 @@ from ..models.database import AsyncSessionLocal
 from ..conf.settings import get_settings
 from .task_notifier import task_notifier
 from .task_runner import task_runner, CERES_LIB_PATH
+from .log_parser import LogParser, detect_tool
+from .process_pump import LogRingBuffer, ProcessOutputPump, SharedLogWriters
+from .log_tail import tail_lines
+from . import colmap_io, image_validation
 from .task_runner_integration import on_task_failure
+from .openmvs_scalable import ScalableDensify
+from .resource_profiler import resource_profiler
+from .benchmark_store import benchmark_store
+from .undistort_cache import UNDISTORT_CACHE_DIRNAME, link_into_dense, undistort_cache
 
 # Load OpenMVS configuration from new system
 _settings = get_settings()
@@ -43,6 +50,9 @@ OPENMVS_TEXTURE = Path(_openmvs_bin_dir) / "TextureMesh"
 # Output directories from configuration system
 OUTPUTS_DIR = _settings.paths.outputs_dir
 
+# Block reconstruction undistorts at this size (version runs and 3DGS use full resolution)
+BLOCK_UNDISTORT_MAX_IMAGE_SIZE = 3200
+
 
 class OpenMVSProcessError(Exception):
     """Exception raised when an OpenMVS or COLMAP CLI fails."""
@@ -90,6 +100,8 @@ QUALITY_PRESETS: Dict[str, Dict[str, Dict[str, any]]] = {
             "resolution_level": 2,
             "number_views": 3,
             "number_views_fuse": 2,
+            "sub_scene_memory_gb": 0,
+            "max_parallel": 1,
         },
         "mesh": {
             "decimate": 0.3,
@@ -111,6 +123,8 @@ QUALITY_PRESETS: Dict[str, Dict[str, Dict[str, any]]] = {
             "resolution_level": 1,
             "number_views": 5,
             "number_views_fuse": 3,
+            "sub_scene_memory_gb": 0,
+            "max_parallel": 1,
         },
         "mesh": {
             "decimate": 0.5,
@@ -132,6 +146,8 @@ QUALITY_PRESETS: Dict[str, Dict[str, Dict[str, any]]] = {
             "resolution_level": 0,
             "number_views": 7,
             "number_views_fuse": 4,
+            "sub_scene_memory_gb": 0,
+            "max_parallel": 1,
         },
         "mesh": {
             "decimate": 0.7,
@@ -177,6 +193,22 @@ PARAMS_SCHEMA: Dict[str, Dict[str, Dict[str, any]]] = {
             "description": "融合时最小视图数量",
             "label": "融合视图数",
         },
+        "sub_scene_memory_gb": {
+            "type": "int",
+            "min": 0,
+            "max": 256,
+            "default": 0,
+            "description": "子场景内存预算 (GB)，>0 时按子场景分块稠密化与建网 (0=整场景)",
+            "label": "子场景内存",
+        },
+        "max_parallel": {
+            "type": "int",
+            "min": 1,
+            "max": 16,
+            "default": 1,
+            "description": "并行处理的子场景数量 (轮流分配到各 GPU)",
+            "label": "子场景并行数",
+        },
     },
     "mesh": {
         "decimate": {
@@ -269,7 +301,8 @@ class OpenMVSRunner:
         # Per-block in-memory log buffers (keyed by block_id)
         self._log_buffers: Dict[str, Deque[str]] = {}
         # Track running reconstruction subprocesses for cancellation
-        self._processes: Dict[str, asyncio.subprocess.Process] = {}
+        # (several per block while scalable densify runs sub-scenes in parallel)
+        self._processes: Dict[str, Set[asyncio.subprocess.Process]] = {}
         # Simple cancelled flags per block
         self._cancelled: Dict[str, bool] = {}
         self._recovery_done = False
@@ -277,9 +310,11 @@ class OpenMVSRunner:
         # Version-specific log buffers (keyed by version_id)
         self._version_log_buffers: Dict[str, Deque[str]] = {}
         # Version-specific process tracking
-        self._version_processes: Dict[str, asyncio.subprocess.Process] = {}
+        self._version_processes: Dict[str, Set[asyncio.subprocess.Process]] = {}
         # Version-specific cancelled flags
         self._version_cancelled: Dict[str, bool] = {}
+        # One writer per log file, shared by concurrent processes of a task
+        self._log_writers = SharedLogWriters()
 
     async def _sync_block_recon_status(
         self,
@@ -552,6 +587,7 @@ class OpenMVSRunner:
             texture_dir: Textured mesh output directory
         """
         stage_times: Dict[str, float] = {}
+        resource_profiler.begin_run("openmvs", block_id)
 
         try:
             async with AsyncSessionLocal() as db:
@@ -645,7 +681,7 @@ class OpenMVSRunner:
                     await db.commit()
                     return
 
-                self._log_buffers[block_id] = []
+                self._log_buffers[block_id] = LogRingBuffer(maxlen=1000)
                 log_path = os.path.join(recon_dir, "run_recon.log")
 
                 # Helper function to log skip message
@@ -661,6 +697,8 @@ class OpenMVSRunner:
                     images_dir=images_dir,
                     sparse_dir=sparse_dir,
                     log_path=log_path,
+                    cache_path=os.path.join(block.output_path, image_validation.VALIDATION_CACHE_NAME)
+                    if block.output_path else None,
                 )
                 if self._cancelled.get(block_id):
                     block.recon_status = "CANCELLED"
@@ -692,6 +730,8 @@ class OpenMVSRunner:
                         sparse_dir=sparse_dir,
                         dense_dir=dense_dir,
                         log_path=log_path,
+                        cache_root=os.path.join(block.output_path, UNDISTORT_CACHE_DIRNAME)
+                        if block.output_path else None,
                     )
                     if self._cancelled.get(block_id):
                         block.recon_status = "CANCELLED"
@@ -758,6 +798,7 @@ class OpenMVSRunner:
                         gpu_index=gpu_index,
                         params=merged_params.get("densify", {}),
                         log_path=log_path,
+                        mesh_params=merged_params.get("mesh", {}),
                     )
                     if self._cancelled.get(block_id):
                         block.recon_status = "CANCELLED"
@@ -936,7 +977,7 @@ class OpenMVSRunner:
                 stats["stage_times"] = stats_stage_times
                 total_time = sum(stats_stage_times.values())
                 stats["total_time"] = total_time
-                block.recon_statistics = stats
+                block.recon_statistics = resource_profiler.attach(stats, "openmvs", block_id)
                 await db.commit()
                 
                 # Send task completed notification
@@ -946,6 +987,8 @@ class OpenMVSRunner:
                     task_type="recon",
                     duration=total_time,
                 )
+            # Outside the session: the recorder opens its own
+            benchmark_store.schedule("openmvs", block_id)
 
         except Exception as exc:
             async with AsyncSessionLocal() as db:
@@ -953,6 +996,7 @@ class OpenMVSRunner:
                 block = result.scalar_one_or_none()
                 if not block:
                     return
+                block.recon_statistics = resource_profiler.attach(block.recon_statistics, "openmvs", block_id)
                 # If user cancelled (SIGTERM), do not overwrite with FAILED.
                 if self._cancelled.get(block_id):
                     block.recon_status = "CANCELLED"
@@ -1024,97 +1068,42 @@ class OpenMVSRunner:
         images_dir: str,
         sparse_dir: str,
         log_path: str,
+        cache_path: Optional[str] = None,
     ) -> None:
-        """Validate images in reconstruction and remove invalid ones."""
+        """Validate images in reconstruction and remove invalid ones.
+
+        Validation (header check, decode only for suspicious JPEGs, MPO -> JPEG
+        conversion) runs in a process pool off the event loop; results are cached
+        per file by (inode, mtime, size) in ``cache_path``.
+        """
         from .task_runner import COLMAP_PATH  # Local import to avoid cycles
-        
-        # First, convert binary format to text format if needed for easier parsing
-        images_txt = os.path.join(sparse_dir, "images.txt")
-        images_bin = os.path.join(sparse_dir, "images.bin")
-        
-        # Convert to text format if binary exists but text doesn't
-        if os.path.exists(images_bin) and not os.path.exists(images_txt):
-            cmd_convert = [
-                COLMAP_PATH,
-                "model_converter",
-                "--input_path",
-                sparse_dir,
-                "--output_path",
-                sparse_dir,
-                "--output_type",
-                "TXT",
-            ]
-            proc = await asyncio.create_subprocess_exec(
-                *cmd_convert,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            await proc.wait()
-        
-        # Read images from reconstruction
-        invalid_images = []
-        converted_mpo_count = 0
-        if os.path.exists(images_txt):
-            with open(images_txt, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-                # Skip header lines (first 4 lines)
-                for i in range(4, len(lines), 2):
-                    if i >= len(lines):
-                        break
-                    line = lines[i].strip()
-                    if not line or line.startswith("#"):
-                        continue
-                    parts = line.split()
-                    if len(parts) < 10:
-                        continue
-                    image_name = parts[9]  # Image name is the 10th field
-                    image_path = os.path.join(images_dir, image_name)
-                    
-                    # Check if image exists and is readable
-                    if not os.path.exists(image_path):
-                        invalid_images.append(image_name)
-                        continue
-                    
-                    # Try to validate image using PIL
-                    try:
-                        from PIL import Image
-                        with Image.open(image_path) as img:
-                            img.verify()
-                            # Re-open to check format (verify() closes the image)
-                            with Image.open(image_path) as img2:
-                                # Convert MPO (DJI stereo images) to JPEG
-                                if img2.format == 'MPO':
-                                    try:
-                                        # Extract first frame and save as JPEG
-                                        with Image.open(image_path) as mpo_img:
-                                            # Seek to first frame (default is already first)
-                                            mpo_img.seek(0)
-                                            # Convert to RGB if needed
-                                            if mpo_img.mode != 'RGB':
-                                                mpo_img = mpo_img.convert('RGB')
-                                            # Save as JPEG, replacing original
-                                            mpo_img.save(image_path, 'JPEG', quality=95)
-                                        # Count successful conversion
-                                        converted_mpo_count += 1
-                                    except Exception as conv_err:
-                                        # If conversion fails, mark as invalid
-                                        invalid_images.append(image_name)
-                                        error_msg = f"[VALIDATE] Failed to convert MPO {image_name}: {str(conv_err)}"
-                                        self._log_buffers[block_id].append(error_msg)
-                                        with open(log_path, "a", encoding="utf-8", buffering=1) as log_fp:
-                                            log_fp.write(error_msg + "\n")
-                                # Reject other non-standard formats
-                                elif img2.format not in ['JPEG', 'PNG', 'TIFF', 'BMP']:
-                                    invalid_images.append(image_name)
-                    except Exception:
-                        invalid_images.append(image_name)
-        
-        # Log MPO conversion summary
-        if converted_mpo_count > 0:
-            summary_msg = f"[VALIDATE] Converted {converted_mpo_count} MPO images to JPEG format"
-            self._log_buffers[block_id].append(summary_msg)
+
+        def _log(msg: str) -> None:
+            self._log_buffers[block_id].append(msg)
             with open(log_path, "a", encoding="utf-8", buffering=1) as log_fp:
-                log_fp.write(summary_msg + "\n")
+                log_fp.write(msg + "\n")
+
+        # Registered image names only (no observations, no txt conversion needed)
+        try:
+            image_names = colmap_io.open_model(sparse_dir).names
+        except Exception as e:
+            _log(f"[WARNING] Cannot read registered images for validation: {e}")
+            return
+
+        t0 = time.perf_counter()
+        results = await asyncio.to_thread(
+            image_validation.validate_images, images_dir, image_names, cache_path
+        )
+        invalid_images = [n for n, r in results.items() if r.status == image_validation.STATUS_INVALID]
+        converted = [n for n, r in results.items() if r.status == image_validation.STATUS_CONVERTED]
+        _log(
+            f"[VALIDATE] Checked {len(results)} images in {time.perf_counter() - t0:.1f}s "
+            f"({len(invalid_images)} invalid)"
+        )
+
+        # Log MPO conversion summary
+        if converted:
+            _log(f"[VALIDATE] Converted {len(converted)} MPO images to JPEG format")
         
         # Remove invalid images from reconstruction
         if invalid_images:
@@ -1123,7 +1112,7 @@ class OpenMVSRunner:
             with open(log_path, "a", encoding="utf-8", buffering=1) as log_fp:
                 log_fp.write(log_msg + "\n")
                 for img_name in invalid_images:
-                    log_fp.write(f"  - {img_name}\n")
+                    log_fp.write(f"  - {img_name}: {results[img_name].reason}\n")
             
             # Use COLMAP image_deleter to remove invalid images
             # Create a temporary file with image names to delete
@@ -1176,9 +1165,30 @@ class OpenMVSRunner:
         sparse_dir: str,
         dense_dir: str,
         log_path: str,
+        cache_root: Optional[str] = None,
     ) -> None:
         from .task_runner import COLMAP_PATH  # Local import to avoid cycles
 
+        if cache_root:
+            # Undistort once per block into the shared cache, then link into dense/.
+            # QUALITY_PRESETS' resolution levels are tuned for 3200 px images.
+            async def run(cmd: List[str]) -> None:
+                await self._run_process(block_id=block_id, stage="undistort", cmd=cmd, log_path=log_path)
+
+            cache_dir = await undistort_cache.ensure(
+                cache_root=cache_root,
+                image_dir=images_dir,
+                sparse_dir=sparse_dir,
+                run=run,
+                max_image_size=BLOCK_UNDISTORT_MAX_IMAGE_SIZE,
+                colmap_path=str(COLMAP_PATH),
+                log=lambda msg: self._log_buffers.setdefault(block_id, LogRingBuffer(maxlen=1000)).append(msg),
+                is_cancelled=lambda: bool(self._cancelled.get(block_id)),
+            )
+            if cache_dir:
+                link_into_dense(cache_dir, dense_dir)
+            return
+
         cmd = [
             COLMAP_PATH,
             "image_undistorter",
@@ -1191,7 +1201,7 @@ class OpenMVSRunner:
             "--output_type",
             "COLMAP",
             "--max_image_size",
-            "3200",
+            str(BLOCK_UNDISTORT_MAX_IMAGE_SIZE),
         ]
         await self._run_process(
             block_id=block_id,
@@ -1239,6 +1249,7 @@ class OpenMVSRunner:
         gpu_index: int,
         params: Dict[str, any],
         log_path: str,
+        mesh_params: Optional[Dict[str, any]] = None,
     ) -> None:
         """Run DensifyPointCloud stage.
         
@@ -1246,9 +1257,40 @@ class OpenMVSRunner:
             block_id: Block ID
             dense_dir: Dense point cloud output directory
             gpu_index: GPU device index
-            params: Stage parameters (resolution_level, number_views, number_views_fuse)
+            params: Stage parameters (resolution_level, number_views, number_views_fuse,
+                sub_scene_memory_gb, max_parallel, gpu_indices)
             log_path: Path to log file
+            mesh_params: Mesh stage parameters, used by the scalable mode to mesh sub-scenes
         """
+        if params.get("sub_scene_memory_gb"):
+            async def run(stage: str, cmd: List[str], cwd: str, _outputs: List[str]) -> None:
+                await self._run_process(block_id=block_id, stage=stage, cmd=cmd, log_path=log_path, cwd=cwd)
+
+            async def on_progress(done: int, total: int) -> None:
+                await task_runner._notify_progress(  # type: ignore[attr-defined]
+                    block_id,
+                    {
+                        "pipeline": "reconstruction",
+                        "stage": "densify",
+                        "detail": "sub-scenes",
+                        "progress": 35.0 + 20.0 * done / max(total, 1),
+                        "message": f"Sub-scenes fused and meshed: {done}/{total}",
+                    },
+                )
+
+            await self._run_scalable_densify(
+                run=run,
+                dense_dir=dense_dir,
+                gpu_index=gpu_index,
+                params=params,
+                mesh_params=mesh_params or {},
+                log_path=log_path,
+                buffer=self._log_buffers.setdefault(block_id, LogRingBuffer(maxlen=1000)),
+                on_progress=on_progress,
+                is_cancelled=lambda: bool(self._cancelled.get(block_id)),
+            )
+            return
+
         # 在 dense 目录下运行 DensifyPointCloud，并显式设置 working-folder，
         # 保证 .mvs 中的相对路径 images/* 解析到 recon/dense/images，而不是后端工作目录。
         dense_dir_abs = str(Path(dense_dir).resolve())
@@ -1290,6 +1332,52 @@ class OpenMVSRunner:
             env=env,
         )
 
+    async def _run_scalable_densify(
+        self,
+        run,
+        dense_dir: str,
+        gpu_index: int,
+        params: Dict[str, any],
+        mesh_params: Dict[str, any],
+        log_path: str,
+        buffer: Deque[str],
+        on_progress,
+        is_cancelled,
+    ) -> None:
+        """Scalable densify: depth maps once, split by memory budget, fuse/mesh sub-scenes concurrently.
+
+        Leaves scene_dense.{ply,mvs} and scene_dense_mesh.ply in dense_dir, so the mesh stage is
+        skipped and refine/texture run unchanged on the merged mesh. Finished sub-scenes are kept
+        and skipped on the next run.
+
+        Args:
+            run: Stage runner ``(stage, cmd, cwd, output_validation_paths)``
+            gpu_index: Selected GPU; used unless params["gpu_indices"] lists several
+            params: Densify parameters (sub_scene_memory_gb, max_parallel, gpu_indices, ...)
+            buffer: In-memory log buffer of the task
+        """
+        gpu_indices = [int(g) for g in (params.get("gpu_indices") or [gpu_index])]
+        # Hold the task's log writer open so every sub-scene process appends through it
+        async with self._log_writers.open(log_path) as log_fp:
+            def log(msg: str) -> None:
+                buffer.append(msg)
+                log_fp.write(msg)
+
+            scalable = ScalableDensify(
+                densify_bin=str(OPENMVS_DENSIFY),
+                mesh_bin=str(OPENMVS_RECONSTRUCT),
+                dense_dir=str(Path(dense_dir).resolve()),
+                run=run,
+                densify_params=params,
+                mesh_params=mesh_params,
+                gpu_indices=gpu_indices,
+                max_parallel=params.get("max_parallel") or len(gpu_indices),
+                log=log,
+                on_progress=on_progress,
+                is_cancelled=is_cancelled,
+            )
+            await scalable.execute()
+
     def _move_mesh_outputs(self, dense_dir: str, mesh_dir: str) -> None:
         """Move mesh output files from dense_dir to mesh_dir.
         
@@ -1620,7 +1708,7 @@ class OpenMVSRunner:
     ) -> None:
         """Run a subprocess, stream logs to file and in-memory buffer."""
         pretty_cmd = " ".join(shlex.quote(str(x)) for x in cmd)
-        buffer = self._log_buffers.setdefault(block_id, deque(maxlen=1000))
+        buffer = self._log_buffers.setdefault(block_id, LogRingBuffer(maxlen=1000))
 
         # Prepare environment variables with library paths
         process_env = os.environ.copy()
@@ -1632,8 +1720,8 @@ class OpenMVSRunner:
             process_env["LD_LIBRARY_PATH"] = f"{CERES_LIB_PATH}:{current_ld_path}" if current_ld_path else CERES_LIB_PATH
 
         os.makedirs(os.path.dirname(log_path), exist_ok=True)
-        with open(log_path, "a", encoding="utf-8", buffering=1) as log_fp:
-            log_fp.write(f"[CMD] {pretty_cmd}\n")
+        async with self._log_writers.open(log_path) as log_fp:
+            log_fp.write(f"[CMD] {pretty_cmd}")
 
             process = await asyncio.create_subprocess_exec(
                 *cmd,
@@ -1644,40 +1732,47 @@ class OpenMVSRunner:
                 limit=10 * 1024 * 1024,
             )
             # Register process for cancellation
-            self._processes[block_id] = process
-
-            last_ws_update = 0.0
+            self._processes.setdefault(block_id, set()).add(process)
+            profiler = resource_profiler.start("openmvs", block_id, stage, process.pid, tool=cmd[0])
+            try:
 
-            while True:
-                # Check for cooperative cancellation request
-                if self._cancelled.get(block_id):
-                    process.terminate()
+                last_ws_update = 0.0
+                parser = LogParser(detect_tool(cmd))
+                stage_progress = 0.0
+                detail_stage = stage
 
-                line = await process.stdout.readline()  # type: ignore[union-attr]
-                if not line:
-                    break
-                line_str = line.decode("utf-8", errors="replace").rstrip("\n")
-                if not line_str:
-                    continue
-                buffer.append(line_str)
-                # Persist to log file
-                log_fp.write(line_str + "\n")
-
-                # Throttled WS heartbeat for this stage
-                now = time.time()
-                if now - last_ws_update >= 1.0:
-                    last_ws_update = now
-                    await task_runner._notify_progress(  # type: ignore[attr-defined]
-                        block_id,
-                        {
-                            "pipeline": "reconstruction",
-                            "stage": stage,
-                            "progress": 0.0,
-                            "message": line_str,
-                        },
-                    )
+                # Chunked reads; lines go to the ring buffer and the background log writer
+                pump = ProcessOutputPump(process.stdout, ring=buffer, writer=log_fp)  # type: ignore[arg-type]
+                async for lines in pump.batches():
+                    # Check for cooperative cancellation request
+                    if self._cancelled.get(block_id):
+                        process.terminate()
+
+                    for line_str in lines:
+                        parsed = parser.parse_line(line_str)
+                        if parsed:
+                            stage_progress = parsed.progress
+                            detail_stage = parsed.stage
+
+                    # Throttled WS update for this stage (real progress when the tool reports it)
+                    now = time.time()
+                    if now - last_ws_update >= 1.0:
+                        last_ws_update = now
+                        await task_runner._notify_progress(  # type: ignore[attr-defined]
+                            block_id,
+                            {
+                                "pipeline": "reconstruction",
+                                "stage": stage,
+                                "detail": detail_stage,
+                                "progress": stage_progress,
+                                "message": lines[-1],
+                            },
+                        )
 
-            await process.wait()
+                await process.wait()
+            finally:
+                self._processes.get(block_id, set()).discard(process)
+                await resource_profiler.finish("openmvs", block_id, profiler, process.returncode)
 
             if process.returncode != 0:
                 # Treat SIGTERM/SIGKILL triggered by user cancellation as CANCELLED, not FAILED.
@@ -1685,7 +1780,7 @@ class OpenMVSRunner:
                 if self._cancelled.get(block_id) or process.returncode in (-15, -2, -9):
                     cancel_msg = f"[CANCELLED] Stage '{stage}' terminated (returncode {process.returncode})"
                     buffer.append(cancel_msg)
-                    log_fp.write(cancel_msg + "\n")
+                    log_fp.write(cancel_msg)
                     return
                 
                 # 对于去畸变阶段，即使程序异常退出（如 SIGSEGV），如果输出文件已生成，也视为成功
@@ -1732,15 +1827,15 @@ class OpenMVSRunner:
                                         f"Output files validated at {dense_dir}"
                                     )
                                     buffer.append(success_msg)
-                                    log_fp.write(success_msg + "\n")
+                                    log_fp.write(success_msg)
                                     return
                     except Exception as e:
                         # 验证逻辑失败时不要中断主流程，只记录告警并继续按错误处理
                         warning_msg = f"[WARNING] Failed to validate undistort output after non-zero exit: {e}"
                         buffer.append(warning_msg)
-                        log_fp.write(warning_msg + "\n")
+                        log_fp.write(warning_msg)
                 
-                recent_logs = buffer[-30:]
+                recent_logs = list(buffer)[-30:]
                 raise OpenMVSProcessError(stage, process.returncode, recent_logs)
 
     async def cancel_reconstruction(self, block_id: str) -> None:
@@ -1748,9 +1843,10 @@ class OpenMVSRunner:
         # Mark as cancelled so running _run_process loops can terminate gracefully
         self._cancelled[block_id] = True
 
-        proc = self._processes.get(block_id)
-        if proc and proc.returncode is None:
+        procs = [p for p in self._processes.get(block_id, ()) if p.returncode is None]
+        for proc in procs:
             proc.terminate()
+        for proc in procs:
             try:
                 await asyncio.wait_for(proc.wait(), timeout=5.0)
             except asyncio.TimeoutError:
@@ -1892,6 +1988,11 @@ class OpenMVSRunner:
             import traceback
             traceback.print_exc()
     
+    def get_log_path(self, block_id: str) -> Path:
+        """Persisted run_recon.log for legacy (non-version) reconstruction."""
+        # We infer path from typical layout: <output>/recon/run_recon.log
+        return OUTPUTS_DIR / block_id / "recon" / "run_recon.log"
+
     def get_log_tail(self, block_id: str, lines: int = 200) -> Optional[List[str]]:
         """Get the last N lines of reconstruction log for a block."""
         # Prefer in-memory buffer when running
@@ -1900,20 +2001,7 @@ class OpenMVSRunner:
             return list(buf)[-lines:]
 
         # Fallback to persisted run_recon.log on disk
-        # We infer path from typical layout: <output>/recon/run_recon.log
-        recon_log = OUTPUTS_DIR / block_id / "recon" / "run_recon.log"
-        if not recon_log.is_file():
-            return None
-
-        dq: Deque[str] = deque(maxlen=lines)
-        try:
-            with open(recon_log, "r", encoding="utf-8", errors="replace") as fp:
-                for line in fp:
-                    dq.append(line.rstrip("\n"))
-        except Exception:
-            return None
-
-        return list(dq)
+        return tail_lines(self.get_log_path(block_id), lines)
 
     # ==================== Version-based Reconstruction Methods ====================
 
@@ -2006,6 +2094,7 @@ class OpenMVSRunner:
     ) -> None:
         """Internal: run reconstruction pipeline for a version in its own DB session."""
         stage_times: Dict[str, float] = {}
+        resource_profiler.begin_run("openmvs_version", version_id)
 
         try:
             async with AsyncSessionLocal() as db:
@@ -2094,6 +2183,8 @@ class OpenMVSRunner:
                         dense_dir=dense_dir,
                         image_path=image_path,
                         log_path=log_path,
+                        cache_root=os.path.join(block.output_path, UNDISTORT_CACHE_DIRNAME)
+                        if block.output_path else None,
                     )
                     if self._version_cancelled.get(version_id):
                         version.status = ReconVersionStatus.CANCELLED.value
@@ -2138,6 +2229,7 @@ class OpenMVSRunner:
                         gpu_index=gpu_index,
                         params=merged_params.get("densify", {}),
                         log_path=log_path,
+                        mesh_params=merged_params.get("mesh", {}),
                     )
                     if self._version_cancelled.get(version_id):
                         version.status = ReconVersionStatus.CANCELLED.value
@@ -2255,10 +2347,12 @@ class OpenMVSRunner:
                 stats_stage_times.update(stage_times)
                 stats["stage_times"] = stats_stage_times
                 stats["total_time"] = sum(stats_stage_times.values())
-                version.statistics = stats
+                version.statistics = resource_profiler.attach(stats, "openmvs_version", version_id)
                 # Sync to Block for backward compatibility
                 await self._sync_block_recon_status(block_id, version, db)
                 await db.commit()
+            # Outside the session: the recorder opens its own
+            benchmark_store.schedule("openmvs", block_id, version_id)
 
         except Exception as exc:
             # Store stage for diagnostic before DB session closes
@@ -2271,6 +2365,7 @@ class OpenMVSRunner:
                 failed_stage = version.current_stage or "unknown"
                 version.status = ReconVersionStatus.FAILED.value
                 version.error_message = str(exc)
+                version.statistics = resource_profiler.attach(version.statistics, "openmvs_version", version_id)
                 await self._sync_block_recon_status(block_id, version, db)
                 await db.commit()
 
@@ -2312,7 +2407,7 @@ class OpenMVSRunner:
                 crash during cleanup (e.g., free(): invalid pointer).
         """
         pretty_cmd = " ".join(shlex.quote(str(x)) for x in cmd)
-        buffer = self._version_log_buffers.setdefault(version_id, deque(maxlen=1000))
+        buffer = self._version_log_buffers.setdefault(version_id, LogRingBuffer(maxlen=1000))
 
         process_env = os.environ.copy()
         if env is not None:
@@ -2322,9 +2417,8 @@ class OpenMVSRunner:
                 CERES_LIB_PATH + ":" + process_env.get("LD_LIBRARY_PATH", "")
             )
 
-        with open(log_path, "a", encoding="utf-8", buffering=1) as log_fp:
-            log_fp.write(f"\n\n====== [{stage}] Start ======\n")
-            log_fp.write(f"$ {pretty_cmd}\n")
+        async with self._log_writers.open(log_path) as log_fp:
+            log_fp.write_many(["", "", f"====== [{stage}] Start ======", f"$ {pretty_cmd}"])
             buffer.append(f"====== [{stage}] Start ======")
             buffer.append(f"$ {pretty_cmd}")
 
@@ -2335,22 +2429,20 @@ class OpenMVSRunner:
                 cwd=cwd,
                 env=process_env,
             )
-            self._version_processes[version_id] = process
-
-            async def stream_output():
-                while True:
-                    line = await process.stdout.readline()
-                    if not line:
-                        break
-                    decoded = line.decode("utf-8", errors="replace").rstrip("\n")
-                    buffer.append(decoded)
-                    log_fp.write(decoded + "\n")
-
-            await stream_output()
-            await process.wait()
-            self._version_processes.pop(version_id, None)
+            self._version_processes.setdefault(version_id, set()).add(process)
+            profiler = resource_profiler.start("openmvs_version", version_id, stage, process.pid, tool=cmd[0])
+            try:
+
+                # Chunked reads; lines go to the ring buffer and the background log writer
+                pump = ProcessOutputPump(process.stdout, ring=buffer, writer=log_fp)  # type: ignore[arg-type]
+                async for _ in pump.batches():
+                    pass
+                await process.wait()
+            finally:
+                self._version_processes.get(version_id, set()).discard(process)
+                await resource_profiler.finish("openmvs_version", version_id, profiler, process.returncode)
 
-            log_fp.write(f"====== [{stage}] Exit code: {process.returncode} ======\n")
+            log_fp.write(f"====== [{stage}] Exit code: {process.returncode} ======")
             buffer.append(f"====== [{stage}] Exit code: {process.returncode} ======")
 
             if process.returncode != 0:
@@ -2358,7 +2450,7 @@ class OpenMVSRunner:
                 if self._version_cancelled.get(version_id) or process.returncode in (-15, -2, -9):
                     cancel_msg = f"[CANCELLED] Stage '{stage}' terminated (returncode {process.returncode})"
                     buffer.append(cancel_msg)
-                    log_fp.write(cancel_msg + "\n")
+                    log_fp.write(cancel_msg)
                     return
 
                 # Validate output files if provided
@@ -2377,7 +2469,7 @@ class OpenMVSRunner:
                             f"{', '.join(os.path.basename(p) for p in valid_outputs)}"
                         )
                         buffer.append(success_msg)
-                        log_fp.write(success_msg + "\n")
+                        log_fp.write(success_msg)
                         logger.info(f"Version {version_id}, stage {stage}: {success_msg}")
                         return
 
@@ -2395,9 +2487,35 @@ class OpenMVSRunner:
         dense_dir: str,
         image_path: str,
         log_path: str,
+        cache_root: Optional[str] = None,
     ) -> None:
-        """Run COLMAP image_undistorter for version."""
+        """Run COLMAP image_undistorter for version.
+
+        With ``cache_root`` the full-resolution undistortion is shared by all versions
+        of the block (and by 3DGS) and only linked into this version's dense dir.
+        """
         from .task_runner import COLMAP_PATH  # Local import to avoid cycles
+        if cache_root:
+            async def run(cmd: List[str]) -> None:
+                await self._run_version_process(
+                    version_id=version_id, stage="undistort", cmd=cmd, log_path=log_path
+                )
+
+            cache_dir = await undistort_cache.ensure(
+                cache_root=cache_root,
+                image_dir=image_path,
+                sparse_dir=sparse_dir,
+                run=run,
+                colmap_path=str(COLMAP_PATH),
+                log=lambda msg: self._version_log_buffers.setdefault(
+                    version_id, LogRingBuffer(maxlen=1000)
+                ).append(msg),
+                is_cancelled=lambda: bool(self._version_cancelled.get(version_id)),
+            )
+            if cache_dir:
+                link_into_dense(cache_dir, dense_dir)
+            return
+
         cmd = [
             str(COLMAP_PATH),
             "image_undistorter",
@@ -2462,8 +2580,33 @@ class OpenMVSRunner:
         gpu_index: int,
         params: Dict[str, any],
         log_path: str,
+        mesh_params: Optional[Dict[str, any]] = None,
     ) -> None:
-        """Run DensifyPointCloud for version."""
+        """Run DensifyPointCloud for version (scalable sub-scene mode if ``sub_scene_memory_gb`` is set)."""
+        if params.get("sub_scene_memory_gb"):
+            async def run(stage: str, cmd: List[str], cwd: str, outputs: List[str]) -> None:
+                await self._run_version_process(
+                    version_id=version_id,
+                    stage=stage,
+                    cmd=cmd,
+                    log_path=log_path,
+                    cwd=cwd,
+                    output_validation_paths=outputs or None,
+                )
+
+            await self._run_scalable_densify(
+                run=run,
+                dense_dir=dense_dir,
+                gpu_index=gpu_index,
+                params=params,
+                mesh_params=mesh_params or {},
+                log_path=log_path,
+                buffer=self._version_log_buffers.setdefault(version_id, LogRingBuffer(maxlen=1000)),
+                on_progress=None,
+                is_cancelled=lambda: bool(self._version_cancelled.get(version_id)),
+            )
+            return
+
         dense_dir_abs = str(Path(dense_dir).resolve())
         scene_path = os.path.join(dense_dir_abs, "scene.mvs")
         scene_dense_mvs_path = os.path.join(dense_dir_abs, "scene_dense.mvs")
@@ -2681,15 +2824,17 @@ class OpenMVSRunner:
     async def cancel_reconstruction_version(self, version_id: str) -> None:
         """Cancel a running reconstruction version."""
         self._version_cancelled[version_id] = True
-        process = self._version_processes.get(version_id)
-        if process and process.returncode is None:
-            try:
+        processes = [p for p in self._version_processes.get(version_id, ()) if p.returncode is None]
+        try:
+            for process in processes:
                 process.terminate()
+            if processes:
                 await asyncio.sleep(0.5)
+            for process in processes:
                 if process.returncode is None:
                     process.kill()
-            except Exception:
-                pass
+        except Exception:
+            pass
 
         async with AsyncSessionLocal() as db:
             result = await db.execute(select(ReconVersion).where(ReconVersion.id == version_id))
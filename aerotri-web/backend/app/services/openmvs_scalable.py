@@ -0,0 +1,355 @@
+"""Scalable (sub-scene) densification for OpenMVS.
+
+Follows the openMVS scalable workflow (see ``openMVS/scripts/python/MvsScalablePipeline.py``):
+
+1. ``DensifyPointCloud scene.mvs --fusion-mode 1``: compute all depth maps once, no fusion;
+2. ``DensifyPointCloud scene.mvs --sub-scene-area A``: split into ``scene_XXXX.mvs`` sub-scenes,
+   where ``A`` is derived from a per-process memory budget;
+3. fuse (``--dense-config-file Densify.ini`` with ``Optimize = 0``, so depth maps are not
+   re-filtered) and mesh every sub-scene, several at a time, round-robin over GPUs;
+4. merge the sub-scene point clouds / meshes into ``scene_dense.ply`` / ``scene_dense_mesh.ply``.
+
+Every step is skipped when its outputs already exist, so a failed or cancelled run resumes
+at sub-scene granularity.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import shutil
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# ~660000 keeps one fusion process around 16 GB (openMVS scalable pipeline notes)
+SUB_SCENE_AREA_PER_GB = 660000 / 16
+FUSION_CONFIG_NAME = "Densify.ini"
+DEPTH_MAPS_MARKER = ".depthmaps_done"
+_SUB_SCENE_RE = re.compile(r"^scene_(\d{4})\.mvs$")
+
+# run(stage, cmd, cwd, output_validation_paths) -> None
+RunFn = Callable[[str, List[str], str, List[str]], Awaitable[None]]
+
+
+def sub_scene_area(memory_gb: float) -> int:
+    """``--sub-scene-area`` value for a per-sub-scene memory budget in GB."""
+    return max(1, int(memory_gb * SUB_SCENE_AREA_PER_GB))
+
+
+def list_sub_scenes(dense_dir: str) -> List[str]:
+    """Sub-scene stems (``scene_0000`` ...) produced by the split step, sorted."""
+    try:
+        names = os.listdir(dense_dir)
+    except OSError:
+        return []
+    return sorted(name[:-4] for name in names if _SUB_SCENE_RE.match(name))
+
+
+def _non_empty(path: str) -> bool:
+    try:
+        return os.path.getsize(path) > 0
+    except OSError:
+        return False
+
+
+def write_fusion_config(dense_dir: str) -> str:
+    """Write ``Densify.ini`` disabling depth-map re-filtering during sub-scene fusion."""
+    path = os.path.join(dense_dir, FUSION_CONFIG_NAME)
+    with open(path, "w", encoding="utf-8") as fp:
+        fp.write("Optimize = 0\n")
+    return path
+
+
+# ---------------------------------------------------------------------------
+# PLY merging
+# ---------------------------------------------------------------------------
+
+_PLY_TYPES = {
+    "char": "i1", "int8": "i1", "uchar": "u1", "uint8": "u1",
+    "short": "i2", "int16": "i2", "ushort": "u2", "uint16": "u2",
+    "int": "i4", "int32": "i4", "uint": "u4", "uint32": "u4",
+    "float": "f4", "float32": "f4", "double": "f8", "float64": "f8",
+}
+_CHUNK_RECORDS = 1 << 20
+
+
+@dataclass
+class _PlyElement:
+    name: str
+    count: int
+    properties: List[str]  # raw "property ..." lines
+    dtype: np.dtype
+
+
+def _read_ply_header(path: str):
+    """Parse a binary little-endian PLY header -> (comments, elements, data offset)."""
+    with open(path, "rb") as fp:
+        if fp.readline().strip() != b"ply":
+            raise ValueError(f"Not a PLY file: {path}")
+        comments: List[str] = []
+        elements: List[_PlyElement] = []
+        while True:
+            raw = fp.readline()
+            if not raw:
+                raise ValueError(f"Truncated PLY header: {path}")
+            line = raw.decode("ascii", errors="replace").strip()
+            parts = line.split()
+            if not parts:
+                continue
+            if parts[0] == "format":
+                if parts[1] != "binary_little_endian":
+                    raise ValueError(f"Unsupported PLY format '{parts[1]}': {path}")
+            elif parts[0] in ("comment", "obj_info"):
+                comments.append(line)
+            elif parts[0] == "element":
+                elements.append(_PlyElement(parts[1], int(parts[2]), [], np.dtype([])))
+            elif parts[0] == "property":
+                elements[-1].properties.append(line)
+            elif parts[0] == "end_header":
+                offset = fp.tell()
+                break
+    for element in elements:
+        element.dtype = _element_dtype(element, path)
+    return comments, elements, offset
+
+
+def _element_dtype(element: _PlyElement, path: str) -> np.dtype:
+    fields = []
+    for prop in element.properties:
+        parts = prop.split()
+        if parts[1] == "list":
+            # Only triangle faces (fixed 3-index lists) have a fixed record size
+            if element.name != "face" or len(element.properties) != 1:
+                raise ValueError(f"Unsupported list property '{prop}' in {path}")
+            fields = [("n", _PLY_TYPES[parts[2]]), ("v", "<" + _PLY_TYPES[parts[3]], (3,))]
+        else:
+            fields.append((parts[2], "<" + _PLY_TYPES[parts[1]]))
+    return np.dtype(fields)
+
+
+def merge_ply_files(inputs: Sequence[str], output: str) -> Dict[str, int]:
+    """Concatenate PLY point clouds or triangle meshes with identical layouts into ``output``.
+
+    Streams element data file by file (face indices are offset by the vertices of the
+    preceding files), so memory stays bounded by ``_CHUNK_RECORDS``.
+
+    Returns:
+        Total count per element name.
+    """
+    if not inputs:
+        raise ValueError("No PLY files to merge")
+    headers = [_read_ply_header(path) for path in inputs]
+    comments, layout, _ = headers[0]
+    signature = [(e.name, e.properties) for e in layout]
+    for path, (_, elements, _) in zip(inputs, headers):
+        if [(e.name, e.properties) for e in elements] != signature:
+            raise ValueError(f"PLY layout of {path} differs from {inputs[0]}")
+
+    totals = {e.name: sum(h[1][i].count for h in headers) for i, e in enumerate(layout)}
+    tmp = output + ".tmp"
+    with open(tmp, "wb") as out:
+        lines = ["ply", "format binary_little_endian 1.0", *comments]
+        for element in layout:
+            lines.append(f"element {element.name} {totals[element.name]}")
+            lines.extend(element.properties)
+        lines.append("end_header")
+        out.write(("\n".join(lines) + "\n").encode("ascii"))
+
+        for index, element in enumerate(layout):
+            vertex_offset = 0
+            for path, (_, elements, offset) in zip(inputs, headers):
+                # Skip the preceding elements of this file
+                start = offset + sum(e.count * e.dtype.itemsize for e in elements[:index])
+                _copy_element(path, start, elements[index], out, vertex_offset)
+                vertex_offset += next((e.count for e in elements if e.name == "vertex"), 0)
+    os.replace(tmp, output)
+    return totals
+
+
+def _copy_element(path: str, start: int, element: _PlyElement, out, vertex_offset: int) -> None:
+    with open(path, "rb") as fp:
+        fp.seek(start)
+        remaining = element.count
+        while remaining > 0:
+            n = min(remaining, _CHUNK_RECORDS)
+            records = np.fromfile(fp, dtype=element.dtype, count=n)
+            if len(records) != n:
+                raise ValueError(f"Truncated PLY data in {path}")
+            if element.dtype.names == ("n", "v"):
+                if np.any(records["n"] != 3):
+                    raise ValueError(f"Only triangle meshes can be merged: {path}")
+                if vertex_offset:
+                    records["v"] += vertex_offset
+            out.write(records.tobytes())
+            remaining -= n
+
+
+# ---------------------------------------------------------------------------
+# Orchestration
+# ---------------------------------------------------------------------------
+
+class ScalableDensify:
+    """Depth maps once, sub-scene split, concurrent per-sub-scene fusion + mesh, merge.
+
+    The caller supplies ``run`` (a stage runner streaming logs, e.g. ``OpenMVSRunner._run_process``)
+    so logging and cancellation behave like the single-scene path.
+    """
+
+    def __init__(
+        self,
+        densify_bin: str,
+        mesh_bin: str,
+        dense_dir: str,
+        run: RunFn,
+        densify_params: Dict[str, Any],
+        mesh_params: Dict[str, Any],
+        gpu_indices: Sequence[int],
+        max_parallel: int = 1,
+        log: Optional[Callable[[str], None]] = None,
+        on_progress: Optional[Callable[[int, int], Awaitable[None]]] = None,
+        is_cancelled: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        self.densify_bin = densify_bin
+        self.mesh_bin = mesh_bin
+        self.dense_dir = os.path.abspath(dense_dir)
+        self.run = run
+        self.densify_params = densify_params
+        self.mesh_params = mesh_params
+        self.gpu_indices = list(gpu_indices) or [0]
+        self.max_parallel = max(1, int(max_parallel))
+        self.log = log or (lambda msg: None)
+        self.on_progress = on_progress
+        self.is_cancelled = is_cancelled or (lambda: False)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.dense_dir, name)
+
+    def sub_scene_done(self, stem: str) -> bool:
+        return _non_empty(self._path(f"{stem}_dense.ply")) and _non_empty(self._path(f"{stem}_dense_mesh.ply"))
+
+    async def execute(self) -> bool:
+        """Run all steps; returns False if cancelled before the merge."""
+        scene = self._path("scene.mvs")
+        memory_gb = float(self.densify_params.get("sub_scene_memory_gb") or 16)
+        gpu = self.gpu_indices[0]
+
+        sub_scenes = list_sub_scenes(self.dense_dir)
+        if not sub_scenes:
+            if not os.path.exists(self._path(DEPTH_MAPS_MARKER)):
+                await self.run("densify", [
+                    self.densify_bin, scene,
+                    "--working-folder", self.dense_dir,
+                    "--cuda-device", str(gpu),
+                    "--resolution-level", str(self.densify_params.get("resolution_level", 1)),
+                    "--number-views", str(self.densify_params.get("number_views", 5)),
+                    "--fusion-mode", "1",
+                    "-v", "2",
+                ], self.dense_dir, [])
+                if self.is_cancelled():
+                    return False
+                with open(self._path(DEPTH_MAPS_MARKER), "w", encoding="utf-8"):
+                    pass
+            else:
+                self.log("[SCALABLE] Depth maps already computed, skipping")
+
+            area = sub_scene_area(memory_gb)
+            self.log(f"[SCALABLE] Splitting scene (budget {memory_gb:g} GB -> --sub-scene-area {area})")
+            await self.run("densify", [
+                self.densify_bin, scene,
+                "--working-folder", self.dense_dir,
+                "--sub-scene-area", str(area),
+                "-v", "2",
+            ], self.dense_dir, [])
+            if self.is_cancelled():
+                return False
+            sub_scenes = list_sub_scenes(self.dense_dir)
+            if not sub_scenes:
+                raise RuntimeError(f"Sub-scene split produced no scene_XXXX.mvs in {self.dense_dir}")
+
+        write_fusion_config(self.dense_dir)
+        pending = [stem for stem in sub_scenes if not self.sub_scene_done(stem)]
+        total = len(sub_scenes)
+        done = total - len(pending)
+        self.log(f"[SCALABLE] {total} sub-scene(s), {done} already done, {len(pending)} to process "
+                 f"({self.max_parallel} parallel on GPU {','.join(map(str, self.gpu_indices))})")
+        if self.on_progress:
+            await self.on_progress(done, total)
+
+        # One slot per concurrent job; slots cycle over the GPUs
+        slots: asyncio.Queue = asyncio.Queue()
+        for i in range(min(self.max_parallel, max(1, len(pending)))):
+            slots.put_nowait(self.gpu_indices[i % len(self.gpu_indices)])
+
+        async def process(stem: str) -> None:
+            nonlocal done
+            gpu_index = await slots.get()
+            try:
+                if self.is_cancelled():
+                    return
+                await self._process_sub_scene(stem, gpu_index)
+                if self.is_cancelled() or not self.sub_scene_done(stem):
+                    return
+                done += 1
+                self.log(f"[SCALABLE] Sub-scene {stem} done on GPU {gpu_index} ({done}/{total})")
+                if self.on_progress:
+                    await self.on_progress(done, total)
+            finally:
+                slots.put_nowait(gpu_index)
+
+        results = await asyncio.gather(*(process(stem) for stem in pending), return_exceptions=True)
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            raise errors[0]
+        if self.is_cancelled():
+            return False
+
+        missing = [stem for stem in sub_scenes if not self.sub_scene_done(stem)]
+        if missing:
+            raise RuntimeError(f"Sub-scene outputs missing: {', '.join(missing)}")
+        self.merge(sub_scenes)
+        return True
+
+    async def _process_sub_scene(self, stem: str, gpu_index: int) -> None:
+        dense_mvs = self._path(f"{stem}_dense.mvs")
+        if not (_non_empty(dense_mvs) and _non_empty(self._path(f"{stem}_dense.ply"))):
+            await self.run("densify", [
+                self.densify_bin, self._path(f"{stem}.mvs"),
+                "--working-folder", self.dense_dir,
+                "--dense-config-file", FUSION_CONFIG_NAME,
+                "--cuda-device", str(gpu_index),
+                "--number-views-fuse", str(self.densify_params.get("number_views_fuse", 3)),
+                "--estimate-colors", "1",
+                "--estimate-normals", "1",
+                "-v", "2",
+            ], self.dense_dir, [dense_mvs])
+            if self.is_cancelled():
+                return
+        await self.run("mesh", [
+            self.mesh_bin, dense_mvs,
+            "--working-folder", self.dense_dir,
+            "--cuda-device", str(gpu_index),
+            "--thickness-factor", str(self.mesh_params.get("thickness_factor", 1.5)),
+            "--quality-factor", str(self.mesh_params.get("quality_factor", 1.0)),
+            "--decimate", str(self.mesh_params.get("decimate", 0.5)),
+            "-v", "2",
+        ], self.dense_dir, [self._path(f"{stem}_dense_mesh.ply")])
+
+    def merge(self, sub_scenes: Sequence[str]) -> None:
+        """Merge sub-scene outputs into the single-scene file names used by later stages.
+
+        Overlapping border regions of neighbouring sub-scenes are kept as-is. ``scene_dense.mvs``
+        is a copy of ``scene.mvs``: refine/texture only need its cameras and images, the
+        geometry comes from the merged mesh passed with ``-m``.
+        """
+        clouds = merge_ply_files([self._path(f"{s}_dense.ply") for s in sub_scenes], self._path("scene_dense.ply"))
+        meshes = merge_ply_files(
+            [self._path(f"{s}_dense_mesh.ply") for s in sub_scenes], self._path("scene_dense_mesh.ply")
+        )
+        shutil.copyfile(self._path("scene.mvs"), self._path("scene_dense.mvs"))
+        self.log(
+            f"[SCALABLE] Merged {len(sub_scenes)} sub-scene(s): {clouds.get('vertex', 0)} points, "
+            f"{meshes.get('vertex', 0)} mesh vertices, {meshes.get('face', 0)} faces"
+        )
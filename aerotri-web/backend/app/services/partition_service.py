@@ -6,6 +6,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models import Block, BlockPartition, AsyncSessionLocal
+from .image_catalog import ImageCatalogService
 from .workspace_service import WorkspaceService
 
 
@@ -61,6 +62,15 @@ class PartitionService:
         image_files = WorkspaceService.list_source_images(image_dir)
         return sorted([f.name for f in image_files])
     
+    @staticmethod
+    async def list_image_names(db: AsyncSession, block: Block) -> List[str]:
+        """Sorted image filenames of a block from the image catalog.
+        
+        Refreshes the catalog first (a single stat when the directory is unchanged).
+        """
+        await ImageCatalogService.refresh(db, block)
+        return await ImageCatalogService.list_names(db, block.id)
+    
     @staticmethod
     def build_partitions_by_name_with_overlap(
         image_names: List[str],
@@ -155,7 +165,7 @@ class PartitionService:
             if not block:
                 raise ValueError(f"Block not found: {block_id}")
             
-            image_names = PartitionService.get_image_list(block)
+            image_names = await PartitionService.list_image_names(db, block)
             partitions = PartitionService.build_partitions_by_name_with_overlap(
                 image_names,
                 partition_size=partition_size,
@@ -255,26 +265,31 @@ class PartitionService:
     async def get_partition_image_names(
         block: Block,
         partition: BlockPartition,
+        db: Optional[AsyncSession] = None,
     ) -> List[str]:
         """Get list of image names for a specific partition.
         
         Args:
             block: Block instance
             partition: BlockPartition instance
+            db: Database session (a new one is opened when omitted)
             
         Returns:
             List of image filenames in this partition
         """
-        all_images = PartitionService.get_image_list(block)
-        if not all_images:
+        start_name, end_name = partition.image_start_name, partition.image_end_name
+        if not start_name or not end_name:
             return []
         
-        # Find the range based on start/end names
-        try:
-            start_idx = all_images.index(partition.image_start_name)
-            end_idx = all_images.index(partition.image_end_name) + 1
-            return all_images[start_idx:end_idx]
-        except ValueError:
+        if db is None:
+            async with AsyncSessionLocal() as session:
+                return await PartitionService.get_partition_image_names(block, partition, session)
+        
+        # Range lookup on the (block_id, name) index
+        await ImageCatalogService.refresh(db, block)
+        names = await ImageCatalogService.names_in_range(db, block.id, start_name, end_name)
+        if not names or names[0] != start_name or names[-1] != end_name:
             # Fallback: if names not found, return empty (shouldn't happen normally)
             return []
+        return names
 
@@ -0,0 +1,303 @@
+"""Non-blocking subprocess output pump.
+
+Reading a tool's stdout with ``readline()`` costs one event-loop round trip per
+line, and writing each line to a line-buffered file is a blocking syscall on
+the loop thread. With several COLMAP/OpenMVS processes streaming at once this
+slows down API requests served by the same loop.
+
+This module provides:
+
+- ``BufferedLogWriter``: a background thread that owns the log file and
+  writes queued lines in batches (flushed at least every ``flush_interval``).
+  Async code closes it with ``aclose()``, which waits for the final flush
+  without blocking the loop.
+- ``SharedLogWriters``: one reference-counted ``BufferedLogWriter`` per path, so
+  processes of one task running concurrently append through a single writer.
+- ``LogRingBuffer``: bounded in-memory tail of recent lines.
+- ``ProcessOutputPump``: reads stdout in large chunks, splits ``\\n`` and
+  ``\\r`` frames, and collapses ``\\r`` progress redraws so only the latest
+  frame of a progress bar is emitted.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import queue
+import os
+import threading
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bytes requested per read() on the subprocess pipe
+DEFAULT_CHUNK_SIZE = 64 * 1024
+# A single line longer than this is emitted in pieces instead of growing forever
+MAX_LINE_BYTES = 1024 * 1024
+
+_CLOSE = object()
+
+
+class BufferedLogWriter:
+    """Append-only log file written from a dedicated background thread.
+
+    ``write()`` only enqueues and never touches the filesystem, so it is safe to
+    call from the event loop. Lines are written in batches and flushed at least
+    every ``flush_interval`` seconds, and on ``close()``. ``close()`` joins the
+    writer thread; from the event loop use ``aclose()`` / ``async with``.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 0.5):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._fp = open(path, "a", encoding="utf-8", errors="replace")
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"log-writer:{path}", daemon=True)
+        self._thread.start()
+
+    def write(self, line: str) -> None:
+        if not self._closed:
+            self._queue.put(line)
+
+    def write_many(self, lines: Iterable[str]) -> None:
+        if not self._closed:
+            self._queue.put(list(lines))
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush pending lines and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_CLOSE)
+        self._thread.join(timeout)
+
+    async def aclose(self, timeout: float = 5.0) -> None:
+        """``close()`` without blocking the event loop while the thread flushes."""
+        if not self._closed:
+            await asyncio.to_thread(self.close, timeout)
+
+    def __enter__(self) -> "BufferedLogWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "BufferedLogWriter":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    def _run(self) -> None:
+        fp = self._fp
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    continue
+                done = False
+                batch: List[str] = []
+                # Drain whatever is already queued into one write() call
+                while True:
+                    if item is _CLOSE:
+                        done = True
+                        break
+                    if isinstance(item, list):
+                        batch.extend(item)
+                    else:
+                        batch.append(item)
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                if batch:
+                    fp.write("\n".join(batch) + "\n")
+                    fp.flush()
+                if done:
+                    break
+        except Exception as e:
+            logger.warning(f"Log writer for {self.path} stopped: {e}")
+        finally:
+            try:
+                fp.close()
+            except Exception:
+                pass
+
+
+class SharedLogWriters:
+    """Reference-counted ``BufferedLogWriter`` per log path.
+
+    Concurrent processes writing the same log (e.g. parallel sub-scenes) share
+    one writer thread, so their batches never interleave inside a line. The
+    writer is closed when the last user leaves.
+    """
+
+    def __init__(self, flush_interval: float = 0.5):
+        self.flush_interval = flush_interval
+        self._writers: Dict[str, List] = {}
+
+    @asynccontextmanager
+    async def open(self, path: str) -> AsyncIterator[BufferedLogWriter]:
+        key = os.path.abspath(path)
+        entry = self._writers.get(key)
+        if entry is None:
+            entry = self._writers[key] = [BufferedLogWriter(path, self.flush_interval), 0]
+        entry[1] += 1
+        try:
+            yield entry[0]
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                self._writers.pop(key, None)
+                await entry[0].aclose()
+
+
+class LogRingBuffer(deque):
+    """Bounded in-memory tail of log lines (oldest lines are discarded)."""
+
+    def __init__(self, maxlen: int = 1000, iterable: Iterable[str] = ()):
+        super().__init__(iterable, maxlen=maxlen)
+
+    def tail(self, n: int) -> List[str]:
+        if n <= 0:
+            return []
+        if n >= len(self):
+            return list(self)
+        return list(self)[-n:]
+
+
+class ProcessOutputPump:
+    """Chunked reader for a subprocess stdout stream.
+
+    ``batches()`` yields lists of decoded lines, one list per chunk read.
+    ``\\r``-terminated progress redraws are collapsed: within a chunk (or
+    before the next regular line) only the newest redraw is emitted, and
+    identical consecutive redraws are emitted once.
+
+    Args:
+        stream: ``asyncio.StreamReader`` (e.g. ``process.stdout``)
+        ring: Optional bounded buffer that receives every emitted line
+        writer: Optional ``BufferedLogWriter`` that receives every emitted line
+        chunk_size: Bytes per ``read()`` call
+    """
+
+    def __init__(
+        self,
+        stream: asyncio.StreamReader,
+        ring: Optional[Deque[str]] = None,
+        writer: Optional[BufferedLogWriter] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        self.stream = stream
+        self.ring = ring
+        self.writer = writer
+        self.chunk_size = chunk_size
+        self.lines_emitted = 0
+        self.frames_collapsed = 0
+        self.bytes_read = 0
+        self._partial = b""
+        self._pending_cr: Optional[str] = None
+        self._last_cr: Optional[str] = None
+        self._cr_at_end = False
+
+    @staticmethod
+    def _decode(raw: bytes) -> str:
+        # Keep leading indentation (tables, tracebacks); drop blank lines in _emit
+        return raw.decode("utf-8", errors="replace").rstrip("\n")
+
+    def feed(self, data: bytes) -> List[str]:
+        """Split a chunk into lines; returns lines ready to emit."""
+        out: List[str] = []
+        buf = self._partial + data
+        start = 0
+        if self._cr_at_end:
+            self._cr_at_end = False
+            if buf[:1] == b"\n":
+                start = 1
+        n = len(buf)
+        while start < n:
+            i_n = buf.find(b"\n", start)
+            i_r = buf.find(b"\r", start)
+            if i_n < 0 and i_r < 0:
+                break
+            if i_n < 0 or (0 <= i_r < i_n):
+                # "\r\n" is a plain line ending
+                if i_r + 1 < n and buf[i_r + 1:i_r + 2] == b"\n":
+                    self._emit(self._decode(buf[start:i_r]), out)
+                    start = i_r + 2
+                    continue
+                if i_r + 1 == n:
+                    # Chunk ends on "\r": treat as a redraw, swallow a following "\n"
+                    self._cr_at_end = True
+                # Progress redraw: keep only the newest until a real line ends
+                frame = self._decode(buf[start:i_r])
+                if frame.strip():
+                    if self._pending_cr is not None:
+                        self.frames_collapsed += 1
+                    self._pending_cr = frame
+                start = i_r + 1
+            else:
+                self._emit(self._decode(buf[start:i_n]), out)
+                start = i_n + 1
+        self._partial = buf[start:]
+        if len(self._partial) > MAX_LINE_BYTES:
+            self._emit(self._decode(self._partial), out)
+            self._partial = b""
+        # Surface the newest redraw once per chunk so progress stays live
+        self._emit_pending(out)
+        return out
+
+    def flush(self) -> List[str]:
+        """Emit whatever is left once the stream hit EOF."""
+        out: List[str] = []
+        tail = self._decode(self._partial)
+        self._partial = b""
+        self._emit(tail, out)
+        self._emit_pending(out)
+        return out
+
+    def _emit(self, line: str, out: List[str]) -> None:
+        if not line.strip():
+            return
+        # Keep the newest redraw before a regular line: it may be a different bar
+        self._emit_pending(out)
+        self._last_cr = None
+        self._emit_line(line, out)
+
+    def _emit_pending(self, out: List[str]) -> None:
+        pending, self._pending_cr = self._pending_cr, None
+        if pending is None:
+            return
+        if pending == self._last_cr:
+            self.frames_collapsed += 1
+            return
+        self._last_cr = pending
+        self._emit_line(pending, out)
+
+    def _emit_line(self, line: str, out: List[str]) -> None:
+        out.append(line)
+        self.lines_emitted += 1
+        if self.ring is not None:
+            self.ring.append(line)
+
+    async def batches(self) -> AsyncIterator[List[str]]:
+        """Yield batches of lines until EOF."""
+        while True:
+            data = await self.stream.read(self.chunk_size)
+            if not data:
+                break
+            self.bytes_read += len(data)
+            lines = self.feed(data)
+            if lines:
+                if self.writer is not None:
+                    self.writer.write_many(lines)
+                yield lines
+        lines = self.flush()
+        if lines:
+            if self.writer is not None:
+                self.writer.write_many(lines)
+            yield lines
@@ -0,0 +1,234 @@
+"""Push-based progress hub for WebSocket subscribers.
+
+Runners publish progress frames without awaiting any network I/O:
+``publish()`` only records the latest snapshot and enqueues the frame on each
+subscriber's bounded queue. Every WebSocket client owns a sender task that
+drains its queue, so a slow browser can never stall a subprocess read loop.
+
+When a subscriber falls behind, queued frames are coalesced: only the newest
+frame per (pipeline, version, partition) key is kept. Frames that still do not
+fit are dropped and counted. A client whose send fails or stalls past the send
+timeout is removed from the hub and its socket is closed, so the browser
+reconnects and starts again from the snapshots. A new subscriber immediately receives the latest snapshot
+of every pipeline (sfm / reconstruction / gs / tiles / gs_tiles) for the block.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bounded per-client queue size; beyond this frames are coalesced
+DEFAULT_QUEUE_SIZE = 64
+# A single send that takes longer than this marks the client as dead
+DEFAULT_SEND_TIMEOUT = 10.0
+# WebSocket close code sent to a dropped client ("try again later")
+CLOSE_TRY_AGAIN = 1013
+
+
+def _frame_key(frame: Dict[str, Any]) -> Tuple[Any, str, Any, Any]:
+    """Coalescing key: newer frames of the same key supersede older ones.
+
+    Replies such as ``{"type": "status"}`` only supersede replies of their own type.
+    """
+    return (
+        frame.get("type"), frame.get("pipeline", "sfm"), frame.get("version_id"), frame.get("partition_index"),
+    )
+
+
+def _snapshot_key(frame: Dict[str, Any]) -> str:
+    """Snapshot key: one entry per pipeline (and per recon version, if any)."""
+    pipeline = frame.get("pipeline", "sfm")
+    version_id = frame.get("version_id")
+    return f"{pipeline}:{version_id}" if version_id else pipeline
+
+
+class ProgressSubscriber:
+    """A single WebSocket client with its own queue and sender task.
+
+    The sender task is the only writer of ``ws``; anything else sent to the
+    client (e.g. replies to its requests) goes through ``offer()`` as well.
+    """
+
+    def __init__(
+        self,
+        block_id: str,
+        ws,
+        queue_size: int,
+        send_timeout: float,
+        on_failed: Optional[Callable[["ProgressSubscriber"], None]] = None,
+    ):
+        self.block_id = block_id
+        self.ws = ws
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.send_timeout = send_timeout
+        self.dropped = 0
+        self.coalesced = 0
+        self.closed = False
+        self._on_failed = on_failed
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._sender())
+
+    async def stop(self) -> None:
+        self.closed = True
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    def offer(self, frame: Dict[str, Any]) -> None:
+        """Enqueue a frame without blocking; coalesce when the queue is full."""
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(frame)
+            return
+        except asyncio.QueueFull:
+            pass
+
+        # Keep only the newest frame per key, preserving arrival order
+        pending: "OrderedDict[Tuple[Any, str, Any, Any], Dict[str, Any]]" = OrderedDict()
+        drained = 0
+        while True:
+            try:
+                old = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            drained += 1
+            key = _frame_key(old)
+            pending.pop(key, None)
+            pending[key] = old
+        key = _frame_key(frame)
+        pending.pop(key, None)
+        pending[key] = frame
+        self.coalesced += drained + 1 - len(pending)
+
+        # Still too many distinct keys: drop the oldest ones
+        while len(pending) > self.queue.maxsize:
+            pending.popitem(last=False)
+            self.dropped += 1
+        for item in pending.values():
+            self.queue.put_nowait(item)
+
+    async def _sender(self) -> None:
+        try:
+            while not self.closed:
+                frame = await self.queue.get()
+                await asyncio.wait_for(self.ws.send_json(frame), timeout=self.send_timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Client went away or is too slow: drop it and close the socket so it reconnects
+            logger.debug(f"Progress sender for block {self.block_id} stopped: {e!r}")
+            self.closed = True
+            if self._on_failed:
+                self._on_failed(self)
+            try:
+                await asyncio.wait_for(
+                    self.ws.close(code=CLOSE_TRY_AGAIN), timeout=self.send_timeout
+                )
+            except Exception:
+                pass
+
+
+class ProgressHub:
+    """Fan-out of runner progress frames to per-block WebSocket subscribers."""
+
+    def __init__(
+        self,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        send_timeout: float = DEFAULT_SEND_TIMEOUT,
+    ) -> None:
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self._subscribers: Dict[str, List[ProgressSubscriber]] = {}
+        # block_id -> snapshot key (pipeline[:version_id]) -> latest frame
+        self._snapshots: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def publish(self, block_id: str, data: Dict[str, Any]) -> None:
+        """Publish a progress frame. Never awaits, safe to call from hot loops."""
+        frame = dict(data)
+        frame.setdefault("pipeline", "sfm")
+        frame.setdefault("ts", time.time())
+        self._snapshots.setdefault(block_id, {})[_snapshot_key(frame)] = frame
+
+        subscribers = self._subscribers.get(block_id)
+        if not subscribers:
+            return
+        for sub in subscribers:
+            sub.offer(frame)
+
+    def publish_stage(
+        self,
+        block_id: str,
+        pipeline: str,
+        stage: str,
+        progress: float,
+        message: str = "",
+        status: Optional[str] = None,
+        version_id: Optional[str] = None,
+    ) -> None:
+        """Convenience wrapper used by runners that track a single stage/progress pair."""
+        frame: Dict[str, Any] = {
+            "pipeline": pipeline,
+            "stage": stage,
+            "progress": float(progress or 0.0),
+            "message": message,
+        }
+        if status is not None:
+            frame["status"] = status
+        if version_id is not None:
+            frame["version_id"] = version_id
+        self.publish(block_id, frame)
+
+    def get_snapshot(self, block_id: str) -> Dict[str, Dict[str, Any]]:
+        """Latest frame per pipeline (and recon version) for a block."""
+        return dict(self._snapshots.get(block_id, {}))
+
+    def clear_snapshot(self, block_id: str) -> None:
+        """Forget cached snapshots (e.g. when a block is deleted)."""
+        self._snapshots.pop(block_id, None)
+
+    def subscribe(self, block_id: str, ws) -> ProgressSubscriber:
+        """Register a client; it immediately gets the latest snapshots."""
+        sub = ProgressSubscriber(block_id, ws, self.queue_size, self.send_timeout, on_failed=self._remove)
+        for frame in self._snapshots.get(block_id, {}).values():
+            sub.offer({**frame, "snapshot": True})
+        self._subscribers.setdefault(block_id, []).append(sub)
+        sub.start()
+        return sub
+
+    def _remove(self, sub: ProgressSubscriber) -> None:
+        subs = self._subscribers.get(sub.block_id)
+        if subs is not None:
+            self._subscribers[sub.block_id] = [s for s in subs if s is not sub]
+            if not self._subscribers[sub.block_id]:
+                del self._subscribers[sub.block_id]
+
+    async def unsubscribe(self, sub: ProgressSubscriber) -> None:
+        self._remove(sub)
+        await sub.stop()
+
+    def find_subscriber(self, block_id: str, ws) -> Optional[ProgressSubscriber]:
+        for sub in self._subscribers.get(block_id, []):
+            if sub.ws is ws:
+                return sub
+        return None
+
+    def subscriber_count(self, block_id: Optional[str] = None) -> int:
+        if block_id is not None:
+            return len(self._subscribers.get(block_id, []))
+        return sum(len(v) for v in self._subscribers.values())
+
+
+# Singleton instance
+progress_hub = ProgressHub()
@@ -0,0 +1,295 @@
+"""Per-image / per-point quality analytics for sparse models.
+
+All metrics are computed once per model in a single vectorized pass over the
+columnar model (``colmap_io``) and cached next to it as ``.quality_cache.npz``,
+keyed by the model files' mtime/size. API calls then only bin or page the
+cached arrays, so large blocks can be inspected without shipping the point
+cloud to the browser.
+
+Metrics:
+
+- ``track_length``: observations per 3D point
+- ``triangulation_angle``: largest angle (degrees) between viewing rays of a
+  point. The exact max over all ray pairs is approximated by taking the ray
+  farthest from the mean viewing direction and measuring every other ray
+  against it (exact for two-view tracks).
+- ``reprojection_error``: mean reprojection error (px) per 3D point
+- ``obs_per_image``: observations with a 3D point per image
+- ``image_reprojection_error``: mean reprojection error (px) per image
+- ``residual_heatmap``: mean residual over a grid in normalized image
+  coordinates, for all images or a single ``image_id``
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from . import colmap_io
+from .colmap_io import SparseModel, qvecs_to_rotmats
+from .reprojection import compute_observation_errors
+
+# Bump when the cached array layout changes
+QUALITY_CACHE_VERSION = 1
+QUALITY_CACHE_NAME = ".quality_cache.npz"
+
+POINT_METRICS = ("track_length", "triangulation_angle", "reprojection_error")
+IMAGE_METRICS = ("obs_per_image", "image_reprojection_error")
+HEATMAP_METRIC = "residual_heatmap"
+QUALITY_METRICS = POINT_METRICS + IMAGE_METRICS + (HEATMAP_METRIC,)
+# Metrics with integer values get unit-width bins when the range is small
+_INTEGER_METRICS = {"track_length", "obs_per_image"}
+# Per-observation arrays are by far the largest; only the heatmap needs them
+_OBS_KEYS = ("obs_uv", "obs_error", "obs_image_row")
+
+
+def quality_keys(metric: str) -> List[str]:
+    """Cached arrays ``query_quality`` reads for ``metric``."""
+    if metric not in QUALITY_METRICS:
+        raise ValueError(f"Unknown metric '{metric}', expected one of: {', '.join(QUALITY_METRICS)}")
+    if metric == HEATMAP_METRIC:
+        return ["image_ids", *_OBS_KEYS]
+    if metric in POINT_METRICS:
+        return ["image_ids", "point_ids", metric]
+    return ["image_ids", "image_names", metric]
+
+
+def _group_max(values: np.ndarray, groups: np.ndarray, n_groups: int) -> np.ndarray:
+    """Max of ``values`` per group id (0 for empty groups)."""
+    out = np.zeros(n_groups, dtype=np.float64)
+    if len(values) == 0:
+        return out
+    order = np.argsort(groups, kind="stable")
+    g_sorted = groups[order]
+    starts = np.flatnonzero(np.r_[True, g_sorted[1:] != g_sorted[:-1]])
+    out[g_sorted[starts]] = np.maximum.reduceat(values[order], starts)
+    return out
+
+
+def triangulation_angles(model: SparseModel, image_rows: np.ndarray, point_rows: np.ndarray) -> np.ndarray:
+    """Approximate max triangulation angle (degrees) per 3D point."""
+    n_points = len(model.points)
+    if len(point_rows) == 0:
+        return np.zeros(n_points)
+    R = qvecs_to_rotmats(model.images.qvecs)
+    # Camera centers C = -R^T t
+    centers = -np.einsum("nji,nj->ni", R, model.images.tvecs)
+    rays = model.points.xyz[point_rows] - centers[image_rows]
+    norms = np.linalg.norm(rays, axis=1, keepdims=True)
+    rays = rays / np.where(norms > 0, norms, 1.0)
+
+    mean = np.stack([np.bincount(point_rows, weights=rays[:, k], minlength=n_points) for k in range(3)], axis=1)
+    mean /= np.maximum(np.linalg.norm(mean, axis=1, keepdims=True), 1e-12)
+    cos_to_mean = np.einsum("ni,ni->n", rays, mean[point_rows])
+
+    # Per point, the ray farthest from the mean direction (smallest cosine)
+    order = np.lexsort((cos_to_mean, point_rows))
+    p_sorted = point_rows[order]
+    first = np.flatnonzero(np.r_[True, p_sorted[1:] != p_sorted[:-1]])
+    anchor = np.zeros((n_points, 3))
+    anchor[p_sorted[first]] = rays[order[first]]
+
+    cos = np.clip(np.einsum("ni,ni->n", rays, anchor[point_rows]), -1.0, 1.0)
+    return np.degrees(_group_max(np.arccos(cos), point_rows, n_points))
+
+
+def compute_quality_arrays(model: SparseModel) -> Dict[str, np.ndarray]:
+    """Vectorized pass producing every per-point / per-image / per-observation array."""
+    images = model.images
+    points = model.points
+    n_images = len(images)
+    n_points = len(points)
+    obs = compute_observation_errors(model)
+
+    pt_cnt = np.bincount(obs.point_rows, minlength=n_points)
+    pt_sum = np.bincount(obs.point_rows, weights=obs.errors, minlength=n_points)
+    img_cnt = np.bincount(obs.image_rows, minlength=n_images)
+    img_sum = np.bincount(obs.image_rows, weights=obs.errors, minlength=n_images)
+
+    # Observation positions normalized by the image size of their camera
+    sizes = np.ones((n_images, 2))
+    for row, cam_id in enumerate(images.camera_ids):
+        cam = model.cameras.get(int(cam_id))
+        if cam is not None and cam.width > 0 and cam.height > 0:
+            sizes[row] = (cam.width, cam.height)
+    uv = images.xy[obs.obs_rows] / sizes[obs.image_rows]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            "point_ids": points.ids,
+            "track_length": points.track_lengths.astype(np.int64),
+            "triangulation_angle": triangulation_angles(model, obs.image_rows, obs.point_rows),
+            "reprojection_error": np.where(pt_cnt > 0, pt_sum / np.maximum(pt_cnt, 1), np.nan),
+            "image_ids": images.image_ids,
+            "image_names": np.asarray(images.names, dtype=str),
+            "obs_per_image": img_cnt.astype(np.int64),
+            "image_reprojection_error": np.where(img_cnt > 0, img_sum / np.maximum(img_cnt, 1), np.nan),
+            "obs_uv": uv.astype(np.float32),
+            "obs_error": obs.errors.astype(np.float32),
+            "obs_image_row": obs.image_rows.astype(np.int32),
+        }
+
+
+def load_quality_arrays(
+    sparse_dir: str,
+    fmt: Optional[str] = None,
+    keys: Optional[Iterable[str]] = None,
+) -> Dict[str, np.ndarray]:
+    """Quality arrays of the model in ``sparse_dir``, computed once and cached on disk.
+
+    ``keys`` (e.g. ``quality_keys(metric)``) limits which arrays are read from
+    the cache; the per-observation arrays are only worth loading for heatmaps.
+    """
+    keys = list(keys) if keys is not None else None
+    fmt = fmt or colmap_io.detect_format(sparse_dir)
+    if fmt is None:
+        raise FileNotFoundError(f"No complete COLMAP model in {sparse_dir}")
+    files = colmap_io.model_files(sparse_dir, fmt)
+    signature = json.dumps({
+        "version": QUALITY_CACHE_VERSION,
+        "files": colmap_io.file_signature([files["cameras"], files["images"], files["points3D"]]),
+    }, sort_keys=True)
+
+    cache_path = os.path.join(sparse_dir, QUALITY_CACHE_NAME)
+    try:
+        if os.path.exists(cache_path):
+            with np.load(cache_path, allow_pickle=False) as cached:
+                if str(cached["signature"]) == signature:
+                    # NpzFile members are read lazily, one array per key access
+                    wanted = keys if keys is not None else [k for k in cached.files if k != "signature"]
+                    return {k: cached[k] for k in wanted}
+    except Exception:
+        pass
+
+    arrays = compute_quality_arrays(colmap_io.read_model(sparse_dir, fmt))
+
+    # Write cache (best-effort); write to a temp name first so readers never see a partial file
+    tmp_path = cache_path + ".tmp.npz"
+    try:
+        np.savez(tmp_path, signature=np.asarray(signature), **arrays)
+        os.replace(tmp_path, cache_path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+    if keys is not None:
+        return {k: arrays[k] for k in keys}
+    return arrays
+
+
+def _value_stats(values: np.ndarray) -> Dict[str, float]:
+    if len(values) == 0:
+        return {"count": 0, "min": 0.0, "max": 0.0, "mean": 0.0, "median": 0.0, "p5": 0.0, "p95": 0.0}
+    p5, median, p95 = np.percentile(values, [5, 50, 95])
+    return {
+        "count": int(len(values)),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "mean": float(values.mean()),
+        "median": float(median),
+        "p5": float(p5),
+        "p95": float(p95),
+    }
+
+
+def _histogram(values: np.ndarray, bins: int, integer: bool) -> Dict[str, Any]:
+    if len(values) == 0:
+        return {"edges": [], "counts": []}
+    lo, hi = float(values.min()), float(values.max())
+    if integer and hi - lo + 1 <= bins:
+        # One bin per integer value
+        edges = np.arange(lo, hi + 2) - 0.5
+    else:
+        if hi <= lo:
+            hi = lo + 1.0
+        edges = np.linspace(lo, hi, bins + 1)
+    counts, _ = np.histogram(values, bins=edges)
+    return {"edges": [float(e) for e in edges], "counts": counts.tolist()}
+
+
+def _heatmap(arrays: Dict[str, np.ndarray], grid: int, image_row: Optional[int]) -> Dict[str, Any]:
+    uv = arrays["obs_uv"]
+    err = arrays["obs_error"].astype(np.float64)
+    if image_row is not None:
+        sel = arrays["obs_image_row"] == image_row
+        uv, err = uv[sel], err[sel]
+    cells = np.clip((uv * grid).astype(np.int64), 0, grid - 1)
+    flat = cells[:, 1] * grid + cells[:, 0]
+    counts = np.bincount(flat, minlength=grid * grid)
+    sums = np.bincount(flat, weights=err, minlength=grid * grid)
+    mean = np.full(grid * grid, np.nan)
+    np.divide(sums, counts, out=mean, where=counts > 0)
+    return {
+        "grid": grid,
+        "num_observations": int(len(err)),
+        # Row-major [y][x]; None for cells without observations
+        "counts": counts.reshape(grid, grid).tolist(),
+        "mean_error": [[None if math.isnan(v) else float(v) for v in row] for row in mean.reshape(grid, grid)],
+    }
+
+
+def query_quality(
+    arrays: Dict[str, np.ndarray],
+    metric: str,
+    bins: int = 64,
+    offset: int = 0,
+    limit: int = 0,
+    order: str = "desc",
+    grid: int = 32,
+    image_id: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Binned (and optionally paged) view of one metric.
+
+    ``limit > 0`` additionally returns ``items``: the per-point / per-image
+    values sorted by value (``order``), starting at ``offset``.
+    """
+    if metric not in QUALITY_METRICS:
+        raise ValueError(f"Unknown metric '{metric}', expected one of: {', '.join(QUALITY_METRICS)}")
+
+    image_row = None
+    if image_id is not None:
+        rows = np.flatnonzero(arrays["image_ids"] == image_id)
+        if len(rows) == 0:
+            raise KeyError(f"Image not found in model: {image_id}")
+        image_row = int(rows[0])
+
+    if metric == HEATMAP_METRIC:
+        return {"metric": metric, "image_id": image_id, "heatmap": _heatmap(arrays, grid, image_row)}
+
+    values = arrays[metric].astype(np.float64)
+    if metric in POINT_METRICS:
+        ids = arrays["point_ids"]
+        names = None
+    else:
+        ids = arrays["image_ids"]
+        names = arrays["image_names"]
+    valid = np.flatnonzero(np.isfinite(values))
+    if image_row is not None and metric in IMAGE_METRICS:
+        valid = valid[valid == image_row]
+
+    result: Dict[str, Any] = {
+        "metric": metric,
+        "image_id": image_id,
+        "stats": _value_stats(values[valid]),
+        "histogram": _histogram(values[valid], bins, metric in _INTEGER_METRICS),
+        "total": int(len(valid)),
+        "offset": offset,
+        "items": [],
+    }
+    if limit > 0:
+        idx = valid[np.argsort(values[valid], kind="stable")]
+        if order == "desc":
+            idx = idx[::-1]
+        items = []
+        for row in idx[offset:offset + limit]:
+            item: Dict[str, Any] = {"id": int(ids[row]), "value": float(values[row])}
+            if names is not None:
+                item["name"] = str(names[row])
+            items.append(item)
+        result["items"] = items
+    return result
@@ -0,0 +1,352 @@
+"""Per-stage resource profiling of pipeline child processes.
+
+Every child process started by the runners (COLMAP/GLOMAP/openMVG, OpenMVS,
+3DGS training, tiles conversion) is wrapped in a ``ProcessProfiler`` that
+samples its process tree about once a second while it runs:
+
+- CPU time (user/system), from which the average number of busy cores follows;
+- peak RSS and peak number of processes in the tree;
+- storage I/O (``read_bytes``/``write_bytes``) and, where the kernel has delay
+  accounting, time blocked on I/O;
+- GPU memory of the tree's processes and the utilization of the GPUs they run on
+  (the telemetry sampler's newest sample, so NVML is queried once per interval
+  however many processes are profiled, and ``FakeNVML`` works here too);
+- host swap-in during the stage.
+
+Counters are the last values seen per pid, so children living shorter than the
+sampling interval may be missed. Each finished process becomes a stage report
+with a coarse ``bound`` classification (gpu / cpu / io / swap / wait). Reports
+are kept per (pipeline, task key) and the runners store them as
+``resource_profile`` in the block / version statistics they already persist.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+PROFILE_INTERVAL = 1.0
+_MB = 1024 * 1024
+
+# Thresholds of the bottleneck classification
+GPU_BOUND_UTILIZATION = 60.0  # average % on the stage's GPUs
+SWAP_BOUND_MB = 256.0  # host swap-in during the stage
+IO_BOUND_WAIT_FRACTION = 0.3  # time blocked on I/O / wall time
+IO_BOUND_MB_PER_S = 100.0  # storage throughput with less than one busy core
+CPU_BOUND_CORES = 0.9  # at least one core kept busy
+
+# Returns (gpus, {pid: {gpu index: MB}}), see TelemetrySampler.latest_gpus
+GPUSource = Callable[[], Tuple[List[Any], Dict[int, Dict[int, float]]]]
+
+
+def _default_gpu_source() -> GPUSource:
+    from .telemetry import telemetry_sampler
+
+    return telemetry_sampler.latest_gpus
+
+
+def classify(report: Dict[str, Any]) -> str:
+    """Coarse bottleneck of a stage report.
+
+    ``swap`` beats everything (a swapping stage is slow whatever else it does),
+    then a busy GPU, then blocked I/O, then CPU; ``wait`` means the tree was
+    mostly idle (network, locks, or a single thread blocked on something else).
+    """
+    duration = max(report.get("duration_s") or 0.0, 1e-6)
+    if (report.get("swap_in_mb") or 0.0) >= SWAP_BOUND_MB:
+        return "swap"
+    if (report.get("gpu_util_avg") or 0.0) >= GPU_BOUND_UTILIZATION:
+        return "gpu"
+    cores = report.get("cpu_cores_avg") or 0.0
+    io_rate = ((report.get("read_mb") or 0.0) + (report.get("write_mb") or 0.0)) / duration
+    if (report.get("iowait_s") or 0.0) / duration >= IO_BOUND_WAIT_FRACTION:
+        return "io"
+    if cores < CPU_BOUND_CORES and io_rate >= IO_BOUND_MB_PER_S:
+        return "io"
+    if cores >= CPU_BOUND_CORES:
+        return "cpu"
+    return "wait"
+
+
+class ProcessProfiler:
+    """Samples one process tree until ``stop()``.
+
+    Args:
+        pid: Root process (the runner's direct child)
+        stage: Stage name recorded in the report
+        tool: Executable name
+        labels: Extra fields copied into the report (e.g. ``partition_index``)
+        interval: Seconds between samples
+        gpu_source: GPU sampler; defaults to the telemetry sampler's NVML
+    """
+
+    def __init__(
+        self,
+        pid: int,
+        stage: str,
+        tool: str = "",
+        labels: Optional[Dict[str, Any]] = None,
+        interval: float = PROFILE_INTERVAL,
+        gpu_source: Optional[GPUSource] = None,
+    ):
+        self.pid = pid
+        self.stage = stage
+        self.tool = tool
+        self.labels = dict(labels or {})
+        self.interval = interval
+        self._gpu_source = gpu_source
+        self._procs: Dict[int, psutil.Process] = {}
+        # Last counters seen per pid: (user, system, iowait, read_bytes, write_bytes)
+        self._counters: Dict[int, Tuple[float, float, float, int, int]] = {}
+        self.samples = 0
+        self.peak_rss = 0
+        self.peak_processes = 0
+        self.gpu_memory_peak_mb = 0.0
+        self._gpu_util: List[float] = []
+        self._gpu_indices: set = set()
+        self._swap_in_start = self._swap_in()
+        self.started_at = time.time()
+        self._started_mono = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _swap_in() -> int:
+        try:
+            return psutil.swap_memory().sin
+        except Exception:
+            return 0
+
+    def start(self) -> "ProcessProfiler":
+        self.sample()
+        self._task = asyncio.create_task(self._loop())
+        return self
+
+    async def _loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                alive = await loop.run_in_executor(None, self.sample)
+            except Exception as e:
+                logger.debug(f"Profiler sample failed for pid {self.pid}: {e}")
+                continue
+            if not alive:
+                return
+
+    def _tree(self) -> List[psutil.Process]:
+        root = self._procs.get(self.pid)
+        if root is None:
+            root = self._procs[self.pid] = psutil.Process(self.pid)
+        members = [root]
+        for child in root.children(recursive=True):
+            members.append(self._procs.setdefault(child.pid, child))
+        return members
+
+    def sample(self) -> bool:
+        """Take one sample. Returns False once the root process is gone."""
+        try:
+            members = self._tree()
+        except psutil.Error:
+            return False
+        rss = 0
+        pids = []
+        for proc in members:
+            try:
+                with proc.oneshot():
+                    times = proc.cpu_times()
+                    mem = proc.memory_info()
+                    try:
+                        io = proc.io_counters()
+                        read_bytes, write_bytes = io.read_bytes, io.write_bytes
+                    except (psutil.Error, AttributeError, NotImplementedError):
+                        read_bytes = write_bytes = 0
+            except psutil.Error:
+                continue
+            self._counters[proc.pid] = (
+                times.user, times.system, getattr(times, "iowait", 0.0) or 0.0, read_bytes, write_bytes,
+            )
+            rss += mem.rss
+            pids.append(proc.pid)
+        self.samples += 1
+        self.peak_rss = max(self.peak_rss, rss)
+        self.peak_processes = max(self.peak_processes, len(pids))
+        self._sample_gpu(pids)
+        return True
+
+    def _sample_gpu(self, pids: List[int]) -> None:
+        try:
+            source = self._gpu_source or _default_gpu_source()
+            gpus, mem_by_pid = source()
+        except Exception:
+            return
+        used: Dict[int, float] = {}
+        for pid in pids:
+            for index, mb in mem_by_pid.get(pid, {}).items():
+                used[index] = used.get(index, 0.0) + mb
+        if not used:
+            return
+        self.gpu_memory_peak_mb = max(self.gpu_memory_peak_mb, sum(used.values()))
+        self._gpu_indices.update(used)
+        utils = [g.utilization for g in gpus if g.index in used]
+        if utils:
+            self._gpu_util.append(sum(utils) / len(utils))
+
+    def report(self, returncode: Optional[int] = None) -> Dict[str, Any]:
+        duration = time.monotonic() - self._started_mono
+        user = sum(c[0] for c in self._counters.values())
+        system = sum(c[1] for c in self._counters.values())
+        report: Dict[str, Any] = {
+            "stage": self.stage,
+            "tool": self.tool,
+            **self.labels,
+            "pid": self.pid,
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat(),
+            "duration_s": round(duration, 2),
+            "returncode": returncode,
+            "samples": self.samples,
+            "cpu_user_s": round(user, 2),
+            "cpu_system_s": round(system, 2),
+            "cpu_cores_avg": round((user + system) / duration, 2) if duration > 0 else 0.0,
+            "peak_rss_mb": round(self.peak_rss / _MB, 1),
+            "peak_processes": self.peak_processes,
+            "read_mb": round(sum(c[3] for c in self._counters.values()) / _MB, 1),
+            "write_mb": round(sum(c[4] for c in self._counters.values()) / _MB, 1),
+            "iowait_s": round(sum(c[2] for c in self._counters.values()), 2),
+            "swap_in_mb": round(max(0, self._swap_in() - self._swap_in_start) / _MB, 1),
+            "gpu_indices": sorted(self._gpu_indices),
+            "gpu_memory_peak_mb": round(self.gpu_memory_peak_mb, 1),
+            "gpu_util_avg": round(sum(self._gpu_util) / len(self._gpu_util), 1) if self._gpu_util else None,
+            "gpu_util_max": max(self._gpu_util) if self._gpu_util else None,
+        }
+        report["bound"] = classify(report)
+        return report
+
+    async def stop(self, returncode: Optional[int] = None) -> Dict[str, Any]:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        return self.report(returncode)
+
+
+def summarize(stages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Per-stage totals/peaks over the stage reports of one run, plus an overall entry."""
+    by_stage: Dict[str, Dict[str, Any]] = {}
+    for report in stages:
+        entry = by_stage.setdefault(report["stage"], {
+            "runs": 0, "duration_s": 0.0, "cpu_s": 0.0, "peak_rss_mb": 0.0,
+            "read_mb": 0.0, "write_mb": 0.0, "gpu_memory_peak_mb": 0.0, "_longest": None,
+        })
+        entry["runs"] += 1
+        entry["duration_s"] += report["duration_s"]
+        entry["cpu_s"] += report["cpu_user_s"] + report["cpu_system_s"]
+        entry["peak_rss_mb"] = max(entry["peak_rss_mb"], report["peak_rss_mb"])
+        entry["read_mb"] += report["read_mb"]
+        entry["write_mb"] += report["write_mb"]
+        entry["gpu_memory_peak_mb"] = max(entry["gpu_memory_peak_mb"], report["gpu_memory_peak_mb"])
+        if entry["_longest"] is None or report["duration_s"] > entry["_longest"]["duration_s"]:
+            entry["_longest"] = report
+    for entry in by_stage.values():
+        entry["bound"] = entry.pop("_longest")["bound"]
+        for name in ("duration_s", "cpu_s", "read_mb", "write_mb"):
+            entry[name] = round(entry[name], 2)
+    total = {
+        "duration_s": round(sum(e["duration_s"] for e in by_stage.values()), 2),
+        "cpu_s": round(sum(e["cpu_s"] for e in by_stage.values()), 2),
+        "peak_rss_mb": max((e["peak_rss_mb"] for e in by_stage.values()), default=0.0),
+        "gpu_memory_peak_mb": max((e["gpu_memory_peak_mb"] for e in by_stage.values()), default=0.0),
+    }
+    return {"stages": by_stage, "total": total}
+
+
+class ResourceProfiler:
+    """Keeps the stage reports of each pipeline run, keyed by (pipeline, block/version id)."""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL, gpu_source: Optional[GPUSource] = None):
+        self.interval = interval
+        self.gpu_source = gpu_source
+        self._runs: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._active: Dict[Tuple[str, str], List[ProcessProfiler]] = {}
+
+    def begin_run(self, pipeline: str, key: str) -> None:
+        """Forget the reports of the previous run of this task."""
+        self._runs[(pipeline, key)] = []
+
+    def start(self, pipeline: str, key: str, stage: str, pid: int, tool: str = "", **labels) -> ProcessProfiler:
+        """Start profiling a freshly spawned child process."""
+        profiler = ProcessProfiler(
+            pid, stage, tool=os.path.basename(str(tool)), labels=labels,
+            interval=self.interval, gpu_source=self.gpu_source,
+        )
+        try:
+            profiler.start()
+        except Exception as e:
+            logger.debug(f"Failed to start profiler for pid {pid}: {e}")
+        self._active.setdefault((pipeline, key), []).append(profiler)
+        return profiler
+
+    async def finish(
+        self, pipeline: str, key: str, profiler: ProcessProfiler, returncode: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Stop ``profiler`` and record its stage report."""
+        report = await profiler.stop(returncode)
+        active = self._active.get((pipeline, key), [])
+        if profiler in active:
+            active.remove(profiler)
+        self._runs.setdefault((pipeline, key), []).append(report)
+        return report
+
+    def report(self, pipeline: str, key: str) -> Optional[Dict[str, Any]]:
+        """Stage reports of the current/last run (running processes as partial reports)."""
+        stages = list(self._runs.get((pipeline, key), []))
+        running = [p.report() for p in self._active.get((pipeline, key), [])]
+        if not stages and not running:
+            return None
+        return {
+            "stages": stages,
+            "running": running,
+            "summary": summarize(stages),
+            "updated_at": datetime.now().isoformat(),
+        }
+
+    def current(self, pipeline: str, key: str, stats: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Live report while the task has running processes, else the one persisted in ``stats``."""
+        live = self.report(pipeline, key)
+        if live is not None and live["running"]:
+            return live
+        return (stats or {}).get("resource_profile") or live
+
+    def attach(
+        self, stats: Optional[Dict[str, Any]], pipeline: str, key: str, extend: bool = False
+    ) -> Dict[str, Any]:
+        """``stats`` with ``resource_profile`` set to the current report (unchanged if there is none).
+
+        With ``extend`` the stage reports already stored in ``stats`` are kept and this
+        run's reports appended (runs that continue an earlier one, e.g. a partition merge).
+        """
+        stats = dict(stats or {})
+        report = self.report(pipeline, key)
+        if report is None:
+            return stats
+        report.pop("running", None)
+        if extend:
+            previous = (stats.get("resource_profile") or {}).get("stages") or []
+            report["stages"] = list(previous) + report["stages"]
+            report["summary"] = summarize(report["stages"])
+        stats["resource_profile"] = report
+        return stats
+
+
+# Singleton instance
+resource_profiler = ResourceProfiler()
@@ -1,11 +1,15 @@
 """Reader for COLMAP/GLOMAP reconstruction results."""
 import os
-import struct
 import json
-import math
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
 from ..schemas import CameraInfo, Point3D
+from . import colmap_io
+from .colmap_io import SparseModel
+from .reprojection import compute_reprojection_report
 
 
 class ResultReader:
@@ -132,83 +136,25 @@ class ResultReader:
         images_bin = os.path.join(sparse_dir, "images.bin")
         images_txt = os.path.join(sparse_dir, "images.txt")
         if os.path.exists(images_bin):
-            with open(images_bin, "rb") as f:
-                stats["num_registered_images"] = struct.unpack("<Q", f.read(8))[0]
-                stats["num_images"] = stats["num_registered_images"]
+            stats["num_registered_images"] = colmap_io.read_num_records(images_bin)
+            stats["num_images"] = stats["num_registered_images"]
         elif os.path.exists(images_txt):
-            # 统计 images.txt 中的有效相机行（非注释行的第一行）
-            with open(images_txt, "r", encoding="utf-8") as f:
-                lines = [ln.strip() for ln in f.readlines() if ln.strip()]
-            count = 0
-            i = 0
-            while i < len(lines):
-                line = lines[i]
-                if line.startswith("#"):
-                    i += 1
-                    continue
-                # 把这一行当作一个已注册图像的记录
-                count += 1
-                # 跳过下一行的 2D-3D 观测（如果存在）
-                if i + 1 < len(lines) and not lines[i + 1].startswith("#"):
-                    i += 2
-                else:
-                    i += 1
+            count = len(colmap_io.read_images_txt(images_txt, observations=False))
             stats["num_registered_images"] = count
             stats["num_images"] = count
         
-        # Count 3D points and compute stats
+        # Count 3D points and compute stats (no tracks needed, only their lengths)
         points_bin = os.path.join(sparse_dir, "points3D.bin")
         points_txt = os.path.join(sparse_dir, "points3D.txt")
-        if os.path.exists(points_bin):
-            total_error = 0.0
-            total_track_length = 0
-            
-            with open(points_bin, "rb") as f:
-                num_points = struct.unpack("<Q", f.read(8))[0]
-                stats["num_points3d"] = num_points
-                
-                for _ in range(num_points):
-                    # Skip point_id, xyz, rgb
-                    f.read(8 + 24 + 3)
-                    error = struct.unpack("<d", f.read(8))[0]
-                    track_length = struct.unpack("<Q", f.read(8))[0]
-                    f.read(track_length * 8)  # Skip track
-                    
-                    total_error += error
-                    total_track_length += track_length
-                    stats["num_observations"] += track_length
-            
-            if num_points > 0:
-                stats["mean_reprojection_error"] = total_error / num_points
-                stats["mean_track_length"] = total_track_length / num_points
-        elif os.path.exists(points_txt):
-            total_error = 0.0
-            total_track_length = 0
-            num_points = 0
-            
-            with open(points_txt, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line or line.startswith("#"):
-                        continue
-                    parts = line.split()
-                    if len(parts) < 8:
-                        continue
-                    
-                    num_points += 1
-                    error = float(parts[7])
-                    
-                    track_elems = parts[8:]
-                    track_length = max(0, len(track_elems) // 2)
-                    
-                    total_error += error
-                    total_track_length += track_length
-                    stats["num_observations"] += track_length
-            
+        points_file = points_bin if os.path.exists(points_bin) else points_txt
+        if os.path.exists(points_file):
+            points = colmap_io.read_points3d(points_file)
+            num_points = len(points)
             stats["num_points3d"] = num_points
+            stats["num_observations"] = int(points.track_lengths.sum())
             if num_points > 0:
-                stats["mean_reprojection_error"] = total_error / num_points
-                stats["mean_track_length"] = total_track_length / num_points
+                stats["mean_reprojection_error"] = float(points.error.mean())
+                stats["mean_track_length"] = stats["num_observations"] / num_points
 
         # InstantSfM may export points3D.txt with ERROR column always 0.0.
         # If so, compute mean reprojection error from 2D observations in images.txt.
@@ -296,52 +242,32 @@ class ResultReader:
     @staticmethod
     def _read_cameras_bin(images_bin: str) -> List[CameraInfo]:
         """读取 COLMAP 二进制 `images.bin`。"""
-        cameras: List[CameraInfo] = []
-        
-        with open(images_bin, "rb") as f:
-            num_images = struct.unpack("<Q", f.read(8))[0]
-            
-            for _ in range(num_images):
-                # Read image data
-                image_id = struct.unpack("<I", f.read(4))[0]
-                qw, qx, qy, qz = struct.unpack("<4d", f.read(32))
-                tx, ty, tz = struct.unpack("<3d", f.read(24))
-                camera_id = struct.unpack("<I", f.read(4))[0]
-                
-                # Read image name (null-terminated string)
-                name_chars = []
-                while True:
-                    char = f.read(1)
-                    if char == b"\x00":
-                        break
-                    name_chars.append(char.decode("utf-8"))
-                image_name = "".join(name_chars)
-                
-                # Read 2D points
-                num_points2d = struct.unpack("<Q", f.read(8))[0]
-                # Skip point data (x, y, point3d_id for each)
-                f.read(num_points2d * 24)  # 8 + 8 + 8 bytes per point
-                
-                # Count valid 3D observations
-                num_points = 0  # TODO: 如果需要精确数量，可以在这里解析 point3d_id
-                
-                cameras.append(
-                    CameraInfo(
-                        image_id=image_id,
-                        image_name=image_name,
-                        camera_id=camera_id,
-                        qw=qw,
-                        qx=qx,
-                        qy=qy,
-                        qz=qz,
-                        tx=tx,
-                        ty=ty,
-                        tz=tz,
-                        num_points=num_points,
-                    )
-                )
-        
-        return cameras
+        return ResultReader._camera_infos(colmap_io.read_images_bin(images_bin))
+
+    @staticmethod
+    def _camera_infos(images: colmap_io.ImageColumns) -> List[CameraInfo]:
+        """列式图像数据 -> CameraInfo 列表（num_points 为有效 3D 观测数）。"""
+        num_points = images.num_points3d().tolist()
+        ids = images.image_ids.tolist()
+        cam_ids = images.camera_ids.tolist()
+        qvecs = images.qvecs.tolist()
+        tvecs = images.tvecs.tolist()
+        return [
+            CameraInfo(
+                image_id=ids[i],
+                image_name=images.names[i],
+                camera_id=cam_ids[i],
+                qw=qvecs[i][0],
+                qx=qvecs[i][1],
+                qy=qvecs[i][2],
+                qz=qvecs[i][3],
+                tx=tvecs[i][0],
+                ty=tvecs[i][1],
+                tz=tvecs[i][2],
+                num_points=num_points[i],
+            )
+            for i in range(len(ids))
+        ]
 
     @staticmethod
     def _read_cameras_txt(images_txt: str) -> List[CameraInfo]:
@@ -351,112 +277,12 @@ class ResultReader:
         IMAGE_ID QW QX QY QZ TX TY TZ CAMERA_ID NAME
         x1 y1 POINT3D_ID1 x2 y2 POINT3D_ID2 ...
         """
-        cameras: List[CameraInfo] = []
-        
-        with open(images_txt, "r", encoding="utf-8") as f:
-            lines = [ln.strip() for ln in f.readlines() if ln.strip()]
-        
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-            if line.startswith("#"):
-                i += 1
-                continue
-            
-            # 第一行：姿态 + 相机 ID + 图片名
-            parts = line.split()
-            if len(parts) < 10:
-                # 格式异常，跳过
-                i += 1
-                continue
-            
-            image_id = int(parts[0])
-            qw, qx, qy, qz = map(float, parts[1:5])
-            tx, ty, tz = map(float, parts[5:8])
-            camera_id = int(parts[8])
-            image_name = " ".join(parts[9:])
-            
-            # 下一行是 2D-3D 对应点
-            num_points = 0
-            if i + 1 < len(lines) and not lines[i + 1].startswith("#"):
-                obs_parts = lines[i + 1].split()
-                # 每个观测是 (x, y, point3d_id) 三元组
-                for j in range(2, len(obs_parts), 3):
-                    try:
-                        point3d_id = int(obs_parts[j])
-                        if point3d_id != -1:
-                            num_points += 1
-                    except (ValueError, IndexError):
-                        continue
-                i += 2
-            else:
-                i += 1
-            
-            cameras.append(
-                CameraInfo(
-                    image_id=image_id,
-                    image_name=image_name,
-                    camera_id=camera_id,
-                    qw=qw,
-                    qx=qx,
-                    qy=qy,
-                    qz=qz,
-                    tx=tx,
-                    ty=ty,
-                    tz=tz,
-                    num_points=num_points,
-                )
-            )
-        
-        return cameras
+        return ResultReader._camera_infos(colmap_io.read_images_txt(images_txt))
 
     @staticmethod
     def _read_points3d_bin(points_bin: str, limit: int) -> Tuple[List[Dict[str, Any]], int]:
         """读取 COLMAP 二进制 `points3D.bin`。"""
-        points: List[Dict[str, Any]] = []
-        
-        with open(points_bin, "rb") as f:
-            num_points = struct.unpack("<Q", f.read(8))[0]
-            
-            # Calculate stride for uniform sampling
-            # If num_points <= limit, stride=1 (return all points)
-            # Otherwise, sample uniformly to maintain overall shape
-            stride = max(1, num_points // limit) if num_points > limit else 1
-            
-            for i in range(num_points):
-                # Read point data (must read completely to maintain file pointer)
-                point_id = struct.unpack("<Q", f.read(8))[0]
-                x, y, z = struct.unpack("<3d", f.read(24))
-                r, g, b = struct.unpack("<3B", f.read(3))
-                error = struct.unpack("<d", f.read(8))[0]
-                
-                # Read track (observations)
-                track_length = struct.unpack("<Q", f.read(8))[0]
-                # Skip track data (image_id, point2d_idx for each)
-                f.read(track_length * 8)  # 4 + 4 bytes per observation
-                
-                # Only keep points that match stride sampling
-                if i % stride == 0:
-                    points.append(
-                        {
-                            "id": point_id,
-                            "x": x,
-                            "y": y,
-                            "z": z,
-                            "r": r,
-                            "g": g,
-                            "b": b,
-                            "error": error,
-                            "num_observations": track_length,
-                        }
-                    )
-        
-        # Safety check: if sampling still exceeds limit, truncate
-        # (theoretically shouldn't happen, but just in case)
-        if len(points) > limit:
-            points = points[:limit]
-        
-        return points, num_points
+        return ResultReader._sample_points(colmap_io.read_points3d_bin(points_bin), limit)
 
     @staticmethod
     def _read_points3d_txt(points_txt: str, limit: int) -> Tuple[List[Dict[str, Any]], int]:
@@ -466,50 +292,34 @@ class ResultReader:
         POINT3D_ID X Y Z R G B ERROR TRACK[]
         其中 TRACK 是若干 (image_id, point2d_idx) 对。
         """
-        # 先把所有非注释行读入内存，以便计算总点数并做 stride 采样
-        with open(points_txt, "r", encoding="utf-8") as f:
-            pure_lines = [ln.strip() for ln in f.readlines() if ln.strip() and not ln.lstrip().startswith("#")]
-        
-        num_points = len(pure_lines)
-        if num_points == 0:
-            return [], 0
-        
+        return ResultReader._sample_points(colmap_io.read_points3d_txt(points_txt), limit)
+
+    @staticmethod
+    def _sample_points(points: colmap_io.PointColumns, limit: int) -> Tuple[List[Dict[str, Any]], int]:
+        """Stride sampling to at most ``limit`` points, keeping the overall shape."""
+        num_points = len(points)
+        # If num_points <= limit, stride=1 (return all points)
         stride = max(1, num_points // limit) if num_points > limit else 1
-        
-        points: List[Dict[str, Any]] = []
-        for idx, line in enumerate(pure_lines):
-            parts = line.split()
-            if len(parts) < 8:
-                continue
-            
-            point_id = int(parts[0])
-            x, y, z = map(float, parts[1:4])
-            r, g, b = map(int, parts[4:7])
-            error = float(parts[7])
-            
-            # 后面是 track: image_id, point2d_idx 成对出现
-            track_elems = parts[8:]
-            track_length = max(0, len(track_elems) // 2)
-            
-            if idx % stride == 0:
-                points.append(
-                    {
-                        "id": point_id,
-                        "x": x,
-                        "y": y,
-                        "z": z,
-                        "r": r,
-                        "g": g,
-                        "b": b,
-                        "error": error,
-                        "num_observations": track_length,
-                    }
-                )
-        
-        if len(points) > limit:
-            points = points[:limit]
-        
-        return points, num_points
+        rows = np.arange(0, num_points, stride)[:limit]
+        ids = points.ids[rows].tolist()
+        xyz = points.xyz[rows].tolist()
+        rgb = points.rgb[rows].tolist()
+        error = points.error[rows].tolist()
+        track_lengths = points.track_lengths[rows].tolist()
+        return [
+            {
+                "id": ids[i],
+                "x": xyz[i][0],
+                "y": xyz[i][1],
+                "z": xyz[i][2],
+                "r": rgb[i][0],
+                "g": rgb[i][1],
+                "b": rgb[i][2],
+                "error": error[i],
+                "num_observations": track_lengths[i],
+            }
+            for i in range(len(rows))
+        ], num_points
     
     # ------------------------------------------------------------------
     # Partition-specific methods
@@ -637,29 +447,34 @@ class ResultReader:
     # ------------------------------------------------------------------
     # Reprojection error computation (for exports with zero ERROR column)
     # ------------------------------------------------------------------
+    # Bump when the cached result layout changes
+    _REPROJ_CACHE_VERSION = 2
+
     @staticmethod
-    def _compute_mean_reprojection_error_with_cache(
-        sparse_dir: str,
-        cameras_txt: str,
-        images_txt: str,
-        points3d_txt: str,
+    def _reprojection_with_cache(
+        cache_path: str,
+        cameras_file: str,
+        images_file: str,
+        points3d_file: str,
+        fmt: str,
     ) -> Optional[Dict[str, Any]]:
-        """Compute mean reprojection error (px) from images.txt observations with local cache.
+        """Compute reprojection statistics with an on-disk cache.
 
-        Cache file is stored inside sparse_dir and keyed by input file mtimes/sizes.
+        Cache file is stored inside the sparse dir and keyed by input file mtimes/sizes.
         """
-        cache_path = os.path.join(sparse_dir, ".reproj_cache.json")
-
         def _sig(p: str) -> Dict[str, Any]:
             st = os.stat(p)
             return {"path": os.path.basename(p), "mtime": st.st_mtime, "size": st.st_size}
 
-        signature = {
-            "version": 1,
-            "cameras": _sig(cameras_txt),
-            "images": _sig(images_txt),
-            "points3D": _sig(points3d_txt),
-        }
+        try:
+            signature = {
+                "version": ResultReader._REPROJ_CACHE_VERSION,
+                "cameras": _sig(cameras_file),
+                "images": _sig(images_file),
+                "points3D": _sig(points3d_file),
+            }
+        except OSError:
+            return None
 
         # Try read cache
         try:
@@ -671,12 +486,13 @@ class ResultReader:
         except Exception:
             pass
 
-        # Compute fresh (with per-image breakdown)
-        result = ResultReader._compute_mean_reprojection_error_with_per_image(
-            cameras_txt=cameras_txt,
-            images_txt=images_txt,
-            points3d_txt=points3d_txt,
-        )
+        try:
+            result = ResultReader._compute_reprojection_stats(
+                ResultReader._load_model(cameras_file, images_file, points3d_file, fmt)
+            )
+        except Exception as e:
+            print(f"Error computing reprojection error ({fmt}): {e}")
+            return None
         if not result:
             return None
 
@@ -689,6 +505,39 @@ class ResultReader:
 
         return result
 
+    @staticmethod
+    def _load_model(cameras_file: str, images_file: str, points3d_file: str, fmt: str) -> SparseModel:
+        """Load an explicit (cameras, images, points3D) triple in columnar form."""
+        return SparseModel(
+            colmap_io.read_cameras(cameras_file),
+            colmap_io.read_images(images_file),
+            colmap_io.read_points3d(points3d_file),
+            fmt,
+        )
+
+    @staticmethod
+    def _compute_reprojection_stats(model: SparseModel) -> Optional[Dict[str, Any]]:
+        """Vectorized reprojection statistics, or None if nothing could be projected."""
+        if not model.cameras or len(model.points) == 0:
+            return None
+        result = compute_reprojection_report(model)
+        if result["num_observations"] == 0:
+            return None
+        return result
+
+    @staticmethod
+    def _compute_mean_reprojection_error_with_cache(
+        sparse_dir: str,
+        cameras_txt: str,
+        images_txt: str,
+        points3d_txt: str,
+    ) -> Optional[Dict[str, Any]]:
+        """Compute mean reprojection error (px) from images.txt observations with local cache."""
+        return ResultReader._reprojection_with_cache(
+            os.path.join(sparse_dir, ".reproj_cache.json"),
+            cameras_txt, images_txt, points3d_txt, "txt",
+        )
+
     @staticmethod
     def _compute_mean_reprojection_error(
         cameras_txt: str,
@@ -718,124 +567,25 @@ class ResultReader:
     ) -> Optional[Dict[str, Any]]:
         """Compute mean reprojection error with per-image breakdown.
 
-        Returns both global mean error and per-image mean errors.
-        Supports common COLMAP camera models, including OPENCV.
-
         Returns:
             Dict with keys:
-                - mean_reprojection_error: global mean error
+                - mean_reprojection_error / median_reprojection_error: global stats
                 - num_observations: total number of observations
+                - histogram: {"edges": [...], "counts": [...]} (last bin is open-ended)
                 - per_image: dict mapping image_id to {
                     "mean_reprojection_error": float,
-                    "num_observations": int
+                    "max_reprojection_error": float,
+                    "num_observations": int,
+                    "histogram": counts on the global edges
                 }
+                - per_point: {"num_points", "mean_reprojection_error", "histogram"}
         """
         # Check if files exist
         if not os.path.exists(cameras_txt) or not os.path.exists(images_txt) or not os.path.exists(points3d_txt):
             return None
-        
-        cameras = ResultReader._parse_cameras_txt(cameras_txt)
-        if not cameras:
-            return None
-
-        points = ResultReader._parse_points3d_xyz(points3d_txt)
-        if not points:
-            return None
-
-        total_err = 0.0
-        num_obs = 0
-        # Per-image error accumulation
-        img_err: Dict[int, float] = {}
-        img_cnt: Dict[int, int] = {}
-
-        # Stream parse images.txt
-        with open(images_txt, "r", encoding="utf-8", errors="replace") as f:
-            while True:
-                line = f.readline()
-                if not line:
-                    break
-                line = line.strip()
-                if not line or line.startswith("#"):
-                    continue
-
-                parts = line.split()
-                if len(parts) < 10:
-                    continue
-
-                # image pose
-                image_id = int(parts[0])
-                qw, qx, qy, qz = map(float, parts[1:5])
-                tx, ty, tz = map(float, parts[5:8])
-                cam_id = int(parts[8])
-
-                cam = cameras.get(cam_id)
-                if not cam:
-                    # Skip observation line
-                    _ = f.readline()
-                    continue
-
-                R = ResultReader._qvec_to_rotmat(qw, qx, qy, qz)
-                t = (tx, ty, tz)
-
-                # Observation line
-                obs_line = f.readline()
-                if not obs_line:
-                    break
-                obs_line = obs_line.strip()
-                if not obs_line or obs_line.startswith("#"):
-                    continue
-                obs = obs_line.split()
-                # Triples (x, y, point3d_id)
-                for j in range(0, len(obs) - 2, 3):
-                    try:
-                        u = float(obs[j])
-                        v = float(obs[j + 1])
-                        pid = int(obs[j + 2])
-                    except Exception:
-                        continue
-                    if pid == -1:
-                        continue
-                    X = points.get(pid)
-                    if X is None:
-                        continue
-
-                    proj = ResultReader._project_point(cam, R, t, X)
-                    if proj is None:
-                        continue
-                    up, vp = proj
-                    du = up - u
-                    dv = vp - v
-                    err = math.hypot(du, dv)
-                    
-                    # Accumulate global
-                    total_err += err
-                    num_obs += 1
-                    
-                    # Accumulate per-image
-                    if image_id not in img_err:
-                        img_err[image_id] = 0.0
-                        img_cnt[image_id] = 0
-                    img_err[image_id] += err
-                    img_cnt[image_id] += 1
-
-        if num_obs == 0:
-            return None
-        
-        # Compute per-image means
-        # Use string keys for JSON serialization compatibility
-        per_image: Dict[str, Dict[str, Any]] = {}
-        for img_id in img_err:
-            if img_cnt[img_id] > 0:
-                per_image[str(img_id)] = {
-                    "mean_reprojection_error": img_err[img_id] / img_cnt[img_id],
-                    "num_observations": img_cnt[img_id]
-                }
-        
-        return {
-            "mean_reprojection_error": total_err / num_obs,
-            "num_observations": num_obs,
-            "per_image": per_image
-        }
+        return ResultReader._compute_reprojection_stats(
+            ResultReader._load_model(cameras_txt, images_txt, points3d_txt, "txt")
+        )
 
     @staticmethod
     def _compute_mean_reprojection_error_from_bin(
@@ -853,348 +603,9 @@ class ResultReader:
             points3d_bin: Path to points3D.bin
             
         Returns:
-            Dict with mean_reprojection_error, num_observations, and per_image
+            Same layout as _compute_mean_reprojection_error_with_per_image
         """
-        cache_path = os.path.join(sparse_dir, ".reproj_cache_bin.json")
-        
-        def _sig(p: str) -> Dict[str, Any]:
-            st = os.stat(p)
-            return {"path": os.path.basename(p), "mtime": st.st_mtime, "size": st.st_size}
-        
-        signature = {
-            "version": 1,
-            "cameras": _sig(cameras_bin),
-            "images": _sig(images_bin),
-            "points3D": _sig(points3d_bin),
-        }
-        
-        # Try read cache
-        try:
-            if os.path.exists(cache_path):
-                with open(cache_path, "r", encoding="utf-8") as f:
-                    cached = json.load(f)
-                if cached.get("signature") == signature and "result" in cached:
-                    return cached["result"]
-        except Exception:
-            pass
-        
-        # Parse cameras.bin
-        # COLMAP cameras.bin format: camera_id (uint32), model_id (uint32), width (uint64), height (uint64), params (double array)
-        # Note: COLMAP cameras.bin does NOT include num_params field - params length depends on model_id
-        cameras: Dict[int, Dict[str, Any]] = {}
-        try:
-            with open(cameras_bin, "rb") as f:
-                num_cameras = struct.unpack("<Q", f.read(8))[0]
-                for _ in range(num_cameras):
-                    camera_id = struct.unpack("<I", f.read(4))[0]
-                    model_id = struct.unpack("<I", f.read(4))[0]
-                    width = struct.unpack("<Q", f.read(8))[0]
-                    height = struct.unpack("<Q", f.read(8))[0]
-                    
-                    # Map model_id to model name and param count
-                    model_map = {
-                        0: ("SIMPLE_PINHOLE", 3),
-                        1: ("PINHOLE", 4),
-                        2: ("SIMPLE_RADIAL", 4),
-                        3: ("RADIAL", 5),
-                        4: ("OPENCV", 8),
-                        5: ("OPENCV5", 9),
-                    }
-                    model_info = model_map.get(model_id, ("PINHOLE", 4))
-                    model_name, num_params = model_info
-                    
-                    params = struct.unpack(f"<{num_params}d", f.read(8 * num_params))
-                    
-                    cameras[int(camera_id)] = {
-                        "model": model_name,
-                        "width": int(width),
-                        "height": int(height),
-                        "params": list(params)
-                    }
-        except Exception as e:
-            print(f"Error reading cameras.bin: {e}")
-            import traceback
-            traceback.print_exc()
-            return None
-        
-        # Parse points3D.bin to get 3D coordinates
-        points: Dict[int, Tuple[float, float, float]] = {}
-        try:
-            with open(points3d_bin, "rb") as f:
-                num_points = struct.unpack("<Q", f.read(8))[0]
-                for _ in range(num_points):
-                    point_id = struct.unpack("<Q", f.read(8))[0]
-                    x, y, z = struct.unpack("<3d", f.read(24))
-                    r, g, b = struct.unpack("<3B", f.read(3))
-                    error = struct.unpack("<d", f.read(8))[0]
-                    track_length = struct.unpack("<Q", f.read(8))[0]
-                    # Skip track data
-                    f.read(track_length * 8)
-                    points[point_id] = (x, y, z)
-        except Exception as e:
-            print(f"Error reading points3D.bin: {e}")
-            return None
-        
-        if not cameras or not points:
-            return None
-        
-        total_err = 0.0
-        num_obs = 0
-        img_err: Dict[int, float] = {}
-        img_cnt: Dict[int, int] = {}
-        
-        # Parse images.bin and compute errors
-        try:
-            with open(images_bin, "rb") as f:
-                num_images = struct.unpack("<Q", f.read(8))[0]
-                
-                for _ in range(num_images):
-                    image_id = struct.unpack("<I", f.read(4))[0]
-                    qw, qx, qy, qz = struct.unpack("<4d", f.read(32))
-                    tx, ty, tz = struct.unpack("<3d", f.read(24))
-                    camera_id = struct.unpack("<I", f.read(4))[0]
-                    
-                    # Read image name
-                    name_chars = []
-                    while True:
-                        char = f.read(1)
-                        if char == b"\x00":
-                            break
-                        name_chars.append(char.decode("utf-8"))
-                    
-                    # Read 2D points
-                    num_points2d = struct.unpack("<Q", f.read(8))[0]
-                    
-                    cam = cameras.get(camera_id)
-                    if not cam:
-                        # Skip point data
-                        f.read(num_points2d * 24)
-                        continue
-                    
-                    R = ResultReader._qvec_to_rotmat(qw, qx, qy, qz)
-                    t = (tx, ty, tz)
-                    
-                    # Process observations
-                    for _ in range(num_points2d):
-                        u = struct.unpack("<d", f.read(8))[0]
-                        v = struct.unpack("<d", f.read(8))[0]
-                        point3d_id = struct.unpack("<Q", f.read(8))[0]
-                        
-                        if point3d_id == 18446744073709551615:  # -1 as unsigned
-                            continue
-                        
-                        X = points.get(point3d_id)
-                        if X is None:
-                            continue
-                        
-                        proj = ResultReader._project_point(cam, R, t, X)
-                        if proj is None:
-                            continue
-                        
-                        up, vp = proj
-                        du = up - u
-                        dv = vp - v
-                        err = math.hypot(du, dv)
-                        
-                        # Accumulate global
-                        total_err += err
-                        num_obs += 1
-                        
-                        # Accumulate per-image
-                        if image_id not in img_err:
-                            img_err[image_id] = 0.0
-                            img_cnt[image_id] = 0
-                        img_err[image_id] += err
-                        img_cnt[image_id] += 1
-        except Exception as e:
-            print(f"Error reading images.bin: {e}")
-            import traceback
-            traceback.print_exc()
-            return None
-        
-        if num_obs == 0:
-            return None
-        
-        # Compute per-image means
-        per_image: Dict[str, Dict[str, Any]] = {}
-        for img_id in img_err:
-            if img_cnt[img_id] > 0:
-                per_image[str(img_id)] = {
-                    "mean_reprojection_error": img_err[img_id] / img_cnt[img_id],
-                    "num_observations": img_cnt[img_id]
-                }
-        
-        result = {
-            "mean_reprojection_error": total_err / num_obs,
-            "num_observations": num_obs,
-            "per_image": per_image
-        }
-        
-        # Write cache (best-effort)
-        try:
-            with open(cache_path, "w", encoding="utf-8") as f:
-                json.dump({"signature": signature, "result": result}, f)
-        except Exception:
-            pass
-        
-        return result
-
-    @staticmethod
-    def _parse_cameras_txt(cameras_txt: str) -> Dict[int, Dict[str, Any]]:
-        """Parse COLMAP cameras.txt into a dict keyed by camera_id."""
-        cams: Dict[int, Dict[str, Any]] = {}
-        with open(cameras_txt, "r", encoding="utf-8", errors="replace") as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith("#"):
-                    continue
-                parts = line.split()
-                if len(parts) < 5:
-                    continue
-                try:
-                    cam_id = int(parts[0])
-                    model = parts[1]
-                    width = int(parts[2])
-                    height = int(parts[3])
-                    params = list(map(float, parts[4:]))
-                except Exception:
-                    continue
-                cams[cam_id] = {"model": model, "width": width, "height": height, "params": params}
-        return cams
-
-    @staticmethod
-    def _parse_points3d_xyz(points3d_txt: str) -> Dict[int, Tuple[float, float, float]]:
-        """Parse points3D.txt and return {point3d_id: (x,y,z)}."""
-        pts: Dict[int, Tuple[float, float, float]] = {}
-        with open(points3d_txt, "r", encoding="utf-8", errors="replace") as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith("#"):
-                    continue
-                parts = line.split()
-                if len(parts) < 4:
-                    continue
-                try:
-                    pid = int(parts[0])
-                    x = float(parts[1])
-                    y = float(parts[2])
-                    z = float(parts[3])
-                except Exception:
-                    continue
-                pts[pid] = (x, y, z)
-        return pts
-
-    @staticmethod
-    def _qvec_to_rotmat(qw: float, qx: float, qy: float, qz: float) -> Tuple[Tuple[float, float, float], Tuple[float, float, float], Tuple[float, float, float]]:
-        """Quaternion (qw,qx,qy,qz) to rotation matrix. (COLMAP qvec is world-to-camera)."""
-        # Normalize
-        n = math.sqrt(qw * qw + qx * qx + qy * qy + qz * qz)
-        if n > 0:
-            qw, qx, qy, qz = qw / n, qx / n, qy / n, qz / n
-
-        r00 = 1 - 2 * (qy * qy + qz * qz)
-        r01 = 2 * (qx * qy - qz * qw)
-        r02 = 2 * (qx * qz + qy * qw)
-        r10 = 2 * (qx * qy + qz * qw)
-        r11 = 1 - 2 * (qx * qx + qz * qz)
-        r12 = 2 * (qy * qz - qx * qw)
-        r20 = 2 * (qx * qz - qy * qw)
-        r21 = 2 * (qy * qz + qx * qw)
-        r22 = 1 - 2 * (qx * qx + qy * qy)
-        return ((r00, r01, r02), (r10, r11, r12), (r20, r21, r22))
-
-    @staticmethod
-    def _project_point(
-        cam: Dict[str, Any],
-        R: Tuple[Tuple[float, float, float], Tuple[float, float, float], Tuple[float, float, float]],
-        t: Tuple[float, float, float],
-        X: Tuple[float, float, float],
-    ) -> Optional[Tuple[float, float]]:
-        """Project world point X to pixel using COLMAP camera model and pose (world->cam)."""
-        Xw, Yw, Zw = X
-        tx, ty, tz = t
-        # camera coordinates: Xc = R*X + t
-        Xc = R[0][0] * Xw + R[0][1] * Yw + R[0][2] * Zw + tx
-        Yc = R[1][0] * Xw + R[1][1] * Yw + R[1][2] * Zw + ty
-        Zc = R[2][0] * Xw + R[2][1] * Yw + R[2][2] * Zw + tz
-        if Zc <= 1e-12:
-            return None
-
-        x = Xc / Zc
-        y = Yc / Zc
-
-        model = (cam.get("model") or "").upper()
-        p = cam.get("params") or []
-
-        # Distort in normalized coordinates
-        if model == "PINHOLE" and len(p) >= 4:
-            fx, fy, cx, cy = p[:4]
-            xd, yd = x, y
-        elif model == "SIMPLE_PINHOLE" and len(p) >= 3:
-            f, cx, cy = p[:3]
-            fx, fy = f, f
-            xd, yd = x, y
-        elif model == "SIMPLE_RADIAL" and len(p) >= 4:
-            f, cx, cy, k1 = p[:4]
-            fx, fy = f, f
-            r2 = x * x + y * y
-            radial = 1.0 + k1 * r2
-            xd, yd = x * radial, y * radial
-        elif model == "RADIAL" and len(p) >= 5:
-            f, cx, cy, k1, k2 = p[:5]
-            fx, fy = f, f
-            r2 = x * x + y * y
-            radial = 1.0 + k1 * r2 + k2 * r2 * r2
-            xd, yd = x * radial, y * radial
-        elif model == "OPENCV" and len(p) >= 8:
-            fx, fy, cx, cy, k1, k2, p1, p2 = p[:8]
-            r2 = x * x + y * y
-            radial = 1.0 + k1 * r2 + k2 * r2 * r2
-            xrad = x * radial
-            yrad = y * radial
-            x_tan = 2.0 * p1 * x * y + p2 * (r2 + 2.0 * x * x)
-            y_tan = p1 * (r2 + 2.0 * y * y) + 2.0 * p2 * x * y
-            xd = xrad + x_tan
-            yd = yrad + y_tan
-        elif model == "OPENCV5" and len(p) >= 9:
-            fx, fy, cx, cy, k1, k2, p1, p2, k3 = p[:9]
-            r2 = x * x + y * y
-            radial = 1.0 + k1 * r2 + k2 * r2 * r2 + k3 * r2 * r2 * r2
-            xrad = x * radial
-            yrad = y * radial
-            x_tan = 2.0 * p1 * x * y + p2 * (r2 + 2.0 * x * x)
-            y_tan = p1 * (r2 + 2.0 * y * y) + 2.0 * p2 * x * y
-            xd = xrad + x_tan
-            yd = yrad + y_tan
-        elif model == "FULL_OPENCV" and len(p) >= 12:
-            # FULL_OPENCV model: fx, fy, cx, cy, k1, k2, p1, p2, k3, k4, k5, k6
-            # Uses rational distortion model: (1 + k1*r2 + k2*r2^2 + k3*r2^3) / (1 + k4*r2 + k5*r2^2 + k6*r2^3)
-            fx, fy, cx, cy, k1, k2, p1, p2, k3, k4, k5, k6 = p[:12]
-            r2 = x * x + y * y
-            # Rational radial distortion
-            numerator = 1.0 + k1 * r2 + k2 * r2 * r2 + k3 * r2 * r2 * r2
-            denominator = 1.0 + k4 * r2 + k5 * r2 * r2 + k6 * r2 * r2 * r2
-            # Avoid division by zero
-            if abs(denominator) < 1e-8:
-                denominator = 1e-8 if denominator >= 0 else -1e-8
-            radial = numerator / denominator
-            # Tangential distortion
-            x_tan = 2.0 * p1 * x * y + p2 * (r2 + 2.0 * x * x)
-            y_tan = p1 * (r2 + 2.0 * y * y) + 2.0 * p2 * x * y
-            xd = x * radial + x_tan
-            yd = y * radial + y_tan
-        else:
-            # Unknown/unsupported model -> fall back to pinhole if possible
-            if len(p) >= 4:
-                fx, fy, cx, cy = p[:4]
-                xd, yd = x, y
-            elif len(p) >= 3:
-                f, cx, cy = p[:3]
-                fx, fy = f, f
-                xd, yd = x, y
-            else:
-                return None
-
-        u = fx * xd + cx
-        v = fy * yd + cy
-        return u, v
\ No newline at end of file
+        return ResultReader._reprojection_with_cache(
+            os.path.join(sparse_dir, ".reproj_cache_bin.json"),
+            cameras_bin, images_bin, points3d_bin, "bin",
+        )
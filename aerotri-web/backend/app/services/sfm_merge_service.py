@@ -1,17 +1,45 @@
 """SfM merge service for combining partition results."""
 import os
-import struct
 import numpy as np
 from typing import List, Dict, Tuple, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models import Block, BlockPartition
+from . import colmap_io
 from .partition_service import PartitionService
 
 
 class SFMMergeService:
     """Service for merging partition SfM results."""
     
+    @staticmethod
+    def _image_dicts(images: colmap_io.ImageColumns, include_points2d: bool) -> Dict[str, Dict]:
+        """Columnar images -> dict keyed by image name (legacy merge layout)."""
+        ids = images.image_ids.tolist()
+        qvecs = images.qvecs.tolist()
+        tvecs = images.tvecs.tolist()
+        cam_ids = images.camera_ids.tolist()
+        if include_points2d:
+            offsets = images.obs_offsets.tolist()
+            xy = images.xy.tolist()
+            # Invalid ids (-1) become UINT64_MAX, as stored on disk
+            pids = images.point3d_ids.astype(np.uint64).tolist()
+        result = {}
+        for i, name in enumerate(images.names):
+            qw, qx, qy, qz = qvecs[i]
+            tx, ty, tz = tvecs[i]
+            result[name] = {
+                "image_id": ids[i],
+                "qw": qw, "qx": qx, "qy": qy, "qz": qz,
+                "tx": tx, "ty": ty, "tz": tz,
+                "camera_id": cam_ids[i],
+            }
+            if include_points2d:
+                result[name]["points2d"] = [
+                    (xy[j][0], xy[j][1], pids[j]) for j in range(offsets[i], offsets[i + 1])
+                ]
+        return result
+
     @staticmethod
     def read_images_bin(images_bin_path: str, include_points2d: bool = False) -> Dict[str, Dict]:
         """Read COLMAP images.bin file.
@@ -24,50 +52,8 @@ class SFMMergeService:
             Dict mapping image_name -> {image_id, qw, qx, qy, qz, tx, ty, tz, camera_id, points2d}
             points2d is a list of (x, y, point3d_id) tuples if include_points2d=True
         """
-        images = {}
-        with open(images_bin_path, "rb") as f:
-            num_images = struct.unpack("<Q", f.read(8))[0]
-            # Validate num_images to avoid overflow in range()
-            if num_images > 2**31 - 1:  # Python range() limit
-                raise RuntimeError(f"Number of images {num_images} exceeds Python range() limit")
-            for _ in range(int(num_images)):
-                image_id = struct.unpack("<I", f.read(4))[0]
-                qw, qx, qy, qz = struct.unpack("<4d", f.read(32))
-                tx, ty, tz = struct.unpack("<3d", f.read(24))
-                camera_id = struct.unpack("<I", f.read(4))[0]
-                
-                # Read image name
-                name_chars = []
-                while True:
-                    char = f.read(1)
-                    if char == b"\x00":
-                        break
-                    name_chars.append(char.decode("utf-8"))
-                image_name = "".join(name_chars)
-                
-                # Read 2D points
-                num_points2d = struct.unpack("<Q", f.read(8))[0]
-                if num_points2d > 2**31 - 1:  # Python range() limit
-                    raise RuntimeError(f"Number of 2D points {num_points2d} exceeds Python range() limit")
-                
-                points2d = []
-                if include_points2d:
-                    for _ in range(int(num_points2d)):
-                        x, y = struct.unpack("<2d", f.read(16))
-                        point3d_id = struct.unpack("<Q", f.read(8))[0]
-                        points2d.append((x, y, point3d_id))
-                else:
-                    f.read(int(num_points2d) * 24)  # Skip point data
-                
-                images[image_name] = {
-                    "image_id": image_id,
-                    "qw": qw, "qx": qx, "qy": qy, "qz": qz,
-                    "tx": tx, "ty": ty, "tz": tz,
-                    "camera_id": camera_id,
-                }
-                if include_points2d:
-                    images[image_name]["points2d"] = points2d
-        return images
+        images = colmap_io.read_images_bin(images_bin_path, observations=include_points2d)
+        return SFMMergeService._image_dicts(images, include_points2d)
     
     @staticmethod
     def read_images_txt(images_txt_path: str) -> Dict[str, Dict]:
@@ -76,43 +62,24 @@ class SFMMergeService:
         Returns:
             Dict mapping image_name -> {image_id, qw, qx, qy, qz, tx, ty, tz, camera_id}
         """
-        images = {}
-        with open(images_txt_path, "r", encoding="utf-8") as f:
-            lines = [ln.strip() for ln in f.readlines() if ln.strip()]
-        
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-            if line.startswith("#"):
-                i += 1
-                continue
-            
-            # First line: pose + camera ID + image name
-            parts = line.split()
-            if len(parts) < 10:
-                i += 1
-                continue
-            
-            image_id = int(parts[0])
-            qw, qx, qy, qz = map(float, parts[1:5])
-            tx, ty, tz = map(float, parts[5:8])
-            camera_id = int(parts[8])
-            image_name = " ".join(parts[9:])
-            
-            images[image_name] = {
-                "image_id": image_id,
-                "qw": qw, "qx": qx, "qy": qy, "qz": qz,
-                "tx": tx, "ty": ty, "tz": tz,
-                "camera_id": camera_id,
+        images = colmap_io.read_images_txt(images_txt_path, observations=False)
+        return SFMMergeService._image_dicts(images, False)
+
+    @staticmethod
+    def _camera_dicts(cameras: Dict[int, colmap_io.Camera]) -> Dict[int, Dict]:
+        for cam_id, cam in cameras.items():
+            if cam.model_id < 0:
+                # Merged models are written as cameras.bin, which needs a known model id
+                raise ValueError(f"Unknown COLMAP camera model {cam.model} (camera {cam_id})")
+        return {
+            cam_id: {
+                "model": cam.model_id,
+                "width": cam.width,
+                "height": cam.height,
+                "params": tuple(cam.params.tolist()),
             }
-            
-            # Skip next line (2D-3D observations)
-            if i + 1 < len(lines) and not lines[i + 1].startswith("#"):
-                i += 2
-            else:
-                i += 1
-        
-        return images
+            for cam_id, cam in cameras.items()
+        }
     
     @staticmethod
     def read_cameras_bin(cameras_bin_path: str) -> Dict[int, Dict]:
@@ -121,54 +88,7 @@ class SFMMergeService:
         Returns:
             Dict mapping camera_id -> camera parameters
         """
-        # COLMAP camera model to parameter count mapping
-        # Reference: https://github.com/colmap/colmap/blob/master/src/base/camera_models.h
-        MODEL_PARAM_COUNTS = {
-            0: 3,   # SIMPLE_PINHOLE
-            1: 4,   # PINHOLE
-            2: 4,   # SIMPLE_RADIAL
-            3: 5,   # RADIAL
-            4: 8,   # OPENCV
-            5: 8,   # OPENCV_FISHEYE
-            6: 12,  # FULL_OPENCV
-            7: 4,   # FOV
-            8: 4,   # SIMPLE_RADIAL_FISHEYE
-            9: 5,   # RADIAL_FISHEYE
-            10: 12, # THIN_PRISM_FISHEYE
-        }
-        
-        cameras = {}
-        with open(cameras_bin_path, "rb") as f:
-            num_cameras = struct.unpack("<Q", f.read(8))[0]
-            # Validate num_cameras to avoid overflow in range()
-            if num_cameras > 2**31 - 1:  # Python range() limit
-                raise RuntimeError(f"Number of cameras {num_cameras} exceeds Python range() limit")
-            for _ in range(int(num_cameras)):
-                camera_id = struct.unpack("<I", f.read(4))[0]
-                model = struct.unpack("<I", f.read(4))[0]
-                width = struct.unpack("<Q", f.read(8))[0]
-                height = struct.unpack("<Q", f.read(8))[0]
-                
-                # Get parameter count based on camera model
-                num_params = MODEL_PARAM_COUNTS.get(model, 4)  # Default to 4 if unknown model
-                # Validate num_params to avoid overflow in struct.unpack
-                if num_params > 2**31 - 1:  # Python struct format limit
-                    raise RuntimeError(f"Number of camera parameters {num_params} exceeds Python struct format limit")
-                if num_params < 0:
-                    raise RuntimeError(f"Number of camera parameters {num_params} is negative")
-                # Read params as bytes and unpack
-                params_bytes = f.read(8 * int(num_params))
-                if len(params_bytes) < 8 * num_params:
-                    raise RuntimeError(f"Insufficient data for camera {camera_id}: expected {8 * num_params} bytes, got {len(params_bytes)}")
-                params = struct.unpack(f"<{int(num_params)}d", params_bytes)
-                
-                cameras[camera_id] = {
-                    "model": model,
-                    "width": width,
-                    "height": height,
-                    "params": params,
-                }
-        return cameras
+        return SFMMergeService._camera_dicts(colmap_io.read_cameras_bin(cameras_bin_path))
     
     @staticmethod
     def read_cameras_txt(cameras_txt_path: str) -> Dict[int, Dict]:
@@ -177,49 +97,84 @@ class SFMMergeService:
         Returns:
             Dict mapping camera_id -> camera parameters
         """
-        cameras = {}
-        # Model name to ID mapping (COLMAP standard)
-        model_map = {
-            "SIMPLE_PINHOLE": 0,
-            "PINHOLE": 1,
-            "SIMPLE_RADIAL": 2,
-            "RADIAL": 3,
-            "OPENCV": 4,
-            "OPENCV_FISHEYE": 5,
-            "FULL_OPENCV": 6,
-            "FOV": 7,
-            "SIMPLE_RADIAL_FISHEYE": 8,
-            "RADIAL_FISHEYE": 9,
-            "THIN_PRISM_FISHEYE": 10,
-        }
-        
-        with open(cameras_txt_path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith("#"):
-                    continue
-                
-                parts = line.split()
-                if len(parts) < 4:
-                    continue
-                
-                camera_id = int(parts[0])
-                model_name = parts[1]
-                width = int(parts[2])
-                height = int(parts[3])
-                params = [float(p) for p in parts[4:]]
-                
-                model_id = model_map.get(model_name, 0)
-                
-                cameras[camera_id] = {
-                    "model": model_id,
-                    "width": width,
-                    "height": height,
-                    "params": tuple(params),
-                }
-        
-        return cameras
+        return SFMMergeService._camera_dicts(colmap_io.read_cameras_txt(cameras_txt_path))
+
+    @staticmethod
+    def _point_dicts(points: colmap_io.PointColumns) -> Dict[int, Dict]:
+        ids = points.ids.astype(np.uint64).tolist()
+        xyz = points.xyz.tolist()
+        rgb = points.rgb.tolist()
+        error = points.error.tolist()
+        offsets = points.track_offsets.tolist()
+        track = list(zip(points.track_image_ids.tolist(), points.track_point2d_idx.tolist()))
+        result = {}
+        for i, point_id in enumerate(ids):
+            x, y, z = xyz[i]
+            r, g, b = rgb[i]
+            result[point_id] = {
+                "x": x, "y": y, "z": z,
+                "r": r, "g": g, "b": b,
+                "error": error[i],
+                "track": track[offsets[i]:offsets[i + 1]],
+            }
+        return result
     
+    @staticmethod
+    def _build_sparse_model(
+        cameras: Dict[int, Dict],
+        images: Dict[str, Dict],
+        points: Dict[int, Dict],
+    ) -> colmap_io.SparseModel:
+        """Merged dicts (legacy merge layout) -> columnar model for ``colmap_io`` writers.
+
+        Images are ordered by image_id, cameras and points by id.
+        """
+        model_cameras = {}
+        for cam_id, cam in sorted(cameras.items()):
+            model_name = colmap_io.CAMERA_MODELS.get(cam["model"], (f"UNKNOWN_{cam['model']}", 0))[0]
+            model_cameras[cam_id] = colmap_io.Camera(
+                cam_id, model_name, int(cam["width"]), int(cam["height"]),
+                np.asarray(cam["params"], dtype=np.float64),
+            )
+
+        ordered = sorted(images.items(), key=lambda x: x[1]["image_id"])
+        counts = [len(img.get("points2d") or []) for _, img in ordered]
+        offsets = np.zeros(len(ordered) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        obs = [p for _, img in ordered for p in (img.get("points2d") or [])]
+        image_columns = colmap_io.ImageColumns(
+            image_ids=np.array([img["image_id"] for _, img in ordered], dtype=np.int64),
+            qvecs=np.array([[img["qw"], img["qx"], img["qy"], img["qz"]] for _, img in ordered],
+                           dtype=np.float64).reshape(-1, 4),
+            tvecs=np.array([[img["tx"], img["ty"], img["tz"]] for _, img in ordered],
+                           dtype=np.float64).reshape(-1, 3),
+            camera_ids=np.array([img["camera_id"] for _, img in ordered], dtype=np.int64),
+            names=[name for name, _ in ordered],
+            obs_offsets=offsets,
+            xy=np.array([(x, y) for x, y, _ in obs], dtype=np.float64).reshape(-1, 2),
+            # UINT64_MAX (no 3D point) maps to -1 when viewed as int64
+            point3d_ids=np.array([pid for _, _, pid in obs], dtype=np.uint64).view(np.int64),
+        )
+
+        ordered_points = sorted(points.items())
+        tracks = [pt.get("track") or [] for _, pt in ordered_points]
+        track_offsets = np.zeros(len(ordered_points) + 1, dtype=np.int64)
+        np.cumsum([len(t) for t in tracks], out=track_offsets[1:])
+        track_pairs = np.array([e for t in tracks for e in t], dtype=np.int64).reshape(-1, 2)
+        point_columns = colmap_io.PointColumns(
+            ids=np.array([pid for pid, _ in ordered_points], dtype=np.uint64).view(np.int64),
+            xyz=np.array([[pt["x"], pt["y"], pt["z"]] for _, pt in ordered_points],
+                         dtype=np.float64).reshape(-1, 3),
+            rgb=np.array([[pt["r"], pt["g"], pt["b"]] for _, pt in ordered_points],
+                         dtype=np.uint8).reshape(-1, 3),
+            error=np.array([pt["error"] for _, pt in ordered_points], dtype=np.float64),
+            track_lengths=np.diff(track_offsets),
+            track_offsets=track_offsets,
+            track_image_ids=track_pairs[:, 0].copy(),
+            track_point2d_idx=track_pairs[:, 1].copy(),
+        )
+        return colmap_io.SparseModel(model_cameras, image_columns, point_columns, "bin")
+
     @staticmethod
     def read_points3d_bin(points_bin_path: str) -> Dict[int, Dict]:
         """Read COLMAP points3D.bin file.
@@ -227,35 +182,7 @@ class SFMMergeService:
         Returns:
             Dict mapping point3d_id -> {x, y, z, r, g, b, error, track}
         """
-        points = {}
-        with open(points_bin_path, "rb") as f:
-            num_points = struct.unpack("<Q", f.read(8))[0]
-            # Validate num_points to avoid overflow in range()
-            if num_points > 2**31 - 1:  # Python range() limit
-                raise RuntimeError(f"Number of points {num_points} exceeds Python range() limit")
-            for _ in range(int(num_points)):
-                point_id = struct.unpack("<Q", f.read(8))[0]
-                x, y, z = struct.unpack("<3d", f.read(24))
-                r, g, b = struct.unpack("<3B", f.read(3))
-                error = struct.unpack("<d", f.read(8))[0]
-                
-                track_length = struct.unpack("<Q", f.read(8))[0]
-                # Validate track_length to avoid overflow in range()
-                if track_length > 2**31 - 1:  # Python range() limit
-                    raise RuntimeError(f"Track length {track_length} exceeds Python range() limit")
-                track = []
-                for _ in range(int(track_length)):
-                    image_id = struct.unpack("<I", f.read(4))[0]
-                    point2d_idx = struct.unpack("<I", f.read(4))[0]
-                    track.append((int(image_id), int(point2d_idx)))
-                
-                points[point_id] = {
-                    "x": x, "y": y, "z": z,
-                    "r": r, "g": g, "b": b,
-                    "error": error,
-                    "track": track,
-                }
-        return points
+        return SFMMergeService._point_dicts(colmap_io.read_points3d_bin(points_bin_path, tracks=True))
     
     @staticmethod
     def read_points3d_txt(points_txt_path: str) -> Dict[int, Dict]:
@@ -264,39 +191,7 @@ class SFMMergeService:
         Returns:
             Dict mapping point3d_id -> {x, y, z, r, g, b, error, track}
         """
-        points = {}
-        with open(points_txt_path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith("#"):
-                    continue
-                
-                parts = line.split()
-                if len(parts) < 8:
-                    continue
-                
-                point_id = int(parts[0])
-                x, y, z = map(float, parts[1:4])
-                r, g, b = map(int, parts[4:7])
-                error = float(parts[7])
-                
-                # Track: image_id, point2d_idx pairs
-                track_elems = parts[8:]
-                track = []
-                for j in range(0, len(track_elems), 2):
-                    if j + 1 < len(track_elems):
-                        image_id = int(track_elems[j])
-                        point2d_idx = int(track_elems[j + 1])
-                        track.append((image_id, point2d_idx))
-                
-                points[point_id] = {
-                    "x": x, "y": y, "z": z,
-                    "r": r, "g": g, "b": b,
-                    "error": error,
-                    "track": track,
-                }
-        
-        return points
+        return SFMMergeService._point_dicts(colmap_io.read_points3d_txt(points_txt_path, tracks=True))
     
     @staticmethod
     def quaternion_to_rotation_matrix(qw: float, qx: float, qy: float, qz: float) -> np.ndarray:
@@ -924,127 +819,13 @@ class SFMMergeService:
         # Write merged results
         ctx.write_log_line(f"[Merge] Writing merged results to {output_sparse_dir}")
         
-        # Model ID to name mapping for text output
-        model_id_to_name = {
-            0: "SIMPLE_PINHOLE",
-            1: "PINHOLE",
-            2: "SIMPLE_RADIAL",
-            3: "RADIAL",
-            4: "OPENCV",
-            5: "OPENCV_FISHEYE",
-            6: "FULL_OPENCV",
-            7: "FOV",
-            8: "SIMPLE_RADIAL_FISHEYE",
-            9: "RADIAL_FISHEYE",
-            10: "THIN_PRISM_FISHEYE",
-        }
-        
-        # Write cameras.bin
-        # COLMAP cameras.bin format does NOT include num_params field
-        # Format: num_cameras (Q), then for each camera:
-        #   camera_id (I), model (I), width (Q), height (Q), params[] (d array, no count)
-        cameras_bin_path = os.path.join(output_sparse_dir, "cameras.bin")
-        MAX_UINT32 = 4294967295
-        with open(cameras_bin_path, "wb") as f:
-            f.write(struct.pack("<Q", len(merged_cameras)))
-            for cam_id, cam_data in sorted(merged_cameras.items()):
-                if cam_id > MAX_UINT32:
-                    raise RuntimeError(f"Cannot write camera_id {cam_id}: exceeds 32-bit unsigned integer limit ({MAX_UINT32})")
-                if cam_data["model"] > MAX_UINT32:
-                    raise RuntimeError(f"Cannot write camera model {cam_data['model']}: exceeds 32-bit unsigned integer limit")
-                f.write(struct.pack("<I", cam_id))
-                f.write(struct.pack("<I", cam_data["model"]))
-                f.write(struct.pack("<Q", cam_data["width"]))
-                f.write(struct.pack("<Q", cam_data["height"]))
-                # Write params directly without num_params field (COLMAP format)
-                params = cam_data["params"]
-                f.write(struct.pack(f"<{len(params)}d", *params))
-        
-        # Also write cameras.txt for compatibility (COLMAP sometimes has issues with binary format)
-        cameras_txt_path = os.path.join(output_sparse_dir, "cameras.txt")
-        with open(cameras_txt_path, "w", encoding="utf-8") as f:
-            f.write("# Camera list with one line of data per camera:\n")
-            f.write("#   CAMERA_ID, MODEL, WIDTH, HEIGHT, PARAMS[]\n")
-            f.write(f"# Number of cameras: {len(merged_cameras)}\n")
-            for cam_id, cam_data in sorted(merged_cameras.items()):
-                model_name = model_id_to_name.get(cam_data["model"], f"UNKNOWN_{cam_data['model']}")
-                params_str = " ".join(str(p) for p in cam_data["params"])
-                f.write(f"{cam_id} {model_name} {cam_data['width']} {cam_data['height']} {params_str}\n")
-        
-        # Write images.bin
-        images_bin_path = os.path.join(output_sparse_dir, "images.bin")
-        MAX_UINT32 = 4294967295
-        with open(images_bin_path, "wb") as f:
-            f.write(struct.pack("<Q", len(merged_images)))
-            for img_name, img_data in sorted(merged_images.items(), key=lambda x: x[1]["image_id"]):
-                img_id = img_data["image_id"]
-                cam_id = img_data["camera_id"]
-                if img_id > MAX_UINT32:
-                    raise RuntimeError(f"Cannot write image_id {img_id}: exceeds 32-bit unsigned integer limit ({MAX_UINT32})")
-                if cam_id > MAX_UINT32:
-                    raise RuntimeError(f"Cannot write camera_id {cam_id}: exceeds 32-bit unsigned integer limit ({MAX_UINT32})")
-                f.write(struct.pack("<I", img_id))
-                f.write(struct.pack("<4d", img_data["qw"], img_data["qx"], img_data["qy"], img_data["qz"]))
-                f.write(struct.pack("<3d", img_data["tx"], img_data["ty"], img_data["tz"]))
-                f.write(struct.pack("<I", cam_id))
-                f.write(img_name.encode("utf-8") + b"\x00")
-                
-                # Write 2D points if available
-                points2d = img_data.get("points2d", [])
-                f.write(struct.pack("<Q", len(points2d)))
-                for x, y, point3d_id in points2d:
-                    f.write(struct.pack("<2d", x, y))
-                    f.write(struct.pack("<Q", point3d_id))
-        
-        # Also write images.txt for compatibility
-        images_txt_path = os.path.join(output_sparse_dir, "images.txt")
-        with open(images_txt_path, "w", encoding="utf-8") as f:
-            f.write("# Image list with two lines of data per image:\n")
-            f.write("#   IMAGE_ID, QW, QX, QY, QZ, TX, TY, TZ, CAMERA_ID, NAME\n")
-            f.write("#   POINTS2D[] as (X, Y, IMAGE_ID, POINT2D_IDX)\n")
-            f.write(f"# Number of images: {len(merged_images)}, mean observations per image: 0\n")
-            for img_name, img_data in sorted(merged_images.items(), key=lambda x: x[1]["image_id"]):
-                f.write(f"{img_data['image_id']} {img_data['qw']} {img_data['qx']} {img_data['qy']} {img_data['qz']} "
-                       f"{img_data['tx']} {img_data['ty']} {img_data['tz']} {img_data['camera_id']} {img_name}\n")
-                # Empty 2D points line
-                f.write("\n")
-        
-        # Write points3D.bin
-        points_bin_path = os.path.join(output_sparse_dir, "points3D.bin")
-        with open(points_bin_path, "wb") as f:
-            f.write(struct.pack("<Q", len(merged_points)))
-            for pt_id, pt_data in sorted(merged_points.items()):
-                f.write(struct.pack("<Q", pt_id))
-                f.write(struct.pack("<3d", pt_data["x"], pt_data["y"], pt_data["z"]))
-                f.write(struct.pack("<3B", pt_data["r"], pt_data["g"], pt_data["b"]))
-                f.write(struct.pack("<d", pt_data["error"]))
-                track = pt_data["track"]
-                f.write(struct.pack("<Q", len(track)))
-                MAX_UINT32 = 4294967295
-                for image_id, point2d_idx in track:
-                    # Ensure values are integers and within valid range
-                    image_id_int = int(image_id)
-                    point2d_idx_int = int(point2d_idx)
-                    if image_id_int < 0 or image_id_int > MAX_UINT32:
-                        raise RuntimeError(f"Cannot write track image_id {image_id_int}: exceeds 32-bit unsigned integer limit ({MAX_UINT32})")
-                    if point2d_idx_int < 0 or point2d_idx_int > MAX_UINT32:
-                        raise RuntimeError(f"Cannot write track point2d_idx {point2d_idx_int}: exceeds 32-bit unsigned integer limit ({MAX_UINT32})")
-                    f.write(struct.pack("<I", image_id_int))
-                    f.write(struct.pack("<I", point2d_idx_int))
-        
-        # Also write points3D.txt for compatibility
-        points_txt_path = os.path.join(output_sparse_dir, "points3D.txt")
-        with open(points_txt_path, "w", encoding="utf-8") as f:
-            f.write("# 3D point list with one line of data per point:\n")
-            f.write("#   POINT3D_ID, X, Y, Z, R, G, B, ERROR, TRACK[] as (IMAGE_ID, POINT2D_IDX)\n")
-            total_obs = sum(len(pt.get("track", [])) for pt in merged_points.values())
-            mean_track = (total_obs / len(merged_points)) if merged_points else 0.0
-            f.write(f"# Number of points: {len(merged_points)}, mean track length: {mean_track:.1f}\n")
-            for pt_id, pt_data in sorted(merged_points.items()):
-                track = pt_data.get("track", [])
-                track_str = " ".join(f"{img_id} {pt2d_idx}" for img_id, pt2d_idx in track)
-                f.write(f"{pt_id} {pt_data['x']} {pt_data['y']} {pt_data['z']} "
-                       f"{pt_data['r']} {pt_data['g']} {pt_data['b']} {pt_data['error']} {track_str}\n")
+        merged_model = SFMMergeService._build_sparse_model(merged_cameras, merged_images, merged_points)
+        try:
+            colmap_io.write_model(merged_model, output_sparse_dir, "bin")
+            # Also write the text model for compatibility (COLMAP sometimes has issues with binary format)
+            colmap_io.write_model(merged_model, output_sparse_dir, "txt")
+        except ValueError as e:
+            raise RuntimeError(f"Cannot write merged model: {e}") from e
 
         # Write merged stats sidecar for reprojection error (InstantSfM ERROR often 0 in merged bin-only output)
         try:
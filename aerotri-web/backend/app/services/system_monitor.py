@@ -119,10 +119,27 @@ class SystemMonitor:
     @classmethod
     def get_system_status(cls) -> dict:
         """Get complete system status snapshot.
+
+        Served from the background telemetry sampler; when it has no recent
+        sample (not started yet) one is taken on the spot, which does not block
+        either since the sampler's CPU counter is primed.
         
         Returns:
             Dict with all system metrics
         """
+        try:
+            from .telemetry import telemetry_sampler
+
+            sample = telemetry_sampler.latest(max_age=telemetry_sampler.interval * 3)
+            if sample is None:
+                sample = telemetry_sampler.sample_once()
+            status = sample.to_dict(include_processes=False)
+            status["gpu_count"] = len(status["gpus"])
+            status["timestamp"] = datetime.utcfromtimestamp(sample.timestamp).isoformat()
+            return status
+        except Exception as e:
+            logger.warning(f"Telemetry unavailable, sampling directly: {e}")
+
         memory = cls.get_memory_info()
         disk = cls.get_disk_info("/")
         gpus = cls.get_gpu_info()
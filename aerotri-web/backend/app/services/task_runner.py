@@ -2,14 +2,12 @@
 import os
 import asyncio
 import time
-import shutil
 import multiprocessing
 import csv
 import json
 import math
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
-from collections import deque
+from typing import Dict, List, Optional
 from pathlib import Path
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -18,6 +16,10 @@ from ..models.block import Block, BlockStatus, AlgorithmType, MatchingMethod, Gl
 from ..models.database import AsyncSessionLocal
 from ..conf.settings import get_settings
 from .log_parser import LogParser
+from .process_pump import BufferedLogWriter, LogRingBuffer, ProcessOutputPump
+from .log_tail import tail_lines
+from . import colmap_io
+from .image_catalog import ImageCatalogService, block_image_dir, read_gps_positions
 from .workspace_service import WorkspaceService
 from .instantsfm_visualizer_proxy import (
     InstantSfMVisualizerProxy,
@@ -26,6 +28,9 @@ from .instantsfm_visualizer_proxy import (
     get_visualizer_proxy,
 )
 from .task_notifier import task_notifier
+from .progress_hub import progress_hub
+from .resource_profiler import resource_profiler
+from .benchmark_store import benchmark_store
 
 
 # Load algorithm paths from configuration system
@@ -56,48 +61,61 @@ class TaskContext:
         self.block_id = block_id
         self.process: Optional[asyncio.subprocess.Process] = None
         self.log_parser = LogParser()
-        self.log_buffer: deque = deque(maxlen=1000)
+        self.log_buffer: LogRingBuffer = LogRingBuffer(maxlen=1000)
         self.log_file_path: Optional[str] = None
-        self._log_fp = None
-        self._global_log_fp = None  # Additional log file for partitioned mode
+        self._log_writer: Optional[BufferedLogWriter] = None
+        self._global_log_writer: Optional[BufferedLogWriter] = None  # Additional log file for partitioned mode
         self.started_at: Optional[datetime] = None
         self.current_stage: Optional[str] = None
         self.progress: float = 0.0
         self.cancelled: bool = False
 
-    def open_log_file(self, output_dir: str):
-        """Open per-task log file for persistence."""
+    def open_log_file(self, output_dir: str, filename: str = "run.log"):
+        """Open per-task log file for persistence (written by a background thread)."""
         try:
             os.makedirs(output_dir, exist_ok=True)
-            self.log_file_path = os.path.join(output_dir, "run.log")
-            # line-buffered text mode
-            self._log_fp = open(self.log_file_path, "a", buffering=1, encoding="utf-8", errors="replace")
+            self.log_file_path = os.path.join(output_dir, filename)
+            self._log_writer = BufferedLogWriter(self.log_file_path)
         except Exception:
             self.log_file_path = None
-            self._log_fp = None
+            self._log_writer = None
+
+    async def open_global_log_file(self, path: Optional[str]):
+        """Mirror log lines to an additional file (partitioned mode)."""
+        if self._global_log_writer:
+            await self._global_log_writer.aclose()
+        self._global_log_writer = None
+        if not path:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._global_log_writer = BufferedLogWriter(path)
+        except Exception:
+            self._global_log_writer = None
 
-    def close_log_file(self):
+    async def close_log_file(self):
         try:
-            if self._log_fp:
-                self._log_fp.flush()
-                self._log_fp.close()
-            if self._global_log_fp:
-                self._global_log_fp.flush()
-                self._global_log_fp.close()
+            if self._log_writer:
+                await self._log_writer.aclose()
+            if self._global_log_writer:
+                await self._global_log_writer.aclose()
         except Exception:
             pass
         finally:
-            self._log_fp = None
-            self._global_log_fp = None
+            self._log_writer = None
+            self._global_log_writer = None
 
     def write_log_line(self, line: str):
-        try:
-            if self._log_fp:
-                self._log_fp.write(line + "\n")
-            if self._global_log_fp:
-                self._global_log_fp.write(line + "\n")
-        except Exception:
-            pass
+        if self._log_writer:
+            self._log_writer.write(line)
+        if self._global_log_writer:
+            self._global_log_writer.write(line)
+
+    def write_log_lines(self, lines: List[str]):
+        if self._log_writer:
+            self._log_writer.write_many(lines)
+        if self._global_log_writer:
+            self._global_log_writer.write_many(lines)
 
 
 class TaskRunner:
@@ -105,7 +123,6 @@ class TaskRunner:
     
     def __init__(self):
         self.running_tasks: Dict[str, TaskContext] = {}
-        self.ws_connections: Dict[str, List] = {}  # block_id -> list of websocket connections
         self._recovery_done = False
     
     async def recover_orphaned_tasks(self):
@@ -237,6 +254,7 @@ class TaskRunner:
         # Create task context
         ctx = TaskContext(block.id)
         ctx.started_at = datetime.now()
+        resource_profiler.begin_run("sfm", block.id)
         ctx.open_log_file(output_path)
         self.running_tasks[block.id] = ctx
         
@@ -281,15 +299,8 @@ class TaskRunner:
         # Create task context
         ctx = TaskContext(block.id)
         ctx.started_at = datetime.now()
-        merge_log_path = os.path.join(block.output_path, "run_merge.log")
-        ctx.open_log_file(os.path.dirname(merge_log_path))
-        ctx.log_file_path = merge_log_path
-        # Reopen with correct path
-        try:
-            os.makedirs(os.path.dirname(merge_log_path), exist_ok=True)
-            ctx._log_fp = open(merge_log_path, "a", buffering=1, encoding="utf-8", errors="replace")
-        except Exception:
-            ctx._log_fp = None
+        resource_profiler.begin_run("sfm", block.id)
+        ctx.open_log_file(block.output_path, "run_merge.log")
         
         self.running_tasks[block.id] = ctx
         
@@ -482,7 +493,15 @@ class TaskRunner:
                             "gpu_index": gpu_index,
                         },
                     }
+                    block.statistics = resource_profiler.attach(block.statistics, "sfm", block.id)
                     await db.commit()
+                    benchmark_store.schedule("sfm", block.id)
+                    await self._notify_progress(block_id, {
+                        "stage": "completed",
+                        "progress": 100.0,
+                        "status": BlockStatus.COMPLETED.value,
+                        "message": "SfM completed",
+                    })
                     
                     # Send task completed notification
                     await task_notifier.on_task_completed(
@@ -497,9 +516,16 @@ class TaskRunner:
                         block = result.scalar_one_or_none()
                         if block:
                             block.status = BlockStatus.FAILED
+                            block.statistics = resource_profiler.attach(block.statistics, "sfm", block.id)
                             block.error_message = str(e)
                             block.completed_at = datetime.utcnow()
                             await db.commit()
+                            await self._notify_progress(block_id, {
+                                "stage": block.current_stage or "failed",
+                                "progress": ctx.progress,
+                                "status": BlockStatus.FAILED.value,
+                                "message": str(e),
+                            })
 
                             # Trigger diagnostic agent (async, non-blocking)
                             try:
@@ -534,7 +560,7 @@ class TaskRunner:
         finally:
             # Cleanup (always)
             if block_id in self.running_tasks:
-                ctx.close_log_file()
+                await ctx.close_log_file()
                 del self.running_tasks[block_id]
             
             # Trigger queue scheduler to dispatch next task
@@ -544,27 +570,6 @@ class TaskRunner:
             except Exception as e:
                 print(f"Failed to trigger queue scheduler: {e}")
 
-    @staticmethod
-    def _qvec_to_rotmat(qvec: Tuple[float, float, float, float]):
-        """Convert COLMAP qvec (qw,qx,qy,qz) to rotation matrix R (3x3).
-
-        Uses COLMAP's convention.
-        """
-        qw, qx, qy, qz = qvec
-        return (
-            (1.0 - 2.0 * qy * qy - 2.0 * qz * qz, 2.0 * qx * qy - 2.0 * qw * qz, 2.0 * qx * qz + 2.0 * qw * qy),
-            (2.0 * qx * qy + 2.0 * qw * qz, 1.0 - 2.0 * qx * qx - 2.0 * qz * qz, 2.0 * qy * qz - 2.0 * qw * qx),
-            (2.0 * qx * qz - 2.0 * qw * qy, 2.0 * qy * qz + 2.0 * qw * qx, 1.0 - 2.0 * qx * qx - 2.0 * qy * qy),
-        )
-
-    @staticmethod
-    def _mat3_mul_vec3(R, v):
-        return (
-            R[0][0] * v[0] + R[0][1] * v[1] + R[0][2] * v[2],
-            R[1][0] * v[0] + R[1][1] * v[1] + R[1][2] * v[2],
-            R[2][0] * v[0] + R[2][1] * v[1] + R[2][2] * v[2],
-        )
-
     @staticmethod
     def _find_best_sparse_input_dir(output_path: str) -> Optional[str]:
         """Find best sparse model directory under a block output_path.
@@ -617,47 +622,23 @@ class TaskRunner:
 
         # 1) EXIF GPS -> CSV (optional when external ref provided)
         gps_csv = os.path.join(geo_dir, "gps_raw.csv")
-        exif_rows: List[dict] = []
+        gps_positions: List[tuple] = []
         if not external_ref_images_path:
-            cmd_exif = [
-                "exiftool",
-                "-csv",
-                "-n",
-                "-FileName",
-                "-GPSLatitude",
-                "-GPSLongitude",
-                "-GPSAltitude",
-                image_dir,
-            ]
-            ctx.write_log_line(f"[GEOREF] Extracting EXIF GPS: {' '.join(cmd_exif)}")
+            ctx.write_log_line(f"[GEOREF] Extracting EXIF GPS: {image_dir}")
+            if os.path.realpath(image_dir) == os.path.realpath(block_image_dir(block) or ""):
+                # Catalog rows already carry the GPS tags; only new/changed files are read
+                await ImageCatalogService.refresh(db, block)
+                gps_positions = await ImageCatalogService.gps_positions(db, block.id)
+            else:
+                gps_positions = await asyncio.to_thread(read_gps_positions, image_dir)
+            ctx.write_log_line(f"[GEOREF] {len(gps_positions)} GPS-tagged images")
 
-            # Run exiftool and capture stdout to file (do NOT rely on _run_process output capture).
-            proc = await asyncio.create_subprocess_exec(
-                *cmd_exif,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.STDOUT,
-            )
-            out = []
-            while True:
-                line = await proc.stdout.readline()
-                if not line:
-                    break
-                out.append(line.decode("utf-8", errors="replace"))
-            await proc.wait()
-            if proc.returncode != 0:
-                raise RuntimeError(f"exiftool failed with code {proc.returncode}")
-
-            # exiftool may print non-CSV summary lines before the actual CSV header.
-            header_idx = None
-            for i, ln in enumerate(out):
-                if ln.startswith("SourceFile,") or ln.startswith("FileName,"):
-                    header_idx = i
-                    break
-            if header_idx is None:
-                raise RuntimeError("exiftool output does not contain CSV header (SourceFile/FileName)")
-            out = out[header_idx:]
-            with open(gps_csv, "w", encoding="utf-8") as f:
-                f.writelines(out)
+            # Same columns as `exiftool -csv -n -FileName -GPSLatitude -GPSLongitude -GPSAltitude`
+            with open(gps_csv, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["FileName", "GPSLatitude", "GPSLongitude", "GPSAltitude"])
+                for name, lat, lon, alt in gps_positions:
+                    writer.writerow([name, lat, lon, "" if alt is None else alt])
 
         # 2) Build ref_images.txt
         try:
@@ -722,38 +703,19 @@ class TaskRunner:
             tr = None  # type: ignore
 
         else:
-            # Robust CSV parsing: gps_csv may still contain exiftool summary lines; skip them.
-            with open(gps_csv, "r", encoding="utf-8", errors="replace") as f:
-                raw_lines = f.read().splitlines()
-            header_idx = None
-            for i, ln in enumerate(raw_lines):
-                if ln.startswith("SourceFile,") or ln.startswith("FileName,"):
-                    header_idx = i
-                    break
-            if header_idx is None:
-                raise RuntimeError("gps_raw.csv missing CSV header (SourceFile/FileName)")
-            csv_text = "\n".join(raw_lines[header_idx:]) + "\n"
-            import io
-            reader = csv.DictReader(io.StringIO(csv_text))
-            # If exiftool found no GPS tags in any image, it may omit GPS columns entirely.
-            if not reader.fieldnames or ("GPSLatitude" not in reader.fieldnames or "GPSLongitude" not in reader.fieldnames):
+            if not gps_positions:
                 raise RuntimeError(
-                    "No EXIF GPS tags found in images (exiftool CSV has no GPSLatitude/GPSLongitude columns). "
+                    "No EXIF GPS tags found in images. "
                     "Either use images with EXIF GPS or provide mapper_params.georef_ref_images_path + georef_epsg_utm."
                 )
-            for r in reader:
-                if not r.get("FileName"):
-                    continue
-                if r.get("GPSLatitude") in (None, "", "nan") or r.get("GPSLongitude") in (None, "", "nan"):
-                    continue
-                rows.append(r)
+            rows = [{"FileName": name} for name, _, _, _ in gps_positions]
 
             if len(rows) < 3:
                 raise RuntimeError(f"Not enough GPS-tagged images for alignment: {len(rows)}")
 
-            lats = [float(r["GPSLatitude"]) for r in rows]
-            lons = [float(r["GPSLongitude"]) for r in rows]
-            alts = [float(r.get("GPSAltitude") or 0.0) for r in rows]
+            lats = [float(lat) for _, lat, _, _ in gps_positions]
+            lons = [float(lon) for _, _, lon, _ in gps_positions]
+            alts = [float(alt or 0.0) for _, _, _, alt in gps_positions]
             lat_mean = sum(lats) / len(lats)
             lon_mean = sum(lons) / len(lons)
 
@@ -865,101 +827,18 @@ class TaskRunner:
             json.dump(geo_ref, f, ensure_ascii=False, indent=2)
         ctx.write_log_line(f"[GEOREF] Wrote geo_ref.json: {geo_ref_path}")
 
-        # Convert UTM model -> TXT (for shifting)
-        sparse_utm_txt = os.path.join(out_root, "sparse_utm_txt")
-        sparse_local_txt = os.path.join(out_root, "sparse_enu_local_txt")
+        # Shift the UTM model in memory: read sparse_utm/0 binaries, translate
+        # poses/points with NumPy and write sparse_enu_local/0 directly.
         sparse_local_root = os.path.join(out_root, "sparse_enu_local")
-        os.makedirs(sparse_utm_txt, exist_ok=True)
-        os.makedirs(sparse_local_txt, exist_ok=True)
-        os.makedirs(os.path.join(sparse_local_root, "0"), exist_ok=True)
-
-        cmd_to_txt = [
-            COLMAP_PATH,
-            "model_converter",
-            "--input_path",
-            sparse_utm_0,
-            "--output_path",
-            sparse_utm_txt,
-            "--output_type",
-            "TXT",
-        ]
-        await self._run_process(cmd_to_txt, ctx, db, block_id, coarse_stage="georef")
-
-        # Shift points3D.txt and images.txt
-        # points: X' = X - O
-        # images: t' = t + R*O (so that camera centers shift by -O)
-        cameras_src = os.path.join(sparse_utm_txt, "cameras.txt")
-        images_src = os.path.join(sparse_utm_txt, "images.txt")
-        points_src = os.path.join(sparse_utm_txt, "points3D.txt")
-        if not (os.path.exists(images_src) and os.path.exists(points_src) and os.path.exists(cameras_src)):
-            raise RuntimeError("TXT export missing required files for shifting")
-
-        # cameras.txt (copy)
-        shutil.copy2(cameras_src, os.path.join(sparse_local_txt, "cameras.txt"))
-
-        # images.txt
-        with open(images_src, "r", encoding="utf-8", errors="replace") as fin, open(
-            os.path.join(sparse_local_txt, "images.txt"), "w", encoding="utf-8"
-        ) as fout:
-            while True:
-                pose = fin.readline()
-                if not pose:
-                    break
-                if pose.startswith("#") or pose.strip() == "":
-                    fout.write(pose)
-                    continue
-                parts = pose.strip().split()
-                if len(parts) < 10:
-                    fout.write(pose)
-                    continue
-                image_id = parts[0]
-                qw, qx, qy, qz = map(float, parts[1:5])
-                tx, ty, tz = map(float, parts[5:8])
-                cam_id = parts[8]
-                name = " ".join(parts[9:])
-                R = self._qvec_to_rotmat((qw, qx, qy, qz))
-                Ro = self._mat3_mul_vec3(R, O)
-                t_new = (tx + Ro[0], ty + Ro[1], tz + Ro[2])
-                fout.write(
-                    f"{image_id} {qw:.17g} {qx:.17g} {qy:.17g} {qz:.17g} {t_new[0]:.17g} {t_new[1]:.17g} {t_new[2]:.17g} {cam_id} {name}\n"
-                )
-                pts2d = fin.readline()
-                if not pts2d:
-                    break
-                fout.write(pts2d)
-
-        # points3D.txt
-        with open(points_src, "r", encoding="utf-8", errors="replace") as fin, open(
-            os.path.join(sparse_local_txt, "points3D.txt"), "w", encoding="utf-8"
-        ) as fout:
-            for ln in fin:
-                if ln.startswith("#") or ln.strip() == "":
-                    fout.write(ln)
-                    continue
-                parts = ln.strip().split()
-                if len(parts) < 8:
-                    fout.write(ln)
-                    continue
-                pid = parts[0]
-                x, y, z = map(float, parts[1:4])
-                x -= O[0]
-                y -= O[1]
-                z -= O[2]
-                rest = " ".join(parts[4:])
-                fout.write(f"{pid} {x:.17g} {y:.17g} {z:.17g} {rest}\n")
-
-        # Convert shifted TXT -> BIN
-        cmd_to_bin = [
-            COLMAP_PATH,
-            "model_converter",
-            "--input_path",
-            sparse_local_txt,
-            "--output_path",
-            os.path.join(sparse_local_root, "0"),
-            "--output_type",
-            "BIN",
-        ]
-        await self._run_process(cmd_to_bin, ctx, db, block_id, coarse_stage="georef")
+        sparse_local_0 = os.path.join(sparse_local_root, "0")
+        if colmap_io.detect_format(sparse_utm_0, prefer="bin") != "bin":
+            raise RuntimeError(f"model_aligner output missing binary model files: {sparse_utm_0}")
+        ctx.write_log_line(f"[GEOREF] Shifting origin in memory: {sparse_utm_0} -> {sparse_local_0}")
+        shift_counts = await asyncio.to_thread(colmap_io.shift_model_origin_bin, sparse_utm_0, sparse_local_0, O)
+        ctx.write_log_line(
+            f"[GEOREF] Origin shift done: {shift_counts['num_images']} images, "
+            f"{shift_counts['num_points3d']} points"
+        )
 
         # Record stats for later consumers
         try:
@@ -969,7 +848,7 @@ class TaskRunner:
                 "origin_utm": geo_ref["origin_utm"],
                 "origin_wgs84": geo_ref["origin_wgs84"],
                 "sparse_utm_dir": sparse_utm_0,
-                "sparse_enu_local_dir": os.path.join(sparse_local_root, "0"),
+                "sparse_enu_local_dir": sparse_local_0,
                 "geo_ref_path": geo_ref_path,
             }
             block.statistics = stats
@@ -1005,19 +884,9 @@ class TaskRunner:
             db: Database session
             log_file_path: Optional log file path (defaults to run_global.log)
         """
-        if log_file_path:
-            # For partitioned mode, we want to write to both the main log and the global log
-            # Keep the main log file open for frontend compatibility
-            # Also write to global log for detailed tracking
-            try:
-                os.makedirs(os.path.dirname(log_file_path), exist_ok=True)
-                # Open global log file in addition to main log
-                # The main log file (_log_fp) remains open, we'll write to both
-                ctx._global_log_fp = open(log_file_path, "a", buffering=1, encoding="utf-8", errors="replace")
-            except Exception:
-                ctx._global_log_fp = None
-        else:
-            ctx._global_log_fp = None
+        # For partitioned mode, write to both the main log (kept open for frontend
+        # compatibility) and the global log for detailed tracking
+        await ctx.open_global_log_file(log_file_path)
         
         # Stage 1: Feature extraction
         # Use frontend-recognizable stage names: "feature_extraction" instead of "global_feature"
@@ -1144,6 +1013,12 @@ class TaskRunner:
             # Note: COLMAP automatically detects GPS vs Cartesian coordinates from database
             spatial_max_num_neighbors = params.get("spatial_max_num_neighbors", 50)
             spatial_ignore_z = params.get("spatial_ignore_z", False)
+            # GPS coverage is known from the image catalog; warn before a long matching run without priors
+            num_gps = len(await ImageCatalogService.gps_positions(db, block_id))
+            if num_gps == 0:
+                ctx.write_log_line("[MATCH][WARNING] No GPS-tagged images in catalog; spatial matching has no position priors")
+            else:
+                ctx.write_log_line(f"[MATCH] Spatial matching with {num_gps} GPS-tagged images")
             cmd = [
                 COLMAP_PATH, "spatial_matcher",
                 "--database_path", database_path,
@@ -1622,7 +1497,9 @@ class TaskRunner:
                 "glomap_params": getattr(block, "glomap_params", None),
             },
         }
+        block.statistics = resource_profiler.attach(block.statistics, "sfm", block.id)
         await db.commit()
+        benchmark_store.schedule("sfm", block.id)
 
     def _create_partition_database(
         self,
@@ -2041,28 +1918,38 @@ class TaskRunner:
             env=env,  # Pass environment with library paths
         )
         ctx.process = process
+        labels = {"partition_index": partition_index} if partition_index is not None else {}
+        profiler = resource_profiler.start("sfm", block_id, coarse_stage, process.pid, tool=cmd[0], **labels)
+        try:
+            # Pick the log profile matching the executable (colmap/glomap/instantsfm/openMVG...)
+            ctx.log_parser.use_command(cmd)
+
+            # Push stage start even if the tool never prints a parsable progress line
+            await self._notify_progress(ctx.block_id, {
+                "stage": coarse_stage,
+                "progress": 0.0,
+                "message": f"Running {os.path.basename(cmd[0])} {cmd[1] if len(cmd) > 1 else ''}".strip(),
+            })
 
-        last_db_update = 0.0
-        last_detail = None
-        last_progress = -1.0
-        
-        # Read output line by line
-        while True:
-            if ctx.cancelled:
-                process.terminate()
-                break
-            
-            line = await process.stdout.readline()
-            if not line:
-                break
-            
-            line_str = line.decode('utf-8', errors='replace').strip()
-            if line_str:
-                ctx.log_buffer.append(line_str)
-                ctx.write_log_line(line_str)
-                
-                # Parse progress
-                progress = ctx.log_parser.parse_line(line_str)
+            last_db_update = 0.0
+            last_detail = None
+            last_progress = -1.0
+
+            # Read output in large chunks; lines land in the ring buffer as they are split,
+            # and log files are written by background threads
+            pump = ProcessOutputPump(process.stdout, ring=ctx.log_buffer)
+            async for lines in pump.batches():
+                ctx.write_log_lines(lines)
+                if ctx.cancelled:
+                    process.terminate()
+                    break
+
+                # Parse progress; only the newest progress of a batch is reported
+                progress = None
+                for line_str in lines:
+                    parsed = ctx.log_parser.parse_line(line_str)
+                    if parsed:
+                        progress = parsed
                 if progress:
                     ctx.current_stage = coarse_stage
                     ctx.progress = progress.progress
@@ -2086,7 +1973,7 @@ class TaskRunner:
                         last_db_update = now
                         last_detail = detail_stage
                         last_progress = progress.progress
-                    
+
                     # Notify WebSocket clients
                     await self._notify_progress(ctx.block_id, {
                         "stage": progress.stage,  # detail stage
@@ -2094,7 +1981,9 @@ class TaskRunner:
                         "message": progress.message,
                     })
         
-        await process.wait()
+            await process.wait()
+        finally:
+            await resource_profiler.finish("sfm", block_id, profiler, process.returncode)
 
         # 处理非 0 退出码。
         # 注意：COLMAP / GLOMAP / InstantSfM 在处理完成后，退出阶段存在已知的 SIGSEGV/Abort 问题（returncode 为负数，通常是 -11 或 -6）。
@@ -2212,7 +2101,9 @@ class TaskRunner:
         return p
     
     async def _notify_progress(self, block_id: str, data: dict):
-        """Notify WebSocket clients about progress.
+        """Publish progress to WebSocket subscribers via the progress hub.
+        
+        Publishing never waits on clients; each subscriber drains its own queue.
         
         Args:
             block_id: Block ID
@@ -2221,13 +2112,7 @@ class TaskRunner:
         # Default pipeline for legacy callers (SfM)
         if "pipeline" not in data:
             data["pipeline"] = "sfm"
-        
-        if block_id in self.ws_connections:
-            for ws in self.ws_connections[block_id]:
-                try:
-                    await ws.send_json(data)
-                except Exception:
-                    pass
+        progress_hub.publish(block_id, data)
     
     async def stop_task(self, block_id: str, db: AsyncSession):
         """Stop a running task.
@@ -2259,6 +2144,12 @@ class TaskRunner:
                 block.current_detail = None
                 block.completed_at = datetime.utcnow()
                 await s.commit()
+        await self._notify_progress(block_id, {
+            "stage": "cancelled",
+            "progress": ctx.progress,
+            "status": BlockStatus.CANCELLED.value,
+            "message": "Task cancelled",
+        })
     
     def get_log_tail(self, block_id: str, lines: int = 20) -> Optional[List[str]]:
         """Get last N lines of log.
@@ -2277,16 +2168,7 @@ class TaskRunner:
 
         # If completed, try read persisted log file
         log_path = os.path.join(str(OUTPUTS_DIR), block_id, "run.log")
-        if not os.path.exists(log_path):
-            return None
-        try:
-            dq: deque = deque(maxlen=lines)
-            with open(log_path, "r", encoding="utf-8", errors="replace") as f:
-                for ln in f:
-                    dq.append(ln.rstrip("\n"))
-            return list(dq)
-        except Exception:
-            return None
+        return tail_lines(log_path, lines)
     
     def get_stage_times(self, block_id: str) -> Optional[Dict[str, float]]:
         """Get stage timing information.
@@ -2310,21 +2192,18 @@ class TaskRunner:
             block_id: Block ID
             ws: WebSocket connection
         """
-        if block_id not in self.ws_connections:
-            self.ws_connections[block_id] = []
-        self.ws_connections[block_id].append(ws)
+        return progress_hub.subscribe(block_id, ws)
     
-    def unregister_websocket(self, block_id: str, ws):
+    async def unregister_websocket(self, block_id: str, ws):
         """Unregister a WebSocket connection.
         
         Args:
             block_id: Block ID
             ws: WebSocket connection
         """
-        if block_id in self.ws_connections:
-            self.ws_connections[block_id] = [
-                w for w in self.ws_connections[block_id] if w != ws
-            ]
+        sub = progress_hub.find_subscriber(block_id, ws)
+        if sub is not None:
+            await progress_hub.unsubscribe(sub)
     
     async def _run_partitioned_sfm(
         self,
@@ -2480,6 +2359,7 @@ class TaskRunner:
                         "merge_strategy": block.merge_strategy or "sim3_keep_one",
                     },
                 }
+                block.statistics = resource_profiler.attach(block.statistics, "sfm", block.id)
                 await db.commit()
                 
                 ctx.write_log_line(f"[Partitions] All {len(partitions)} partitions completed. Ready for merge.")
@@ -2490,6 +2370,7 @@ class TaskRunner:
                     block = result.scalar_one_or_none()
                     if block:
                         block.status = BlockStatus.FAILED
+                        block.statistics = resource_profiler.attach(block.statistics, "sfm", block.id)
                         block.error_message = str(e)
                         block.completed_at = datetime.utcnow()
                         await db.commit()
@@ -2511,7 +2392,7 @@ class TaskRunner:
                 pass
         finally:
             if block_id in self.running_tasks:
-                ctx.close_log_file()
+                await ctx.close_log_file()
                 del self.running_tasks[block_id]
             
             # Trigger queue scheduler to dispatch next task
@@ -2613,8 +2494,9 @@ class TaskRunner:
                 block.current_stage = "completed"
                 block.current_detail = None
                 block.progress = 100.0
-                block.statistics = existing_stats
+                block.statistics = resource_profiler.attach(existing_stats, "sfm", block.id, extend=True)
                 await db.commit()
+                benchmark_store.schedule("sfm", block.id)
                 
                 ctx.write_log_line(f"[Merge] Merge completed successfully in {merge_time:.2f} seconds")
         except Exception as e:
@@ -2624,6 +2506,7 @@ class TaskRunner:
                     block = result.scalar_one_or_none()
                     if block:
                         block.status = BlockStatus.FAILED
+                        block.statistics = resource_profiler.attach(block.statistics, "sfm", block.id)
                         block.error_message = str(e)
                         block.completed_at = datetime.utcnow()
                         block.current_stage = "merge_failed"
@@ -2648,7 +2531,7 @@ class TaskRunner:
         finally:
             # Cleanup task context
             if block_id in self.running_tasks:
-                ctx.close_log_file()
+                await ctx.close_log_file()
                 del self.running_tasks[block_id]
             
             # Trigger queue scheduler to dispatch next task
@@ -2690,7 +2573,7 @@ class TaskRunner:
         await db.commit()
         
         # Get partition image names
-        partition_images = await PartitionService.get_partition_image_names(block, partition)
+        partition_images = await PartitionService.get_partition_image_names(block, partition, db)
         if not partition_images:
             raise RuntimeError(f"No images found for partition {partition.index}")
         
@@ -3355,7 +3238,9 @@ class TaskRunner:
                     "openmvg_params": openmvg_params,
                 },
             }
+            block.statistics = resource_profiler.attach(block.statistics, "sfm", block.id)
             await db.commit()
+            benchmark_store.schedule("sfm", block.id)
             
             ctx.write_log_line("=" * 80)
             ctx.write_log_line("OpenMVG Pipeline completed successfully!")
@@ -3364,6 +3249,7 @@ class TaskRunner:
             
         except Exception as e:
             block.status = BlockStatus.FAILED
+            block.statistics = resource_profiler.attach(block.statistics, "sfm", block.id)
             block.error_message = str(e)
             block.completed_at = datetime.utcnow()
 
@@ -0,0 +1,493 @@
+"""Background telemetry sampler.
+
+Request handlers used to sample the machine on the request path:
+``psutil.cpu_percent(interval=0.1)`` blocked for 100 ms, and every GPU query
+looked the NVML handle up again. ``TelemetrySampler`` instead samples on a
+fixed cadence (``monitoring.telemetry.interval_seconds``) in a worker thread
+and keeps the samples in a ring buffer. ``/api/system/status``, the
+notification scheduler and the diagnostic collector read the latest sample,
+and ``/api/system/telemetry/history`` serves the time series.
+
+Each sample holds:
+
+- host CPU / RAM / disk usage;
+- per-GPU memory and utilization (NVML handles are looked up once);
+- per-task attribution: CPU, RSS and GPU memory of every running COLMAP /
+  OpenMVS / 3DGS / tiles child process, summed over its process tree.
+
+``FakeNVML`` implements the NVML calls used here so the sampler can be
+exercised on machines without GPUs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from types import SimpleNamespace
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 2.0
+DEFAULT_HISTORY_SIZE = 1800  # 1 h at the default interval
+_MB = 1024 * 1024
+_GB = 1024 ** 3
+
+# (kind, task key, pid) of a running child process
+TrackedProcess = Tuple[str, str, int]
+
+
+@dataclass
+class GPUSample:
+    index: int
+    name: str
+    memory_total: int  # MB
+    memory_used: int  # MB
+    memory_free: int  # MB
+    utilization: int  # percentage
+    is_available: bool
+
+
+@dataclass
+class ProcessSample:
+    """Resources of one task's process tree."""
+    kind: str  # sfm | openmvs | openmvs_version | gs | tiles | gs_tiles
+    key: str  # block id or version id
+    pid: int
+    num_processes: int
+    cpu_percent: float
+    rss_mb: float
+    gpu_memory_mb: float
+
+
+@dataclass
+class TelemetrySample:
+    timestamp: float
+    cpu_percent: float
+    memory_total_gb: float
+    memory_used_gb: float
+    memory_available_gb: float
+    memory_percent: float
+    disk_total_gb: float
+    disk_used_gb: float
+    disk_free_gb: float
+    disk_percent: float
+    gpus: List[GPUSample] = field(default_factory=list)
+    processes: List[ProcessSample] = field(default_factory=list)
+    # {pid: {gpu index: MB}} as returned by sample_gpus (not serialized)
+    gpu_memory_by_pid: Dict[int, Dict[int, float]] = field(default_factory=dict, repr=False)
+
+    def to_dict(self, include_processes: bool = True) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop("gpu_memory_by_pid")
+        if not include_processes:
+            data.pop("processes")
+        return data
+
+
+class FakeNVML:
+    """In-memory stand-in for ``pynvml`` (only the calls the sampler uses).
+
+    Args:
+        gpus: One dict per device: ``name``, ``memory_total`` (MB), ``memory_used`` (MB),
+            ``utilization`` (%) and ``processes`` (pid -> used MB). Mutate them to
+            simulate load.
+    """
+
+    def __init__(self, gpus: Sequence[Dict[str, Any]]):
+        self.gpus = [dict(g) for g in gpus]
+        self.handle_lookups = 0
+
+    def nvmlInit(self) -> None:
+        pass
+
+    def nvmlDeviceGetCount(self) -> int:
+        return len(self.gpus)
+
+    def nvmlDeviceGetHandleByIndex(self, index: int) -> int:
+        self.handle_lookups += 1
+        if not 0 <= index < len(self.gpus):
+            raise ValueError(f"Invalid GPU index {index}")
+        return index
+
+    def nvmlDeviceGetName(self, handle: int) -> str:
+        return self.gpus[handle].get("name", f"Fake GPU {handle}")
+
+    def nvmlDeviceGetMemoryInfo(self, handle: int) -> SimpleNamespace:
+        gpu = self.gpus[handle]
+        total = gpu.get("memory_total", 24576) * _MB
+        used = gpu.get("memory_used", 0) * _MB
+        return SimpleNamespace(total=total, used=used, free=total - used)
+
+    def nvmlDeviceGetUtilizationRates(self, handle: int) -> SimpleNamespace:
+        return SimpleNamespace(gpu=self.gpus[handle].get("utilization", 0), memory=0)
+
+    def nvmlDeviceGetComputeRunningProcesses(self, handle: int) -> List[SimpleNamespace]:
+        return [
+            SimpleNamespace(pid=pid, usedGpuMemory=mb * _MB)
+            for pid, mb in self.gpus[handle].get("processes", {}).items()
+        ]
+
+
+def _default_nvml():
+    """Initialized ``pynvml`` module, or None without GPUs/drivers."""
+    from .gpu_service import GPUService, _ensure_pynvml
+
+    if not GPUService._ensure_initialized():
+        return None
+    return _ensure_pynvml()[1]
+
+
+def running_task_processes() -> List[TrackedProcess]:
+    """Child processes currently owned by the pipeline runners."""
+    # Local imports: the runners import half the app
+    from .gs_runner import gs_runner
+    from .gs_tiles_runner import gs_tiles_runner
+    from .openmvs_runner import openmvs_runner
+    from .task_runner import task_runner
+    from .tiles_runner import tiles_runner
+
+    tracked: List[TrackedProcess] = []
+
+    def add(kind: str, processes: Dict[str, Any]) -> None:
+        for key, procs in list(processes.items()):
+            # A task may own a set of processes (parallel OpenMVS sub-scenes)
+            for proc in list(procs) if isinstance(procs, (set, list)) else [procs]:
+                if proc is not None and proc.returncode is None:
+                    tracked.append((kind, key, proc.pid))
+
+    add("sfm", {block_id: ctx.process for block_id, ctx in task_runner.running_tasks.items()})
+    add("openmvs", openmvs_runner._processes)
+    add("openmvs_version", openmvs_runner._version_processes)
+    add("gs", gs_runner._processes)
+    add("tiles", tiles_runner._processes)
+    add("gs_tiles", gs_tiles_runner._processes)
+    return tracked
+
+
+class ProcessTreeSampler:
+    """CPU/RSS of a process and its descendants.
+
+    ``psutil.Process`` objects are kept between calls so ``cpu_percent`` measures
+    the interval since the previous sample instead of blocking.
+    """
+
+    def __init__(self) -> None:
+        self._procs: Dict[int, psutil.Process] = {}
+
+    def _proc(self, pid: int) -> psutil.Process:
+        proc = self._procs.get(pid)
+        if proc is None:
+            proc = self._procs[pid] = psutil.Process(pid)
+            proc.cpu_percent(None)  # Prime: the first call always returns 0
+        return proc
+
+    def sample(self, pid: int) -> Optional[Dict[str, Any]]:
+        """Summed ``cpu_percent``/``rss`` and the pids of the tree rooted at ``pid``."""
+        try:
+            root = self._proc(pid)
+            members = [root] + root.children(recursive=True)
+        except psutil.Error:
+            self._procs.pop(pid, None)
+            return None
+        cpu = 0.0
+        rss = 0
+        pids = []
+        for member in members:
+            try:
+                proc = self._proc(member.pid)
+                with proc.oneshot():
+                    cpu += proc.cpu_percent(None)
+                    rss += proc.memory_info().rss
+                pids.append(member.pid)
+            except psutil.Error:
+                self._procs.pop(member.pid, None)
+        return {"cpu_percent": cpu, "rss": rss, "pids": pids}
+
+    def prune(self, alive: Iterable[int]) -> None:
+        keep = set(alive)
+        for pid in list(self._procs):
+            if pid not in keep:
+                del self._procs[pid]
+
+
+class TelemetrySampler:
+    """Samples host/GPU/task metrics on a fixed cadence into a ring buffer.
+
+    Args:
+        interval: Seconds between samples
+        history_size: Samples kept in memory
+        nvml: ``pynvml``-compatible object (e.g. ``FakeNVML``); defaults to ``pynvml``
+        process_source: Returns the (kind, key, pid) of running child processes
+        disk_path: Filesystem reported as disk usage
+    """
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_INTERVAL,
+        history_size: int = DEFAULT_HISTORY_SIZE,
+        nvml: Any = None,
+        process_source: Optional[Callable[[], List[TrackedProcess]]] = None,
+        disk_path: str = "/",
+    ):
+        self.interval = interval
+        self.disk_path = disk_path
+        self.history: Deque[TelemetrySample] = deque(maxlen=history_size)
+        self._nvml = nvml
+        self._nvml_checked = nvml is not None
+        self._handles: Optional[List[Any]] = None
+        self._process_source = process_source or running_task_processes
+        self._trees = ProcessTreeSampler()
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        psutil.cpu_percent(None)  # Prime the host counter
+
+    # ------------------------------------------------------------------ sampling
+
+    def _gpu_handles(self) -> List[Any]:
+        if not self._nvml_checked:
+            self._nvml_checked = True
+            try:
+                self._nvml = _default_nvml()
+            except Exception as e:
+                logger.warning(f"NVML unavailable for telemetry: {e}")
+                self._nvml = None
+        if self._nvml is None:
+            return []
+        if self._handles is None:
+            try:
+                count = self._nvml.nvmlDeviceGetCount()
+                self._handles = [self._nvml.nvmlDeviceGetHandleByIndex(i) for i in range(count)]
+            except Exception as e:
+                logger.warning(f"Failed to enumerate GPUs: {e}")
+                return []
+        return self._handles
+
+    def sample_gpus(self) -> Tuple[List[GPUSample], Dict[int, Dict[int, float]]]:
+        """Per-GPU metrics and GPU memory (MB) by pid and device index. Thread safe."""
+        gpus: List[GPUSample] = []
+        gpu_mem_by_pid: Dict[int, Dict[int, float]] = {}
+        nvml = self._nvml
+        for index, handle in enumerate(self._gpu_handles()):
+            try:
+                name = nvml.nvmlDeviceGetName(handle)
+                if isinstance(name, bytes):
+                    name = name.decode("utf-8")
+                mem = nvml.nvmlDeviceGetMemoryInfo(handle)
+                try:
+                    utilization = int(nvml.nvmlDeviceGetUtilizationRates(handle).gpu)
+                except Exception:
+                    utilization = 0
+                memory_free = mem.free // _MB
+                gpus.append(GPUSample(
+                    index=index,
+                    name=name,
+                    memory_total=mem.total // _MB,
+                    memory_used=mem.used // _MB,
+                    memory_free=memory_free,
+                    utilization=utilization,
+                    # Same rule as GPUService.get_gpu
+                    is_available=memory_free > 1024 and utilization < 90,
+                ))
+            except Exception as e:
+                logger.debug(f"GPU {index} sample failed: {e}")
+                continue
+            try:
+                for proc in nvml.nvmlDeviceGetComputeRunningProcesses(handle):
+                    used = getattr(proc, "usedGpuMemory", None) or 0
+                    per_device = gpu_mem_by_pid.setdefault(proc.pid, {})
+                    per_device[index] = per_device.get(index, 0.0) + used / _MB
+            except Exception:
+                pass
+        return gpus, gpu_mem_by_pid
+
+    def _sample_processes(self, gpu_mem_by_pid: Dict[int, Dict[int, float]]) -> List[ProcessSample]:
+        try:
+            tracked = self._process_source()
+        except Exception as e:
+            logger.debug(f"Failed to list task processes: {e}")
+            tracked = []
+        samples: List[ProcessSample] = []
+        alive: List[int] = []
+        for kind, key, pid in tracked:
+            tree = self._trees.sample(pid)
+            if tree is None:
+                continue
+            alive.extend(tree["pids"])
+            samples.append(ProcessSample(
+                kind=kind,
+                key=key,
+                pid=pid,
+                num_processes=len(tree["pids"]),
+                cpu_percent=round(tree["cpu_percent"], 1),
+                rss_mb=round(tree["rss"] / _MB, 1),
+                gpu_memory_mb=round(
+                    sum(sum(gpu_mem_by_pid.get(p, {}).values()) for p in tree["pids"]), 1
+                ),
+            ))
+        self._trees.prune(alive)
+        return samples
+
+    def sample_once(self) -> TelemetrySample:
+        """Take one sample (blocking; runs in a worker thread) and append it to the history."""
+        with self._lock:
+            mem = psutil.virtual_memory()
+            try:
+                disk = psutil.disk_usage(self.disk_path)
+                disk_values = (disk.total / _GB, disk.used / _GB, disk.free / _GB, disk.percent)
+            except Exception:
+                disk_values = (0.0, 0.0, 0.0, 0.0)
+            gpus, gpu_mem_by_pid = self.sample_gpus()
+            sample = TelemetrySample(
+                timestamp=time.time(),
+                cpu_percent=psutil.cpu_percent(None),
+                memory_total_gb=round(mem.total / _GB, 2),
+                memory_used_gb=round(mem.used / _GB, 2),
+                memory_available_gb=round(mem.available / _GB, 2),
+                memory_percent=mem.percent,
+                disk_total_gb=round(disk_values[0], 2),
+                disk_used_gb=round(disk_values[1], 2),
+                disk_free_gb=round(disk_values[2], 2),
+                disk_percent=disk_values[3],
+                gpus=gpus,
+                processes=self._sample_processes(gpu_mem_by_pid),
+                gpu_memory_by_pid=gpu_mem_by_pid,
+            )
+            self.history.append(sample)
+            return sample
+
+    # ------------------------------------------------------------------ lifecycle
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def _loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = time.monotonic()
+            try:
+                await loop.run_in_executor(None, self.sample_once)
+            except Exception as e:
+                logger.warning(f"Telemetry sample failed: {e}")
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    # ------------------------------------------------------------------ reads
+
+    def latest(self, max_age: Optional[float] = None) -> Optional[TelemetrySample]:
+        """Newest sample, or None if there is none (or it is older than ``max_age`` seconds)."""
+        if not self.history:
+            return None
+        sample = self.history[-1]
+        if max_age is not None and time.time() - sample.timestamp > max_age:
+            return None
+        return sample
+
+    def latest_gpus(self) -> Tuple[List[GPUSample], Dict[int, Dict[int, float]]]:
+        """GPUs and per-pid GPU memory of the newest sample, without querying NVML again.
+
+        Empty when the sampler has not produced a sample in the last three intervals.
+        """
+        sample = self.latest(max_age=self.interval * 3)
+        if sample is None:
+            return [], {}
+        return sample.gpus, sample.gpu_memory_by_pid
+
+    def window(self, seconds: Optional[float] = None) -> List[TelemetrySample]:
+        samples = list(self.history)
+        if seconds is not None:
+            cutoff = time.time() - seconds
+            samples = [s for s in samples if s.timestamp >= cutoff]
+        return samples
+
+    def task_history(self, key: str, seconds: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Time series of one task's process tree (block or version id)."""
+        points = []
+        for sample in self.window(seconds):
+            for proc in sample.processes:
+                if proc.key == key:
+                    points.append({"timestamp": sample.timestamp, **asdict(proc)})
+        return points
+
+
+_HOST_FIELDS = (
+    "cpu_percent", "memory_used_gb", "memory_available_gb", "memory_percent",
+    "disk_used_gb", "disk_free_gb", "disk_percent",
+)
+
+
+def downsample(samples: Sequence[TelemetrySample], max_points: int) -> List[Dict[str, Any]]:
+    """Average consecutive samples into at most ``max_points`` points (host and per-GPU values).
+
+    Each point also carries the peak CPU/memory/GPU values of its bucket, which is what
+    capacity planning needs; process attribution is left out.
+    """
+    if not samples:
+        return []
+    size = max(1, math.ceil(len(samples) / max(1, max_points)))
+    points = []
+    for start in range(0, len(samples), size):
+        bucket = samples[start:start + size]
+        point: Dict[str, Any] = {
+            "timestamp": bucket[-1].timestamp,
+            "samples": len(bucket),
+            "memory_total_gb": bucket[-1].memory_total_gb,
+            "disk_total_gb": bucket[-1].disk_total_gb,
+        }
+        for name in _HOST_FIELDS:
+            point[name] = round(sum(getattr(s, name) for s in bucket) / len(bucket), 2)
+        point["cpu_percent_max"] = max(s.cpu_percent for s in bucket)
+        point["memory_percent_max"] = max(s.memory_percent for s in bucket)
+        gpus: Dict[int, List[GPUSample]] = {}
+        for s in bucket:
+            for gpu in s.gpus:
+                gpus.setdefault(gpu.index, []).append(gpu)
+        point["gpus"] = [
+            {
+                "index": index,
+                "name": values[-1].name,
+                "memory_total": values[-1].memory_total,
+                "memory_used": round(sum(g.memory_used for g in values) / len(values)),
+                "memory_used_max": max(g.memory_used for g in values),
+                "utilization": round(sum(g.utilization for g in values) / len(values), 1),
+                "utilization_max": max(g.utilization for g in values),
+            }
+            for index, values in sorted(gpus.items())
+        ]
+        points.append(point)
+    return points
+
+
+def _create_sampler() -> TelemetrySampler:
+    try:
+        from ..conf.settings import get_settings
+
+        cfg = get_settings().monitoring.telemetry
+        return TelemetrySampler(interval=cfg.interval_seconds, history_size=cfg.history_size)
+    except Exception as e:
+        logger.warning(f"Using default telemetry settings: {e}")
+        return TelemetrySampler()
+
+
+# Global instance
+telemetry_sampler = _create_sampler()
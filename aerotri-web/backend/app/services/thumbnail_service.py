@@ -0,0 +1,279 @@
+"""Thumbnail pyramid service.
+
+Every image gets a small pyramid of JPEG thumbnails (``PYRAMID_LEVELS`` on the
+long side) built once, in a process pool, by ``image_workers.write_levels``
+(shared with the 3DGS pyramids): JPEGs are decoded with ``Image.draft`` so
+libjpeg downscales in the DCT domain, and each level is resized from the one
+above it, not from the original.
+
+Requests are served from the smallest level that covers the requested size.
+The catalog's ``thumbnail_state`` tracks which pyramids are current (a
+catalog refresh resets it when a file changes), so bulk requests such as the
+sprite sheet never stat the originals.
+
+Layout: ``<thumbnails_dir>/<block_id>/<md5(name)>_<level>.jpg``; sprite sheets
+live in ``<block_id>/sprites/`` named by page and content hash, and a page's
+previous sheet is deleted when its content changes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Sequence, Set, Tuple
+
+from PIL import Image
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..conf.settings import get_settings
+from ..models import AsyncSessionLocal, Block, BlockImage, ThumbnailState
+from .image_catalog import ImageCatalogService, block_image_dir
+from .image_workers import batched, run_batches, write_levels, write_levels_batch
+
+logger = logging.getLogger(__name__)
+
+_settings = get_settings()
+THUMBNAIL_CACHE_DIR = str(_settings.paths.thumbnails_dir)
+
+PYRAMID_LEVELS = (128, 256, 512)
+THUMBNAIL_QUALITY = 85
+SPRITE_QUALITY = 80
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+# Images handed to one pool task during background pre-generation
+_BATCH_SIZE = 32
+# Row ids per UPDATE ... IN clause, well below SQLite's bound-parameter limit
+_UPDATE_CHUNK = 500
+
+
+def pyramid_level(size: int) -> int:
+    """Smallest pyramid level covering ``size`` (the largest one beyond it)."""
+    for level in PYRAMID_LEVELS:
+        if level >= size:
+            return level
+    return PYRAMID_LEVELS[-1]
+
+
+def thumbnail_path(cache_dir: str, block_id: str, name: str, level: int) -> str:
+    key = hashlib.md5(name.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, block_id, f"{key}_{level}.jpg")
+
+
+def fit_size(width: int, height: int, level: int) -> Tuple[int, int]:
+    """Size of level ``level``: long side ``level``, never upscaled."""
+    scale = min(1.0, level / max(width, height, 1))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def build_pyramid(image_path: str, out_paths: Dict[int, str]) -> bool:
+    """Write every level of ``out_paths`` (level -> path) for one image. Runs in worker processes."""
+    return write_levels(image_path, out_paths, fit_size, jpeg_quality=THUMBNAIL_QUALITY)
+
+
+def compose_sprite(tile_paths: Sequence[Optional[str]], cell: int, columns: int, out_path: str) -> None:
+    """Pack square, center-cropped tiles row-major into one JPEG. Missing tiles stay grey."""
+    rows = max(1, -(-len(tile_paths) // columns))
+    sheet = Image.new("RGB", (columns * cell, rows * cell), (245, 247, 250))
+    for i, path in enumerate(tile_paths):
+        if not path:
+            continue
+        try:
+            with Image.open(path) as tile:
+                w, h = tile.size
+                side = min(w, h)
+                box = ((w - side) // 2, (h - side) // 2, (w - side) // 2 + side, (h - side) // 2 + side)
+                square = tile.convert("RGB").resize((cell, cell), Image.Resampling.BILINEAR, box=box)
+        except Exception:
+            continue
+        sheet.paste(square, ((i % columns) * cell, (i // columns) * cell))
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    tmp = out_path + ".tmp"
+    sheet.save(tmp, "JPEG", quality=SPRITE_QUALITY)
+    os.replace(tmp, out_path)
+
+
+class ThumbnailService:
+    """Builds and serves per-block thumbnail pyramids."""
+
+    def __init__(self, cache_dir: str = THUMBNAIL_CACHE_DIR, max_workers: int = DEFAULT_WORKERS):
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # Blocks with a background pre-generation task in flight
+        self._warming: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def shutdown(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _out_paths(self, block_id: str, name: str) -> Dict[int, str]:
+        return {level: thumbnail_path(self.cache_dir, block_id, name, level) for level in PYRAMID_LEVELS}
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._get_pool(), fn, *args)
+
+    async def get_thumbnail(self, block_id: str, image_path: str, size: int) -> str:
+        """Path of the pyramid level covering ``size``; builds the pyramid if missing or stale."""
+        name = os.path.basename(image_path)
+        out_paths = self._out_paths(block_id, name)
+        path = out_paths[pyramid_level(size)]
+        try:
+            if os.path.getmtime(path) > os.path.getmtime(image_path):
+                return path
+        except OSError:
+            pass
+        if not await self._run(build_pyramid, image_path, out_paths):
+            raise RuntimeError(f"Failed to generate thumbnail: {image_path}")
+        return path
+
+    async def build_names(self, block_id: str, image_dir: str, names: Sequence[str]) -> Dict[str, bool]:
+        """Build the pyramids of ``names``; name -> success. Does not touch the database."""
+        jobs = [
+            (os.path.join(image_dir, name), self._out_paths(block_id, name), fit_size, ("RGB",), THUMBNAIL_QUALITY)
+            for name in names
+        ]
+        batches = batched(jobs, _BATCH_SIZE)
+        results = await run_batches(write_levels_batch, batches, self.max_workers, executor=self._get_pool())
+        return {name: ok for name, ok in zip(names, (ok for oks in results for ok in oks))}
+
+    async def ensure_rows(self, db: AsyncSession, block: Block, rows: Sequence[BlockImage]) -> None:
+        """Build pyramids for catalog ``rows`` that are not READY and record their state. Commits."""
+        image_dir = block_image_dir(block)
+        todo = [
+            row for row in rows
+            if row.thumbnail_state != ThumbnailState.READY
+            or not os.path.exists(thumbnail_path(self.cache_dir, block.id, row.name, PYRAMID_LEVELS[0]))
+        ]
+        if not todo or not image_dir:
+            return
+        built = await self.build_names(block.id, image_dir, [row.name for row in todo])
+        for row in todo:
+            row.thumbnail_state = ThumbnailState.READY if built[row.name] else ThumbnailState.FAILED
+        await db.commit()
+
+    def warm_block(self, block_id: str) -> None:
+        """Pre-generate all pending pyramids of a block in the background (no-op if already running)."""
+        if block_id in self._warming:
+            return
+        self._warming.add(block_id)
+        task = asyncio.create_task(self._warm_block(block_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _warm_block(self, block_id: str) -> None:
+        try:
+            # Read what to build, then release the connection while the pool works
+            async with AsyncSessionLocal() as db:
+                block = (await db.execute(select(Block).where(Block.id == block_id))).scalar_one_or_none()
+                if not block:
+                    return
+                image_dir = block_image_dir(block)
+                result = await db.execute(
+                    select(BlockImage.id, BlockImage.name)
+                    .where(BlockImage.block_id == block_id, BlockImage.thumbnail_state == ThumbnailState.NONE)
+                    .order_by(BlockImage.name)
+                )
+                pending = [tuple(row) for row in result.all()]
+            if not pending or not image_dir:
+                return
+
+            built = await self.build_names(block_id, image_dir, [name for _, name in pending])
+            ready = [row_id for row_id, name in pending if built[name]]
+            failed = [row_id for row_id, name in pending if not built[name]]
+            async with AsyncSessionLocal() as db:
+                for state, row_ids in ((ThumbnailState.READY, ready), (ThumbnailState.FAILED, failed)):
+                    for i in range(0, len(row_ids), _UPDATE_CHUNK):
+                        # Rows a concurrent sprite request finished meanwhile keep their state
+                        await db.execute(
+                            update(BlockImage)
+                            .where(
+                                BlockImage.id.in_(row_ids[i:i + _UPDATE_CHUNK]),
+                                BlockImage.thumbnail_state == ThumbnailState.NONE,
+                            )
+                            .values(thumbnail_state=state)
+                        )
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"Thumbnail pre-generation failed for block {block_id}: {e}")
+        finally:
+            self._warming.discard(block_id)
+
+    async def get_sprite(
+        self,
+        db: AsyncSession,
+        block: Block,
+        offset: int,
+        limit: int,
+        cell: int,
+        columns: int,
+    ) -> Optional[str]:
+        """Sprite sheet of one catalog page (same order as the image list), or None for an empty page.
+
+        Tile ``i`` sits at column ``i % columns``, row ``i // columns``.
+        """
+        await ImageCatalogService.refresh(db, block)
+        rows = await ImageCatalogService.list_page(db, block.id, offset, limit)
+        if not rows:
+            return None
+        await self.ensure_rows(db, block, rows)
+
+        level = pyramid_level(cell)
+        key = hashlib.md5(
+            "|".join(f"{r.name}:{r.size}:{r.mtime}:{r.thumbnail_state}" for r in rows).encode("utf-8")
+        ).hexdigest()
+        sprite_dir = os.path.join(self.cache_dir, block.id, "sprites")
+        page = f"{offset}_{limit}_{cell}_{columns}_"
+        out_path = os.path.join(sprite_dir, f"{page}{key}.jpg")
+        if not os.path.exists(out_path):
+            tiles = [
+                thumbnail_path(self.cache_dir, block.id, r.name, level)
+                if r.thumbnail_state == ThumbnailState.READY else None
+                for r in rows
+            ]
+            await asyncio.to_thread(compose_sprite, tiles, cell, columns, out_path)
+            await asyncio.to_thread(self._evict_sprites, sprite_dir, page, out_path)
+        return out_path
+
+    @staticmethod
+    def sprite_etag(sprite_path: str) -> str:
+        """Strong ETag of a sprite sheet: its page content hash."""
+        return '"' + os.path.splitext(os.path.basename(sprite_path))[0].rsplit("_", 1)[-1] + '"'
+
+    @staticmethod
+    def _evict_sprites(sprite_dir: str, page: str, keep: str) -> None:
+        """Delete sheets of the same page (offset/limit/cell/columns) built for older content."""
+        try:
+            with os.scandir(sprite_dir) as it:
+                for entry in it:
+                    if entry.name.startswith(page) and entry.path != keep:
+                        try:
+                            os.remove(entry.path)
+                        except OSError:
+                            pass
+        except OSError:
+            pass
+
+    def remove_image(self, block_id: str, name: str) -> None:
+        for path in self._out_paths(block_id, name).values():
+            if os.path.exists(path):
+                os.remove(path)
+
+    def remove_block(self, block_id: str) -> None:
+        shutil.rmtree(os.path.join(self.cache_dir, block_id), ignore_errors=True)
+
+
+# Singleton instance
+thumbnail_service = ThumbnailService()
@@ -12,7 +12,7 @@ import json
 from collections import deque
 from datetime import datetime
 from pathlib import Path
-from typing import Deque, Dict, List, Optional
+from typing import Deque, Dict, List, Optional, Tuple
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -21,7 +21,10 @@ from ..models.block import Block
 from ..models.database import AsyncSessionLocal
 from ..conf.settings import get_settings
 from .task_notifier import task_notifier
+from .progress_hub import progress_hub
+from .log_tail import tail_lines
 from .task_runner_integration import on_task_failure
+from .resource_profiler import resource_profiler
 
 # Load output directory from configuration system
 _settings = get_settings()
@@ -218,6 +221,7 @@ class TilesRunner:
 
             log_buffer = self._log_buffers.get(block_id, deque(maxlen=1000))
             start_time = time.time()
+            resource_profiler.begin_run("tiles", block_id)
 
             try:
                 # Stage 1: OBJ → GLB
@@ -229,6 +233,7 @@ class TilesRunner:
                 block.tiles_current_stage = "obj_to_glb"
                 block.tiles_progress = 10.0
                 await db.commit()
+                progress_hub.publish_stage(block_id, "tiles", "obj_to_glb", 10.0, "Converting OBJ to GLB")
 
                 glb_path = tiles_output_dir / "model.glb"
                 await self._convert_obj_to_glb(
@@ -237,6 +242,7 @@ class TilesRunner:
                     texture_dir=texture_dir,
                     log_buffer=log_buffer,
                     log_path=log_path,
+                    profile_key=("tiles", block_id),
                 )
 
                 # Stage 2: GLB → 3D Tiles
@@ -248,6 +254,7 @@ class TilesRunner:
                 block.tiles_current_stage = "glb_to_tiles"
                 block.tiles_progress = 60.0
                 await db.commit()
+                progress_hub.publish_stage(block_id, "tiles", "glb_to_tiles", 60.0, "Converting GLB to 3D Tiles")
 
                 await self._convert_glb_to_tiles(
                     glb_path=glb_path,
@@ -279,8 +286,12 @@ class TilesRunner:
                     "tileset_size_bytes": tileset_path.stat().st_size if tileset_path.exists() else 0,
                     "glb_count": len(glb_files),
                 }
+                block.tiles_statistics = resource_profiler.attach(block.tiles_statistics, "tiles", block_id)
                 
                 await db.commit()
+                progress_hub.publish_stage(
+                    block_id, "tiles", "completed", 100.0, "3D Tiles conversion completed", status="COMPLETED"
+                )
                 
                 # Send task completed notification
                 await task_notifier.on_task_completed(
@@ -293,7 +304,12 @@ class TilesRunner:
             except TilesProcessError as e:
                 block.tiles_status = "FAILED"
                 block.tiles_error_message = str(e)
+                block.tiles_statistics = resource_profiler.attach(block.tiles_statistics, "tiles", block_id)
                 await db.commit()
+                progress_hub.publish_stage(
+                    block_id, "tiles", block.tiles_current_stage or "failed",
+                    block.tiles_progress or 0.0, str(e), status="FAILED",
+                )
 
                 # Send task failed notification
                 log_tail = list(log_buffer)[-10:] if log_buffer else None
@@ -322,6 +338,10 @@ class TilesRunner:
                 block.tiles_status = "FAILED"
                 block.tiles_error_message = f"Unexpected error: {str(e)}"
                 await db.commit()
+                progress_hub.publish_stage(
+                    block_id, "tiles", block.tiles_current_stage or "failed",
+                    block.tiles_progress or 0.0, block.tiles_error_message, status="FAILED",
+                )
 
                 # Send task failed notification
                 log_tail = list(log_buffer)[-10:] if log_buffer else None
@@ -360,8 +380,12 @@ class TilesRunner:
         texture_dir: Path,
         log_buffer: Deque[str],
         log_path: Path,
+        profile_key: Optional[Tuple[str, str]] = None,
     ) -> None:
-        """Convert OBJ to GLB using obj2gltf."""
+        """Convert OBJ to GLB using obj2gltf.
+
+        ``profile_key`` is the (pipeline, id) the process' resource profile is recorded under.
+        """
         obj2gltf_cmd = self._get_obj2gltf_path()
         
         # obj2gltf command: -i input.obj -o output.glb --binary
@@ -379,22 +403,30 @@ class TilesRunner:
             stderr=asyncio.subprocess.STDOUT,
             cwd=str(texture_dir),
         )
+        profiler = None
+        if profile_key:
+            profiler = resource_profiler.start(*profile_key, "obj_to_glb", process.pid, tool=obj2gltf_cmd)
 
         # Note: We track processes by block_id in _run_conversion
         # For now, we'll handle cancellation at the task level
 
         # Read output line by line
         output_lines = []
-        async for line in process.stdout:
-            line_str = line.decode("utf-8", errors="replace").rstrip()
-            log_buffer.append(line_str)
-            output_lines.append(line_str)
-            
-            # Write to log file
-            with open(log_path, "a", encoding="utf-8") as f:
-                f.write(line_str + "\n")
+        return_code = None
+        try:
+            async for line in process.stdout:
+                line_str = line.decode("utf-8", errors="replace").rstrip()
+                log_buffer.append(line_str)
+                output_lines.append(line_str)
+                
+                # Write to log file
+                with open(log_path, "a", encoding="utf-8") as f:
+                    f.write(line_str + "\n")
 
-        return_code = await process.wait()
+            return_code = await process.wait()
+        finally:
+            if profiler:
+                await resource_profiler.finish(*profile_key, profiler, return_code)
         
         if return_code != 0:
             raise TilesProcessError("obj_to_glb", return_code, output_lines[-20:])
@@ -484,6 +516,11 @@ class TilesRunner:
                 block.tiles_status = "CANCELLED"
                 await db.commit()
 
+    def get_log_path(self, block_id: str) -> Path:
+        """Persisted run_tiles.log for a block."""
+        # We infer path from typical layout: <output>/recon/tiles/run_tiles.log
+        return OUTPUTS_DIR / block_id / "recon" / "tiles" / "run_tiles.log"
+
     def get_log_tail(self, block_id: str, lines: int = 200) -> List[str]:
         """Get the last N lines of conversion logs."""
         # Prefer in-memory buffer when running
@@ -492,20 +529,7 @@ class TilesRunner:
             return list(buf)[-lines:]
 
         # Fallback to persisted run_tiles.log on disk
-        # We infer path from typical layout: <output>/recon/tiles/run_tiles.log
-        tiles_log = OUTPUTS_DIR / block_id / "recon" / "tiles" / "run_tiles.log"
-        if not tiles_log.is_file():
-            return []
-
-        dq: Deque[str] = deque(maxlen=lines)
-        try:
-            with open(tiles_log, "r", encoding="utf-8", errors="replace") as fp:
-                for line in fp:
-                    dq.append(line.rstrip("\n"))
-        except Exception:
-            return []
-
-        return list(dq)
+        return tail_lines(self.get_log_path(block_id), lines) or []
 
     async def recover_orphaned_tiles_tasks(self) -> None:
         """Recover orphaned conversion tasks on startup."""
@@ -642,6 +666,7 @@ class TilesRunner:
 
             log_buffer = self._log_buffers.get(version_id, deque(maxlen=1000))
             start_time = time.time()
+            resource_profiler.begin_run("tiles_version", version_id)
 
             try:
                 # Stage 1: OBJ → GLB
@@ -653,6 +678,9 @@ class TilesRunner:
                 version.tiles_current_stage = "obj_to_glb"
                 version.tiles_progress = 10.0
                 await db.commit()
+                progress_hub.publish_stage(
+                    block_id, "tiles", "obj_to_glb", 10.0, "Converting OBJ to GLB", version_id=version_id
+                )
 
                 glb_path = tiles_output_dir / "model.glb"
                 await self._convert_obj_to_glb(
@@ -661,6 +689,7 @@ class TilesRunner:
                     texture_dir=texture_dir,
                     log_buffer=log_buffer,
                     log_path=log_path,
+                    profile_key=("tiles_version", version_id),
                 )
 
                 # Stage 2: GLB → 3D Tiles
@@ -672,6 +701,9 @@ class TilesRunner:
                 version.tiles_current_stage = "glb_to_tiles"
                 version.tiles_progress = 60.0
                 await db.commit()
+                progress_hub.publish_stage(
+                    block_id, "tiles", "glb_to_tiles", 60.0, "Converting GLB to 3D Tiles", version_id=version_id
+                )
 
                 await self._convert_glb_to_tiles(
                     glb_path=glb_path,
@@ -704,8 +736,15 @@ class TilesRunner:
                     "tileset_size_bytes": tileset_path.stat().st_size if tileset_path.exists() else 0,
                     "glb_count": len(glb_files),
                 }
+                version.tiles_statistics = resource_profiler.attach(
+                    version.tiles_statistics, "tiles_version", version_id
+                )
                 
                 await db.commit()
+                progress_hub.publish_stage(
+                    block_id, "tiles", "completed", 100.0, "3D Tiles conversion completed",
+                    status="COMPLETED", version_id=version_id,
+                )
                 
                 # Send task completed notification
                 if block:
@@ -719,7 +758,14 @@ class TilesRunner:
             except TilesProcessError as e:
                 version.tiles_status = "FAILED"
                 version.tiles_error_message = str(e)
+                version.tiles_statistics = resource_profiler.attach(
+                    version.tiles_statistics, "tiles_version", version_id
+                )
                 await db.commit()
+                progress_hub.publish_stage(
+                    block_id, "tiles", version.tiles_current_stage or "failed",
+                    version.tiles_progress or 0.0, str(e), status="FAILED", version_id=version_id,
+                )
 
                 # Send task failed notification
                 if block:
@@ -749,6 +795,10 @@ class TilesRunner:
                 version.tiles_status = "FAILED"
                 version.tiles_error_message = f"Unexpected error: {e}"
                 await db.commit()
+                progress_hub.publish_stage(
+                    block_id, "tiles", version.tiles_current_stage or "failed",
+                    version.tiles_progress or 0.0, version.tiles_error_message, status="FAILED", version_id=version_id,
+                )
 
                 # Trigger diagnostic agent (async, non-blocking)
                 if block:
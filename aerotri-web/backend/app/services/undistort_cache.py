@@ -0,0 +1,390 @@
+"""Block-level cache of COLMAP undistorted images.
+
+OpenMVS (block and version runs) and 3DGS all start from ``colmap image_undistorter``
+on the same sparse model. The output is produced once per block and per
+(sparse model, image directory, ``max_image_size``) signature under
+``<block output>/undistort_cache/<signature>/`` and then linked into each consumer.
+Each consumer keeps its own ``max_image_size`` (block OpenMVS undistorts at 3200 px,
+versions and 3DGS at full resolution), so consumers of the same size share an entry.
+
+- OpenMVS: ``dense/images`` is filled with hardlinks (symlinks across filesystems);
+  the small ``dense/sparse`` model is copied, since tools may rewrite it in place
+  and a hardlink would carry that write back into the cache;
+- 3DGS: ``dataset/images`` and ``dataset/sparse/0`` are symlinks to the cache.
+
+A cache entry is complete once its ``cache.json`` marker exists; it is built in a
+``.partial`` directory and renamed into place, so an interrupted run never leaves
+a half-written entry behind. Consumers register the paths they link under
+``refs/``. Entries built from the same image directory and size for an older
+version of the model are deleted, unless a registered path still links into them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from typing import AsyncContextManager, Awaitable, Callable, Dict, List, Optional
+
+from .log_parser import LogParser
+from .process_pump import ProcessOutputPump
+
+logger = logging.getLogger(__name__)
+
+UNDISTORT_CACHE_DIRNAME = "undistort_cache"
+CACHE_MARKER = "cache.json"
+REFS_DIRNAME = "refs"
+_MODEL_FILES = ("cameras", "images", "points3D")
+_IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".tif", ".tiff")
+
+# run(cmd) -> None; runs the undistorter, streaming logs the way the caller does
+RunFn = Callable[[List[str]], Awaitable[None]]
+# track(process) -> async context manager held while the process runs
+# (cancel registration, resource profiling)
+TrackFn = Callable[[asyncio.subprocess.Process], AsyncContextManager]
+
+
+def model_signature(sparse_dir: str, image_dir: str, max_image_size: int = 0) -> str:
+    """Signature of an undistortion job: model files (size + mtime), image dir and size limit."""
+    h = hashlib.sha1()
+    h.update(os.path.realpath(image_dir).encode("utf-8"))
+    h.update(f"|max={int(max_image_size or 0)}".encode("utf-8"))
+    for name in _MODEL_FILES:
+        for ext in (".bin", ".txt"):
+            path = os.path.join(sparse_dir, name + ext)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            h.update(f"|{name}{ext}:{st.st_size}:{st.st_mtime_ns}".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def is_complete(cache_dir: str) -> bool:
+    return os.path.isfile(os.path.join(cache_dir, CACHE_MARKER))
+
+
+def cache_sparse_dir(cache_dir: str) -> str:
+    """Directory holding the undistorted PINHOLE model (``sparse/`` or ``sparse/0``)."""
+    for candidate in (os.path.join(cache_dir, "sparse", "0"), os.path.join(cache_dir, "sparse")):
+        if os.path.isfile(os.path.join(candidate, "cameras.bin")) or os.path.isfile(
+            os.path.join(candidate, "cameras.txt")
+        ):
+            return candidate
+    return os.path.join(cache_dir, "sparse")
+
+
+def _has_output(out_dir: str) -> bool:
+    images_dir = os.path.join(out_dir, "images")
+    try:
+        has_images = any(
+            entry.name.lower().endswith(_IMAGE_EXTENSIONS) or entry.is_dir()
+            for entry in os.scandir(images_dir)
+        )
+    except OSError:
+        return False
+    sparse = cache_sparse_dir(out_dir)
+    return has_images and any(
+        os.path.isfile(os.path.join(sparse, f"cameras{ext}")) for ext in (".bin", ".txt")
+    )
+
+
+def link_tree(src_dir: str, dst_dir: str) -> int:
+    """Mirror ``src_dir`` into ``dst_dir`` with hardlinks (symlinks across devices).
+
+    Existing destination files are kept. Returns the number of links created.
+    """
+    created = 0
+    for root, _dirs, files in os.walk(src_dir):
+        rel = os.path.relpath(root, src_dir)
+        target_root = dst_dir if rel == "." else os.path.join(dst_dir, rel)
+        os.makedirs(target_root, exist_ok=True)
+        for name in files:
+            src = os.path.join(root, name)
+            dst = os.path.join(target_root, name)
+            if os.path.lexists(dst):
+                continue
+            try:
+                os.link(src, dst)
+            except OSError:
+                os.symlink(os.path.abspath(src), dst)
+            created += 1
+    return created
+
+
+def copy_tree(src_dir: str, dst_dir: str) -> int:
+    """Copy the files of ``src_dir`` into ``dst_dir`` (existing files are kept)."""
+    copied = 0
+    for root, _dirs, files in os.walk(src_dir):
+        rel = os.path.relpath(root, src_dir)
+        target_root = dst_dir if rel == "." else os.path.join(dst_dir, rel)
+        os.makedirs(target_root, exist_ok=True)
+        for name in files:
+            dst = os.path.join(target_root, name)
+            if os.path.lexists(dst):
+                continue
+            shutil.copy2(os.path.join(root, name), dst)
+            copied += 1
+    return copied
+
+
+def add_reference(cache_dir: str, path: str) -> None:
+    """Record that ``path`` links into ``cache_dir`` (checked before eviction)."""
+    path = os.path.abspath(path)
+    refs = os.path.join(cache_dir, REFS_DIRNAME)
+    os.makedirs(refs, exist_ok=True)
+    name = hashlib.sha1(path.encode("utf-8")).hexdigest()[:16]
+    with open(os.path.join(refs, name), "w", encoding="utf-8") as fp:
+        fp.write(path)
+
+
+def _links_into(path: str, cache_dir: str) -> bool:
+    """Whether ``path`` is, or is a directory containing, a symlink into ``cache_dir``."""
+    prefix = os.path.realpath(cache_dir) + os.sep
+
+    def points_in(link: str) -> bool:
+        return os.path.realpath(link).startswith(prefix)
+
+    if os.path.islink(path):
+        return points_in(path)
+    if not os.path.isdir(path):
+        return False
+    # Hardlinked files survive the entry's deletion; only symlinks would dangle
+    for root, dirs, files in os.walk(path):
+        for name in files + dirs:
+            full = os.path.join(root, name)
+            if os.path.islink(full) and points_in(full):
+                return True
+    return False
+
+
+def is_referenced(cache_dir: str) -> bool:
+    """Whether a registered consumer path still links into ``cache_dir``."""
+    try:
+        refs = list(os.scandir(os.path.join(cache_dir, REFS_DIRNAME)))
+    except OSError:
+        return False
+    for ref in refs:
+        try:
+            with open(ref.path, encoding="utf-8") as fp:
+                path = fp.read().strip()
+        except OSError:
+            continue
+        if path and _links_into(path, cache_dir):
+            return True
+    return False
+
+
+def evict_superseded(cache_root: str, keep: str) -> List[str]:
+    """Delete complete entries of ``cache_root`` built from the same images/size as ``keep``.
+
+    They belong to an earlier version of the sparse model (e.g. before SfM was re-run)
+    and will never be hit again. Entries that a consumer still links into (see
+    ``add_reference``) are kept until it is re-linked. Returns the removed entry directories.
+    """
+    try:
+        with open(os.path.join(keep, CACHE_MARKER), encoding="utf-8") as fp:
+            current = json.load(fp)
+    except (OSError, ValueError):
+        return []
+    source = (current.get("image_dir"), current.get("max_image_size"))
+    removed = []
+    try:
+        entries = list(os.scandir(cache_root))
+    except OSError:
+        return []
+    for entry in entries:
+        if entry.path == keep or not entry.is_dir() or entry.name.endswith(".partial"):
+            continue
+        try:
+            with open(os.path.join(entry.path, CACHE_MARKER), encoding="utf-8") as fp:
+                meta = json.load(fp)
+        except (OSError, ValueError):
+            continue
+        if (meta.get("image_dir"), meta.get("max_image_size")) == source:
+            if is_referenced(entry.path):
+                continue
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed.append(entry.path)
+    return removed
+
+
+def link_into_dense(cache_dir: str, dense_dir: str) -> int:
+    """Populate an OpenMVS ``dense`` directory (``images/`` + ``sparse/``) from a cache entry.
+
+    Images are linked (read-only for OpenMVS); the sparse model is copied.
+    """
+    images_dir = os.path.join(dense_dir, "images")
+    count = link_tree(os.path.join(cache_dir, "images"), images_dir)
+    copy_tree(cache_sparse_dir(cache_dir), os.path.join(dense_dir, "sparse"))
+    add_reference(cache_dir, images_dir)
+    return count
+
+
+def link_dataset(cache_dir: str, dataset_dir: str) -> None:
+    """Point a 3DGS dataset (``images`` + ``sparse/0``) at a cache entry with symlinks."""
+    links = (
+        (os.path.join(dataset_dir, "images"), os.path.join(cache_dir, "images")),
+        (os.path.join(dataset_dir, "sparse", "0"), cache_sparse_dir(cache_dir)),
+    )
+    for link, target in links:
+        os.makedirs(os.path.dirname(link), exist_ok=True)
+        if os.path.lexists(link):
+            os.unlink(link)
+        os.symlink(target, link)
+        add_reference(cache_dir, link)
+
+
+class UndistortCache:
+    """Produces undistorted image sets once per block/signature and hands out their location."""
+
+    def __init__(self) -> None:
+        # One producer per cache entry; concurrent callers wait for it
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _lock(self, key: str) -> asyncio.Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    async def ensure(
+        self,
+        cache_root: str,
+        image_dir: str,
+        sparse_dir: str,
+        run: RunFn,
+        max_image_size: int = 0,
+        colmap_path: Optional[str] = None,
+        log: Optional[Callable[[str], None]] = None,
+        is_cancelled: Optional[Callable[[], bool]] = None,
+    ) -> Optional[str]:
+        """Return the cache entry for this model, running ``image_undistorter`` if it is missing.
+
+        Args:
+            cache_root: ``<block output>/undistort_cache``
+            run: Executes the undistorter command (the caller's own process runner)
+            max_image_size: ``--max_image_size`` (0 = full resolution)
+            is_cancelled: Returns True if the caller was cancelled while ``run`` was executing
+
+        Returns:
+            The cache entry directory, or None if cancelled before it was complete.
+        """
+        log = log or (lambda msg: None)
+        signature = model_signature(sparse_dir, image_dir, max_image_size)
+        cache_dir = os.path.join(cache_root, signature)
+
+        async with self._lock(cache_dir):
+            if is_complete(cache_dir):
+                log(f"[UNDISTORT] Reusing cached undistorted images: {cache_dir}")
+                # Entries kept earlier because they were still linked may be free now
+                await self._evict(cache_root, cache_dir, log)
+                return cache_dir
+
+            if colmap_path is None:
+                from .task_runner import COLMAP_PATH  # Local import to avoid cycles
+                colmap_path = COLMAP_PATH
+
+            partial = cache_dir + ".partial"
+            shutil.rmtree(partial, ignore_errors=True)
+            os.makedirs(partial, exist_ok=True)
+            cmd = [
+                str(colmap_path),
+                "image_undistorter",
+                "--image_path",
+                image_dir,
+                "--input_path",
+                sparse_dir,
+                "--output_path",
+                partial,
+                "--output_type",
+                "COLMAP",
+            ]
+            if max_image_size and int(max_image_size) > 0:
+                cmd += ["--max_image_size", str(int(max_image_size))]
+
+            start = time.time()
+            try:
+                await run(cmd)
+            except Exception:
+                # image_undistorter is known to crash on exit after writing everything
+                if not _has_output(partial):
+                    raise
+                log("[UNDISTORT] image_undistorter exited with an error but its output is complete")
+            if is_cancelled and is_cancelled():
+                return None
+            if not _has_output(partial):
+                raise RuntimeError(f"COLMAP image_undistorter produced no images/sparse output in {partial}")
+
+            num_images = sum(len(files) for _, _, files in os.walk(os.path.join(partial, "images")))
+            with open(os.path.join(partial, CACHE_MARKER), "w", encoding="utf-8") as fp:
+                json.dump(
+                    {
+                        "signature": signature,
+                        "sparse_dir": sparse_dir,
+                        "image_dir": image_dir,
+                        "max_image_size": int(max_image_size or 0),
+                        "num_images": num_images,
+                        "seconds": round(time.time() - start, 1),
+                        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    },
+                    fp,
+                    indent=2,
+                )
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            os.replace(partial, cache_dir)
+            log(f"[UNDISTORT] Cached {num_images} undistorted images in {cache_dir}")
+            await self._evict(cache_root, cache_dir, log)
+            return cache_dir
+
+    async def _evict(self, cache_root: str, keep: str, log: Callable[[str], None]) -> None:
+        for old in await asyncio.to_thread(evict_superseded, cache_root, keep):
+            self._locks.pop(old, None)
+            log(f"[UNDISTORT] Removed superseded cache entry {old}")
+
+    @staticmethod
+    async def run_subprocess(
+        cmd: List[str],
+        env: Optional[Dict[str, str]] = None,
+        log: Optional[Callable[[str], None]] = None,
+        on_progress: Optional[Callable[[float, str], None]] = None,
+        track: Optional[TrackFn] = None,
+    ) -> None:
+        """Minimal async runner for callers without their own (streams lines, parses progress).
+
+        ``track`` wraps the process lifetime, so the caller can register it for
+        cancellation and resource profiling like its own processes.
+        """
+        log = log or (lambda msg: None)
+        log(f"[CMD] {' '.join(str(c) for c in cmd)}")
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            env=env,
+            limit=10 * 1024 * 1024,
+        )
+        parser = LogParser("colmap")
+        last_report = 0.0
+        async with (track(process) if track else contextlib.nullcontext()):
+            pump = ProcessOutputPump(process.stdout)  # type: ignore[arg-type]
+            async for lines in pump.batches():
+                for line in lines:
+                    log(line)
+                    parsed = parser.parse_line(line)
+                    now = time.time()
+                    if parsed and on_progress and now - last_report >= 1.0:
+                        last_report = now
+                        on_progress(parsed.progress, line)
+            await process.wait()
+        if process.returncode != 0:
+            raise RuntimeError(f"{os.path.basename(str(cmd[0]))} exited with code {process.returncode}")
+
+
+# Singleton instance
+undistort_cache = UndistortCache()
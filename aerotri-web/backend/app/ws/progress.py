@@ -1,6 +1,7 @@
 """WebSocket endpoint for progress updates."""
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from ..services.task_runner import task_runner
+from ..services.progress_hub import progress_hub
 
 router = APIRouter()
 
@@ -9,14 +10,19 @@ router = APIRouter()
 async def progress_websocket(websocket: WebSocket, block_id: str):
     """WebSocket endpoint for real-time progress updates.
     
+    Progress frames of every pipeline (sfm/reconstruction/gs/tiles/gs_tiles) are
+    pushed by the progress hub from a per-client sender task. The latest snapshot
+    of each pipeline is sent right after connecting. Replies to "status" requests
+    are queued on the same sender, so only one task ever writes to the socket.
+    
     Args:
         websocket: WebSocket connection
         block_id: Block ID to monitor
     """
     await websocket.accept()
     
-    # Register connection
-    task_runner.register_websocket(block_id, websocket)
+    # Register connection (starts the sender task and replays snapshots)
+    subscriber = task_runner.register_websocket(block_id, websocket)
     
     try:
         # Keep connection alive and listen for messages
@@ -30,13 +36,15 @@ async def progress_websocket(websocket: WebSocket, block_id: str):
                     log_tail = task_runner.get_log_tail(block_id, 10)
                     stage_times = task_runner.get_stage_times(block_id)
                     
-                    await websocket.send_json({
+                    subscriber.offer({
                         "type": "status",
                         "log_tail": log_tail or [],
                         "stage_times": stage_times or {},
+                        "pipelines": progress_hub.get_snapshot(block_id),
                     })
-            except WebSocketDisconnect:
+            except (WebSocketDisconnect, RuntimeError):
+                # RuntimeError: the hub already closed a stalled client's socket
                 break
     finally:
         # Unregister connection
-        task_runner.unregister_websocket(block_id, websocket)
+        await task_runner.unregister_websocket(block_id, websocket)
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+COLMAP 稀疏模型 I/O 基准测试
+
+生成合成模型（images / points3D / cameras，bin + txt），对比原先逐记录
+struct.unpack 的读取方式（内嵌在本脚本中作为参考实现）与 app.services.colmap_io
+的列式读取 / 按需加载 / 写出耗时，并校验两者结果一致。
+
+用法:
+    python scripts/bench_colmap_io.py --images 300 --points 50000 --repeat 3
+"""
+
+import argparse
+import struct
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services import colmap_io  # noqa: E402
+
+
+# ---------------------------------------------------------------------------
+# Legacy per-record readers (the implementations colmap_io replaced)
+# ---------------------------------------------------------------------------
+
+def legacy_read_images_bin(path: str, include_points2d: bool = True) -> dict:
+    images = {}
+    with open(path, "rb") as f:
+        num_images = struct.unpack("<Q", f.read(8))[0]
+        for _ in range(num_images):
+            image_id = struct.unpack("<I", f.read(4))[0]
+            qvec = struct.unpack("<4d", f.read(32))
+            tvec = struct.unpack("<3d", f.read(24))
+            camera_id = struct.unpack("<I", f.read(4))[0]
+            name_chars = []
+            while True:
+                char = f.read(1)
+                if char == b"\x00":
+                    break
+                name_chars.append(char.decode("utf-8"))
+            num_points2d = struct.unpack("<Q", f.read(8))[0]
+            points2d = []
+            if include_points2d:
+                for _ in range(num_points2d):
+                    x, y = struct.unpack("<2d", f.read(16))
+                    point3d_id = struct.unpack("<Q", f.read(8))[0]
+                    points2d.append((x, y, point3d_id))
+            else:
+                f.read(num_points2d * 24)
+            images["".join(name_chars)] = {
+                "image_id": image_id, "qvec": qvec, "tvec": tvec,
+                "camera_id": camera_id, "points2d": points2d,
+            }
+    return images
+
+
+def legacy_read_points3d_bin(path: str) -> dict:
+    points = {}
+    with open(path, "rb") as f:
+        num_points = struct.unpack("<Q", f.read(8))[0]
+        for _ in range(num_points):
+            point_id = struct.unpack("<Q", f.read(8))[0]
+            xyz = struct.unpack("<3d", f.read(24))
+            rgb = struct.unpack("<3B", f.read(3))
+            error = struct.unpack("<d", f.read(8))[0]
+            track_length = struct.unpack("<Q", f.read(8))[0]
+            track = []
+            for _ in range(track_length):
+                image_id = struct.unpack("<I", f.read(4))[0]
+                point2d_idx = struct.unpack("<I", f.read(4))[0]
+                track.append((image_id, point2d_idx))
+            points[point_id] = {"xyz": xyz, "rgb": rgb, "error": error, "track": track}
+    return points
+
+
+def legacy_read_points3d_txt(path: str) -> dict:
+    points = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = line.split()
+            track_elems = parts[8:]
+            points[int(parts[0])] = {
+                "xyz": tuple(map(float, parts[1:4])),
+                "rgb": tuple(map(int, parts[4:7])),
+                "error": float(parts[7]),
+                "track": [(int(track_elems[j]), int(track_elems[j + 1]))
+                          for j in range(0, len(track_elems) - 1, 2)],
+            }
+    return points
+
+
+# ---------------------------------------------------------------------------
+# Synthetic model
+# ---------------------------------------------------------------------------
+
+def make_model(n_images: int, n_points: int, track_len: int, seed: int = 0) -> colmap_io.SparseModel:
+    """Random model where every point is seen by ``track_len`` images."""
+    rng = np.random.default_rng(seed)
+    cameras = {1: colmap_io.Camera(1, "OPENCV", 4000, 3000,
+                                   np.array([3000.0, 3000.0, 2000.0, 1500.0, 0.01, -0.002, 1e-4, 1e-4]))}
+
+    track_images = np.stack([rng.choice(n_images, track_len, replace=False) for _ in range(n_points)])
+    obs_image = track_images.ravel()
+    obs_point = np.repeat(np.arange(n_points), track_len)
+    order = np.argsort(obs_image, kind="stable")
+    counts = np.bincount(obs_image, minlength=n_images)
+    offsets = np.zeros(n_images + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    # Position of each observation inside its image's keypoint list
+    point2d_idx = np.empty(len(order), dtype=np.int64)
+    point2d_idx[order] = np.arange(len(order)) - offsets[obs_image[order]]
+
+    qvecs = rng.normal(size=(n_images, 4))
+    qvecs /= np.linalg.norm(qvecs, axis=1, keepdims=True)
+    images = colmap_io.ImageColumns(
+        image_ids=np.arange(1, n_images + 1, dtype=np.int64),
+        qvecs=qvecs,
+        tvecs=rng.normal(size=(n_images, 3)) * 100.0,
+        camera_ids=np.ones(n_images, dtype=np.int64),
+        names=[f"DJI_{i:05d}.JPG" for i in range(n_images)],
+        obs_offsets=offsets,
+        xy=rng.uniform(0, 4000, size=(len(order), 2)),
+        point3d_ids=obs_point[order].astype(np.int64),
+    )
+    track_offsets = np.arange(0, n_points * track_len + 1, track_len, dtype=np.int64)
+    points = colmap_io.PointColumns(
+        ids=np.arange(n_points, dtype=np.int64),
+        xyz=rng.normal(size=(n_points, 3)) * 50.0,
+        rgb=rng.integers(0, 256, size=(n_points, 3), dtype=np.uint8),
+        error=rng.uniform(0.1, 2.0, size=n_points),
+        track_lengths=np.full(n_points, track_len, dtype=np.int64),
+        track_offsets=track_offsets,
+        track_image_ids=(obs_image + 1).astype(np.int64),
+        track_point2d_idx=point2d_idx,
+    )
+    return colmap_io.SparseModel(cameras, images, points, "bin")
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+def _best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0
+
+
+def _check_equal(bin_dir: str, txt_dir: str) -> None:
+    legacy_images = legacy_read_images_bin(f"{bin_dir}/images.bin")
+    images = colmap_io.read_images_bin(f"{bin_dir}/images.bin")
+    assert images.names == list(legacy_images)
+    for row, name in enumerate(images.names):
+        legacy = legacy_images[name]
+        lo, hi = images.obs_offsets[row], images.obs_offsets[row + 1]
+        assert legacy["qvec"] == tuple(images.qvecs[row]) and legacy["tvec"] == tuple(images.tvecs[row])
+        assert [p[2] for p in legacy["points2d"]] == images.point3d_ids[lo:hi].astype(np.uint64).tolist()
+
+    legacy_points = legacy_read_points3d_bin(f"{bin_dir}/points3D.bin")
+    points = colmap_io.read_points3d_bin(f"{bin_dir}/points3D.bin", tracks=True)
+    for row, pid in enumerate(points.ids.tolist()):
+        legacy = legacy_points[pid]
+        lo, hi = points.track_offsets[row], points.track_offsets[row + 1]
+        assert legacy["xyz"] == tuple(points.xyz[row]) and legacy["error"] == points.error[row]
+        assert legacy["track"] == list(zip(points.track_image_ids[lo:hi].tolist(),
+                                           points.track_point2d_idx[lo:hi].tolist()))
+
+    txt_points = colmap_io.read_points3d_txt(f"{txt_dir}/points3D.txt", tracks=True)
+    assert np.array_equal(txt_points.xyz, points.xyz)
+    assert np.array_equal(txt_points.track_image_ids, points.track_image_ids)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="COLMAP sparse model I/O benchmark")
+    parser.add_argument("--images", type=int, default=300, help="图像数量")
+    parser.add_argument("--points", type=int, default=50000, help="3D 点数量")
+    parser.add_argument("--track-len", type=int, default=4, help="每个 3D 点的观测数")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数（取最快一次）")
+    args = parser.parse_args()
+
+    model = make_model(args.images, args.points, args.track_len)
+    with tempfile.TemporaryDirectory() as tmp:
+        bin_dir, txt_dir, out_dir = f"{tmp}/bin", f"{tmp}/txt", f"{tmp}/out"
+        colmap_io.write_model(model, bin_dir, "bin")
+        colmap_io.write_model(model, txt_dir, "txt")
+        _check_equal(bin_dir, txt_dir)
+
+        cases = [
+            ("images.bin", "legacy", lambda: legacy_read_images_bin(f"{bin_dir}/images.bin")),
+            ("images.bin", "colmap_io", lambda: colmap_io.read_images_bin(f"{bin_dir}/images.bin")),
+            ("images.bin poses", "legacy", lambda: legacy_read_images_bin(f"{bin_dir}/images.bin", False)),
+            ("images.bin poses", "colmap_io", lambda: colmap_io.open_model(bin_dir, "bin").poses),
+            ("points3D.bin", "legacy", lambda: legacy_read_points3d_bin(f"{bin_dir}/points3D.bin")),
+            ("points3D.bin", "colmap_io", lambda: colmap_io.read_points3d_bin(f"{bin_dir}/points3D.bin")),
+            ("points3D.bin +tracks", "colmap_io",
+             lambda: colmap_io.read_points3d_bin(f"{bin_dir}/points3D.bin", tracks=True)),
+            ("points3D.txt", "legacy", lambda: legacy_read_points3d_txt(f"{txt_dir}/points3D.txt")),
+            ("points3D.txt +tracks", "colmap_io",
+             lambda: colmap_io.read_points3d_txt(f"{txt_dir}/points3D.txt", tracks=True)),
+            ("write model bin", "colmap_io", lambda: colmap_io.write_model(model, out_dir, "bin")),
+            ("write model txt", "colmap_io", lambda: colmap_io.write_model(model, out_dir, "txt")),
+        ]
+
+        print(f"model: {args.images} images, {args.points} points, "
+              f"{len(model.images.point3d_ids)} observations")
+        print(f"{'case':<24} {'reader':<10} {'best(ms)':>10}")
+        for case, reader, fn in cases:
+            print(f"{case:<24} {reader:<10} {_best_ms(fn, args.repeat):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+数据库并发负载基准测试
+
+模拟后台 runner 高频写进度 + API 并发读的场景，对比 SQLite 默认配置与
+性能模式（WAL / synchronous=NORMAL / busy_timeout / mmap / cache_size），
+以及性能模式下后台连接池（writer_pool_limits）与单连接写入引擎。
+
+用法:
+    python scripts/bench_db_concurrency.py --writers 10 --readers 16 --seconds 10
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine  # noqa: E402
+
+from app.conf.settings import DatabaseConfig  # noqa: E402
+from app.models.database import _create_engines, _install_sqlite_pragmas  # noqa: E402
+
+
+async def _setup(engine, rows: int) -> None:
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS bench_blocks ("
+            "id INTEGER PRIMARY KEY, progress FLOAT, detail TEXT)"
+        ))
+        await conn.execute(text("DELETE FROM bench_blocks"))
+        for i in range(rows):
+            await conn.execute(
+                text("INSERT INTO bench_blocks (id, progress, detail) VALUES (:i, 0, '')"),
+                {"i": i},
+            )
+
+
+async def _writer(engine, block_id: int, deadline: float, stats: dict) -> None:
+    progress = 0.0
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(
+                    text("UPDATE bench_blocks SET progress=:p, detail=:d WHERE id=:i"),
+                    {"p": progress, "d": f"stage {progress:.1f}", "i": block_id},
+                )
+            stats["writes"] += 1
+            stats["write_latency"].append(time.perf_counter() - t0)
+        except Exception:
+            stats["errors"] += 1
+        progress = (progress + 0.5) % 100
+        await asyncio.sleep(0)
+
+
+async def _reader(engine, rows: int, deadline: float, stats: dict) -> None:
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT id, progress, detail FROM bench_blocks"))
+                await conn.execute(
+                    text("SELECT progress FROM bench_blocks WHERE id=:i"), {"i": rows // 2}
+                )
+            stats["reads"] += 1
+            stats["read_latency"].append(time.perf_counter() - t0)
+        except Exception:
+            stats["errors"] += 1
+        await asyncio.sleep(0)
+
+
+def _p(values, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] * 1000.0
+
+
+async def run_case(name: str, config: DatabaseConfig, args, single_writer: bool = False) -> dict:
+    api_engine, writer_engine = _create_engines(config)
+    if single_writer:
+        # One background connection shared by all runners
+        await writer_engine.dispose()
+        writer_engine = create_async_engine(config.get_url(), pool_size=1, max_overflow=0)
+        _install_sqlite_pragmas(writer_engine, config)
+    await _setup(writer_engine, args.writers)
+
+    stats = {"writes": 0, "reads": 0, "errors": 0, "write_latency": [], "read_latency": []}
+    deadline = time.perf_counter() + args.seconds
+    tasks = [_writer(writer_engine, i, deadline, stats) for i in range(args.writers)]
+    tasks += [_reader(api_engine, args.writers, deadline, stats) for _ in range(args.readers)]
+    await asyncio.gather(*tasks)
+
+    await api_engine.dispose()
+    if writer_engine is not api_engine:
+        await writer_engine.dispose()
+
+    return {
+        "name": name,
+        "writes/s": stats["writes"] / args.seconds,
+        "reads/s": stats["reads"] / args.seconds,
+        "errors": stats["errors"],
+        "write_p95_ms": _p(stats["write_latency"], 0.95),
+        "read_p95_ms": _p(stats["read_latency"], 0.95),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="SQLite concurrent-load benchmark")
+    parser.add_argument("--writers", type=int, default=4, help="并发写任务数（模拟 runner）")
+    parser.add_argument("--readers", type=int, default=16, help="并发读任务数（模拟 API 轮询）")
+    parser.add_argument("--seconds", type=float, default=10.0, help="每个场景持续时间")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline = DatabaseConfig(path=Path(tmp) / "baseline.db", performance_mode=False, busy_timeout_ms=5000)
+        tuned = DatabaseConfig(path=Path(tmp) / "tuned.db", performance_mode=True)
+        results.append(await run_case("default", baseline, args))
+        results.append(await run_case("performance", tuned, args))
+        single = DatabaseConfig(path=Path(tmp) / "single.db", performance_mode=True)
+        results.append(await run_case("single-writer", single, args, single_writer=True))
+
+    print(f"{'case':<14} {'writes/s':>10} {'reads/s':>10} {'w_p95(ms)':>10} {'r_p95(ms)':>10} {'errors':>7}")
+    for r in results:
+        print(
+            f"{r['name']:<14} {r['writes/s']:>10.1f} {r['reads/s']:>10.1f} "
+            f"{r['write_p95_ms']:>10.2f} {r['read_p95_ms']:>10.2f} {r['errors']:>7d}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,6 +5,7 @@ Pytest configuration and shared fixtures
 pytest 会自动发现 conftest.py 中的 fixtures。
 """
 import pytest
+import pytest_asyncio
 from pathlib import Path
 import tempfile
 import shutil
@@ -192,3 +193,28 @@ def full_config_dir(temp_config_dir):
         yaml.dump(settings, f, allow_unicode=True)
 
     return temp_config_dir
+
+
+@pytest_asyncio.fixture
+async def db_sessionmaker():
+    """内存 SQLite 数据库（已建表）的会话工厂
+
+    Yields:
+        async_sessionmaker: 绑定到同一内存库的会话工厂，可用于模拟并发会话
+    """
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+    from app.models.database import Base
+
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def db(db_sessionmaker):
+    """内存 SQLite 数据库上的一个会话"""
+    async with db_sessionmaker() as session:
+        yield session
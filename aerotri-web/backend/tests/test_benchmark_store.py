@@ -0,0 +1,173 @@
+"""
+流水线基准数据库单元测试
+
+验证运行记录（输入规模、参数哈希、阶段耗时、输出指标）、回归比较以及基于相似历史运行的耗时预测。
+"""
+import sys
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.models import AlgorithmType, BenchmarkRun, Block, BlockImage
+from app.services.benchmark_store import (
+    benchmark_store,
+    compare_runs,
+    params_hash,
+    ply_vertex_count,
+    predict_runtime,
+)
+from test_reprojection import MODELS, _write_model
+
+
+def run(id, total, megapixels=100.0, stages=None, outputs=None, resources=None, **kwargs):
+    data = {
+        "id": id, "num_images": 100, "megapixels": megapixels, "total_time": total,
+        "stage_times": stages or {}, "outputs": outputs or {}, "resources": resources,
+        "params_hash": "p1", "tool_version": "colmap@a", "created_at": f"2026-01-{id:02d}T00:00:00",
+    }
+    data.update(kwargs)
+    return data
+
+
+class TestRecord:
+    """运行记录"""
+
+    @pytest.mark.asyncio
+    async def test_record_sfm_run(self, db, tmp_path):
+        sparse = tmp_path / "out" / "sparse" / "0"
+        sparse.mkdir(parents=True)
+        _write_model(sparse, *MODELS[0])
+        image_dir = tmp_path / "images"
+        image_dir.mkdir()
+        for i in range(5):
+            Image.new("RGB", (2000, 1500)).save(image_dir / f"{i}.jpg", "JPEG")
+        block = Block(
+            id="blk-1", name="b", image_path=str(image_dir), output_path=str(tmp_path / "out"),
+            algorithm=AlgorithmType.COLMAP,
+            feature_params={"max_image_size": 3200},
+            statistics={
+                "stage_times": {"feature_extraction": 12.0, "mapping": 30.0},
+                "total_time": 42.0,
+                "resource_profile": {"summary": {"stages": {}, "total": {"peak_rss_mb": 900.0}}},
+            },
+        )
+        db.add(block)
+        # A stale catalog row: the store refreshes the catalog before counting
+        db.add(BlockImage(block_id="blk-1", name="gone.jpg", width=4000, height=3000))
+        await db.commit()
+
+        record = await benchmark_store.record(db, "sfm", block)
+        data = record.to_dict()
+        assert data["algorithm"] == "colmap"
+        assert data["num_images"] == 5 and data["megapixels"] == 15.0
+        assert data["total_time"] == 42.0 and data["stage_times"]["mapping"] == 30.0
+        assert data["resources"]["total"]["peak_rss_mb"] == 900.0
+        assert data["params"]["feature_params"] == {"max_image_size": 3200}
+        assert data["params_hash"] == params_hash(data["params"])
+        outputs = data["outputs"]
+        assert outputs["num_registered_images"] == 4 and outputs["num_points3d"] == 50
+        assert outputs["registered_ratio"] == 0.8
+        assert outputs["mean_reprojection_error"] > 0
+
+        # Same block settings predict from the recorded run
+        prediction = await benchmark_store.predict(db, "sfm", block)
+        assert prediction["matched_params"] and prediction["based_on"] == 1
+        assert prediction["predicted_seconds"] == 42.0
+
+        # A changed parameter no longer matches
+        block.feature_params = {"max_image_size": 1600}
+        assert not (await benchmark_store.predict(db, "sfm", block))["matched_params"]
+
+    @pytest.mark.asyncio
+    async def test_baseline_and_compare(self, db):
+        for i, (total, mp) in enumerate([(100.0, 100.0), (110.0, 110.0), (50.0, 30.0), (200.0, 100.0)]):
+            db.add(BenchmarkRun(
+                pipeline="sfm", block_id=f"b{i}", algorithm="colmap", params_hash="p1",
+                num_images=100, megapixels=mp, total_time=total,
+            ))
+        db.add(BenchmarkRun(pipeline="sfm", block_id="x", algorithm="colmap", params_hash="p2",
+                            num_images=100, megapixels=100.0, total_time=100.0))
+        await db.commit()
+
+        latest = await benchmark_store.get(db, 4)
+        # Run 3 is too small, run 5 has other parameters and is newer
+        assert [r.id for r in await benchmark_store.baseline(db, latest)] == [2, 1]
+        result = await benchmark_store.compare(db, latest)
+        assert result["status"] == "regression"
+        assert result["regressions"][0]["metric"] == "time:total"
+        assert result["regressions"][0]["change"] == 1.0
+
+        assert (await benchmark_store.compare(db, latest, baseline_id=5))["baseline_runs"] == [5]
+        db.add(BenchmarkRun(pipeline="sfm", block_id="y", algorithm="glomap", params_hash="p1",
+                            num_images=100, megapixels=100.0, total_time=100.0))
+        await db.commit()
+        with pytest.raises(ValueError):
+            await benchmark_store.compare(db, latest, baseline_id=6)
+        first = await benchmark_store.get(db, 1)
+        assert (await benchmark_store.compare(db, first))["status"] == "no_baseline"
+
+
+class TestCompare:
+    """回归判定"""
+
+    def test_stage_output_and_resource_checks(self):
+        baseline = [
+            run(1, 100.0, stages={"matching": 60.0, "undistort": 2.0},
+                outputs={"registered_ratio": 0.98, "mean_reprojection_error": 0.8},
+                resources={"total": {"peak_rss_mb": 1000.0}}),
+            run(2, 100.0, stages={"matching": 60.0, "undistort": 2.0},
+                outputs={"registered_ratio": 0.97, "mean_reprojection_error": 0.8},
+                resources={"total": {"peak_rss_mb": 1000.0}}),
+        ]
+        current = run(
+            3, 105.0, stages={"matching": 90.0, "undistort": 4.0},
+            outputs={"registered_ratio": 0.90, "mean_reprojection_error": 0.82},
+            resources={"total": {"peak_rss_mb": 1500.0}}, tool_version="colmap@b",
+        )
+        result = compare_runs(current, baseline)
+        flagged = {c["metric"] for c in result["regressions"]}
+        # Short stages are noise; the total is within the threshold
+        assert flagged == {"time:matching", "registered_ratio", "resource:peak_rss_mb"}
+        assert "time:undistort" not in {c["metric"] for c in result["checks"]}
+        assert result["tool_changed"] and result["basis"] == "megapixels"
+
+    def test_normalized_by_size(self):
+        # Twice the input in twice the time is not a regression
+        result = compare_runs(run(2, 200.0, megapixels=200.0), [run(1, 100.0)])
+        assert result["status"] == "ok" and not result["tool_changed"]
+        # Without megapixels on every run, image counts are used
+        result = compare_runs(run(2, 200.0, megapixels=0.0, num_images=100), [run(1, 100.0)])
+        assert result["basis"] == "num_images" and result["status"] == "regression"
+        assert compare_runs(run(1, 100.0), [])["status"] == "no_baseline"
+
+
+class TestPredict:
+    """耗时预测"""
+
+    def test_nearest_same_params(self):
+        history = [
+            run(1, 100.0, megapixels=100.0, stages={"matching": 60.0}),
+            run(2, 240.0, megapixels=200.0, stages={"matching": 180.0}),
+            run(3, 1000.0, megapixels=10.0),
+            run(4, 10.0, megapixels=100.0, params_hash="other"),
+        ]
+        prediction = predict_runtime({"megapixels": 150.0, "params_hash": "p1"}, history, neighbours=2)
+        assert prediction["runs"] == [2, 1] and prediction["matched_params"]
+        # Median of 1.0 and 1.2 s/MP
+        assert prediction["predicted_seconds"] == 165.0
+        assert (prediction["low_seconds"], prediction["high_seconds"]) == (150.0, 180.0)
+        assert prediction["stage_seconds"]["matching"] == 112.5
+
+        fallback = predict_runtime({"megapixels": 100.0, "params_hash": "new"}, history, neighbours=1)
+        assert not fallback["matched_params"] and fallback["runs"] == [4]
+        assert predict_runtime({"megapixels": 0, "num_images": 0}, history)["predicted_seconds"] is None
+
+    def test_ply_vertex_count(self, tmp_path):
+        ply = tmp_path / "point_cloud.ply"
+        ply.write_bytes(b"ply\nformat binary_little_endian 1.0\nelement vertex 1234\nproperty float x\nend_header\n\x00\x01")
+        assert ply_vertex_count(str(ply)) == 1234
+        assert ply_vertex_count(str(tmp_path / "missing.ply")) is None
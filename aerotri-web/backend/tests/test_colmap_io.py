@@ -0,0 +1,135 @@
+"""
+COLMAP 模型读写单元测试
+
+验证 bin/txt 读写往返、按需加载、合并服务兼容接口，以及二进制模型的原点平移。
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services import colmap_io
+from app.services.sfm_merge_service import SFMMergeService
+from test_reprojection import MODELS, _write_model
+
+
+class TestOriginShift:
+    """sparse_utm -> sparse_enu_local 原点平移"""
+
+    def test_shift_points_and_camera_centers(self, tmp_path):
+        src = tmp_path / "utm"
+        dst = tmp_path / "enu" / "0"
+        src.mkdir()
+        _write_model(src, *MODELS[1])
+        origin = (500000.25, 4000000.5, 100.0)
+
+        counts = colmap_io.shift_model_origin_bin(str(src), str(dst), origin)
+        assert counts == {"num_images": 4, "num_points3d": 50}
+
+        a = colmap_io.read_model(str(src), "bin")
+        b = colmap_io.read_model(str(dst), "bin")
+        np.testing.assert_allclose(b.points.xyz, a.points.xyz - np.array(origin), atol=1e-9)
+        R = colmap_io.qvecs_to_rotmats(a.images.qvecs)
+        centers_a = -np.einsum("nji,nj->ni", R, a.images.tvecs)
+        centers_b = -np.einsum("nji,nj->ni", R, b.images.tvecs)
+        np.testing.assert_allclose(centers_b, centers_a - np.array(origin), atol=1e-6)
+
+        # Everything except translated fields is preserved byte for byte
+        np.testing.assert_array_equal(b.images.qvecs, a.images.qvecs)
+        np.testing.assert_array_equal(b.images.xy, a.images.xy)
+        np.testing.assert_array_equal(b.images.point3d_ids, a.images.point3d_ids)
+        assert b.images.names == a.images.names
+        np.testing.assert_array_equal(b.points.track_lengths, a.points.track_lengths)
+        assert (dst / "cameras.bin").read_bytes() == (src / "cameras.bin").read_bytes()
+        assert (src / "points3D.bin").stat().st_size == (dst / "points3D.bin").stat().st_size
+
+
+class TestRoundTrip:
+    """读写往返"""
+
+    def test_bin_rewrite_is_byte_identical(self, tmp_path):
+        _write_model(tmp_path, *MODELS[1])
+        model = colmap_io.read_model(str(tmp_path), "bin", tracks=True)
+        out = tmp_path / "out"
+        colmap_io.write_model(model, str(out), "bin")
+        for name in ("cameras.bin", "images.bin", "points3D.bin"):
+            assert (out / name).read_bytes() == (tmp_path / name).read_bytes()
+
+    def test_txt_round_trip(self, tmp_path):
+        _write_model(tmp_path, *MODELS[2])
+        a = colmap_io.read_model(str(tmp_path), "bin", tracks=True)
+        colmap_io.write_model(a, str(tmp_path / "txt"), "txt")
+        b = colmap_io.read_model(str(tmp_path / "txt"), "txt", tracks=True)
+        np.testing.assert_array_equal(b.cameras[1].params, a.cameras[1].params)
+        np.testing.assert_array_equal(b.images.qvecs, a.images.qvecs)
+        np.testing.assert_array_equal(b.images.xy, a.images.xy)
+        np.testing.assert_array_equal(b.images.point3d_ids, a.images.point3d_ids)
+        np.testing.assert_array_equal(b.points.xyz, a.points.xyz)
+        np.testing.assert_array_equal(b.points.track_offsets, a.points.track_offsets)
+        np.testing.assert_array_equal(b.points.track_point2d_idx, a.points.track_point2d_idx)
+
+    def test_tracks_match_bin_and_txt(self, tmp_path):
+        _write_model(tmp_path, *MODELS[0])
+        for fmt in ("bin", "txt"):
+            points = colmap_io.read_points3d(str(tmp_path / f"points3D.{fmt}"), tracks=True)
+            assert points.has_tracks
+            np.testing.assert_array_equal(points.track_lengths, np.full(50, 4))
+            # Point k is seen by images 1..4 at keypoint index k-1
+            np.testing.assert_array_equal(points.track_image_ids[:4], [1, 2, 3, 4])
+            np.testing.assert_array_equal(points.track_point2d_idx[4:8], [1, 1, 1, 1])
+            assert not colmap_io.read_points3d(str(tmp_path / f"points3D.{fmt}")).has_tracks
+
+    def test_write_rejects_ids_out_of_uint32(self, tmp_path):
+        _write_model(tmp_path, *MODELS[0])
+        model = colmap_io.read_model(str(tmp_path), "bin", tracks=True)
+        model.images.image_ids[0] = 2**32
+        with pytest.raises(ValueError):
+            colmap_io.write_model(model, str(tmp_path / "out"), "bin")
+
+
+class TestLazyModel:
+    """按需加载的列组"""
+
+    def test_poses_without_observations(self, tmp_path):
+        _write_model(tmp_path, *MODELS[0])
+        lazy = colmap_io.open_model(str(tmp_path))
+        assert lazy.num_images() == 4 and lazy.num_points3d() == 50
+        poses = lazy.poses
+        assert not poses.has_observations
+        np.testing.assert_array_equal(poses.num_points2d, [51, 51, 51, 51])
+        assert lazy.names == [f"img_{i}.jpg" for i in range(4)]
+        assert "images" not in vars(lazy) and "points" not in vars(lazy)
+        np.testing.assert_array_equal(lazy.images.num_points3d(), [50, 50, 50, 50])
+
+
+class TestMergeServiceCompat:
+    """SFMMergeService 的字典格式读写接口"""
+
+    def test_dict_layout_and_rewrite(self, tmp_path):
+        _write_model(tmp_path, *MODELS[1])
+        cameras = SFMMergeService.read_cameras_bin(str(tmp_path / "cameras.bin"))
+        assert cameras[1]["model"] == 4 and len(cameras[1]["params"]) == 8
+        assert SFMMergeService.read_cameras_txt(str(tmp_path / "cameras.txt")) == cameras
+        # An unknown model name is an error, not a silent SIMPLE_PINHOLE
+        (tmp_path / "cameras.txt").write_text("1 CUSTOM_MODEL 1000 800 800 500 400\n")
+        with pytest.raises(ValueError):
+            SFMMergeService.read_cameras_txt(str(tmp_path / "cameras.txt"))
+
+        images = SFMMergeService.read_images_bin(str(tmp_path / "images.bin"), include_points2d=True)
+        assert list(images) == [f"img_{i}.jpg" for i in range(4)]
+        assert images["img_0.jpg"]["points2d"][-1] == (1.0, 1.0, 18446744073709551615)
+        poses = SFMMergeService.read_images_txt(str(tmp_path / "images.txt"))
+        assert poses["img_2.jpg"]["tx"] == images["img_2.jpg"]["tx"] and "points2d" not in poses["img_2.jpg"]
+
+        points = SFMMergeService.read_points3d_bin(str(tmp_path / "points3D.bin"))
+        assert points == SFMMergeService.read_points3d_txt(str(tmp_path / "points3D.txt"))
+        assert points[3]["track"] == [(1, 2), (2, 2), (3, 2), (4, 2)]
+
+        model = SFMMergeService._build_sparse_model(cameras, images, points)
+        colmap_io.write_model(model, str(tmp_path / "merged"), "bin")
+        for name in ("cameras.bin", "images.bin", "points3D.bin"):
+            assert (tmp_path / "merged" / name).read_bytes() == (tmp_path / name).read_bytes()
@@ -99,6 +99,28 @@ class TestDatabaseConfig:
         assert config.path.is_absolute()
         assert config.path == project_root / "data" / "test.db"
 
+    def test_sqlite_url_and_performance_defaults(self):
+        """测试默认 SQLite URL 与性能模式默认值"""
+        config = DatabaseConfig(path=Path("/tmp/test.db"))
+        assert config.is_sqlite
+        assert config.get_url() == "sqlite+aiosqlite:////tmp/test.db"
+        assert config.performance_mode is True
+        assert config.journal_mode == "WAL"
+        assert config.synchronous == "NORMAL"
+
+    def test_external_database_url(self):
+        """测试外部数据库 URL 优先于 path"""
+        url = "postgresql+asyncpg://aerotri:secret@db:5432/aerotri"
+        config = DatabaseConfig(url=url)
+        assert not config.is_sqlite
+        assert config.get_url() == url
+
+    def test_pragma_value_validation(self):
+        """测试 PRAGMA 取值只允许关键字"""
+        assert DatabaseConfig(synchronous="full").synchronous == "FULL"
+        with pytest.raises(Exception):
+            DatabaseConfig(journal_mode="WAL; DROP TABLE blocks")
+
 
 class TestAlgorithmsConfig:
     """测试算法配置"""
@@ -237,6 +259,17 @@ class TestAppSettings:
             assert overrides["algorithms"]["colmap"]["path"] == "/usr/bin/colmap"
             assert overrides["queue"]["max_concurrent"] == 4
 
+    def test_load_env_overrides_database_url(self):
+        """测试数据库 URL 与性能模式环境变量覆盖"""
+        with patch.dict(os.environ, {
+            "AEROTRI_DB_URL": "postgresql+asyncpg://db/aerotri",
+            "AEROTRI_DB_PERFORMANCE_MODE": "false",
+        }):
+            overrides = AppSettings.load_env_overrides()
+
+            assert overrides["database"]["url"] == "postgresql+asyncpg://db/aerotri"
+            assert overrides["database"]["performance_mode"] is False
+
     def test_load_env_overrides_frontend_origin(self):
         """测试单个前端域名环境变量覆盖 CORS"""
         with patch.dict(os.environ, {
@@ -0,0 +1,68 @@
+"""
+数据库引擎单元测试
+
+验证后台连接池能容纳 max_concurrent 个 runner 同时持有外层会话并打开嵌套会话写入，
+不会因 QueuePool 超时而失败。
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.conf.settings import DatabaseConfig
+from app.models import Block
+from app.models.database import Base, MAX_CONCURRENT_TASKS, _create_engines, writer_pool_limits
+
+
+class TestWriterPool:
+    """后台连接池容量"""
+
+    def test_limits_cover_nested_sessions(self):
+        config = DatabaseConfig(writer_max_overflow=0)
+        pool_size, max_overflow = writer_pool_limits(config)
+        assert pool_size + max_overflow >= 2 * MAX_CONCURRENT_TASKS
+        # writer_max_overflow is added on top of the computed minimum
+        extra = writer_pool_limits(DatabaseConfig(writer_max_overflow=3))
+        assert extra == (pool_size, max_overflow + 3)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_runners(self, tmp_path):
+        config = DatabaseConfig(path=tmp_path / "test.db", writer_max_overflow=0)
+        api, writer = _create_engines(config, pool_timeout=2)
+        try:
+            async with api.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            sessions = async_sessionmaker(writer, class_=AsyncSession, expire_on_commit=False)
+            held = asyncio.Event()
+            holding = 0
+
+            async def runner(i):
+                nonlocal holding
+                async with sessions() as outer:
+                    outer.add(Block(id=f"blk-{i}", name=f"b{i}", image_path=str(tmp_path)))
+                    await outer.commit()
+                    await outer.execute(select(Block.id))
+                    # Every runner holds its outer session before any opens a nested one
+                    holding += 1
+                    if holding == MAX_CONCURRENT_TASKS:
+                        held.set()
+                    await held.wait()
+                    async with sessions() as nested:
+                        block = await nested.get(Block, f"blk-{i}")
+                        block.current_stage = "mapping"
+                        await nested.commit()
+
+            await asyncio.wait_for(
+                asyncio.gather(*(runner(i) for i in range(MAX_CONCURRENT_TASKS))), timeout=30
+            )
+            async with sessions() as session:
+                stages = (await session.execute(select(Block.current_stage))).scalars().all()
+            assert stages == ["mapping"] * MAX_CONCURRENT_TASKS
+        finally:
+            await api.dispose()
+            await writer.dispose()
@@ -0,0 +1,104 @@
+"""
+3DGS 多分辨率影像金字塔单元测试
+
+验证分辨率选级、各级尺寸（与 3DGS 取整一致）、RGBA 保留、增量复用、进程池并行生成、
+批次间取消以及旧金字塔清理。
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import gs_pyramid, image_workers
+from app.services.gs_pyramid import build_pyramid, prune_pyramids, pyramid_factor, pyramid_root
+
+
+class TestPyramidLevels:
+    """选级与尺寸"""
+
+    def test_factor(self):
+        assert pyramid_factor(2) == 2
+        assert pyramid_factor("8") == 8
+        assert pyramid_factor(-1) is None
+        assert pyramid_factor(1) is None
+        assert pyramid_factor(None) is None
+
+    @pytest.mark.asyncio
+    async def test_sizes_and_reuse(self, tmp_path):
+        src = tmp_path / "images"
+        (src / "sub").mkdir(parents=True)
+        Image.new("RGB", (1001, 751), (200, 10, 10)).save(src / "a.jpg", "JPEG")
+        Image.new("RGBA", (64, 48), (0, 0, 255, 128)).save(src / "sub" / "b.png")
+        (src / "notes.txt").write_text("skip")
+        out = pyramid_root(str(tmp_path / "cache"), str(src))
+
+        assert await build_pyramid(str(src), out, max_workers=1) == (2, 0)
+        for factor in (2, 4, 8):
+            with Image.open(os.path.join(out, f"images_{factor}", "a.jpg")) as img:
+                assert img.size == (round(1001 / factor), round(751 / factor))
+            with Image.open(os.path.join(out, f"images_{factor}", "sub", "b.png")) as img:
+                assert img.mode == "RGBA"
+                assert img.size == (64 // factor, 48 // factor)
+
+        progress = []
+        assert await build_pyramid(str(src), out, max_workers=1, on_progress=lambda d, t: progress.append(d)) == (0, 0)
+        assert progress == []
+
+        # A changed source is redone, and only that one
+        os.utime(src / "a.jpg", (os.path.getmtime(src / "a.jpg") + 10,) * 2)
+        assert await build_pyramid(str(src), out, max_workers=1) == (1, 0)
+
+    @pytest.mark.asyncio
+    async def test_process_pool(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(image_workers, "MIN_PARALLEL_IMAGES", 2)
+        monkeypatch.setattr(gs_pyramid, "_BATCH_SIZE", 2)
+        src = tmp_path / "images"
+        src.mkdir()
+        for i in range(5):
+            Image.new("RGB", (80, 60)).save(src / f"{i}.jpg", "JPEG")
+        (src / "bad.jpg").write_bytes(b"corrupt")
+
+        progress = []
+        done, failed = await build_pyramid(
+            str(src), str(tmp_path / "out"), factors=(2,), max_workers=2,
+            on_progress=lambda d, t: progress.append((d, t)),
+        )
+        assert (done, failed) == (6, 1)
+        assert progress[-1] == (6, 6)
+        assert len(os.listdir(tmp_path / "out" / "images_2")) == 5
+
+    @pytest.mark.asyncio
+    async def test_cancel_between_batches(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(gs_pyramid, "_BATCH_SIZE", 2)
+        src = tmp_path / "images"
+        src.mkdir()
+        for i in range(6):
+            Image.new("RGB", (80, 60)).save(src / f"{i}.jpg", "JPEG")
+
+        progress = []
+        done, failed = await build_pyramid(
+            str(src), str(tmp_path / "out"), factors=(2,), max_workers=1,
+            on_progress=lambda d, t: progress.append(d),
+            is_cancelled=lambda: bool(progress),
+        )
+        assert (done, failed) == (2, 0)
+        assert len(os.listdir(tmp_path / "out" / "images_2")) == 2
+
+
+class TestPyramidPrune:
+    """每个 Block 只保留当前源的金字塔"""
+
+    def test_prune_keeps_current(self, tmp_path):
+        cache = tmp_path / "gs_pyramid"
+        old = pyramid_root(str(cache), str(tmp_path / "undistort_old" / "images"))
+        new = pyramid_root(str(cache), str(tmp_path / "undistort_new" / "images"))
+        for root in (old, new):
+            os.makedirs(os.path.join(root, "images_2"))
+
+        assert prune_pyramids(str(cache), new) == [old]
+        assert os.listdir(cache) == [os.path.basename(new)]
+        assert prune_pyramids(str(tmp_path / "missing"), new) == []
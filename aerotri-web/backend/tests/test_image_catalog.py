@@ -0,0 +1,186 @@
+"""
+影像目录 (image catalog) 单元测试
+
+验证增量刷新、目录 mtime 跳过、分页与分区范围查询，以及 EXIF GPS 解析（原生 APP1 读取与 PIL 回退）。
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models import Block, BlockPartition
+from app.services import image_catalog, image_workers
+from app.services.exif_reader import read_jpeg_exif
+from app.services.image_catalog import ImageCatalogService, read_image_metadata, read_metadata_batch
+from app.services.partition_service import PartitionService
+
+
+async def _make_block(db, image_dir: Path, n: int = 5) -> Block:
+    image_dir.mkdir(exist_ok=True)
+    for i in range(n):
+        Image.new("RGB", (32, 24)).save(image_dir / f"IMG_{i:03d}.jpg", "JPEG")
+    (image_dir / "notes.txt").write_text("not an image")
+    block = Block(id=f"blk-{image_dir.name}", name="b", image_path=str(image_dir))
+    db.add(block)
+    await db.commit()
+    return block
+
+
+def _touch_dir(directory: Path) -> None:
+    # Directory mtime granularity can be coarse; force a visible change
+    st = os.stat(directory)
+    os.utime(directory, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+class TestCatalogRefresh:
+    """增量刷新"""
+
+    @pytest.mark.asyncio
+    async def test_add_update_remove(self, db, tmp_path):
+        block = await _make_block(db, tmp_path / "images")
+        stats = await ImageCatalogService.refresh(db, block, force=True)
+        assert (stats.added, stats.updated, stats.removed) == (5, 0, 0)
+        assert await ImageCatalogService.count(db, block.id) == 5
+        row = await ImageCatalogService.get(db, block.id, "IMG_000.jpg")
+        assert (row.width, row.height) == (32, 24)
+
+        Image.new("RGB", (64, 48)).save(tmp_path / "images" / "IMG_001.jpg", "JPEG")
+        os.utime(tmp_path / "images" / "IMG_001.jpg", (1, 1))
+        os.remove(tmp_path / "images" / "IMG_004.jpg")
+        Image.new("RGB", (8, 8)).save(tmp_path / "images" / "IMG_005.png", "PNG")
+        _touch_dir(tmp_path / "images")
+
+        stats = await ImageCatalogService.refresh(db, block)
+        assert (stats.added, stats.updated, stats.removed) == (1, 1, 1)
+        assert await ImageCatalogService.list_names(db, block.id) == [
+            "IMG_000.jpg", "IMG_001.jpg", "IMG_002.jpg", "IMG_003.jpg", "IMG_005.png",
+        ]
+        row = await ImageCatalogService.get(db, block.id, "IMG_001.jpg")
+        assert (row.width, row.height) == (64, 48)
+        assert await ImageCatalogService.counts_by_block(db) == {block.id: 5}
+        assert await ImageCatalogService.gps_positions(db, block.id) == []
+
+    @pytest.mark.asyncio
+    async def test_unchanged_dir_skips_scan(self, db, tmp_path, monkeypatch):
+        block = await _make_block(db, tmp_path / "images")
+        await ImageCatalogService.refresh(db, block, force=True)
+
+        calls = []
+        monkeypatch.setattr(image_catalog, "scan_image_files", lambda d: calls.append(d) or {})
+        stats = await ImageCatalogService.refresh(db, block)
+        assert not stats.scanned and calls == []
+        assert await ImageCatalogService.count(db, block.id) == 5
+
+
+    @pytest.mark.asyncio
+    async def test_concurrent_refresh(self, db, db_sessionmaker, tmp_path):
+        """同一区块并发刷新不会重复插入"""
+        block = await _make_block(db, tmp_path / "images")
+        async with db_sessionmaker() as other:
+            first, second = await asyncio.gather(
+                ImageCatalogService.refresh(db, block),
+                ImageCatalogService.refresh(other, block),
+            )
+        assert sorted([first.added, second.added]) == [0, 5]
+        assert await ImageCatalogService.count(db, block.id) == 5
+
+        await ImageCatalogService.remove(db, block.id)
+        assert block.id not in ImageCatalogService._dir_state
+        assert block.id not in ImageCatalogService._locks
+
+
+class TestCatalogQueries:
+    """分页与范围查询"""
+
+    @pytest.mark.asyncio
+    async def test_page_and_partition_range(self, db, tmp_path):
+        block = await _make_block(db, tmp_path / "images", n=10)
+        await ImageCatalogService.refresh(db, block, force=True)
+
+        page = await ImageCatalogService.list_page(db, block.id, offset=3, limit=4)
+        assert [r.name for r in page] == [f"IMG_{i:03d}.jpg" for i in range(3, 7)]
+
+        partition = BlockPartition(
+            block_id=block.id, index=0, name="P1",
+            image_start_name="IMG_002.jpg", image_end_name="IMG_005.jpg",
+        )
+        names = await PartitionService.get_partition_image_names(block, partition, db)
+        assert names == [f"IMG_{i:03d}.jpg" for i in range(2, 6)]
+
+        partition.image_end_name = "IMG_999.jpg"
+        assert await PartitionService.get_partition_image_names(block, partition, db) == []
+
+    @pytest.mark.asyncio
+    async def test_gps_positions(self, db, tmp_path):
+        block = await _make_block(db, tmp_path / "images", n=3)
+        Image.new("RGB", (16, 12)).save(tmp_path / "images" / "IMG_001.jpg", "JPEG", exif=_gps_exif())
+        await ImageCatalogService.refresh(db, block, force=True)
+        [(name, lat, lon, alt)] = await ImageCatalogService.gps_positions(db, block.id)
+        assert name == "IMG_001.jpg" and alt == pytest.approx(85.5)
+        assert (lat, lon) == (pytest.approx(-30.26), pytest.approx(120.5))
+
+
+def _gps_exif() -> Image.Exif:
+        exif = Image.Exif()
+        exif[271] = "DJI"
+        exif[272] = "FC6310"
+        exif.get_ifd(0x8769)[36867] = "2024:05:06 07:08:09"
+        gps = exif.get_ifd(0x8825)
+        gps[1] = "S"
+        gps[2] = (30.0, 15.0, 36.0)
+        gps[3] = "E"
+        gps[4] = (120.0, 30.0, 0.0)
+        gps[5] = 0
+        gps[6] = 85.5
+        return exif
+
+
+class TestImageMetadata:
+    """EXIF 解析"""
+
+    def test_gps_time_camera(self, tmp_path):
+        path = tmp_path / "gps.jpg"
+        Image.new("RGB", (16, 12)).save(path, "JPEG", exif=_gps_exif())
+
+        meta = read_image_metadata(str(path))
+        assert (meta["width"], meta["height"]) == (16, 12)
+        assert meta["gps_lat"] == pytest.approx(-30.26)
+        assert meta["gps_lon"] == pytest.approx(120.5)
+        assert meta["gps_alt"] == pytest.approx(85.5)
+        assert meta["captured_at"].isoformat() == "2024-05-06T07:08:09"
+        assert (meta["camera_make"], meta["camera_model"]) == ("DJI", "FC6310")
+
+    def test_native_reader_matches_pil(self, tmp_path, monkeypatch):
+        path = tmp_path / "gps.jpg"
+        Image.new("RGB", (40, 30)).save(path, "JPEG", exif=_gps_exif())
+        native = read_jpeg_exif(str(path))
+        assert native["size"] == (40, 30) and native["gps"][1] == "S"
+        meta = read_image_metadata(str(path))
+
+        # Same result when forced through PIL
+        monkeypatch.setattr(image_catalog, "read_jpeg_exif", lambda p: None)
+        assert read_image_metadata(str(path)) == meta
+
+    def test_png_falls_back_to_pil(self, tmp_path):
+        Image.new("RGB", (9, 7)).save(tmp_path / "a.png", "PNG")
+        assert read_jpeg_exif(str(tmp_path / "a.png")) is None
+        assert read_image_metadata(str(tmp_path / "a.png"))["width"] == 9
+
+    def test_batch_in_process_pool(self, tmp_path):
+        n = image_workers.MIN_PARALLEL_IMAGES + 2
+        names = [f"{i:03d}.jpg" for i in range(n)]
+        for i, name in enumerate(names):
+            Image.new("RGB", (8 + i, 8)).save(tmp_path / name, "JPEG", exif=_gps_exif())
+        metas = read_metadata_batch(str(tmp_path), names, max_workers=2)
+        assert [m["width"] for m in metas] == [8 + i for i in range(n)]
+        assert all(m["gps_lon"] == pytest.approx(120.5) for m in metas)
+
+    def test_unreadable_file(self, tmp_path):
+        (tmp_path / "bad.jpg").write_bytes(b"not a jpeg")
+        meta = read_image_metadata(str(tmp_path / "bad.jpg"))
+        assert meta["width"] is None and meta["gps_lat"] is None
@@ -0,0 +1,69 @@
+"""
+影像校验单元测试
+
+验证头部检查、截断 JPEG 检测、MPO 转换以及 (inode, mtime, size) 缓存。
+"""
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import image_validation, image_workers
+from app.services.image_validation import STATUS_CONVERTED, STATUS_INVALID, STATUS_OK, validate_images
+
+
+def _make_images(d: Path):
+    img = Image.new("RGB", (64, 48), (200, 100, 50))
+    img.save(d / "good.jpg", "JPEG")
+    img.save(d / "good.png", "PNG")
+    data = (d / "good.jpg").read_bytes()
+    (d / "truncated.jpg").write_bytes(data[: len(data) // 2])
+    img.save(d / "stereo.jpg", "MPO", save_all=True, append_images=[Image.new("RGB", (64, 48))])
+    img.save(d / "anim.gif", "GIF")
+
+
+class TestValidateImages:
+    """校验结果与缓存"""
+
+    def test_statuses(self, tmp_path):
+        _make_images(tmp_path)
+        names = ["good.jpg", "good.png", "truncated.jpg", "stereo.jpg", "anim.gif", "missing.jpg"]
+        results = validate_images(str(tmp_path), names)
+        assert {n: r.status for n, r in results.items()} == {
+            "good.jpg": STATUS_OK,
+            "good.png": STATUS_OK,
+            "truncated.jpg": STATUS_INVALID,
+            "stereo.jpg": STATUS_CONVERTED,
+            "anim.gif": STATUS_INVALID,
+            "missing.jpg": STATUS_INVALID,
+        }
+        with Image.open(tmp_path / "stereo.jpg") as img:
+            assert img.format == "JPEG" and img.size == (64, 48)
+
+    def test_cache_skips_unchanged_files(self, tmp_path, monkeypatch):
+        _make_images(tmp_path)
+        cache = str(tmp_path / "cache.json")
+        names = ["good.jpg", "stereo.jpg", "truncated.jpg"]
+        validate_images(str(tmp_path), names, cache)
+
+        calls = []
+        real_check = image_validation.check_image
+        monkeypatch.setattr(image_validation, "check_image", lambda p: calls.append(p) or real_check(p))
+        results = validate_images(str(tmp_path), names, cache)
+        assert calls == []
+        # The converted MPO is now a plain JPEG
+        assert results["stereo.jpg"].status == STATUS_OK
+        assert results["truncated.jpg"].status == STATUS_INVALID
+
+        Image.new("RGB", (8, 8)).save(tmp_path / "good.jpg", "JPEG")
+        validate_images(str(tmp_path), names, cache)
+        assert calls == [str(tmp_path / "good.jpg")]
+
+    def test_process_pool(self, tmp_path):
+        for i in range(image_workers.MIN_PARALLEL_IMAGES + 4):
+            Image.new("RGB", (16, 16)).save(tmp_path / f"{i}.jpg", "JPEG")
+        names = [f"{i}.jpg" for i in range(image_workers.MIN_PARALLEL_IMAGES + 4)]
+        results = validate_images(str(tmp_path), names, max_workers=2)
+        assert all(r.status == STATUS_OK for r in results.values()) and len(results) == len(names)
@@ -0,0 +1,71 @@
+"""
+日志解析器单元测试
+
+验证各工具日志格式的进度提取、预过滤以及按命令选择解析配置。
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.log_parser import LogParser, detect_tool
+
+
+class TestColmapProfile:
+    """COLMAP / GLOMAP 日志"""
+
+    def test_ratio_and_stage(self):
+        """Processed image X of Y 同时切换阶段并给出比例"""
+        parser = LogParser()
+        p = parser.parse_line("Processed image 25 of 100")
+        assert p.stage == "feature_extraction"
+        assert p.progress == pytest.approx(25.0)
+        assert (p.current, p.total) == (25, 100)
+        assert parser.current_stage == "feature_extraction"
+
+    def test_percent_and_completion(self):
+        """百分比格式与完成行"""
+        parser = LogParser()
+        assert parser.parse_line("Estimating relative pose: 40%").progress == 40.0
+        done = parser.parse_line("Reconstruction done in 12.5 seconds")
+        assert done.stage == "completed" and done.progress == 100.0
+
+    def test_exhaustive_matching_block(self):
+        """穷举匹配的嵌套块计数"""
+        p = LogParser().parse_line("Matching block [2/4, 3/4] in 1.2s")
+        assert p.stage == "matching"
+        assert (p.current, p.total) == (7, 16)
+
+    def test_irrelevant_line(self):
+        """无进度信息的行直接返回 None"""
+        parser = LogParser()
+        assert parser.parse_line("I20240101 12:00:00 feature_extractor.cc:123] Features: 8192") is None
+        assert parser.parse_line("") is None
+
+
+class TestOtherProfiles:
+    """OpenMVS / 3DGS / 工具识别"""
+
+    def test_openmvs_progress(self):
+        """OpenMVS Util::Progress 行"""
+        parser = LogParser("openmvs")
+        p = parser.parse_line("Estimated depth-maps 12 (25.50%, 3s, ETA 9s)...")
+        assert p.stage == "depth_estimation"
+        assert p.progress == pytest.approx(25.5)
+        p = parser.parse_line("Geometric-consistent estimated depth-maps 48 (100%, 12s)")
+        assert p.stage == "depth_geometric" and p.progress == 100.0
+
+    def test_gs_training(self):
+        """3DGS train.py 的 tqdm 进度"""
+        p = LogParser("gs").parse_line("Training progress:  37%|###7      | 11100/30000")
+        assert p.stage == "training" and p.progress == 37.0
+
+    def test_detect_tool(self):
+        """根据可执行文件选择解析配置"""
+        assert detect_tool(["/opt/colmap/bin/colmap", "mapper"]) == "colmap"
+        assert detect_tool(["glomap", "mapper"]) == "glomap"
+        assert detect_tool(["/usr/bin/DensifyPointCloud", "scene.mvs"]) == "openmvs"
+        assert detect_tool(["openMVG_main_ComputeFeatures"]) == "openmvg"
+        assert detect_tool(["python", "/opt/gs/train.py", "-s", "data"]) == "gs"
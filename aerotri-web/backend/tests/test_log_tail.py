@@ -0,0 +1,90 @@
+"""
+日志尾部读取单元测试
+
+验证反向分块读取尾部与基于偏移量的增量跟随。
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.log_tail import read_since, tail_lines, tail_or_follow
+from app.services.process_pump import BufferedLogWriter, LogRingBuffer
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / "run.log"
+    path.write_text("".join(f"line {i}\n" for i in range(5000)))
+    return path
+
+
+class TestTailLines:
+    """反向分块读取"""
+
+    @pytest.mark.parametrize("block_size", [5, 64, 65536])
+    def test_tail_matches_readlines(self, log_file, block_size):
+        expected = log_file.read_text().splitlines()[-37:]
+        assert tail_lines(log_file, 37, block_size=block_size) == expected
+
+    def test_missing_and_short_files(self, tmp_path):
+        assert tail_lines(tmp_path / "missing.log", 10) is None
+        short = tmp_path / "short.log"
+        short.write_text("a\nb")
+        assert tail_lines(short, 10) == ["a", "b"]
+
+
+class TestFollow:
+    """since_offset 增量跟随"""
+
+    def test_only_new_complete_lines(self, log_file):
+        first = tail_or_follow(log_file, 10)
+        assert first.lines[-1] == "line 4999"
+
+        with log_file.open("a") as fp:
+            fp.write("new 1\nnew 2\npartial")
+        chunk = read_since(log_file, first.offset)
+        assert chunk.lines == ["new 1", "new 2"] and not chunk.reset
+
+        with log_file.open("a") as fp:
+            fp.write(" done\n")
+        chunk = read_since(log_file, chunk.offset)
+        assert chunk.lines == ["partial done"]
+        assert read_since(log_file, chunk.offset).lines == []
+
+    def test_truncated_file_resets(self, log_file):
+        offset = log_file.stat().st_size
+        log_file.write_text("fresh\n")
+        chunk = read_since(log_file, offset)
+        assert chunk.reset and chunk.lines == ["fresh"]
+        assert chunk.offset == log_file.stat().st_size
+
+    def test_poll_around_flush(self, tmp_path):
+        """两次轮询之间发生 flush：缓冲中未落盘的行只返回一次"""
+        path = tmp_path / "run.log"
+        ring = LogRingBuffer()
+        writer = BufferedLogWriter(str(path), flush_interval=60)
+        writer.write_many(["a", "b"])
+        ring.extend(["a", "b"])
+        writer.close()  # flushed
+
+        writer = BufferedLogWriter(str(path), flush_interval=60)
+        writer.write_many(["c", "d"])
+        ring.extend(["c", "d"])  # in memory, not on disk yet
+        first = tail_or_follow(path, 10, memory_lines=list(ring))
+        writer.close()  # flush
+        second = tail_or_follow(path, 10, since_offset=first.offset, memory_lines=list(ring))
+        assert first.lines + second.lines == ["a", "b", "c", "d"]
+        assert not second.reset
+
+    def test_memory_before_file_exists(self, tmp_path):
+        path = tmp_path / "run.log"
+        first = tail_or_follow(path, 10, memory_lines=["a"])
+        assert first.lines == ["a"] and first.offset == 0
+        path.write_text("a\nb\n")
+        # The file view replaces the memory view instead of appending to it
+        second = tail_or_follow(path, 10, since_offset=first.offset, memory_lines=["a", "b"])
+        assert second.lines == ["a", "b"] and second.reset
+
@@ -0,0 +1,163 @@
+"""
+OpenMVS 子场景稠密化单元测试
+
+验证内存预算换算、PLY 合并（面索引偏移）以及子场景调度的 GPU 轮转与断点续跑。
+"""
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.openmvs_scalable import (
+    ScalableDensify,
+    list_sub_scenes,
+    merge_ply_files,
+    sub_scene_area,
+)
+
+VERTEX_DTYPE = np.dtype([("x", "<f4"), ("y", "<f4"), ("z", "<f4"), ("red", "u1"), ("green", "u1"), ("blue", "u1")])
+FACE_DTYPE = np.dtype([("n", "u1"), ("v", "<u4", (3,))])
+
+
+def write_ply(path, vertices, faces=None):
+    lines = [
+        "ply", "format binary_little_endian 1.0", f"element vertex {len(vertices)}",
+        "property float x", "property float y", "property float z",
+        "property uchar red", "property uchar green", "property uchar blue",
+    ]
+    if faces is not None:
+        lines += [f"element face {len(faces)}", "property list uchar uint vertex_indices"]
+    lines.append("end_header")
+    with open(path, "wb") as fp:
+        fp.write(("\n".join(lines) + "\n").encode("ascii"))
+        vert = np.zeros(len(vertices), dtype=VERTEX_DTYPE)
+        vert["x"], vert["y"], vert["z"] = np.asarray(vertices, dtype=np.float32).T
+        fp.write(vert.tobytes())
+        if faces is not None:
+            face = np.zeros(len(faces), dtype=FACE_DTYPE)
+            face["n"] = 3
+            face["v"] = np.asarray(faces, dtype=np.uint32).reshape(-1, 3)
+            fp.write(face.tobytes())
+
+
+def read_ply(path):
+    data = Path(path).read_bytes()
+    header, body = data.split(b"end_header\n", 1)
+    counts = {
+        line.split()[1].decode(): int(line.split()[2])
+        for line in header.splitlines() if line.startswith(b"element")
+    }
+    vertices = np.frombuffer(body, dtype=VERTEX_DTYPE, count=counts["vertex"])
+    faces = None
+    if "face" in counts:
+        faces = np.frombuffer(body, dtype=FACE_DTYPE, count=counts["face"], offset=vertices.nbytes)["v"]
+    return vertices, faces
+
+
+class TestMergePly:
+    """PLY 合并"""
+
+    def test_sub_scene_area(self):
+        assert sub_scene_area(16) == 660000
+        assert sub_scene_area(8) == 330000
+
+    def test_merge_meshes_offsets_faces(self, tmp_path):
+        write_ply(tmp_path / "a.ply", [(0, 0, 0), (1, 0, 0), (0, 1, 0)], [(0, 1, 2)])
+        write_ply(tmp_path / "b.ply", [(5, 0, 0), (6, 0, 0), (5, 1, 0), (6, 1, 0)], [(0, 1, 2), (1, 3, 2)])
+        totals = merge_ply_files([str(tmp_path / "a.ply"), str(tmp_path / "b.ply")], str(tmp_path / "m.ply"))
+        assert totals == {"vertex": 7, "face": 3}
+
+        vertices, faces = read_ply(tmp_path / "m.ply")
+        assert list(vertices["x"]) == [0, 1, 0, 5, 6, 5, 6]
+        assert faces.tolist() == [[0, 1, 2], [3, 4, 5], [4, 6, 5]]
+
+    def test_layout_mismatch(self, tmp_path):
+        write_ply(tmp_path / "a.ply", [(0, 0, 0)])
+        write_ply(tmp_path / "b.ply", [(0, 0, 0)], [])
+        with pytest.raises(ValueError):
+            merge_ply_files([str(tmp_path / "a.ply"), str(tmp_path / "b.ply")], str(tmp_path / "m.ply"))
+
+
+class FakeOpenMVS:
+    """Stands in for DensifyPointCloud/ReconstructMesh by writing their outputs."""
+
+    def __init__(self, dense_dir, n_sub_scenes, fail=()):
+        self.dense_dir = dense_dir
+        self.n_sub_scenes = n_sub_scenes
+        self.fail = set(fail)
+        self.calls = []
+
+    async def run(self, stage, cmd, cwd, outputs):
+        self.calls.append(cmd)
+        target = os.path.basename(cmd[1])
+        gpu = cmd[cmd.index("--cuda-device") + 1] if "--cuda-device" in cmd else None
+        if "--sub-scene-area" in cmd:
+            for i in range(self.n_sub_scenes):
+                Path(self.dense_dir, f"scene_{i:04d}.mvs").write_bytes(b"mvs")
+        elif "--fusion-mode" in cmd:
+            Path(self.dense_dir, "depth0000.dmap").write_bytes(b"dmap")
+        elif stage == "densify":
+            stem = target[:-4]
+            if stem in self.fail:
+                raise RuntimeError(f"fusion of {stem} failed")
+            Path(self.dense_dir, f"{stem}_dense.mvs").write_bytes(gpu.encode())
+            write_ply(os.path.join(self.dense_dir, f"{stem}_dense.ply"), [(0, 0, 0), (1, 1, 1)])
+        else:
+            stem = target[:-len("_dense.mvs")]
+            write_ply(os.path.join(self.dense_dir, f"{stem}_dense_mesh.ply"), [(0, 0, 0), (1, 0, 0), (0, 1, 0)], [(0, 1, 2)])
+
+
+class TestScalableDensify:
+    """子场景调度"""
+
+    def make(self, dense_dir, fake, **kwargs):
+        return ScalableDensify(
+            densify_bin="DensifyPointCloud",
+            mesh_bin="ReconstructMesh",
+            dense_dir=str(dense_dir),
+            run=fake.run,
+            densify_params={"sub_scene_memory_gb": 8},
+            mesh_params={},
+            **kwargs,
+        )
+
+    @pytest.mark.asyncio
+    async def test_round_robin_and_merge(self, tmp_path):
+        (tmp_path / "scene.mvs").write_bytes(b"scene")
+        fake = FakeOpenMVS(str(tmp_path), n_sub_scenes=4)
+        progress = []
+
+        async def on_progress(done, total):
+            progress.append((done, total))
+
+        assert await self.make(tmp_path, fake, gpu_indices=[0, 1], max_parallel=2, on_progress=on_progress).execute()
+
+        assert list_sub_scenes(str(tmp_path)) == [f"scene_{i:04d}" for i in range(4)]
+        assert (tmp_path / "Densify.ini").read_text() == "Optimize = 0\n"
+        assert "330000" in fake.calls[1]
+        gpus = {(tmp_path / f"scene_{i:04d}_dense.mvs").read_text() for i in range(4)}
+        assert gpus == {"0", "1"}
+        assert progress[0] == (0, 4) and progress[-1] == (4, 4)
+
+        vertices, faces = read_ply(tmp_path / "scene_dense_mesh.ply")
+        assert len(vertices) == 12 and faces.max() == 11
+        assert len(read_ply(tmp_path / "scene_dense.ply")[0]) == 8
+        assert (tmp_path / "scene_dense.mvs").read_bytes() == b"scene"
+
+    @pytest.mark.asyncio
+    async def test_resume_after_failure(self, tmp_path):
+        (tmp_path / "scene.mvs").write_bytes(b"scene")
+        fake = FakeOpenMVS(str(tmp_path), n_sub_scenes=3, fail={"scene_0001"})
+        with pytest.raises(RuntimeError):
+            await self.make(tmp_path, fake, gpu_indices=[0]).execute()
+        assert not (tmp_path / "scene_dense_mesh.ply").exists()
+
+        fake.fail.clear()
+        fake.calls.clear()
+        assert await self.make(tmp_path, fake, gpu_indices=[0]).execute()
+        # Depth maps, split and finished sub-scenes are not redone
+        assert [os.path.basename(c[1]) for c in fake.calls] == ["scene_0001.mvs", "scene_0001_dense.mvs"]
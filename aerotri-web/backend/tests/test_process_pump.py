@@ -0,0 +1,91 @@
+"""
+子进程输出泵单元测试
+
+验证分块读取时的行切分、\\r 进度帧合并以及后台日志写入。
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.process_pump import BufferedLogWriter, LogRingBuffer, ProcessOutputPump, SharedLogWriters
+
+
+class TestLineSplitting:
+    """分块切分与进度帧合并"""
+
+    def test_lines_across_chunks(self):
+        """跨块的行与 \\r\\n 结尾"""
+        pump = ProcessOutputPump(None)
+        assert pump.feed(b"first\nsec") == ["first"]
+        assert pump.feed(b"ond\r\nthird") == ["second"]
+        assert pump.flush() == ["third"]
+
+    def test_collapse_progress_redraws(self):
+        """同一块内只保留最新的进度帧，重复帧只输出一次"""
+        pump = ProcessOutputPump(None)
+        assert pump.feed(b"A 10%\rA 20%\rA 30%\rA 30") == ["A 30%"]
+        assert pump.feed(b"%\rA 40%\rA 100%\ndone\n") == ["A 40%", "A 100%", "done"]
+        assert pump.frames_collapsed == 3
+
+    def test_ring_buffer_bounded(self):
+        """环形缓冲区只保留最近的行"""
+        ring = LogRingBuffer(maxlen=3)
+        pump = ProcessOutputPump(None, ring=ring)
+        pump.feed(b"".join(f"line {i}\n".encode() for i in range(10)))
+        assert list(ring) == ["line 7", "line 8", "line 9"]
+        assert ring.tail(2) == ["line 8", "line 9"]
+
+    def test_keep_indentation(self):
+        """保留行首缩进，丢弃空白行"""
+        pump = ProcessOutputPump(None)
+        assert pump.feed(b"Traceback:\n  File x\n   \n\tline 3  \n") == ["Traceback:", "  File x", "\tline 3  "]
+
+
+class TestSubprocess:
+    """真实子进程 + 后台写入线程"""
+
+    @pytest.mark.asyncio
+    async def test_pump_subprocess_to_file(self, tmp_path):
+        script = (
+            "import sys\n"
+            "for i in range(2000): sys.stdout.write(f'row {i}\\n')\n"
+            "for p in range(101): sys.stdout.write(f'Training progress: {p}%\\r')\n"
+            "sys.stdout.write('end\\n')\n"
+        )
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, "-c", script, stdout=asyncio.subprocess.PIPE
+        )
+        log_path = tmp_path / "run.log"
+        async with BufferedLogWriter(str(log_path)) as writer:
+            pump = ProcessOutputPump(proc.stdout, writer=writer)
+            seen = []
+            async for lines in pump.batches():
+                seen.extend(lines)
+        await proc.wait()
+
+        content = log_path.read_text().splitlines()
+        assert content == seen
+        assert content[0] == "row 0" and content[1999] == "row 1999"
+        assert content[-2:] == ["Training progress: 100%", "end"]
+        # 101 redraws collapse to at most one per chunk read
+        assert sum(1 for line in content if line.startswith("Training")) < 101
+
+    @pytest.mark.asyncio
+    async def test_shared_writer(self, tmp_path):
+        """同一日志的并发使用者共享一个写入线程，最后一个离开时关闭"""
+        writers = SharedLogWriters()
+        log_path = str(tmp_path / "run.log")
+        async with writers.open(log_path) as first:
+            async with writers.open(log_path) as second:
+                assert first is second
+                first.write("a")
+                second.write_many(["b", "c"])
+            assert not first._closed
+        assert first._closed
+        assert (tmp_path / "run.log").read_text().splitlines() == ["a", "b", "c"]
+        async with writers.open(log_path) as third:
+            assert third is not first
@@ -0,0 +1,132 @@
+"""
+进度推送中心单元测试
+
+验证快照回放、慢客户端帧合并以及发布端不阻塞。
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.progress_hub import ProgressHub
+
+
+class FakeWebSocket:
+    """记录发送内容的 WebSocket 替身，可选阻塞以模拟慢客户端"""
+
+    def __init__(self, block: bool = False):
+        self.sent = []
+        self.close_code = None
+        self.gate = asyncio.Event()
+        if not block:
+            self.gate.set()
+
+    async def send_json(self, data):
+        await self.gate.wait()
+        self.sent.append(data)
+
+    async def close(self, code: int = 1000):
+        self.close_code = code
+
+
+async def _drain():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestProgressHub:
+    """测试 ProgressHub"""
+
+    @pytest.mark.asyncio
+    async def test_new_subscriber_receives_snapshot(self):
+        """新订阅者立即收到各流水线最新快照"""
+        hub = ProgressHub()
+        hub.publish("b1", {"stage": "matching", "progress": 10.0, "message": ""})
+        hub.publish("b1", {"stage": "matching", "progress": 20.0, "message": ""})
+        hub.publish_stage("b1", "gs", "training", 5.0)
+
+        ws = FakeWebSocket()
+        sub = hub.subscribe("b1", ws)
+        await _drain()
+
+        assert {f["pipeline"] for f in ws.sent} == {"sfm", "gs"}
+        sfm = [f for f in ws.sent if f["pipeline"] == "sfm"][0]
+        assert sfm["progress"] == 20.0
+        assert sfm["snapshot"] is True
+        await hub.unsubscribe(sub)
+
+    @pytest.mark.asyncio
+    async def test_slow_client_frames_are_coalesced(self):
+        """慢客户端的积压帧按流水线合并，只保留最新进度"""
+        hub = ProgressHub(queue_size=4)
+        ws = FakeWebSocket(block=True)
+        sub = hub.subscribe("b1", ws)
+
+        for i in range(100):
+            hub.publish("b1", {"stage": "mapping", "progress": float(i), "message": ""})
+        hub.publish_stage("b1", "reconstruction", "densify", 50.0)
+
+        assert sub.queue.qsize() <= 4
+        assert sub.coalesced > 0
+
+        ws.gate.set()
+        await _drain()
+        sfm = [f for f in ws.sent if f["pipeline"] == "sfm"]
+        assert sfm[-1]["progress"] == 99.0
+        assert any(f["pipeline"] == "reconstruction" for f in ws.sent)
+        await hub.unsubscribe(sub)
+
+    @pytest.mark.asyncio
+    async def test_status_reply_is_not_coalesced_with_progress(self):
+        """状态回复经发送队列发出，不会被同流水线的进度帧合并掉"""
+        hub = ProgressHub(queue_size=4)
+        ws = FakeWebSocket(block=True)
+        sub = hub.subscribe("b1", ws)
+
+        hub.publish("b1", {"stage": "mapping", "progress": 1.0, "message": ""})
+        sub.offer({"type": "status", "log_tail": [], "stage_times": {}, "pipelines": {}})
+        for i in range(2, 100):
+            hub.publish("b1", {"stage": "mapping", "progress": float(i), "message": ""})
+
+        ws.gate.set()
+        while not sub.queue.empty():
+            await asyncio.sleep(0)
+        await _drain()
+        assert [f.get("type") for f in ws.sent].count("status") == 1
+        assert ws.sent[-1]["progress"] == 99.0
+        await hub.unsubscribe(sub)
+
+    @pytest.mark.asyncio
+    async def test_stalled_client_is_dropped_and_closed(self):
+        """发送超时的客户端被移出推送中心并关闭连接，以便浏览器重连"""
+        hub = ProgressHub(send_timeout=0.05)
+        stalled = FakeWebSocket(block=True)
+        healthy = FakeWebSocket()
+        sub = hub.subscribe("b1", stalled)
+        hub.subscribe("b1", healthy)
+
+        hub.publish("b1", {"stage": "mapping", "progress": 1.0, "message": ""})
+        await asyncio.wait_for(sub._task, timeout=5)
+        assert sub.closed and stalled.close_code == 1013
+        assert hub.subscriber_count("b1") == 1 and hub.find_subscriber("b1", stalled) is None
+
+        # Publishing keeps working for the remaining client
+        hub.publish("b1", {"stage": "mapping", "progress": 2.0, "message": ""})
+        await _drain()
+        assert healthy.sent[-1]["progress"] == 2.0
+        await hub.unsubscribe(sub)
+        await hub.unsubscribe(hub.find_subscriber("b1", healthy))
+
+    @pytest.mark.asyncio
+    async def test_unsubscribe_removes_client(self):
+        """取消订阅后不再计数"""
+        hub = ProgressHub()
+        ws = FakeWebSocket()
+        sub = hub.subscribe("b1", ws)
+        assert hub.subscriber_count("b1") == 1
+        await hub.unsubscribe(sub)
+        assert hub.subscriber_count("b1") == 0
+        hub.publish("b1", {"stage": "x", "progress": 1.0, "message": ""})
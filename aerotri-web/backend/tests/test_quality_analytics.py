@@ -0,0 +1,100 @@
+"""
+质量分析服务单元测试
+
+验证轨迹长度、交会角、分图像统计、残差热力图与磁盘缓存。
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services import colmap_io
+from app.services.quality_analytics import (
+    QUALITY_CACHE_NAME,
+    compute_quality_arrays,
+    load_quality_arrays,
+    quality_keys,
+    query_quality,
+)
+from test_reprojection import MODELS, _write_model
+
+
+@pytest.fixture
+def sparse_dir(tmp_path):
+    _write_model(tmp_path, *MODELS[1])
+    return tmp_path
+
+
+class TestQualityArrays:
+    """向量化指标计算"""
+
+    def test_metrics(self, sparse_dir):
+        arrays = compute_quality_arrays(colmap_io.read_model(str(sparse_dir), "bin"))
+        assert arrays["track_length"].tolist() == [4] * 50
+        assert arrays["obs_per_image"].tolist() == [50] * 4
+        assert np.isfinite(arrays["reprojection_error"]).all()
+        assert arrays["obs_uv"].shape == (200, 2)
+        assert ((arrays["obs_uv"] >= 0) & (arrays["obs_uv"] <= 1)).all()
+
+        # Cameras shifted along x: exact max angle is between the first and last camera
+        model = colmap_io.read_model(str(sparse_dir), "bin")
+        xyz = model.points.xyz
+        c0 = -np.array([0.0, 0.0, 20.0])
+        c3 = -np.array([0.9, 0.0, 20.0])
+        r0 = (xyz - c0) / np.linalg.norm(xyz - c0, axis=1, keepdims=True)
+        r3 = (xyz - c3) / np.linalg.norm(xyz - c3, axis=1, keepdims=True)
+        exact = np.degrees(np.arccos(np.clip((r0 * r3).sum(axis=1), -1, 1)))
+        np.testing.assert_allclose(arrays["triangulation_angle"], exact, rtol=1e-6)
+
+    def test_cache_reused(self, sparse_dir):
+        first = load_quality_arrays(str(sparse_dir))
+        assert (sparse_dir / QUALITY_CACHE_NAME).exists()
+        second = load_quality_arrays(str(sparse_dir))
+        np.testing.assert_array_equal(first["triangulation_angle"], second["triangulation_angle"])
+        assert second["image_names"].tolist() == [f"img_{i}.jpg" for i in range(4)]
+
+    def test_load_selected_keys(self, sparse_dir):
+        # Computed on first call, then read back from the cache: same subset either way
+        for _ in range(2):
+            arrays = load_quality_arrays(str(sparse_dir), keys=quality_keys("track_length"))
+            assert set(arrays) == {"image_ids", "point_ids", "track_length"}
+        heat = load_quality_arrays(str(sparse_dir), keys=quality_keys("residual_heatmap"))
+        assert "obs_uv" in heat and "track_length" not in heat
+        assert query_quality(heat, "residual_heatmap", grid=4)["heatmap"]["num_observations"] == 200
+        with pytest.raises(ValueError):
+            quality_keys("unknown")
+
+
+class TestQuery:
+    """分箱 / 分页 / 热力图查询"""
+
+    def test_binned_and_paged(self, sparse_dir):
+        arrays = load_quality_arrays(str(sparse_dir))
+        res = query_quality(arrays, "track_length", bins=64)
+        assert res["histogram"]["counts"] == [50]
+        assert res["stats"]["mean"] == 4
+
+        res = query_quality(arrays, "reprojection_error", bins=8, offset=0, limit=5)
+        values = [item["value"] for item in res["items"]]
+        assert len(values) == 5 and values == sorted(values, reverse=True)
+        assert sum(res["histogram"]["counts"]) == res["total"] == 50
+
+        res = query_quality(arrays, "obs_per_image", limit=10, order="asc")
+        assert [item["name"] for item in res["items"]] == [f"img_{i}.jpg" for i in range(4)]
+
+    def test_heatmap(self, sparse_dir):
+        arrays = load_quality_arrays(str(sparse_dir))
+        heat = query_quality(arrays, "residual_heatmap", grid=4)["heatmap"]
+        assert heat["num_observations"] == 200
+        assert sum(map(sum, heat["counts"])) == 200
+        single = query_quality(arrays, "residual_heatmap", grid=4, image_id=2)["heatmap"]
+        assert single["num_observations"] == 50
+
+        with pytest.raises(ValueError):
+            query_quality(arrays, "unknown")
+        with pytest.raises(KeyError):
+            query_quality(arrays, "residual_heatmap", image_id=99)
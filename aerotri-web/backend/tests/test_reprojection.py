@@ -0,0 +1,128 @@
+"""
+重投影误差引擎单元测试
+
+验证列式 COLMAP 读取器（bin/txt）与向量化投影结果一致。
+"""
+import struct
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import colmap_io
+from app.services.colmap_io import Camera
+from app.services.reprojection import compute_reprojection_report, project_normalized
+
+MODELS = [
+    ("SIMPLE_RADIAL", 2, [800.0, 500.0, 400.0, -0.05]),
+    ("OPENCV", 4, [800.0, 810.0, 500.0, 400.0, -0.05, 0.01, 0.001, -0.002]),
+    ("FULL_OPENCV", 6, [800.0, 810.0, 500.0, 400.0, -0.05, 0.01, 0.001, -0.002, 0.001, 0.01, 0.001, 0.0001]),
+]
+
+
+def _write_model(d: Path, model_name, model_id, params, noise=0.5):
+    """生成一个小型合成模型，同时写出 bin 与 txt 两种格式"""
+    rng = np.random.default_rng(0)
+    cam = Camera(1, model_name, 1000, 800, np.asarray(params))
+    xyz = rng.uniform(-5, 5, size=(50, 3))
+    tvecs = [np.array([0.3 * i, 0.0, 20.0]) for i in range(4)]
+    qvec = np.array([1.0, 0.0, 0.0, 0.0])
+
+    obs = []  # per image: list of (x, y, point_id)
+    for t in tvecs:
+        Xc = xyz + t
+        u, v = project_normalized(cam, Xc[:, 0] / Xc[:, 2], Xc[:, 1] / Xc[:, 2])
+        u = u + rng.normal(0, noise, len(u))
+        v = v + rng.normal(0, noise, len(v))
+        obs.append([(float(u[k]), float(v[k]), k + 1) for k in range(len(xyz))] + [(1.0, 1.0, -1)])
+
+    with open(d / "cameras.bin", "wb") as fp:
+        fp.write(struct.pack("<Q", 1))
+        fp.write(struct.pack("<IiQQ", 1, model_id, 1000, 800))
+        fp.write(struct.pack(f"<{len(params)}d", *params))
+    with open(d / "images.bin", "wb") as fp:
+        fp.write(struct.pack("<Q", len(tvecs)))
+        for i, (t, rows) in enumerate(zip(tvecs, obs)):
+            fp.write(struct.pack("<I4d3dI", i + 1, *qvec, *t, 1))
+            fp.write(f"img_{i}.jpg".encode() + b"\x00")
+            fp.write(struct.pack("<Q", len(rows)))
+            for x, y, pid in rows:
+                fp.write(struct.pack("<ddq", x, y, pid))
+    with open(d / "points3D.bin", "wb") as fp:
+        fp.write(struct.pack("<Q", len(xyz)))
+        for k, p in enumerate(xyz):
+            fp.write(struct.pack("<Q3d3BdQ", k + 1, *p, 128, 128, 128, 0.5, len(tvecs)))
+            for i in range(len(tvecs)):
+                fp.write(struct.pack("<ii", i + 1, k))
+
+    (d / "cameras.txt").write_text(f"# cameras\n1 {model_name} 1000 800 {' '.join(repr(p) for p in params)}\n")
+    lines = ["# images"]
+    for i, (t, rows) in enumerate(zip(tvecs, obs)):
+        lines.append(f"{i + 1} {' '.join(repr(float(q)) for q in qvec)} {' '.join(repr(float(x)) for x in t)} 1 img_{i}.jpg")
+        lines.append(" ".join(f"{x!r} {y!r} {pid}" for x, y, pid in rows))
+    (d / "images.txt").write_text("\n".join(lines) + "\n")
+    pts = ["# points"]
+    for k, p in enumerate(xyz):
+        track = " ".join(f"{i + 1} {k}" for i in range(len(tvecs)))
+        pts.append(f"{k + 1} {' '.join(repr(float(c)) for c in p)} 128 128 128 0.5 {track}")
+    (d / "points3D.txt").write_text("\n".join(pts) + "\n")
+
+
+def _scalar_project(params, model_name, X):
+    """逐点参考实现（旧版标量公式）"""
+    x, y = X[0] / X[2], X[1] / X[2]
+    r2 = x * x + y * y
+    if model_name == "SIMPLE_RADIAL":
+        f, cx, cy, k1 = params
+        return f * x * (1 + k1 * r2) + cx, f * y * (1 + k1 * r2) + cy
+    fx, fy, cx, cy, k1, k2, p1, p2 = params[:8]
+    radial = 1 + k1 * r2 + k2 * r2 * r2
+    if model_name == "FULL_OPENCV":
+        k3, k4, k5, k6 = params[8:]
+        radial = (radial + k3 * r2 ** 3) / (1 + k4 * r2 + k5 * r2 * r2 + k6 * r2 ** 3)
+    dx = 2 * p1 * x * y + p2 * (r2 + 2 * x * x)
+    dy = p1 * (r2 + 2 * y * y) + 2 * p2 * x * y
+    return fx * (x * radial + dx) + cx, fy * (y * radial + dy) + cy
+
+
+class TestReprojection:
+    """向量化投影与读取器"""
+
+    @pytest.mark.parametrize("model_name,model_id,params", MODELS)
+    def test_vectorized_matches_scalar(self, model_name, model_id, params):
+        cam = Camera(1, model_name, 1000, 800, np.asarray(params))
+        X = np.random.default_rng(1).uniform([-3, -3, 5], [3, 3, 30], size=(100, 3))
+        u, v = project_normalized(cam, X[:, 0] / X[:, 2], X[:, 1] / X[:, 2])
+        expected = np.array([_scalar_project(params, model_name, p) for p in X])
+        np.testing.assert_allclose(u, expected[:, 0], rtol=1e-12)
+        np.testing.assert_allclose(v, expected[:, 1], rtol=1e-12)
+
+    @pytest.mark.parametrize("model_name,model_id,params", MODELS)
+    def test_bin_and_txt_reports_agree(self, tmp_path, model_name, model_id, params):
+        _write_model(tmp_path, model_name, model_id, params)
+        bin_model = colmap_io.read_model(str(tmp_path), "bin")
+        txt_model = colmap_io.read_model(str(tmp_path), "txt")
+        assert bin_model.cameras[1].model == model_name
+
+        rb = compute_reprojection_report(bin_model, bins=8)
+        rt = compute_reprojection_report(txt_model, bins=8)
+        # 4 images x 50 points; the observation without a 3D point is skipped
+        assert rb["num_observations"] == rt["num_observations"] == 200
+        assert rb["mean_reprojection_error"] == pytest.approx(rt["mean_reprojection_error"])
+        # Gaussian pixel noise sigma=0.5 -> mean error ~0.63
+        assert 0.4 < rb["mean_reprojection_error"] < 0.9
+        assert sum(rb["histogram"]["counts"]) == 200
+        assert set(rb["per_image"]) == {"1", "2", "3", "4"}
+        assert rb["per_image"]["1"]["num_observations"] == 50
+        assert rb["per_point"]["num_points"] == 50
+
+    def test_camera_with_too_few_params_is_skipped(self, tmp_path):
+        _write_model(tmp_path, *MODELS[0])
+        model = colmap_io.read_model(str(tmp_path), "bin")
+        model.cameras[1] = Camera(1, "SIMPLE_RADIAL", 1000, 800, np.asarray([800.0, 500.0]))
+        report = compute_reprojection_report(model, bins=8)
+        assert report["skipped_cameras"] == [1]
+        assert report["num_observations"] == 0 and report["per_image"] == {}
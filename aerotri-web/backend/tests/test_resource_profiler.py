@@ -0,0 +1,132 @@
+"""
+阶段资源画像单元测试
+
+使用真实子进程与 FakeNVML 验证：进程树的 CPU / 内存 / GPU 归属、瓶颈分类、
+按任务保存的阶段报告以及写入统计字段（含分区合并的追加模式）。
+"""
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.resource_profiler import ProcessProfiler, ResourceProfiler, classify, summarize
+from app.services.telemetry import FakeNVML, TelemetrySampler
+
+BUSY = "import time\nend = time.time() + 0.4\nwhile time.time() < end: pass\ntime.sleep(0.2)"
+
+
+def stage_report(stage, duration, bound="cpu", **kwargs):
+    report = {
+        "stage": stage, "duration_s": duration, "cpu_user_s": duration, "cpu_system_s": 0.0,
+        "peak_rss_mb": 100.0, "read_mb": 0.0, "write_mb": 0.0, "gpu_memory_peak_mb": 0.0, "bound": bound,
+    }
+    report.update(kwargs)
+    return report
+
+
+class TestClassify:
+    """瓶颈分类"""
+
+    def test_bounds(self):
+        assert classify({"duration_s": 10, "swap_in_mb": 512, "gpu_util_avg": 90}) == "swap"
+        assert classify({"duration_s": 10, "gpu_util_avg": 80, "cpu_cores_avg": 4}) == "gpu"
+        assert classify({"duration_s": 10, "iowait_s": 5, "cpu_cores_avg": 2}) == "io"
+        assert classify({"duration_s": 10, "read_mb": 2000, "cpu_cores_avg": 0.5}) == "io"
+        assert classify({"duration_s": 10, "read_mb": 2000, "cpu_cores_avg": 6}) == "cpu"
+        assert classify({"duration_s": 10, "cpu_cores_avg": 0.1}) == "wait"
+        assert classify({}) == "wait"
+
+
+class TestProcessProfiler:
+    """真实子进程采样"""
+
+    @pytest.mark.asyncio
+    async def test_child_process(self):
+        proc = await asyncio.create_subprocess_exec(sys.executable, "-c", BUSY)
+        nvml = FakeNVML([
+            {"utilization": 80, "processes": {proc.pid: 1500}},
+            {"utilization": 5},
+        ])
+        sampler = TelemetrySampler(nvml=nvml, process_source=list)
+        # The profiler reads the sampler's ring buffer instead of querying NVML itself
+        sampler.sample_once()
+        nvml.nvmlDeviceGetComputeRunningProcesses = None
+        profiler = ProcessProfiler(
+            proc.pid, "dense", tool="DensifyPointCloud", labels={"partition_index": 2},
+            interval=0.05, gpu_source=sampler.latest_gpus,
+        ).start()
+        returncode = await asyncio.wait_for(proc.wait(), timeout=10)
+        report = await profiler.stop(returncode)
+
+        assert report["stage"] == "dense" and report["partition_index"] == 2
+        assert report["returncode"] == 0 and report["samples"] >= 2
+        assert report["cpu_user_s"] + report["cpu_system_s"] > 0.1
+        assert report["peak_rss_mb"] > 0 and report["peak_processes"] == 1
+        assert report["gpu_indices"] == [0]
+        assert report["gpu_memory_peak_mb"] == 1500
+        assert report["gpu_util_avg"] == 80
+        assert report["bound"] == "gpu"
+
+    def test_missing_process(self):
+        done = subprocess.Popen([sys.executable, "-c", "pass"])
+        done.wait()
+        profiler = ProcessProfiler(done.pid, "x", gpu_source=lambda: ([], {}))
+        assert profiler.sample() is False
+        report = profiler.report()
+        assert report["samples"] == 0 and report["gpu_util_avg"] is None and report["bound"] == "wait"
+
+
+class TestResourceProfiler:
+    """按任务的阶段报告"""
+
+    @pytest.mark.asyncio
+    async def test_run_and_attach(self):
+        profiles = ResourceProfiler(interval=0.05, gpu_source=lambda: ([], {}))
+        assert profiles.report("sfm", "blk") is None
+        assert profiles.attach({"num_images": 3}, "sfm", "blk") == {"num_images": 3}
+
+        profiles.begin_run("sfm", "blk")
+        proc = await asyncio.create_subprocess_exec(sys.executable, "-c", "import time; time.sleep(0.2)")
+        profiler = profiles.start("sfm", "blk", "mapping", proc.pid, tool="/opt/colmap/bin/colmap")
+        live = profiles.report("sfm", "blk")
+        assert live["stages"] == [] and live["running"][0]["tool"] == "colmap"
+        # While a process runs, the live report wins over a persisted one
+        assert profiles.current("sfm", "blk", {"resource_profile": {"stages": []}})["running"]
+
+        await proc.wait()
+        await profiles.finish("sfm", "blk", profiler, proc.returncode)
+        stats = profiles.attach({"num_images": 3}, "sfm", "blk")
+        profile = stats["resource_profile"]
+        assert stats["num_images"] == 3
+        assert [s["stage"] for s in profile["stages"]] == ["mapping"]
+        assert "running" not in profile and "mapping" in profile["summary"]["stages"]
+        # Nothing running any more: the persisted profile wins
+        assert profiles.current("sfm", "blk", stats) is profile
+
+        # A merge run keeps the partition stages stored before it
+        profiles.begin_run("sfm", "blk")
+        profiles._runs[("sfm", "blk")].append(stage_report("merge", 1.0))
+        merged = profiles.attach(stats, "sfm", "blk", extend=True)["resource_profile"]
+        assert [s["stage"] for s in merged["stages"]] == ["mapping", "merge"]
+        assert merged["summary"]["stages"]["merge"]["runs"] == 1
+
+    def test_summarize(self):
+        summary = summarize([
+            stage_report("mapping", 10.0, bound="cpu", peak_rss_mb=500.0, read_mb=50.0),
+            stage_report("mapping", 30.0, bound="io", peak_rss_mb=800.0, read_mb=70.0),
+            stage_report("dense", 5.0, bound="gpu", gpu_memory_peak_mb=3000.0),
+        ])
+        mapping = summary["stages"]["mapping"]
+        assert mapping["runs"] == 2 and mapping["duration_s"] == 40.0
+        assert mapping["peak_rss_mb"] == 800.0 and mapping["read_mb"] == 120.0
+        # The longest run decides the stage's bound
+        assert mapping["bound"] == "io"
+        assert summary["total"]["duration_s"] == 45.0
+        assert summary["total"]["gpu_memory_peak_mb"] == 3000.0
+        assert summarize([]) == {"stages": {}, "total": {
+            "duration_s": 0, "cpu_s": 0, "peak_rss_mb": 0.0, "gpu_memory_peak_mb": 0.0,
+        }}
@@ -0,0 +1,105 @@
+"""
+后台遥测采样单元测试
+
+使用 FakeNVML 在无 GPU 环境下验证：GPU 句柄只查询一次、任务进程树的资源归属、环形缓冲区、
+降采样以及后台采样循环。
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.telemetry import FakeNVML, TelemetrySampler, downsample
+
+
+@pytest.fixture
+def child():
+    proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    yield proc
+    proc.kill()
+    proc.wait()
+
+
+def make_sampler(nvml, tracked, **kwargs):
+    return TelemetrySampler(nvml=nvml, process_source=lambda: list(tracked), **kwargs)
+
+
+class TestTelemetrySampler:
+    """采样与归属"""
+
+    def test_gpus_and_process_attribution(self, child):
+        nvml = FakeNVML([
+            {"name": "Fake A100", "memory_total": 40960, "memory_used": 8192, "utilization": 75,
+             "processes": {child.pid: 3000}},
+            {"memory_used": 40000, "utilization": 10},
+        ])
+        tracked = [("openmvs", "blk-1", os.getpid())]
+        sampler = make_sampler(nvml, tracked, history_size=3)
+
+        sample = sampler.sample_once()
+        assert [g.name for g in sample.gpus] == ["Fake A100", "Fake GPU 1"]
+        assert sample.gpus[0].memory_free == 40960 - 8192 and sample.gpus[0].is_available
+        assert not sample.gpus[1].is_available
+
+        (proc,) = sample.processes
+        assert (proc.kind, proc.key, proc.pid) == ("openmvs", "blk-1", os.getpid())
+        # The child is part of this process's tree, so its GPU memory is attributed here
+        assert proc.num_processes >= 2 and proc.gpu_memory_mb == 3000
+        assert proc.rss_mb > 0
+
+        for _ in range(4):
+            sampler.sample_once()
+        assert len(sampler.history) == 3
+        assert nvml.handle_lookups == 2
+        assert sampler.task_history("blk-1")[0]["gpu_memory_mb"] == 3000
+        assert sampler.task_history("other") == []
+
+    def test_exited_process_and_no_gpu(self):
+        done = subprocess.Popen([sys.executable, "-c", "pass"])
+        done.wait()
+        sampler = make_sampler(FakeNVML([]), [("gs", "blk-2", done.pid)])
+        sample = sampler.sample_once()
+        assert sample.gpus == [] and sample.processes == []
+        assert sample.to_dict(include_processes=False).keys() >= {"cpu_percent", "memory_percent", "gpus"}
+
+    def test_downsample(self):
+        sampler = make_sampler(FakeNVML([{"utilization": 0}]), [])
+        nvml = sampler._nvml
+        for util in (10, 30, 50, 70, 90):
+            nvml.gpus[0]["utilization"] = util
+            sampler.sample_once()
+
+        points = downsample(sampler.window(), max_points=2)
+        assert [p["samples"] for p in points] == [3, 2]
+        assert points[0]["gpus"][0]["utilization"] == 30
+        assert points[0]["gpus"][0]["utilization_max"] == 50
+        assert points[1]["gpus"][0]["utilization"] == 80
+        assert downsample([], 10) == []
+        assert len(downsample(sampler.window(), max_points=100)) == 5
+
+    def test_latest_max_age(self):
+        sampler = make_sampler(FakeNVML([]), [])
+        assert sampler.latest() is None
+        sample = sampler.sample_once()
+        assert sampler.latest(max_age=60) is sample
+        sample.timestamp = time.time() - 120
+        assert sampler.latest(max_age=60) is None
+
+    @pytest.mark.asyncio
+    async def test_background_loop(self):
+        sampler = make_sampler(FakeNVML([{}]), [], interval=0.01)
+        await sampler.start()
+        assert sampler.running
+        for _ in range(200):
+            if len(sampler.history) >= 3:
+                break
+            await asyncio.sleep(0.01)
+        await sampler.stop()
+        assert not sampler.running
+        assert len(sampler.history) >= 3
@@ -0,0 +1,126 @@
+"""
+缩略图金字塔单元测试
+
+验证金字塔各级尺寸、按请求尺寸选级、目录状态记录以及整页精灵图拼接。
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models import Block, ThumbnailState
+from app.services import thumbnail_service
+from app.services.image_catalog import ImageCatalogService
+from app.services.thumbnail_service import (
+    PYRAMID_LEVELS,
+    ThumbnailService,
+    build_pyramid,
+    pyramid_level,
+    thumbnail_path,
+)
+
+
+@pytest.fixture
+def service(tmp_path):
+    svc = ThumbnailService(cache_dir=str(tmp_path / "thumbs"), max_workers=1)
+    yield svc
+    svc.shutdown()
+
+
+class TestPyramid:
+    """金字塔生成与选级"""
+
+    def test_levels(self, tmp_path):
+        Image.new("RGB", (2000, 1000), (10, 200, 30)).save(tmp_path / "a.jpg", "JPEG")
+        out = {level: str(tmp_path / f"a_{level}.jpg") for level in PYRAMID_LEVELS}
+        assert build_pyramid(str(tmp_path / "a.jpg"), out)
+        for level in PYRAMID_LEVELS:
+            with Image.open(out[level]) as img:
+                assert img.size == (level, level // 2)
+
+        (tmp_path / "bad.jpg").write_bytes(b"nope")
+        assert not build_pyramid(str(tmp_path / "bad.jpg"), out)
+
+    def test_level_selection(self):
+        assert pyramid_level(50) == 128
+        assert pyramid_level(200) == 256
+        assert pyramid_level(500) == 512
+
+    @pytest.mark.asyncio
+    async def test_get_thumbnail_reuses_pyramid(self, tmp_path, service):
+        Image.new("RGB", (800, 600)).save(tmp_path / "a.jpg", "JPEG")
+        path = await service.get_thumbnail("blk", str(tmp_path / "a.jpg"), 200)
+        assert path == thumbnail_path(service.cache_dir, "blk", "a.jpg", 256)
+        mtime = os.path.getmtime(path)
+        assert await service.get_thumbnail("blk", str(tmp_path / "a.jpg"), 150) == path
+        assert os.path.getmtime(path) == mtime
+
+
+class TestSprite:
+    """整页精灵图"""
+
+    @pytest.mark.asyncio
+    async def test_sprite_page(self, db, tmp_path, service):
+        image_dir = tmp_path / "images"
+        image_dir.mkdir()
+        colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255)]
+        for i, color in enumerate(colors):
+            Image.new("RGB", (300, 200), color).save(image_dir / f"{i}.jpg", "JPEG")
+        (image_dir / "3.jpg").write_bytes(b"corrupt")
+        block = Block(id="blk-sprite", name="b", image_path=str(image_dir))
+        db.add(block)
+        await db.commit()
+        await ImageCatalogService.refresh(db, block, force=True)
+
+        sprite = await service.get_sprite(db, block, offset=0, limit=10, cell=64, columns=2)
+        with Image.open(sprite) as img:
+            assert img.size == (128, 128)
+            for i, color in enumerate(colors):
+                px = img.getpixel(((i % 2) * 64 + 32, (i // 2) * 64 + 32))
+                assert all(abs(a - b) < 20 for a, b in zip(px, color))
+
+        states = {r.name: r.thumbnail_state for r in await ImageCatalogService.list_page(db, block.id, 0, 10)}
+        assert states == {
+            "0.jpg": ThumbnailState.READY,
+            "1.jpg": ThumbnailState.READY,
+            "2.jpg": ThumbnailState.READY,
+            "3.jpg": ThumbnailState.FAILED,
+        }
+        # Unchanged page: cached sheet
+        assert await service.get_sprite(db, block, offset=0, limit=10, cell=64, columns=2) == sprite
+        assert await service.get_sprite(db, block, offset=10, limit=10, cell=64, columns=2) is None
+
+        # Changed page content: new sheet and ETag, the superseded sheet is deleted
+        Image.new("RGB", (300, 200), (0, 0, 0)).save(image_dir / "4.jpg", "JPEG")
+        await ImageCatalogService.refresh(db, block, force=True)
+        changed = await service.get_sprite(db, block, offset=0, limit=10, cell=64, columns=2)
+        assert changed != sprite and not os.path.exists(sprite)
+        assert service.sprite_etag(changed) != service.sprite_etag(sprite)
+        other = await service.get_sprite(db, block, offset=0, limit=10, cell=64, columns=1)
+        assert os.path.exists(changed) and os.path.exists(other)
+
+    @pytest.mark.asyncio
+    async def test_warm_block(self, db, db_sessionmaker, tmp_path, service, monkeypatch):
+        image_dir = tmp_path / "images"
+        image_dir.mkdir()
+        for i in range(3):
+            Image.new("RGB", (300, 200)).save(image_dir / f"{i}.jpg", "JPEG")
+        (image_dir / "3.jpg").write_bytes(b"corrupt")
+        block = Block(id="blk-warm", name="b", image_path=str(image_dir))
+        db.add(block)
+        await db.commit()
+        await ImageCatalogService.refresh(db, block, force=True)
+
+        monkeypatch.setattr(thumbnail_service, "AsyncSessionLocal", db_sessionmaker)
+        service.warm_block(block.id)
+        await asyncio.gather(*service._tasks)
+
+        async with db_sessionmaker() as fresh:
+            rows = await ImageCatalogService.list_page(fresh, block.id, 0, 10)
+        assert [r.thumbnail_state for r in rows] == [ThumbnailState.READY] * 3 + [ThumbnailState.FAILED]
+        assert os.path.exists(thumbnail_path(service.cache_dir, block.id, "2.jpg", PYRAMID_LEVELS[-1]))
@@ -0,0 +1,199 @@
+"""
+去畸变影像缓存单元测试
+
+验证缓存签名、硬链接镜像、命中复用，以及 image_undistorter 退出异常但输出完整时的处理。
+"""
+import asyncio
+import os
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.undistort_cache import (
+    UndistortCache,
+    cache_sparse_dir,
+    is_complete,
+    link_dataset,
+    link_into_dense,
+    model_signature,
+)
+
+
+def make_model(tmp_path):
+    images = tmp_path / "images"
+    sparse = tmp_path / "sparse" / "0"
+    images.mkdir()
+    sparse.mkdir(parents=True)
+    (images / "a.jpg").write_bytes(b"jpg")
+    for name in ("cameras.bin", "images.bin", "points3D.bin"):
+        (sparse / name).write_bytes(b"model")
+    return str(images), str(sparse)
+
+
+class FakeUndistorter:
+    """Writes image_undistorter output into --output_path."""
+
+    def __init__(self, exit_error=False, write=True):
+        self.exit_error = exit_error
+        self.write = write
+        self.calls = []
+
+    async def run(self, cmd):
+        self.calls.append(cmd)
+        out = Path(cmd[cmd.index("--output_path") + 1])
+        if self.write:
+            (out / "images").mkdir(parents=True)
+            (out / "images" / "a.jpg").write_bytes(b"undistorted")
+            (out / "sparse").mkdir()
+            (out / "sparse" / "cameras.bin").write_bytes(b"pinhole")
+        await asyncio.sleep(0)
+        if self.exit_error:
+            raise RuntimeError("exit code -11")
+
+
+class TestSignature:
+    """缓存签名"""
+
+    def test_changes_with_model_and_size(self, tmp_path):
+        images, sparse = make_model(tmp_path)
+        sig = model_signature(sparse, images)
+        assert model_signature(sparse, images) == sig
+        assert model_signature(sparse, images, 3200) != sig
+
+        (Path(sparse) / "images.bin").write_bytes(b"re-run SfM")
+        assert model_signature(sparse, images) != sig
+
+
+class TestUndistortCache:
+    """缓存生成与复用"""
+
+    @pytest.mark.asyncio
+    async def test_build_then_reuse(self, tmp_path):
+        images, sparse = make_model(tmp_path)
+        cache = UndistortCache()
+        fake = FakeUndistorter()
+
+        cache_dir = await cache.ensure(str(tmp_path / "cache"), images, sparse, fake.run, colmap_path="colmap")
+        assert is_complete(cache_dir)
+        assert cache_sparse_dir(cache_dir) == os.path.join(cache_dir, "sparse")
+        assert "--max_image_size" not in fake.calls[0]
+        assert not os.path.exists(cache_dir + ".partial")
+
+        # Concurrent consumers of the same model share one run
+        results = await asyncio.gather(
+            cache.ensure(str(tmp_path / "cache"), images, sparse, fake.run, colmap_path="colmap"),
+            cache.ensure(str(tmp_path / "cache"), images, sparse, fake.run, colmap_path="colmap"),
+        )
+        assert results == [cache_dir, cache_dir]
+        assert len(fake.calls) == 1
+
+        await cache.ensure(str(tmp_path / "cache"), images, sparse, fake.run, max_image_size=3200, colmap_path="colmap")
+        assert fake.calls[-1][-2:] == ["--max_image_size", "3200"]
+
+    @pytest.mark.asyncio
+    async def test_exit_error(self, tmp_path):
+        images, sparse = make_model(tmp_path)
+        cache = UndistortCache()
+
+        # Crash on exit after writing everything: accepted
+        cache_dir = await cache.ensure(
+            str(tmp_path / "cache"), images, sparse, FakeUndistorter(exit_error=True).run, colmap_path="colmap"
+        )
+        assert is_complete(cache_dir)
+
+        # Crash without output: propagated, nothing cached
+        with pytest.raises(RuntimeError):
+            await cache.ensure(
+                str(tmp_path / "other"), images, sparse,
+                FakeUndistorter(exit_error=True, write=False).run, colmap_path="colmap",
+            )
+        assert not any(is_complete(str(p)) for p in (tmp_path / "other").iterdir())
+
+    @pytest.mark.asyncio
+    async def test_cancelled(self, tmp_path):
+        images, sparse = make_model(tmp_path)
+        cache_dir = await UndistortCache().ensure(
+            str(tmp_path / "cache"), images, sparse, FakeUndistorter(write=False).run,
+            colmap_path="colmap", is_cancelled=lambda: True,
+        )
+        assert cache_dir is None
+
+    @pytest.mark.asyncio
+    async def test_link_into_dense(self, tmp_path):
+        images, sparse = make_model(tmp_path)
+        cache_dir = await UndistortCache().ensure(
+            str(tmp_path / "cache"), images, sparse, FakeUndistorter().run, colmap_path="colmap"
+        )
+        dense = tmp_path / "dense"
+        assert link_into_dense(cache_dir, str(dense)) == 1
+        assert (dense / "images" / "a.jpg").read_bytes() == b"undistorted"
+        # The sparse model is copied: rewriting it in place must not touch the cache
+        cached = os.path.join(cache_dir, "sparse", "cameras.bin")
+        assert not os.path.samefile(dense / "sparse" / "cameras.bin", cached)
+        (dense / "sparse" / "cameras.bin").write_bytes(b"rewritten")
+        assert Path(cached).read_bytes() == b"pinhole"
+        # Already linked files are left alone
+        assert link_into_dense(cache_dir, str(dense)) == 0
+
+    @pytest.mark.asyncio
+    async def test_evict_superseded(self, tmp_path):
+        images, sparse = make_model(tmp_path)
+        cache = UndistortCache()
+        fake = FakeUndistorter()
+        root = str(tmp_path / "cache")
+        old = await cache.ensure(root, images, sparse, fake.run, colmap_path="colmap")
+        other_size = await cache.ensure(root, images, sparse, fake.run, max_image_size=3200, colmap_path="colmap")
+
+        # SfM re-run: the new model's entry replaces the old one of the same size
+        (Path(sparse) / "images.bin").write_bytes(b"re-run SfM")
+        new = await cache.ensure(root, images, sparse, fake.run, colmap_path="colmap")
+        assert new != old and is_complete(new)
+        assert not os.path.exists(old) and is_complete(other_size)
+
+    @pytest.mark.asyncio
+    async def test_linked_entry_is_kept(self, tmp_path):
+        """仍被 3DGS 数据集软链接引用的旧条目不删除，重新链接后再回收"""
+        images, sparse = make_model(tmp_path)
+        cache = UndistortCache()
+        fake = FakeUndistorter()
+        root = str(tmp_path / "cache")
+        dataset = tmp_path / "dataset"
+        old = await cache.ensure(root, images, sparse, fake.run, colmap_path="colmap")
+        link_dataset(old, str(dataset))
+
+        (Path(sparse) / "images.bin").write_bytes(b"re-run SfM")
+        new = await cache.ensure(root, images, sparse, fake.run, colmap_path="colmap")
+        assert is_complete(old)
+        assert (dataset / "images" / "a.jpg").read_bytes() == b"undistorted"
+
+        link_dataset(new, str(dataset))
+        assert await cache.ensure(root, images, sparse, fake.run, colmap_path="colmap") == new
+        assert not os.path.exists(old)
+        assert os.path.realpath(dataset / "sparse" / "0") == os.path.realpath(cache_sparse_dir(new))
+
+
+class TestRunSubprocess:
+    """内置子进程运行器"""
+
+    @pytest.mark.asyncio
+    async def test_track(self):
+        events = []
+
+        @asynccontextmanager
+        async def track(proc):
+            events.append(("start", proc.pid))
+            yield
+            events.append(("exit", proc.returncode))
+
+        lines = []
+        await UndistortCache.run_subprocess(
+            [sys.executable, "-c", "print('hello')"], log=lines.append, track=track
+        )
+        assert [e[0] for e in events] == ["start", "exit"] and events[1][1] == 0
+        assert lines[-1] == "hello"
+        with pytest.raises(RuntimeError):
+            await UndistortCache.run_subprocess([sys.executable, "-c", "raise SystemExit(3)"])
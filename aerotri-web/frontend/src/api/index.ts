@@ -16,6 +16,9 @@ import type {
   ReconQualityPreset,
   ReconPresetsResponse,
   ReconParamsSchemaResponse,
+  LogTailResponse,
+  QualityQuery,
+  QualityMetricResponse,
 } from '@/types'
 
 const apiBase =
@@ -61,6 +64,10 @@ export const imageApi = {
   
   getThumbnailUrl: (blockId: string, imageName: string, size = 200) =>
     `/api/blocks/${blockId}/images/${encodeURIComponent(imageName)}/thumbnail?size=${size}`,
+
+  // One sprite sheet per list page; tile i at column i % columns, row floor(i / columns)
+  getSpriteUrl: (blockId: string, page: number, pageSize: number, cell = 128, columns = 10, version = 0) =>
+    `/api/blocks/${blockId}/images/sprite?page=${page}&page_size=${pageSize}&cell=${cell}&columns=${columns}&v=${version}`,
   
   getImageUrl: (blockId: string, imageName: string) =>
     `/api/blocks/${blockId}/images/${encodeURIComponent(imageName)}`,
@@ -143,6 +150,13 @@ export const resultApi = {
   getStats: (blockId: string) =>
     api.get<BlockStatistics>(`/blocks/${blockId}/result/stats`),
   
+  // First call per model may take a while (metrics are computed, then cached server-side)
+  getQuality: (blockId: string, query: QualityQuery) =>
+    api.get<QualityMetricResponse>(`/blocks/${blockId}/result/quality`, {
+      params: query,
+      timeout: 0,
+    }),
+  
   downloadPoints3DPly: (blockId: string) =>
     api.get(`/blocks/${blockId}/result/points3d/ply`, {
       responseType: 'blob',
@@ -190,11 +204,11 @@ export const reconstructionApi = {
   cancel: (blockId: string) =>
     api.post(`/blocks/${blockId}/reconstruction/cancel`, {}),
 
-  logTail: (blockId: string, lines = 200) =>
-    api.get<{ block_id: string; lines: string[] }>(
+  logTail: (blockId: string, lines = 200, sinceOffset?: number) =>
+    api.get<LogTailResponse & { block_id: string }>(
       `/blocks/${blockId}/reconstruction/log_tail`,
       {
-        params: { lines },
+        params: { lines, since_offset: sinceOffset },
       },
     ),
 }
@@ -239,10 +253,10 @@ export const reconVersionApi = {
     api.get<ReconVersionFilesResponse>(`/blocks/${blockId}/recon-versions/${versionId}/files`),
 
   // Get log tail for a version
-  logTail: (blockId: string, versionId: string, lines = 200) =>
-    api.get<{ version_id: string; lines: string[] }>(
+  logTail: (blockId: string, versionId: string, lines = 200, sinceOffset?: number) =>
+    api.get<LogTailResponse & { version_id: string }>(
       `/blocks/${blockId}/recon-versions/${versionId}/log_tail`,
-      { params: { lines } }
+      { params: { lines, since_offset: sinceOffset } }
     ),
 
   // Get download URL for a version file
@@ -282,9 +296,9 @@ export const gsApi = {
 
   files: (blockId: string) => api.get<{ files: GSFileInfo[] }>(`/blocks/${blockId}/gs/files`),
 
-  logTail: (blockId: string, lines = 200) =>
-    api.get<{ block_id: string; lines: string[] }>(`/blocks/${blockId}/gs/log_tail`, {
-      params: { lines },
+  logTail: (blockId: string, lines = 200, sinceOffset?: number) =>
+    api.get<LogTailResponse & { block_id: string }>(`/blocks/${blockId}/gs/log_tail`, {
+      params: { lines, since_offset: sinceOffset },
     }),
 }
 
@@ -342,9 +356,9 @@ export const gsTilesApi = {
   tilesetUrl: (blockId: string) =>
     api.get<{ tileset_url: string }>(`/blocks/${blockId}/gs/tiles/tileset_url`),
   
-  logTail: (blockId: string, lines = 200) =>
-    api.get<{ block_id: string; lines: string[] }>(`/blocks/${blockId}/gs/tiles/log_tail`, {
-      params: { lines },
+  logTail: (blockId: string, lines = 200, sinceOffset?: number) =>
+    api.get<LogTailResponse & { block_id: string }>(`/blocks/${blockId}/gs/tiles/log_tail`, {
+      params: { lines, since_offset: sinceOffset },
     }),
 }
 
@@ -374,9 +388,9 @@ export const tilesApi = {
   files: (blockId: string) =>
     api.get<{ files: TilesFileInfo[] }>(`/blocks/${blockId}/tiles/files`),
 
-  logTail: (blockId: string, lines = 200) =>
-    api.get<{ block_id: string; lines: string[] }>(`/blocks/${blockId}/tiles/log_tail`, {
-      params: { lines },
+  logTail: (blockId: string, lines = 200, sinceOffset?: number) =>
+    api.get<LogTailResponse & { block_id: string }>(`/blocks/${blockId}/tiles/log_tail`, {
+      params: { lines, since_offset: sinceOffset },
     }),
 
   tilesetUrl: (blockId: string) =>
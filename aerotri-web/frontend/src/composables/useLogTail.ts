@@ -0,0 +1,58 @@
+import { ref } from 'vue'
+import type { AxiosResponse } from 'axios'
+import type { LogTailResponse } from '@/types'
+
+type LogTailFetcher = (
+  lines: number,
+  sinceOffset?: number,
+) => Promise<AxiosResponse<LogTailResponse>>
+
+/**
+ * Follow a log_tail endpoint: the first call fetches the tail, later calls
+ * pass the returned offset back and only append the new lines.
+ */
+export function useLogTail(fetcher: LogTailFetcher, maxLines = 200) {
+  const lines = ref<string[]>([])
+  let offset: number | undefined
+  let pending: Promise<void> | null = null
+  let generation = 0
+
+  async function poll() {
+    const gen = generation
+    const res = await fetcher(maxLines, offset)
+    if (gen !== generation) return
+    const chunk = res.data
+    const incoming = chunk.lines || []
+    if (offset === undefined || chunk.reset) {
+      lines.value = incoming
+    } else if (incoming.length) {
+      lines.value = lines.value.concat(incoming).slice(-maxLines)
+    }
+    offset = chunk.offset ?? undefined
+  }
+
+  // Overlapping polls would append the same lines twice: share the one in flight
+  function fetchLog() {
+    if (!pending) {
+      const current: Promise<void> = poll().finally(() => {
+        if (pending === current) pending = null
+      })
+      pending = current
+    }
+    return pending
+  }
+
+  // Forget the offset, e.g. when switching to another block
+  function reset() {
+    generation++
+    pending = null
+    offset = undefined
+    lines.value = []
+  }
+
+  return {
+    lines,
+    fetchLog,
+    reset,
+  }
+}
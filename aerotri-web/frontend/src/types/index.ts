@@ -212,6 +212,42 @@ export interface BlockStatistics {
   algorithm_params?: Record<string, unknown>
 }
 
+// Quality analytics (GET /result/quality)
+export type QualityMetric =
+  | 'track_length'
+  | 'triangulation_angle'
+  | 'reprojection_error'
+  | 'obs_per_image'
+  | 'image_reprojection_error'
+  | 'residual_heatmap'
+
+export interface QualityQuery {
+  metric: QualityMetric
+  bins?: number
+  offset?: number
+  limit?: number
+  order?: 'asc' | 'desc'
+  grid?: number
+  image_id?: number
+}
+
+export interface QualityMetricResponse {
+  metric: QualityMetric
+  image_id?: number | null
+  stats?: Record<string, number> | null
+  histogram?: { edges: number[], counts: number[] } | null
+  total: number
+  offset: number
+  items: { id: number, value: number, name?: string | null }[]
+  heatmap?: {
+    grid: number
+    num_observations: number
+    counts: number[][]
+    // Row-major [y][x], null for cells without observations
+    mean_error: (number | null)[][]
+  } | null
+}
+
 // Reconstruction types
 export interface ReconFileInfo {
   stage: 'dense' | 'mesh' | 'refine' | 'texture'
@@ -235,6 +271,9 @@ export interface DensifyParams {
   resolution_level?: number
   number_views?: number
   number_views_fuse?: number
+  sub_scene_memory_gb?: number
+  max_parallel?: number
+  gpu_indices?: number[]
 }
 
 export interface MeshParams {
@@ -398,6 +437,11 @@ export interface ImageInfo {
   width?: number
   height?: number
   thumbnail_url?: string
+  gps_lat?: number | null
+  gps_lon?: number | null
+  gps_alt?: number | null
+  captured_at?: string | null
+  camera_model?: string | null
 }
 
 export interface ImageListResponse {
@@ -453,6 +497,13 @@ export interface TaskStatus {
   log_tail: string[] | null
 }
 
+// Log tail response; pass `offset` back as `since_offset` to only fetch new lines
+export interface LogTailResponse {
+  lines: string[]
+  offset?: number | null
+  reset?: boolean
+}
+
 // Result types
 export interface CameraInfo {
   image_id: number
@@ -486,10 +537,16 @@ export interface Point3D {
 
 // Progress WebSocket message
 export interface ProgressMessage {
-  pipeline?: 'sfm' | 'reconstruction'
+  pipeline?: 'sfm' | 'reconstruction' | 'gs' | 'tiles' | 'gs_tiles'
   stage: string
   progress: number
   message: string
+  status?: string
+  partition_index?: number
+  /** Server timestamp (seconds) */
+  ts?: number
+  /** True when replayed from the latest snapshot on (re)connect */
+  snapshot?: boolean
 }
 
 // Real-time visualization types
@@ -9,7 +9,7 @@ Install:
   pip install opencv-python-headless onnxruntime numpy tqdm argparse pathlib
 
 Example usage:
-  python3 ImageSegmentation.py -i images -o masks
+  python3 ImageSegmentation.py -i images -o masks [--batch-size 4] [--workers 4]
 
 In order to use the segmentation masks to segment the dense point-cloud, add these extra params:
   DensifyPointCloud scene.mvs <other-optional-params> -m masks --estimate-segmentation 2 -v 3
@@ -23,45 +23,39 @@ import json
 import numpy as np
 import os
 import onnxruntime as ort
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
 from tqdm import tqdm
 
+# network input size (width, height)
+INPUT_SIZE = (1024, 576)
+# pytorch normalization, in the channel order of the loaded image
+MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+def preprocessImage(image):
+  # image dims have to be 1024,576
+  resized = cv2.resize(image, INPUT_SIZE, interpolation=cv2.INTER_LINEAR)
+  # need to be floating point, normalized as in pytorch
+  normalized = (resized.astype(np.float32) * (1.0 / 255.0) - MEAN) / STD
+  # final dims should be 3,576,1024
+  return np.ascontiguousarray(normalized.transpose(2, 0, 1))
+
 def loadImage(image_name):
   image = cv2.imread(image_name, cv2.IMREAD_UNCHANGED)
   height,width = image.shape[:2]
-
-  # image dims have to be 1024,576
-  my_image_test = cv2.resize(image, (1024,576), interpolation=cv2.INTER_LINEAR)
-  # need to be floating point
-  my_image_test = my_image_test.astype('float32')
-  my_image_test /= 255.0
-  # apply the normalization from pytorch
-  mean=[0.485, 0.456, 0.406]
-  std=[0.229, 0.224, 0.225]
-
-  my_image_test[..., 0] -= mean[0]
-  my_image_test[..., 1] -= mean[1]
-  my_image_test[..., 2] -= mean[2]
-
-  my_image_test[..., 0] /= std[0]
-  my_image_test[..., 1] /= std[1]
-  my_image_test[..., 2] /= std[2]
-  my_image_test = my_image_test.transpose(2, 0, 1)
-  my_image_test = np.expand_dims(my_image_test, axis=0)
   # final dims should be 1,3,576,1024
-  return my_image_test,height,width
+  return np.expand_dims(preprocessImage(image), axis=0),height,width
 
 def extractSegmentedImage(outputs, original_height, original_width, sigmoid_threshold = 0.8):
-  output_masks = outputs[0].transpose(1, 2, 0)
+  output_masks = (outputs[0] > sigmoid_threshold).astype(np.uint8)
   segmented_image = np.zeros((original_height, original_width),dtype=np.uint8)
-  for ch in range(output_masks.shape[-1]):
-    seg_mask = output_masks[:,:,ch]
-    seg_mask[seg_mask<sigmoid_threshold] = 0
-    seg_mask[seg_mask>sigmoid_threshold] = 1
-    seg_mask = seg_mask.astype(np.uint8)
-    seg_mask = cv2.resize(seg_mask, (original_width,original_height), interpolation= cv2.INTER_LINEAR)
-    indxs = np.where(seg_mask>0)
-    segmented_image[indxs] = ch+1
+  for ch in range(output_masks.shape[0]):
+    seg_mask = cv2.resize(output_masks[ch], (original_width,original_height), interpolation= cv2.INTER_LINEAR)
+    segmented_image[seg_mask>0] = ch+1
   return segmented_image
 
 def createPxielLabels():
@@ -78,7 +72,28 @@ def createPxielLabels():
   }
   return label_json
 
-def segmentImages(images_path, output_path, onnx_file, labels_file, sigmoid_threshold=0.8):
+def createSession(onnx_file, intra_op_threads=0, inter_op_threads=0):
+  # one inference at a time: parallelize inside the operators
+  options = ort.SessionOptions()
+  options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+  options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+  options.intra_op_num_threads = intra_op_threads if intra_op_threads > 0 else (os.cpu_count() or 1)
+  options.inter_op_num_threads = inter_op_threads if inter_op_threads > 0 else 1
+  return ort.InferenceSession(onnx_file, sess_options=options)
+
+def readImage(input_image):
+  # decode and preprocess one image (runs in the loader threads)
+  image = cv2.imread(input_image, cv2.IMREAD_UNCHANGED)
+  if image is None:
+    return None
+  return preprocessImage(image), image.shape[0], image.shape[1]
+
+def writeMask(output, output_image, h, w, sigmoid_threshold):
+  # process the output to classified pixels and save it (runs in the writer threads)
+  cv2.imwrite(output_image, extractSegmentedImage(output, h, w, sigmoid_threshold=sigmoid_threshold))
+
+def segmentImages(images_path, output_path, onnx_file, labels_file, sigmoid_threshold=0.8,
+                  batch_size=4, workers=4, intra_op_threads=0, inter_op_threads=0):
   # check if the onnx network exists
   if(not os.path.exists(onnx_file)):
     # download the onnx network
@@ -90,7 +105,13 @@ def segmentImages(images_path, output_path, onnx_file, labels_file, sigmoid_thre
     urllib.request.urlretrieve(url, onnx_file)
 
   # load the onnx network
-  ort_session = ort.InferenceSession(onnx_file)
+  ort_session = createSession(onnx_file, intra_op_threads, inter_op_threads)
+  # a network exported with a fixed batch dimension can only take its own batch size
+  fixed_batch = ort_session.get_inputs()[0].shape[0]
+  if isinstance(fixed_batch, int) and fixed_batch > 0 and fixed_batch != batch_size:
+    print(f"Network has a fixed batch size of {fixed_batch}, using it instead of {batch_size}")
+    batch_size = fixed_batch
+  batch_size = max(1, batch_size)
 
   # get the image locations
   all_images = os.listdir(images_path)
@@ -98,27 +119,61 @@ def segmentImages(images_path, output_path, onnx_file, labels_file, sigmoid_thre
   # create the output folder if it doesn't exist
   Path(output_path).mkdir(parents=True, exist_ok=True)
 
-  # segment each image
-  print("Starting segmentation ...")
-  for image in tqdm(all_images):
+  # select the images still to segment
+  jobs = []
+  for image in all_images:
     input_image = os.path.join(images_path, image)
     output_image = os.path.join(output_path, os.path.splitext(image)[0] + '.mask.png')
-    
     if(not os.path.exists(input_image)):
       print(input_image," doesn't exist")
       continue
     if(os.path.exists(output_image)):
       print(output_image," already exists")
       continue
+    jobs.append((input_image, output_image))
 
-    # format the image to the correct dimensions
-    preprocessed_image,h,w = loadImage(input_image)
-    # run the inference
-    outputs = ort_session.run(["sigmoid"], {'image': preprocessed_image})[0]
-    # process the output to classified pixels
-    classified_image = extractSegmentedImage(outputs, h, w, sigmoid_threshold=sigmoid_threshold)
-    # save the segmented image
-    cv2.imwrite(output_image, classified_image)
+  # segment the images in batches: images are decoded ahead by the loader threads,
+  # masks are resized and written by the writer threads while the next batch runs
+  print("Starting segmentation ...")
+  start_time = time.time()
+  segmented = 0
+  with ThreadPoolExecutor(max_workers=max(1, workers)) as loader, \
+       ThreadPoolExecutor(max_workers=max(1, workers)) as writer:
+    job_iter = iter(jobs)
+    loading = deque((job, loader.submit(readImage, job[0])) for job in islice(job_iter, 2 * batch_size))
+    writing = deque()
+    progress = tqdm(total=len(jobs))
+    while loading:
+      batch = []
+      while loading and len(batch) < batch_size:
+        (input_image, output_image), future = loading.popleft()
+        loading.extend((job, loader.submit(readImage, job[0])) for job in islice(job_iter, 1))
+        result = future.result()
+        if result is None:
+          print(input_image," can't be read")
+          progress.update(1)
+          continue
+        batch.append((output_image,) + result)
+      if not batch:
+        continue
+      # run the inference on the stacked batch
+      inputs = np.stack([tensor for _, tensor, _, _ in batch])
+      if len(batch) < batch_size and isinstance(fixed_batch, int) and fixed_batch > 0:
+        # pad the last batch of a fixed-batch network
+        inputs = np.concatenate([inputs, np.zeros((batch_size - len(batch),) + inputs.shape[1:], dtype=inputs.dtype)])
+      outputs = ort_session.run(["sigmoid"], {'image': inputs})[0]
+      for i, (output_image, _, h, w) in enumerate(batch):
+        writing.append(writer.submit(writeMask, outputs[i:i + 1], output_image, h, w, sigmoid_threshold))
+      # bound the masks waiting to be written
+      while len(writing) > 2 * batch_size:
+        writing.popleft().result()
+      segmented += len(batch)
+      progress.update(len(batch))
+      progress.set_postfix(images_per_sec="%.2f" % (segmented / max(time.time() - start_time, 1e-9)))
+    for future in writing:
+      future.result()
+    progress.close()
+  elapsed = time.time() - start_time
 
   # save a json file with the pixel value to label relationship
   if labels_file is not None:
@@ -128,6 +183,7 @@ def segmentImages(images_path, output_path, onnx_file, labels_file, sigmoid_thre
       json.dump(createPxielLabels(), outfile)
 
   ort_session = None
+  print(f"Segmented {segmented} images in {elapsed:.1f}s ({segmented / max(elapsed, 1e-9):.2f} images/sec)")
   print("... segmentation completed!")
   
 if __name__=="__main__":
@@ -137,6 +193,11 @@ if __name__=="__main__":
   parser.add_argument("-n", "--onnx", default='aerial_segmentation.onnx', help = "onnx network to use")
   parser.add_argument("-l", "--labels", default='labels.json', help = "export label names to json file")
   parser.add_argument("-s", "--sigmoid", default=0.8, help = "sigmoid threshold")
+  parser.add_argument("-b", "--batch-size", type=int, default=4, help = "number of images per inference batch")
+  parser.add_argument("-w", "--workers", type=int, default=4, help = "number of image loader/writer threads")
+  parser.add_argument("--intra-op-threads", type=int, default=0, help = "onnxruntime intra-op threads (0 = all cores)")
+  parser.add_argument("--inter-op-threads", type=int, default=0, help = "onnxruntime inter-op threads (0 = 1)")
   args = parser.parse_args()
 
-  segmentImages(args.images, args.output, args.onnx, args.labels, float(args.sigmoid))
+  segmentImages(args.images, args.output, args.onnx, args.labels, float(args.sigmoid),
+                args.batch_size, args.workers, args.intra_op_threads, args.inter_op_threads)
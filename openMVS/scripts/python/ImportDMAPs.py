@@ -5,14 +5,15 @@ Import depth-maps corresponding to the given scene images, stored as plain EXR d
 Each scene image should have a corresponding depth-map with the same name, but with a '.depth.exr' extension.
 
 Install:
-  pip install opencv-python-headless numpy tqdm argparse Imath OpenEXR scikit-learn
+  pip install opencv-python-headless numpy tqdm argparse Imath OpenEXR
 
 Example usage:
-  python3 ImportDMAPs.py [-h] --scene MVS_SCENE_FILE --input DEPTH_DIR [--ext EXT] [--output OUTPUT_DIR]
+  python3 ImportDMAPs.py [-h] --scene MVS_SCENE_FILE --input DEPTH_DIR [--ext EXT] [--output OUTPUT_DIR] [--workers N]
 """
 
 from argparse import ArgumentParser
-from MvsUtils import loadMVSInterface, scale_K, sample_depth_map, saveDMAP
+from concurrent.futures import ProcessPoolExecutor
+from MvsUtils import loadMVSScene, scale_K, sample_depth_map_batch, saveDMAP
 from tqdm import tqdm
 import numpy as np
 import os
@@ -63,132 +64,221 @@ def load_depth_exr(exr_path):
     return None
 
 
-def scale_depth_map(scene, image_idx, depth_map, verbose=False):
+def build_image_observations(scene):
+  """
+  Index the scene sparse point cloud by image, once for all images.
+  Args:
+    scene (dict): The MVS scene data, as loaded by loadMVSScene (vertices section).
+  Returns:
+    tuple: (points, offsets, vertex_ids) where points is the (N x 3) vertex array and
+      vertex_ids[offsets[i]:offsets[i+1]] are the vertices seen by image i (CSR layout,
+      each vertex listed at most once per image).
+  """
+  num_images = len(scene["images"])
+  points = scene["vertices"].astype(np.float64)
+  num_vertices = max(len(points), 1)
+  image_ids = scene["vertices_views_image_id"].astype(np.int64)
+  vertex_of_view = np.repeat(np.arange(len(points), dtype=np.int64), np.diff(scene["vertices_views_offsets"]))
+  keep = image_ids < num_images
+  # Sort by (image, vertex) and drop duplicated views of the same vertex in one image
+  keys = np.unique(image_ids[keep] * num_vertices + vertex_of_view[keep])
+  vertex_ids = keys % num_vertices
+  offsets = np.zeros(num_images + 1, dtype=np.int64)
+  np.cumsum(np.bincount(keys // num_vertices, minlength=num_images), out=offsets[1:])
+  return points, offsets, vertex_ids
+
+
+def ransac_scale_shift(x, y, threshold, max_trials=1000, stop_probability=0.99999, rng=None):
   """
-  Estimate the scale and shift of the depth map based on the scene sparse point cloud,
-  ussing RANSAC to find the best fit:
+  RANSAC fit of y = scale * x + shift (scale > 0) from minimal 2-point samples,
+  evaluating hypotheses in vectorized batches and stopping once enough trials were
+  drawn for the best inlier ratio found so far.
+  Args:
+    x (numpy.ndarray): The depth-map depths (N,).
+    y (numpy.ndarray): The SfM depths (N,).
+    threshold (float): The inlier residual threshold.
+    max_trials (int): The maximum number of sampled hypotheses.
+    stop_probability (float): The confidence of having drawn an all-inlier sample.
+    rng (numpy.random.Generator): The random generator.
+  Returns:
+    tuple: Scale, shift and the inlier mask; None if no valid hypothesis was found.
+  """
+  rng = rng if rng is not None else np.random.default_rng(0)
+  n = len(x)
+  batch = int(min(64, max(1, 4_000_000 // n)))
+  best = None  # (num_inliers, -error, scale, shift)
+  trials = 0
+  required_trials = max_trials
+  while trials < min(max_trials, required_trials):
+    size = min(batch, max_trials - trials)
+    trials += size
+    i = rng.integers(0, n, size)
+    j = rng.integers(0, n - 1, size)
+    j += j >= i
+    dx = x[j] - x[i]
+    with np.errstate(divide="ignore", invalid="ignore"):
+      scales = (y[j] - y[i]) / dx
+    valid = (dx != 0) & np.isfinite(scales) & (scales > 0)
+    if not np.any(valid):
+      continue
+    scales = scales[valid]
+    shifts = y[i[valid]] - scales * x[i[valid]]
+
+    # Score hypotheses: most inliers first, then lowest mean inlier residual
+    residuals = np.abs(scales[:, None] * x[None, :] + shifts[:, None] - y[None, :])
+    inliers = residuals <= threshold
+    num_inliers = inliers.sum(axis=1)
+    errors = np.where(inliers, residuals, 0.0).sum(axis=1) / np.maximum(num_inliers, 1)
+    k = np.lexsort((errors, -num_inliers))[0]
+    candidate = (int(num_inliers[k]), -float(errors[k]), float(scales[k]), float(shifts[k]))
+    if best is None or candidate[:2] > best[:2]:
+      best = candidate
+      inlier_ratio = best[0] / n
+      if inlier_ratio >= 1.0:
+        break
+      if inlier_ratio > 0:
+        required_trials = np.log(1.0 - stop_probability) / np.log(1.0 - inlier_ratio ** 2)
+  if best is None:
+    return None
+  scale, shift = best[2], best[3]
+  return scale, shift, np.abs(scale * x + shift - y) <= threshold
+
+
+def refine_scale_shift_huber(x, y, scale, shift, delta, iterations=10):
+  """
+  Refine scale and shift with a Huber robust loss (iteratively reweighted least squares).
+  Returns:
+    tuple: The refined scale and shift; the input values if the refinement degenerates.
+  """
+  A = np.stack([x, np.ones_like(x)], axis=1)
+  params = np.array([scale, shift], dtype=np.float64)
+  for _ in range(iterations):
+    residuals = np.abs(A @ params - y)
+    weights = np.where(residuals <= delta, 1.0, delta / np.maximum(residuals, 1e-12))
+    Aw = A * weights[:, None]
+    try:
+      new_params = np.linalg.solve(A.T @ Aw, Aw.T @ y)
+    except np.linalg.LinAlgError:
+      break
+    converged = np.allclose(new_params, params, rtol=1e-9, atol=1e-12)
+    params = new_params
+    if converged:
+      break
+  if not np.all(np.isfinite(params)) or params[0] <= 0:
+    return scale, shift
+  return float(params[0]), float(params[1])
+
+
+def fit_depth_scale(points, K, R, C, image_size, depth_map, verbose=False, seed=0):
+  """
+  Estimate the scale and shift of the depth map based on the 3D points seen by the image,
+  using RANSAC to find the best fit followed by a Huber refinement:
     depth_map_scaled = scale * depth_map + shift
   Args:
-    scene (dict): The MVS scene data.
-    image_idx (int): The index of the image in the scene.
+    points (numpy.ndarray): The 3D points observed by the image (N x 3).
+    K, R, C: The camera intrinsics, rotation and center.
+    image_size (tuple): The (width, height) of the image K refers to.
     depth_map (numpy.ndarray): The depth map to be scaled corresponding to the image.
     verbose (bool): If True, print debug information.
+    seed (int): Seed of the RANSAC sampling.
   Returns:
     tuple: Scale and shift values.
   """
-  from sklearn.linear_model import RANSACRegressor
+  K = scale_K(np.asarray(K, dtype=np.float64), depth_map.shape[1] / image_size[0], depth_map.shape[0] / image_size[1])
+  R = np.asarray(R, dtype=np.float64)
+  C = np.asarray(C, dtype=np.float64)
 
-  # Collect 3D points and corresponding depth values
-  image = scene["images"][image_idx]
-  image_width  = scene["platforms"][image["platform_id"]]["cameras"][image["camera_id"]]["width"]
-  image_height = scene["platforms"][image["platform_id"]]["cameras"][image["camera_id"]]["height"]
-  K = np.array(scene["platforms"][image["platform_id"]]["cameras"][image["camera_id"]]["K"])
-  R = np.array(scene["platforms"][image["platform_id"]]["poses"][image["pose_id"]]["R"])
-  C = np.array(scene["platforms"][image["platform_id"]]["poses"][image["pose_id"]]["C"])
-  K = scale_K(K, depth_map.shape[1] / image_width, depth_map.shape[0] / image_height)
-  depths_sfm = []
-  depths_dmap = []
-  mean_depth = 0
-  for vertex in scene['vertices']:
-    for view in vertex['views']:
-      if view['image_id'] == image_idx:
-        # Project the 3D point to the image plane
-        # and get the corresponding depth value
-        Xcam = R @ (vertex['X'] - C)
-        depth_sfm = float(Xcam[2])
-        if depth_sfm <= 0:
-          break
-        x = K @ Xcam
-        x = np.array([x[0]/x[2], x[1]/x[2]])
-        depth_dmap = sample_depth_map(depth_map, x)
-        if depth_dmap <= 0:
-          break
-        depths_sfm.append(depth_sfm)
-        depths_dmap.append(depth_dmap)
-        mean_depth += depth_sfm
-        break
+  # Project all points at once and sample the depth map at their projections
+  Xcam = (np.asarray(points, dtype=np.float64).reshape(-1, 3) - C) @ R.T
+  Xcam = Xcam[Xcam[:, 2] > 0]
+  x = Xcam @ K.T
+  depths_dmap = sample_depth_map_batch(depth_map, x[:, :2] / x[:, 2:3])
+  valid = depths_dmap > 0
+  depths_sfm = Xcam[valid, 2]
+  depths_dmap = depths_dmap[valid]
   if len(depths_sfm) < 2:
     return 1.0, 0.0
-  mean_depth /= len(depths_sfm)
-  depths_sfm = np.array(depths_sfm).reshape(-1, 1)
-  depths_dmap = np.array(depths_dmap).reshape(-1, 1)
-  
-  # Define the estimator, with all the functions required by RANSAC
-  class Estimator:
-    def __init__(self, scale=1.0, shift=0.0):
-      self.scale = scale
-      self.shift = shift
-
-    def fit(self, X, y):
-      # Solve for scale and shift
-      assert len(X) >= 2, "At least two samples are required for RANSAC"    
-      if X[1][0] - X[0][0] == 0:
-        return
-      scale = (y[1][0] - y[0][0]) / (X[1][0] - X[0][0])
-      if scale <= 0:
-        return
-      self.scale = scale
-      self.shift = y[0][0] - scale * X[0][0]
-
-    def predict(self, X):
-      return self.scale * X + self.shift    
-
-    def score(self, X, y):
-      return np.mean(np.abs(self.predict(X) - y))
-    
-    def get_params(self, deep=True):
-      return {'scale': self.scale, 'shift': self.shift}
-    
-    def set_params(self, **params):
-      if 'scale' in params:
-        self.scale = params['scale']
-      if 'shift' in params:
-        self.shift = params['shift']
-
-  # RANSAC model
-  inlier_threshold = mean_depth * 0.03
-  ransac = RANSACRegressor(
-    estimator=Estimator(),
-    residual_threshold=inlier_threshold,
-    min_samples=2,
-    max_trials=1000,
-    loss='absolute_error',
-    stop_probability=0.99999,
-  )
-  
-  # Fit RANSAC model
-  ransac.fit(depths_dmap, depths_sfm)
-  score = ransac.score(depths_dmap[ransac.inlier_mask_], depths_sfm[ransac.inlier_mask_])
 
-  # Print the number of inliers
+  inlier_threshold = depths_sfm.mean() * 0.03
+  fit = ransac_scale_shift(depths_dmap, depths_sfm, inlier_threshold, rng=np.random.default_rng(seed))
+  if fit is None:
+    return 1.0, 0.0
+  scale, shift, inliers = fit
   if verbose:
-    num_inliers = np.sum(ransac.inlier_mask_)
-    print(f"RANSAC stats: {ransac.n_trials_} iterations, {score:.4f} score, {num_inliers} / {len(depths_dmap)} inliers")
-  
-  # Get the scale and shift from the model
-  scale = ransac.estimator_.scale
-  shift = ransac.estimator_.shift
-  assert scale > 0, "Scale must be positive after RANSAC"
-
-  # Non-linear optimization to refine the scale and shift using Huber robust loss
-  from scipy.optimize import minimize
-  def objective(params, X, y, delta):
-    scale, shift = params
-    residuals = np.abs(scale * X + shift - y)
-    loss = np.where(residuals <= delta, 0.5 * residuals**2, delta * (residuals - 0.5 * delta))
-    return np.sum(loss)
-  result = minimize(objective, [scale, shift], args=(depths_dmap[ransac.inlier_mask_], depths_sfm[ransac.inlier_mask_], inlier_threshold/2), method='L-BFGS-B')
-  if result.success:
-    if verbose:
-      print(f"Optimization stats: {result.nit} iterations, {result.fun/num_inliers:.4f} score, {result.message}")
-    scale, shift = result.x
-    assert scale > 0, "Scale must be positive after optimization"
+    print(f"RANSAC stats: {np.sum(inliers)} / {len(depths_dmap)} inliers")
+
+  scale, shift = refine_scale_shift_huber(depths_dmap[inliers], depths_sfm[inliers], scale, shift, inlier_threshold / 2)
   if verbose:
     print(f"Estimated scale: {scale:.4f}, shift: {shift:.4f}")
   return scale, shift
 
 
-def import_dmaps(scene_file, input_dir, ext, output_file, rescale=True, verbose=False):
+def scale_depth_map(scene, image_idx, depth_map, verbose=False):
+  """
+  Estimate the scale and shift of one image depth map from the scene sparse point cloud
+  (scene as loaded by loadMVSScene; see fit_depth_scale; to process many images build
+  the observation index once instead).
+  Returns:
+    tuple: Scale and shift values.
+  """
+  points, offsets, vertex_ids = build_image_observations(scene)
+  image = scene["images"][image_idx]
+  camera = scene["platforms"][image["platform_id"]]["cameras"][image["camera_id"]]
+  pose = scene["platforms"][image["platform_id"]]["poses"][image["pose_id"]]
+  observed = points[vertex_ids[offsets[image_idx]:offsets[image_idx + 1]]]
+  return fit_depth_scale(observed, camera["K"], pose["R"], pose["C"], (camera["width"], camera["height"]),
+                         depth_map, verbose, seed=image_idx)
+
+
+def import_dmap(job):
+  """
+  Load, optionally rescale, and save the depth map of one image (runs in worker processes).
+  Args:
+    job (dict): The image description built by import_dmaps.
+  Returns:
+    str: A warning message, or None on success.
+  """
+  depth_file_path = job["depth_file_path"]
+  if depth_file_path.endswith(".npy"):
+    depth_map = load_depth_npy(depth_file_path)
+  else:
+    depth_map = load_depth_exr(depth_file_path)
+  if depth_map is None:
+    return f"Warning: Could not load depth map for {job['image_name']}"
+  depth_map = np.array(depth_map, dtype=np.float32)
+
+  if job["rescale"]:
+    # Scale and shift the depth map
+    scale, shift = fit_depth_scale(job["points"], job["K"], job["R"], job["C"], job["image_size"],
+                                   depth_map, job["verbose"], seed=job["index"])
+    depth_map[depth_map != 0] = scale * depth_map[depth_map != 0] + shift
+
+  # Create DMAP data
+  dmap_data = {
+    "has_normal": False,
+    "has_conf": False,
+    "has_views": False,
+    "image_width": job["image_size"][0],
+    "image_height": job["image_size"][1],
+    "depth_width": depth_map.shape[1],
+    "depth_height": depth_map.shape[0],
+    "depth_min": np.min(depth_map[depth_map > 0]) if np.any(depth_map > 0) else 0,
+    "depth_max": np.max(depth_map),
+    "file_name": job["file_name"],
+    "reference_view_id": job["id"],
+    "neighbor_view_ids": [],
+    "K": job["K"],
+    "R": job["R"],
+    "C": job["C"],
+    "depth_map": depth_map,
+  }
+
+  # Save DMAP
+  saveDMAP(dmap_data, job["output_path"])
+  return None
+
+
+def import_dmaps(scene_file, input_dir, ext, output_file, rescale=True, verbose=False, workers=None):
   """
   Import depth maps from EXR files and save them as DMAP files.
   Args:
@@ -197,59 +287,60 @@ def import_dmaps(scene_file, input_dir, ext, output_file, rescale=True, verbose=
     ext (str): Extension of the depth files to load (e.g., '.npy' or '.depth.exr').
     output_file (str): Directory to save the DMAP files.
     verbose (bool): If True, print debug information.
+    workers (int): Number of worker processes (default: CPU count; 1 to run in-process).
   """
-  # Load the MVS scene
-  scene = loadMVSInterface(scene_file)
+  # Load the MVS scene (the sparse point cloud only when rescaling)
+  scene = loadMVSScene(scene_file, sections=("vertices",) if rescale else ())
   if verbose:
     print(f"Scene {scene_file} loaded: {len(scene['images'])} images")
 
   os.makedirs(output_file, exist_ok=True)
 
-  for idx, image in tqdm(enumerate(scene["images"]), desc="Importing depth-maps", total=len(scene["images"])):
+  # Image -> observed vertices, built once for all images
+  if rescale:
+    points, offsets, vertex_ids = build_image_observations(scene)
+
+  jobs = []
+  for idx, image in enumerate(scene["images"]):
     image_name_ext = os.path.basename(image["name"])
     image_name = os.path.splitext(image_name_ext)[0]
     depth_file_path = os.path.join(input_dir, image_name + ext)
     if not os.path.exists(depth_file_path):
       print(f"Warning: Depth file not found for {depth_file_path}")
       continue
-
-    # Load the depth map from the corresponding file
-    if depth_file_path.endswith(".npy"):
-      depth_map = load_depth_npy(depth_file_path)
-    else:
-      depth_map = load_depth_exr(depth_file_path)
-    if depth_map is None:
-      print(f"Warning: Could not load depth map for {image_name}")
-      continue
-
-    if rescale:
-      # Scale and shift the depth map
-      scale, shift = scale_depth_map(scene, idx, depth_map, verbose)
-      depth_map[depth_map != 0] = scale * depth_map[depth_map != 0] + shift
-
-    # Create DMAP data
-    dmap_data = {
-      "has_normal": False,
-      "has_conf": False,
-      "has_views": False,
-      "image_width": scene["platforms"][image["platform_id"]]["cameras"][image["camera_id"]]["width"],
-      "image_height": scene["platforms"][image["platform_id"]]["cameras"][image["camera_id"]]["height"],
-      "depth_width": depth_map.shape[1],
-      "depth_height": depth_map.shape[0],
-      "depth_min": np.min(depth_map[depth_map > 0]) if np.any(depth_map > 0) else 0,
-      "depth_max": np.max(depth_map),
+    camera = scene["platforms"][image["platform_id"]]["cameras"][image["camera_id"]]
+    pose = scene["platforms"][image["platform_id"]]["poses"][image["pose_id"]]
+    jobs.append({
+      "index": idx,
+      "image_name": image_name,
       "file_name": image["name"],
-      "reference_view_id": image["id"],
-      "neighbor_view_ids": [],
-      "K": scene["platforms"][image["platform_id"]]["cameras"][image["camera_id"]]["K"],
-      "R": scene["platforms"][image["platform_id"]]["poses"][image["pose_id"]]["R"],
-      "C": scene["platforms"][image["platform_id"]]["poses"][image["pose_id"]]["C"],
-      "depth_map": depth_map,
-    }
+      "id": image["id"],
+      "depth_file_path": depth_file_path,
+      "output_path": os.path.join(output_file, f"depth{image['id']:04d}.dmap"),
+      "image_size": (camera["width"], camera["height"]),
+      "K": camera["K"],
+      "R": pose["R"],
+      "C": pose["C"],
+      "rescale": rescale,
+      "points": points[vertex_ids[offsets[idx]:offsets[idx + 1]]] if rescale else None,
+      "verbose": verbose,
+    })
 
-    # Save DMAP
-    dmap_output_path = os.path.join(output_file, f"depth{image['id']:04d}.dmap")
-    saveDMAP(dmap_data, dmap_output_path)
+  workers = workers or os.cpu_count() or 1
+  progress = tqdm(desc="Importing depth-maps", total=len(jobs))
+  if workers > 1 and len(jobs) > 1:
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+      for message in pool.map(import_dmap, jobs):
+        if message:
+          print(message)
+        progress.update()
+  else:
+    for job in jobs:
+      message = import_dmap(job)
+      if message:
+        print(message)
+      progress.update()
+  progress.close()
 
 
 if __name__ == "__main__":
@@ -269,9 +360,12 @@ if __name__ == "__main__":
   parser.add_argument(
     "-r", "--rescale", action="store_true", help="Rescale the depth maps using SfM point cloud",
   )
+  parser.add_argument(
+    "-j", "--workers", type=int, default=None, help="Number of worker processes (default: CPU count)"
+  )
   parser.add_argument(
     "-v", "--verbose", action="store_true", help="Enable verbose output"
   )
   args = parser.parse_args()
   
-  import_dmaps(args.scene, args.input, args.ext, args.output, args.rescale, args.verbose)
+  import_dmaps(args.scene, args.input, args.ext, args.output, args.rescale, args.verbose, args.workers)
@@ -19,16 +19,25 @@ This is useful for:
 Install dependencies:
   pip install numpy pillow piexif
 
+JPEG files are updated losslessly: only their APP1 EXIF segment is replaced, the
+compressed image data is copied as is (use --resave to re-encode through PIL instead).
+Images are processed in parallel by a pool of worker processes.
+
 Example usage:
   python MvsCamera2EXIF.py -i scene.mvs -p /path/to/images
   python MvsCamera2EXIF.py -i scene.mvs -p /path/to/images --dry-run
+  python MvsCamera2EXIF.py -i scene.mvs -p /path/to/images --workers 16
 
-usage: MvsCamera2EXIF.py [-h] [--input INPUT] [--images-path IMAGES_PATH] [--dry-run]
+usage: MvsCamera2EXIF.py [-h] [--input INPUT] [--images-path IMAGES_PATH] [--dry-run] [--workers WORKERS] [--resave]
 '''
 
 from argparse import ArgumentParser
-from MvsUtils import loadMVSInterface
+from concurrent.futures import ProcessPoolExecutor
+from MvsUtils import loadMVSScene
 import os
+import shutil
+import struct
+import tempfile
 
 try:
   import piexif
@@ -79,7 +88,93 @@ def get_camera_model_name(platform_name, camera_name):
     return "Unknown_Camera"
 
 
-def add_exif_to_image(image_path, focal_length_35mm, camera_model, dry_run=False):
+JPEG_EXTENSIONS = ('.jpg', '.jpeg', '.jpe', '.jfif')
+
+
+def read_jpeg_exif(image_path):
+  """
+  Read the APP1 EXIF segment of a JPEG file, stopping at the start of scan.
+  
+  Args:
+    image_path: Path to the JPEG file
+  
+  Returns:
+    The EXIF payload including its 'Exif' header (as accepted by piexif.load), or None
+  """
+  with open(image_path, 'rb') as f:
+    if f.read(2) != b'\xff\xd8':
+      raise ValueError(f"Not a JPEG file: {image_path}")
+    while True:
+      header = f.read(4)
+      if len(header) < 4 or header[0] != 0xFF or header[1] in (0xD9, 0xDA):  # EOI / SOS
+        return None
+      if header[1] == 0xFF:  # fill byte
+        f.seek(-3, os.SEEK_CUR)
+        continue
+      length = struct.unpack('>H', header[2:4])[0]
+      if header[1] == 0xE1:
+        payload = f.read(length - 2)
+        if payload[:6] == b'Exif\x00\x00':
+          return payload
+      else:
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def patch_jpeg_exif(image_path, exif_bytes):
+  """
+  Replace (or insert) the APP1 EXIF segment of a JPEG file without decoding it.
+  Only the header segments are parsed; the rest of the file is copied verbatim,
+  and the result is written to a temporary file that atomically replaces the original.
+  
+  Args:
+    image_path: Path to the JPEG file
+    exif_bytes: EXIF payload including its 'Exif' header, as returned by piexif.dump
+  """
+  if len(exif_bytes) + 2 > 0xFFFF:
+    raise ValueError(f"EXIF data too large for one APP1 segment ({len(exif_bytes)} bytes)")
+  with open(image_path, 'rb') as f:
+    data = f.read()
+  if data[:2] != b'\xff\xd8':
+    raise ValueError(f"Not a JPEG file: {image_path}")
+  
+  # Walk the header segments up to the start of scan
+  insert_at = 2
+  span = None
+  pos = 2
+  while pos + 4 <= len(data) and data[pos] == 0xFF:
+    marker = data[pos + 1]
+    if marker == 0xFF:  # fill byte
+      pos += 1
+      continue
+    if marker in (0xD9, 0xDA):  # EOI / SOS
+      break
+    length = struct.unpack('>H', data[pos + 2:pos + 4])[0]
+    end = pos + 2 + length
+    if marker == 0xE0 and insert_at == pos:  # keep JFIF APP0 first
+      insert_at = end
+    elif marker == 0xE1 and data[pos + 4:pos + 10] == b'Exif\x00\x00' and span is None:
+      span = (pos, end)
+    pos = end
+  
+  segment = b'\xff\xe1' + struct.pack('>H', len(exif_bytes) + 2) + exif_bytes
+  if span is None:
+    span = (insert_at, insert_at)
+  
+  fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(image_path)), suffix='.exif.tmp')
+  try:
+    with os.fdopen(fd, 'wb') as f:
+      f.write(data[:span[0]])
+      f.write(segment)
+      f.write(data[span[1]:])
+    shutil.copymode(image_path, tmp_path)
+    os.replace(tmp_path, image_path)
+  except BaseException:
+    if os.path.exists(tmp_path):
+      os.remove(tmp_path)
+    raise
+
+
+def add_exif_to_image(image_path, focal_length_35mm, camera_model, dry_run=False, resave=False):
   """
   Add or update EXIF data in an image file.
   
@@ -88,6 +183,7 @@ def add_exif_to_image(image_path, focal_length_35mm, camera_model, dry_run=False
     focal_length_35mm: 35mm equivalent focal length
     camera_model: Camera model name
     dry_run: If True, only print what would be done
+    resave: If True, re-save JPEGs through PIL instead of patching their EXIF segment
   """
   if not DEPENDENCIES_AVAILABLE:
     print(f"Error: Cannot modify EXIF data, missing dependencies")
@@ -104,15 +200,21 @@ def add_exif_to_image(image_path, focal_length_35mm, camera_model, dry_run=False
       print(f"  Camera model: {camera_model}")
       return True
     
-    # Open image and get existing EXIF data
-    img = Image.open(image_path)
+    lossless = not resave and image_path.lower().endswith(JPEG_EXTENSIONS)
     
     # Get existing EXIF data or create new
-    exif_dict = {}
-    if "exif" in img.info:
-      exif_dict = piexif.load(img.info["exif"])
+    if lossless:
+      # Hand piexif only the EXIF segment (piexif.load on a path reads the whole file)
+      exif = read_jpeg_exif(image_path)
+      exif_dict = piexif.load(exif) if exif else {"0th": {}, "Exif": {}, "GPS": {}, "1st": {}, "thumbnail": None}
     else:
-      exif_dict = {"0th": {}, "Exif": {}, "GPS": {}, "1st": {}, "thumbnail": None}
+      # Open image and get existing EXIF data
+      img = Image.open(image_path)
+      exif_dict = {}
+      if "exif" in img.info:
+        exif_dict = piexif.load(img.info["exif"])
+      else:
+        exif_dict = {"0th": {}, "Exif": {}, "GPS": {}, "1st": {}, "thumbnail": None}
     
     # Add camera model to 0th IFD (main image metadata)
     exif_dict["0th"][piexif.ImageIFD.Make] = "OpenMVS"
@@ -129,8 +231,12 @@ def add_exif_to_image(image_path, focal_length_35mm, camera_model, dry_run=False
     # Convert back to bytes
     exif_bytes = piexif.dump(exif_dict)
     
-    # Save the image with updated EXIF
-    img.save(image_path, exif=exif_bytes)
+    if lossless:
+      # Replace only the EXIF segment
+      patch_jpeg_exif(image_path, exif_bytes)
+    else:
+      # Save the image with updated EXIF
+      img.save(image_path, exif=exif_bytes)
     
     print(f"Updated EXIF for {os.path.basename(image_path)}: {focal_length_35mm}mm, {camera_model}")
     return True
@@ -140,7 +246,14 @@ def add_exif_to_image(image_path, focal_length_35mm, camera_model, dry_run=False
     return False
 
 
-def process_mvs_scene(mvs_path, images_path, dry_run=False):
+def _add_exif_job(job):
+  """
+  Worker entry point: add_exif_to_image on one (image_path, focal_length_35mm, camera_model, dry_run, resave) job.
+  """
+  return add_exif_to_image(*job)
+
+
+def process_mvs_scene(mvs_path, images_path, dry_run=False, workers=0, resave=False):
   """
   Process an MVS scene and update EXIF data for all images.
   
@@ -148,9 +261,12 @@ def process_mvs_scene(mvs_path, images_path, dry_run=False):
     mvs_path: Path to the MVS interface file
     images_path: Path to the directory containing image files
     dry_run: If True, only print what would be done
+    workers: Number of worker processes (0 = number of CPUs, 1 = serial)
+    resave: If True, re-save JPEGs through PIL instead of patching their EXIF segment
   """
   print(f"Loading MVS scene from: {mvs_path}")
-  mvs = loadMVSInterface(mvs_path)
+  # Only cameras and images are needed: skip the point cloud
+  mvs = loadMVSScene(mvs_path, sections=())
   
   if not mvs:
     print("Error: Could not load MVS scene")
@@ -160,6 +276,7 @@ def process_mvs_scene(mvs_path, images_path, dry_run=False):
   
   updated_count = 0
   error_count = 0
+  jobs = []
   
   # Process each image in the scene
   for image_idx, image_info in enumerate(mvs['images']):
@@ -213,11 +330,17 @@ def process_mvs_scene(mvs_path, images_path, dry_run=False):
           image_path = test_path
           break
     
-    # Update EXIF data
-    if add_exif_to_image(image_path, focal_length_35mm, camera_model, dry_run):
-      updated_count += 1
-    else:
-      error_count += 1
+    jobs.append((image_path, focal_length_35mm, camera_model, dry_run, resave))
+  
+  # Update EXIF data
+  workers = workers if workers > 0 else (os.cpu_count() or 1)
+  if workers > 1 and len(jobs) > 1:
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+      results = list(executor.map(_add_exif_job, jobs, chunksize=max(1, min(64, len(jobs) // (4 * workers)))))
+  else:
+    results = [_add_exif_job(job) for job in jobs]
+  updated_count += sum(results)
+  error_count += len(results) - sum(results)
   
   print(f"\nProcessing complete:")
   print(f"  Successfully processed: {updated_count} images")
@@ -234,6 +357,10 @@ def main():
                      help='Path to the directory containing image files')
   parser.add_argument('--dry-run', action='store_true',
                      help='Print what would be done without actually modifying files')
+  parser.add_argument('-j', '--workers', type=int, default=0,
+                     help='Number of worker processes (default: number of CPUs)')
+  parser.add_argument('--resave', action='store_true',
+                     help='Re-save JPEG images through PIL instead of patching only their EXIF segment')
   args = parser.parse_args()
   
   # Check dependencies first
@@ -253,7 +380,7 @@ def main():
     return 1
   
   # Process the MVS scene
-  success = process_mvs_scene(args.input, args.images_path, args.dry_run)
+  success = process_mvs_scene(args.input, args.images_path, args.dry_run, args.workers, args.resave)
   
   return 0 if success else 1
 
@@ -7,12 +7,15 @@ Install:
   pip install open3d numpy tqdm argparse
 
 Example usage:
-  python3 MvsDMAP2TSDF.py [-h] --input INPUT [--output OUTPUT] [--voxel_size VOXEL_SIZE] [--truncation_mult TRUNCATION_MULT]
+  python3 MvsDMAP2TSDF.py [-h] --input INPUT [--output OUTPUT] [--voxel_size VOXEL_SIZE] [--truncation_mult TRUNCATION_MULT] [--workers WORKERS]
 """
 
 from argparse import ArgumentParser
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from glob import glob
-from MvsUtils import loadDMAP
+from itertools import islice
+from MvsUtils import loadDMAPHeader, openDMAP
 from tqdm import tqdm
 import numpy as np
 import open3d as o3d
@@ -22,6 +25,8 @@ import os
 def estimate_gsd_from_depth_maps(dmap_paths):
     """
     Estimate the mean GSD (Ground Sampling Distance) from the given depth-maps.
+    Only the headers are read: the depth of each map is taken as the middle of its
+    stored depth range, so no pixel data is loaded.
 
     Args:
       dmap_paths (str): List of depth-map paths
@@ -29,29 +34,98 @@ def estimate_gsd_from_depth_maps(dmap_paths):
     Returns:
       float: Mean GSD
     """
-    # Parse list of depth maps
+    # Parse list of depth map headers
     mean_gsd = 0.0
     for dmap_path in dmap_paths:
-        # Read depth map
-        dmap = loadDMAP(dmap_path)
+        header = loadDMAPHeader(dmap_path)
 
-        # Compute the mean depth value
-        mean_depth = np.mean(dmap["depth_map"])
+        # Representative depth of the map
+        mean_depth = 0.5 * (float(header["depth_min"]) + float(header["depth_max"]))
 
         # Compute the GSD
-        gsd = mean_depth / dmap["depth_K"][0, 0]
+        gsd = mean_depth / header["depth_K"][0, 0]
         mean_gsd += gsd
     return mean_gsd / len(dmap_paths)
 
 
-def create_mesh_from_depth_maps(dmap_paths, voxel_length=0.01, truncation_mult=4.0):
+def load_integration_frame(dmap_path):
+    """
+    Decode one depth-map into the inputs of a TSDF integration step.
+
+    Args:
+      dmap_path (str): Depth-map path
+
+    Returns:
+      tuple: (open3d.geometry.RGBDImage, open3d.camera.PinholeCameraIntrinsic, 4x4 camera pose)
+    """
+    dmap = openDMAP(dmap_path)
+
+    # Page the memory-mapped depth in here, in the loader thread
+    depth_map = np.array(dmap["depth_map"], dtype=np.float32, order="C")
+
+    # Create RGBD image (using dummy color image)
+    depth = o3d.geometry.Image(depth_map)
+    color = o3d.geometry.Image(np.ones_like(depth_map))
+    rgbd = o3d.geometry.RGBDImage.create_from_color_and_depth(
+        color,
+        depth,
+        depth_scale=1.0,  # Adjust based on your depth unit
+        depth_trunc=10000.0,  # Maximum depth in meters
+        convert_rgb_to_intensity=False,
+    )
+
+    # Create camera intrinsic matrix
+    assert dmap["depth_K"][0, 1] == 0.0 and dmap["depth_K"][1, 0] == 0.0, "Non-zero skew not supported"
+    intrinsic = o3d.camera.PinholeCameraIntrinsic(
+        width=int(dmap["depth_width"]),
+        height=int(dmap["depth_height"]),
+        fx=dmap["depth_K"][0, 0],
+        fy=dmap["depth_K"][1, 1],
+        cx=dmap["depth_K"][0, 2],
+        cy=dmap["depth_K"][1, 2],
+    )
+
+    # Get camera pose for this frame
+    cam_pose = np.eye(4)
+    cam_pose[:3, :3] = dmap["R"]
+    cam_pose[:3, 3] = dmap["R"] @ -dmap["C"]
+    return rgbd, intrinsic, cam_pose
+
+
+def prefetch(loader, items, workers=4, depth=8):
+    """
+    Yield loader(item) for every item, in order, while a thread pool decodes up to
+    `depth` upcoming items in the background.
+
+    Args:
+      loader (callable): Function decoding one item
+      items (list): Items to decode
+      workers (int): Number of loader threads
+      depth (int): Maximum number of items decoded ahead
+
+    Returns:
+      generator: The decoded items
+    """
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        items = iter(items)
+        pending = deque(executor.submit(loader, item) for item in islice(items, max(1, depth)))
+        while pending:
+            result = pending.popleft().result()
+            # Keep the window full: submit the next item as soon as one is consumed
+            pending.extend(executor.submit(loader, item) for item in islice(items, 1))
+            yield result
+
+
+def create_mesh_from_depth_maps(dmap_paths, voxel_length=0.01, truncation_mult=4.0, workers=4):
     """
     Reconstruct a mesh from depth maps using TSDF integration.
+    Depth-maps are decoded by `workers` loader threads ahead of the integration.
 
     Args:
       dmap_paths (str): List of depth-map paths
       voxel_length (float): Size of each voxel in scene units
       truncation_mult (float): Voxel size multiplier to set the truncation value for signed distance function
+      workers (int): Number of depth-map loader threads
 
     Returns:
       open3d.geometry.TriangleMesh: Reconstructed mesh
@@ -63,46 +137,16 @@ def create_mesh_from_depth_maps(dmap_paths, voxel_length=0.01, truncation_mult=4
         color_type=o3d.pipelines.integration.TSDFVolumeColorType.NoColor,
     )
 
-    # Parse list of depth maps
-    for dmap_path in tqdm(dmap_paths, desc="Integrating depth-maps"):
-        # Read depth map
-        dmap = loadDMAP(dmap_path)
-
-        # Create RGBD image (using dummy color image)
-        depth = o3d.geometry.Image(dmap["depth_map"])
-        color = o3d.geometry.Image(np.ones_like(depth))
-        rgbd = o3d.geometry.RGBDImage.create_from_color_and_depth(
-            color,
-            depth,
-            depth_scale=1.0,  # Adjust based on your depth unit
-            depth_trunc=10000.0,  # Maximum depth in meters
-            convert_rgb_to_intensity=False,
-        )
-
-        # Create camera intrinsic matrix
-        assert dmap["depth_K"][0, 1] == 0.0 and dmap["depth_K"][1, 0] == 0.0, "Non-zero skew not supported"
-        intrinsic = o3d.camera.PinholeCameraIntrinsic(
-            width=dmap["depth_width"],
-            height=dmap["depth_height"],
-            fx=dmap["depth_K"][0, 0],
-            fy=dmap["depth_K"][1, 1],
-            cx=dmap["depth_K"][0, 2],
-            cy=dmap["depth_K"][1, 2],
-        )
-
-        # Get camera pose for this frame
-        cam_pose = np.eye(4)
-        cam_pose[:3, :3] = dmap["R"]
-        cam_pose[:3, 3] = dmap["R"] @ -dmap["C"]
-
-        # Integrate into TSDF volume
+    # Integrate depth maps while the next ones are being decoded
+    frames = prefetch(load_integration_frame, dmap_paths, workers, 2 * workers)
+    for rgbd, intrinsic, cam_pose in tqdm(frames, total=len(dmap_paths), desc="Integrating depth-maps"):
         volume.integrate(rgbd, intrinsic, cam_pose)
 
     # Extract mesh from TSDF volume
     return volume.extract_triangle_mesh()
 
 
-def dmap2tsdf(input_dir, output_file, voxel_size=0.0, truncation_mult=4.0):
+def dmap2tsdf(input_dir, output_file, voxel_size=0.0, truncation_mult=4.0, workers=4):
     dmap_paths = sorted(glob(os.path.join(input_dir, "*.dmap")))
 
     # Estimate GSD if voxel size is not provided
@@ -111,7 +155,7 @@ def dmap2tsdf(input_dir, output_file, voxel_size=0.0, truncation_mult=4.0):
         print(f"Estimated voxel size: {voxel_size}")
 
     # Reconstruct mesh
-    mesh = create_mesh_from_depth_maps(dmap_paths, voxel_size, truncation_mult)
+    mesh = create_mesh_from_depth_maps(dmap_paths, voxel_size, truncation_mult, workers)
     print(f"Reconstructed mesh with {len(mesh.vertices)} vertices and {len(mesh.triangles)} triangles")
 
     # Save the mesh
@@ -133,5 +177,8 @@ if __name__ == "__main__":
     parser.add_argument(
         "-t", "--truncation_mult", type=float, default=4.0, help="Truncation multiplier for TSDF integration",
     )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=4, help="Number of threads decoding depth-maps ahead of the integration",
+    )
     args = parser.parse_args()
-    dmap2tsdf(args.input, args.output, args.voxel_size, args.truncation_mult)
+    dmap2tsdf(args.input, args.output, args.voxel_size, args.truncation_mult, args.workers)
@@ -9,13 +9,13 @@ usage: MvsReadDMAP.py [-h] [--input INPUT] [--output OUTPUT]
 from argparse import ArgumentParser
 from concurrent.futures import ProcessPoolExecutor
 from glob import glob
-from MvsUtils import loadDMAP
+from MvsUtils import openDMAP
 import numpy as np
 import os
 import pyvips
 
 def exportDMAPContent(dmap_path):
-  dmap = loadDMAP(dmap_path)
+  dmap = openDMAP(dmap_path)
   
   basename = os.path.splitext(os.path.basename(dmap['file_name']))[0]
   
@@ -26,9 +26,14 @@ DensifyPointCloud scene_000n.mvs --dense-config-file Densify.ini
 
 This script helps to automate the process of calling DensifyPointCloud/ReconstructMesh on all sub-scenes.
 
-usage: MvsScalablePipeline.py openMVS_module input_scene <options>
+Sub-scenes can be processed concurrently: --jobs sets the number of parallel processes,
+--gpus assigns CUDA devices round-robin (through CUDA_VISIBLE_DEVICES), and concurrency is
+further capped so the estimated memory of the running sub-scenes stays within --max-memory.
+A per-sub-scene timing and peak-RSS report is written as CSV (see --report).
 
-ex: DensifyPointCloud scene_XXXX.mvs --number-views-fuse 2
+usage: MvsScalablePipeline.py [--jobs N] [--gpus 0,1,...] openMVS_module input_scene <options>
+
+ex: MvsScalablePipeline.py --jobs 4 --gpus 0,1,2,3 DensifyPointCloud scene_XXXX.mvs --dense-config-file Densify.ini
 """
 
 import os
@@ -36,9 +41,19 @@ import subprocess
 import sys
 import argparse
 import glob
+import csv
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 DEBUG = False
 
+# Estimated peak memory of one job relative to its input sub-scene file (point cloud + depth-maps)
+MEMORY_FACTOR = 40.0
+# Lower bound of the per-job memory estimate, in MB
+MIN_JOB_MEMORY_MB = 1024
+
 if sys.platform.startswith('win'):
     PATH_DELIM = ';'
     FOLDER_DELIM = '\\'
@@ -136,6 +151,16 @@ PARSER.add_argument('openMVS_module',
 PARSER.add_argument('input_scene',
                     help="the scene name reg to process: scene_XXXX.mvs")
 PARSER.add_argument('passthrough', nargs=argparse.REMAINDER, help="Option to be passed to command lines")
+PARSER.add_argument('-j', '--jobs', type=int, default=1,
+                    help="number of sub-scenes processed concurrently (default: 1)")
+PARSER.add_argument('--gpus', default='',
+                    help="comma separated CUDA devices assigned round-robin to the jobs, ex: 0,1,2,3")
+PARSER.add_argument('--max-memory', type=float, default=0,
+                    help="memory budget in GB shared by concurrent jobs (default: physical RAM)")
+PARSER.add_argument('--memory-factor', type=float, default=MEMORY_FACTOR,
+                    help="estimated job memory as a multiple of the sub-scene file size (default: %(default)s)")
+PARSER.add_argument('--report', default='',
+                    help="CSV report path (default: <scene folder>/<module>_report.csv)")
 
 PARSER.parse_args(namespace=CONF)  # store args in the ConfContainer
 
@@ -156,25 +181,167 @@ match CONF.openMVS_module:
   case _:
     moduleSuffix = '_dense.mvs'
 
-printout("# Module {} start #".format(CONF.openMVS_module), colour=RED, effect=BOLD)
-for scene_name in glob.glob(os.path.abspath(os.path.join(os.path.dirname(CONF.input_scene), 'scene_[0-9][0-9][0-9][0-9]'+suffix))):
-  if os.path.exists(os.path.splitext(scene_name)[0] + moduleSuffix) == False:
-    printout("# Process: %s" % os.path.basename(scene_name), colour=GREEN, effect=NO_EFFECT)
 
-    # create a commandline for the current step
-    cmdline = [os.path.join(OPENMVS_BIN, CONF.openMVS_module), scene_name] + CONF.passthrough
-    print('Cmd: ' + ' '.join(cmdline))
 
-    if not DEBUG:
-        # Launch the current step
+def physical_memory_mb():
+    """
+    return physical RAM in MB, None if unknown
+    """
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') / (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def estimate_memory_mb(scene_name):
+    """
+    estimate the memory needed to process a sub-scene from its file size
+    """
+    return max(MIN_JOB_MEMORY_MB, os.path.getsize(scene_name) / (1024 * 1024) * CONF.memory_factor)
+
+
+class MemoryGate:
+    """
+    Block job starts while the running jobs' estimated memory would exceed the budget;
+    a job larger than the whole budget still runs, but alone
+    """
+    def __init__(self, budget_mb):
+        self.budget_mb = budget_mb
+        self.used_mb = 0.0
+        self.running = 0
+        self.cond = threading.Condition()
+
+    def acquire(self, need_mb):
+        with self.cond:
+            while self.budget_mb and self.running and self.used_mb + need_mb > self.budget_mb:
+                self.cond.wait()
+            self.used_mb += need_mb
+            self.running += 1
+
+    def release(self, need_mb):
+        with self.cond:
+            self.used_mb -= need_mb
+            self.running -= 1
+            self.cond.notify_all()
+
+
+def wait_process(proc):
+    """
+    wait for a process; return (exit code, peak RSS in MB or None)
+    """
+    if hasattr(os, 'wait4'):
+        _, status, rusage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        # ru_maxrss is in KB on Linux, in bytes on macOS
+        scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+        return proc.returncode, rusage.ru_maxrss / scale
+    return proc.wait(), None
+
+
+RUNNING = set()
+RUNNING_LOCK = threading.Lock()
+
+
+def run_scene(scene_name, gpus, gate):
+    """
+    process one sub-scene on the next free device; return its report row
+    """
+    need_mb = estimate_memory_mb(scene_name)
+    gate.acquire(need_mb)
+    gpu = gpus.get() if gpus else None
+    row = {'scene': os.path.basename(scene_name), 'gpu': '' if gpu is None else gpu,
+           'status': 'ok', 'returncode': 0, 'seconds': 0.0, 'peak_rss_mb': '',
+           'estimated_mb': round(need_mb)}
+    try:
+        cmdline = [os.path.join(OPENMVS_BIN, CONF.openMVS_module), scene_name] + CONF.passthrough
+        env = os.environ.copy()
+        if gpu is not None:
+            env['CUDA_VISIBLE_DEVICES'] = gpu
+        printout("# Process: %s%s" % (row['scene'], '' if gpu is None else ' (GPU %s)' % gpu),
+                 colour=GREEN, effect=NO_EFFECT)
+        print('Cmd: ' + ' '.join(cmdline))
+        if DEBUG:
+            row['status'] = 'debug'
+            return row
+        start = time.time()
+        proc = subprocess.Popen(cmdline, env=env)
+        with RUNNING_LOCK:
+            RUNNING.add(proc)
         try:
-            pStep = subprocess.Popen(cmdline)
-            pStep.wait()
-            if pStep.returncode != 0:
-                printout("# Warning: step failed", colour=RED, effect=BOLD)
-        except KeyboardInterrupt:
-            sys.exit('\nProcess canceled by user, all files remains')
-    else:
-        print('\t'.join(cmdline))
+            returncode, peak_rss = wait_process(proc)
+        finally:
+            with RUNNING_LOCK:
+                RUNNING.discard(proc)
+        row['seconds'] = round(time.time() - start, 1)
+        row['returncode'] = returncode
+        if peak_rss is not None:
+            row['peak_rss_mb'] = round(peak_rss)
+        if returncode != 0:
+            row['status'] = 'failed'
+            printout("# Warning: step failed: %s" % row['scene'], colour=RED, effect=BOLD)
+        return row
+    finally:
+        if gpus:
+            gpus.put(gpu)
+        gate.release(need_mb)
+
+
+def write_report(path, rows):
+    """
+    write the per-sub-scene report as CSV and print a summary
+    """
+    fields = ['scene', 'gpu', 'status', 'returncode', 'seconds', 'peak_rss_mb', 'estimated_mb']
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+    for row in rows:
+        print('%-20s %-8s gpu=%-3s %8ss  peak RSS %s MB' % (
+            row['scene'], row['status'], row['gpu'], row['seconds'], row['peak_rss_mb'] or '?'))
+    print('Report: ' + path)
+
+
+printout("# Module {} start #".format(CONF.openMVS_module), colour=RED, effect=BOLD)
+scene_dir = os.path.abspath(os.path.dirname(CONF.input_scene))
+scene_names = sorted(glob.glob(os.path.join(scene_dir, 'scene_[0-9][0-9][0-9][0-9]'+suffix)))
+report_rows = []
+pending = []
+for scene_name in scene_names:
+  if os.path.exists(os.path.splitext(scene_name)[0] + moduleSuffix):
+    report_rows.append({'scene': os.path.basename(scene_name), 'gpu': '', 'status': 'skipped',
+                        'returncode': '', 'seconds': '', 'peak_rss_mb': '', 'estimated_mb': ''})
+  else:
+    pending.append(scene_name)
+
+gpu_list = [g.strip() for g in CONF.gpus.split(',') if g.strip()]
+jobs = max(1, CONF.jobs)
+gpu_slots = None
+if gpu_list:
+  # one slot per job, cycling over the devices
+  gpu_slots = queue.Queue()
+  for i in range(jobs):
+    gpu_slots.put(gpu_list[i % len(gpu_list)])
+budget_mb = CONF.max_memory * 1024 if CONF.max_memory > 0 else (physical_memory_mb() or 0)
+gate = MemoryGate(budget_mb)
+
+executor = ThreadPoolExecutor(max_workers=jobs)
+futures = []
+try:
+  futures = [executor.submit(run_scene, scene_name, gpu_slots, gate) for scene_name in pending]
+  for future in futures:
+    report_rows.append(future.result())
+except KeyboardInterrupt:
+  for future in futures:
+    future.cancel()
+  with RUNNING_LOCK:
+    for proc in RUNNING:
+      proc.terminate()
+  executor.shutdown(wait=False)
+  sys.exit('\nProcess canceled by user, all files remains')
+executor.shutdown()
+
+report_rows.sort(key=lambda row: row['scene'])
+if report_rows:
+  write_report(CONF.report or os.path.join(scene_dir, CONF.openMVS_module + '_report.csv'), report_rows)
 
 printout("# Module {} end #".format(CONF.openMVS_module), colour=RED, effect=BOLD)
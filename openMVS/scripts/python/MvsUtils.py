@@ -1,500 +1,817 @@
-#!/usr/bin/python3
-# -*- encoding: utf-8 -*-
-'''
-OpenMVS python utilities.
-
-Install:
-  pip install numpy
-
-Example usage:
-  from MvsUtils import loadDMAP, saveDMAP, loadMVSInterface
-'''
-
-import numpy as np
-
-
-def scale_K(K, sx, sy):
-  '''
-  Scale the intrinsic camera matrix K.
-  Args:
-    K (numpy.ndarray): The intrinsic camera matrix (3x3).
-    sx (float): Scale factor for x-axis.
-    sy (float): Scale factor for y-axis.
-  Returns:
-    numpy.ndarray: The scaled intrinsic camera matrix (3x3).
-  '''
-  return np.array([
-    [K[0, 0]*sx, K[0, 1]*sx, (K[0, 2]+0.5)*sx-0.5],
-    [0.0,  K[1, 1]*sy, (K[1, 2]+0.5)*sy-0.5],
-    [0.0, 0.0, 1.0]
-  ], dtype=np.float64)
-
-
-def sample_depth_map(depth_map, x):
-  """
-  Sample the depth map at the given coordinates using bilinear interpolation.
-  Args:
-    depth_map (numpy.ndarray): The depth map.
-    x (numpy.ndarray): The real number coordinates to sample from.
-  Returns:
-    float: The sampled depth value;
-      0.0 if the coordinates are out of bounds or if the sampled depth is zero.
-  """
-  x0 = int(x[0])
-  y0 = int(x[1])
-  x1 = x0 + 1
-  y1 = y0 + 1
-  if x0 < 0 or y0 < 0 or x1 >= depth_map.shape[1] or y1 >= depth_map.shape[0]:
-    return 0.0
-  dx = x[0] - x0
-  dy = x[1] - y0
-  depth = (
-    (depth_map[y0, x0] * (1.0 - dx) + depth_map[y0, x1] * dx) * (1.0 - dy) +
-    (depth_map[y1, x0] * (1.0 - dx) + depth_map[y1, x1] * dx) * dy
-  )
-  return depth
-
-
-def loadDMAP(dmap_path: str):
-  """
-  Load and parse a DMAP (Depth Map) file.
-  Args:
-    dmap_path (str): The path to the DMAP file.
-  Returns:
-    A dictionary containing the parsed DMAP data.
-  """
-  with open(dmap_path, 'rb') as dmap:
-    file_type = dmap.read(2).decode()
-    content_type = np.frombuffer(dmap.read(1), dtype=np.uint8)
-    reserve = np.frombuffer(dmap.read(1), dtype=np.uint8)
-    
-    has_depth = content_type > 0
-    has_normal = content_type in [3, 7, 11, 15]
-    has_conf = content_type in [5, 7, 13, 15]
-    has_views = content_type in [9, 11, 13, 15]
-    
-    image_width, image_height = np.frombuffer(dmap.read(8), dtype=np.uint32)
-    depth_width, depth_height = np.frombuffer(dmap.read(8), dtype=np.uint32)
-    
-    if (file_type != 'DR' or has_depth == False or depth_width <= 0 or depth_height <= 0 or image_width < depth_width or image_height < depth_height):
-      print('error: opening file \'{}\' for reading depth-data'.format(dmap_path))
-      return
-    
-    depth_min, depth_max = np.frombuffer(dmap.read(8), dtype=np.float32)
-    
-    file_name_size = np.frombuffer(dmap.read(2), dtype=np.uint16)[0]
-    file_name = dmap.read(file_name_size).decode()
-    
-    view_ids_size = np.frombuffer(dmap.read(4), dtype=np.uint32)[0]
-    reference_view_id, *neighbor_view_ids = np.frombuffer(dmap.read(4 * view_ids_size), dtype=np.uint32)
-    
-    K = np.frombuffer(dmap.read(72), dtype=np.float64).reshape(3, 3)
-    R = np.frombuffer(dmap.read(72), dtype=np.float64).reshape(3, 3)
-    C = np.frombuffer(dmap.read(24), dtype=np.float64)
-
-    depth_K = scale_K(K, depth_width / image_width, depth_height / image_height)
-    
-    data = {
-      'has_normal': has_normal,
-      'has_conf': has_conf,
-      'has_views': has_views,
-      'image_width': image_width,
-      'image_height': image_height,
-      'depth_width': depth_width,
-      'depth_height': depth_height,
-      'depth_min': depth_min,
-      'depth_max': depth_max,
-      'file_name': file_name,
-      'reference_view_id': reference_view_id,
-      'neighbor_view_ids': neighbor_view_ids,
-      'depth_K': depth_K,
-      'K': K,
-      'R': R,
-      'C': C
-    }
-    
-    map_size = depth_width * depth_height
-    depth_map = np.frombuffer(dmap.read(4 * map_size), dtype=np.float32).reshape(depth_height, depth_width)
-    data.update({'depth_map': depth_map})
-    if has_normal:
-      normal_map = np.frombuffer(dmap.read(4 * map_size * 3), dtype=np.float32).reshape(depth_height, depth_width, 3)
-      data.update({'normal_map': normal_map})
-    if has_conf:
-      confidence_map = np.frombuffer(dmap.read(4 * map_size), dtype=np.float32).reshape(depth_height, depth_width)
-      data.update({'confidence_map': confidence_map})
-    if has_views:
-      views_map = np.frombuffer(dmap.read(map_size * 4), dtype=np.uint8).reshape(depth_height, depth_width, 4)
-      data.update({'views_map': views_map})
-  
-  return data
-
-
-def saveDMAP(data: dict, dmap_path: str):
-  """
-  Save a depth map (DMAP) file.
-  Args:
-    data (dict): A dictionary containing the depth map data.
-    dmap_path (str): The path to save the DMAP file.
-  """
-  assert 'depth_map' in data, 'depth_map is required'
-  assert 'image_width' in data and data['image_width'] > 0, 'image_width is required'
-  assert 'image_height' in data and data['image_height'] > 0, 'image_height is required'
-  assert 'depth_width' in data and data['depth_width'] > 0, 'depth_width is required'
-  assert 'depth_height' in data and data['depth_height'] > 0, 'depth_height is required'
-
-  assert 'depth_min' in data, 'depth_min is required'
-  assert 'depth_max' in data, 'depth_max is required'
-
-  assert 'file_name' in data, 'file_name is required'
-  assert 'reference_view_id' in data, 'reference_view_id is required'
-  assert 'neighbor_view_ids' in data, 'neighbor_view_ids is required'
-
-  assert 'K' in data, 'K is required'
-  assert 'R' in data, 'R is required'
-  assert 'C' in data, 'C is required'
-
-  content_type = 1
-  if 'normal_map' in data:
-    content_type += 2
-  if 'confidence_map' in data:
-    content_type += 4
-  if 'views_map' in data:
-    content_type += 8
-
-  with open(dmap_path, 'wb') as dmap:
-    dmap.write('DR'.encode())
-
-    dmap.write(np.array([content_type], dtype=np.uint8))
-    dmap.write(np.array([0], dtype=np.uint8))
-
-    dmap.write(np.array([data['image_width'], data['image_height']], dtype=np.uint32))
-    dmap.write(np.array([data['depth_width'], data['depth_height']], dtype=np.uint32))
-
-    dmap.write(np.array([data['depth_min'], data['depth_max']], dtype=np.float32))
-
-    file_name = data['file_name']
-    dmap.write(np.array([len(file_name)], dtype=np.uint16))
-    dmap.write(file_name.encode())
-
-    view_ids = [data['reference_view_id']] + data['neighbor_view_ids']
-    dmap.write(np.array([len(view_ids)], dtype=np.uint32))
-    dmap.write(np.array(view_ids, dtype=np.uint32))
-
-    np.array(data['K'], dtype=np.float64).tofile(dmap)
-    np.array(data['R'], dtype=np.float64).tofile(dmap)
-    np.array(data['C'], dtype=np.float64).tofile(dmap)
-
-    data['depth_map'].astype(np.float32).tofile(dmap)
-    if 'normal_map' in data:
-      data['normal_map'].astype(np.float32).tofile(dmap)
-    if 'confidence_map' in data:
-      data['confidence_map'].astype(np.float32).tofile(dmap)
-    if 'views_map' in data:
-      data['views_map'].astype(np.uint8).tofile(dmap)
-
-
-def loadMVSInterface(archive_path):
-  """
-  Load and parse an MVS (Multi-View Stereo) interface file.
-  Args:
-    archive_path (str): The path to the MVS archive file.
-  Returns:
-  A dictionary containing the parsed MVS data, including project stream version, platforms, images, vertices, vertices normal, vertices color, lines, lines normal, lines color, transform, and obb (oriented bounding box).
-  The dictionary structure includes:
-  - stream_version (int): The version of the MVS stream.
-  - platforms (list): A list of platforms, each containing:
-    - name (str): The name of the platform.
-    - cameras (list): A list of cameras, each containing:
-      - name (str): The name of the camera.
-      - band_name (str, optional): The band name (if version > 3).
-      - width (int, optional): The width of the camera image (if version > 0).
-      - height (int, optional): The height of the camera image (if version > 0).
-      - K (list): The intrinsic camera matrix.
-      - R (list): The rotation matrix relative to the platform.
-      - C (list): The camera center relative to the platform.
-    - poses (list): A list of poses, each containing:
-      - R (list): The rotation matrix.
-      - C (list): The camera center.
-  - images (list): A list of images, each containing:
-    - name (str): The name of the image.
-    - mask_name (str, optional): The mask name (if version > 4).
-    - platform_id (int): The platform ID.
-    - camera_id (int): The camera ID.
-    - pose_id (int): The pose ID.
-    - id (int, optional): The image ID (if version > 2).
-    - min_depth (float, optional): The minimum depth (if version > 6).
-    - avg_depth (float, optional): The average depth (if version > 6).
-    - max_depth (float, optional): The maximum depth (if version > 6).
-    - view_scores (list, optional): A list of view scores, each containing:
-      - id (int): The view score ID.
-      - points (int): The number of points.
-      - scale (float): The scale.
-      - angle (float): The angle.
-      - area (float): The area.
-      - score (float): The score.
-  - vertices (list): A list of vertices, each containing:
-    - X (list): The vertex coordinates.
-    - views (list): A list of views, each containing:
-      - image_id (int): The image ID.
-      - confidence (float): The confidence.
-  - vertices_normal (list): A list of vertex normals.
-  - vertices_color (list): A list of vertex colors.
-  - lines (list, optional): A list of lines (if version > 0), each containing:
-    - pt1 (list): The first point of the line.
-    - pt2 (list): The second point of the line.
-    - views (list): A list of views, each containing:
-      - image_id (int): The image ID.
-      - confidence (float): The confidence.
-  - lines_normal (list, optional): A list of line normals (if version > 0).
-  - lines_color (list, optional): A list of line colors (if version > 0).
-  - transform (list, optional): The transformation matrix (if version > 1).
-  - obb (dict, optional): The oriented bounding box (if version > 5), containing:
-    - rot (list): The rotation matrix.
-    - pt_min (list): The minimum point.
-    - pt_max (list): The maximum point.
-  """
-  with open(archive_path, 'rb') as mvs:
-    archive_type = mvs.read(4).decode()
-    if archive_type != 'MVSI':
-      print('error: opening file \'{}\''.format(archive_path))
-      return
-    
-    version = np.frombuffer(mvs.read(4), dtype=np.uint32).tolist()[0]
-    reserve = np.frombuffer(mvs.read(4), dtype=np.uint32)
-    
-    data = {
-      'stream_version': version,
-      'platforms': [],
-      'images': [],
-      'vertices': [],
-      'vertices_normal': [],
-      'vertices_color': []
-    }
-    
-    platforms_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
-    for platform_index in range(platforms_size):
-      platform_name_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
-      platform_name = mvs.read(platform_name_size).decode()
-      data['platforms'].append({'name': platform_name, 'cameras': [], 'poses': []})
-      cameras_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
-      for camera_index in range(cameras_size):
-        camera_name_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
-        camera_name = mvs.read(camera_name_size).decode()
-        data['platforms'][platform_index]['cameras'].append({'name': camera_name})
-        if version > 3:
-          band_name_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
-          band_name = mvs.read(band_name_size).decode()
-          data['platforms'][platform_index]['cameras'][camera_index].update({'band_name': band_name})
-        if version > 0:
-          width, height = np.frombuffer(mvs.read(8), dtype=np.uint32).tolist()
-          data['platforms'][platform_index]['cameras'][camera_index].update({'width': width, 'height': height})
-        K = np.asarray(np.frombuffer(mvs.read(72), dtype=np.float64)).reshape(3, 3).tolist()
-        R = np.asarray(np.frombuffer(mvs.read(72), dtype=np.float64)).reshape(3, 3).tolist()
-        C = np.asarray(np.frombuffer(mvs.read(24), dtype=np.float64)).tolist()
-        data['platforms'][platform_index]['cameras'][camera_index].update({'K': K, 'R': R, 'C': C})
-        poses_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
-        for _ in range(poses_size):
-          R = np.asarray(np.frombuffer(mvs.read(72), dtype=np.float64)).reshape(3, 3).tolist()
-          C = np.asarray(np.frombuffer(mvs.read(24), dtype=np.float64)).tolist()
-          data['platforms'][platform_index]['poses'].append({'R': R, 'C': C})
-    
-    images_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
-    for image_index in range(images_size):
-      name_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
-      name = mvs.read(name_size).decode()
-      data['images'].append({'name': name})
-      if version > 4:
-        mask_name_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
-        mask_name = mvs.read(mask_name_size).decode()
-        data['images'][image_index].update({'mask_name': mask_name})
-      platform_id, camera_id, pose_id = np.frombuffer(mvs.read(12), dtype=np.uint32).tolist()
-      data['images'][image_index].update({'platform_id': platform_id, 'camera_id': camera_id, 'pose_id': pose_id})
-      if version > 2:
-        id = np.frombuffer(mvs.read(4), dtype=np.uint32).tolist()[0]
-        data['images'][image_index].update({'id': id})
-      if version > 6:
-        min_depth, avg_depth, max_depth = np.frombuffer(mvs.read(12), dtype=np.float32).tolist()
-        data['images'][image_index].update({'min_depth': min_depth, 'avg_depth': avg_depth, 'max_depth': max_depth, 'view_scores': []})
-        view_score_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
-        for _ in range(view_score_size):
-          id, points = np.frombuffer(mvs.read(8), dtype=np.uint32).tolist()
-          scale, angle, area, score = np.frombuffer(mvs.read(16), dtype=np.float32).tolist()
-          data['images'][image_index]['view_scores'].append({'id': id, 'points': points, 'scale': scale, 'angle': angle, 'area': area, 'score': score})
-    
-    vertices_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
-    for vertex_index in range(vertices_size):
-      X = np.frombuffer(mvs.read(12), dtype=np.float32).tolist()
-      data['vertices'].append({'X': X, 'views': []})
-      views_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
-      for _ in range(views_size):
-        image_id = np.frombuffer(mvs.read(4), dtype=np.uint32).tolist()[0]
-        confidence = np.frombuffer(mvs.read(4), dtype=np.float32).tolist()[0]
-        data['vertices'][vertex_index]['views'].append({'image_id': image_id, 'confidence': confidence})
-    
-    vertices_normal_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
-    for _ in range(vertices_normal_size):
-      normal = np.frombuffer(mvs.read(12), dtype=np.float32).tolist()
-      data['vertices_normal'].append(normal)
-    
-    vertices_color_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
-    for _ in range(vertices_color_size):
-      color = np.frombuffer(mvs.read(3), dtype=np.uint8).tolist()
-      data['vertices_color'].append(color)
-    
-    if version > 0:
-      data.update({'lines': [], 'lines_normal': [], 'lines_color': []})
-      lines_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
-      for line_index in range(lines_size):
-        pt1 = np.frombuffer(mvs.read(12), dtype=np.float32).tolist()
-        pt2 = np.frombuffer(mvs.read(12), dtype=np.float32).tolist()
-        data['lines'].append({'pt1': pt1, 'pt2': pt2, 'views': []})
-        views_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
-        for _ in range(views_size):
-          image_id = np.frombuffer(mvs.read(4), dtype=np.uint32).tolist()[0]
-          confidence = np.frombuffer(mvs.read(4), dtype=np.float32).tolist()[0]
-          data['lines'][line_index]['views'].append({'image_id': image_id, 'confidence': confidence})
-      lines_normal_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
-      for _ in range(lines_normal_size):
-        normal = np.frombuffer(mvs.read(12), dtype=np.float32).tolist()
-        data['lines_normal'].append(normal)
-      lines_color_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
-      for _ in range(lines_color_size):
-        color = np.frombuffer(mvs.read(3), dtype=np.uint8).tolist()
-        data['lines_color'].append(color)
-
-    if version > 1:
-      transform = np.frombuffer(mvs.read(128), dtype=np.float64).reshape(4, 4).tolist()
-      data.update({'transform': transform})
-      if version > 5:
-        rot = np.frombuffer(mvs.read(72), dtype=np.float64).reshape(3, 3).tolist()
-        pt_min = np.frombuffer(mvs.read(24), dtype=np.float64).tolist()
-        pt_max = np.frombuffer(mvs.read(24), dtype=np.float64).tolist()
-        data.update({'obb': {'rot': rot, 'pt_min': pt_min, 'pt_max': pt_max}})
-  
-  return data
-
-
-def saveMVSInterface(data: dict, archive_path: str):
-  """
-  Save a scene as an MVS (Multi-View Stereo) interface file.
-  Example:
-    scene = {
-      'stream_version': 3,
-      'platforms': [],
-      'images': [],
-      'vertices': [],
-      'vertices_normal': [],
-      'vertices_color': [],
-      'lines': [],
-      'lines_normal': [],
-      'lines_color': [],
-      'transform': np.eye(4, dtype=np.float32).tolist()
-    }
-    ... populate scene (at least with platforms/cameras and images) ...
-    saveMVSInterface(scene, 'scene.mvs')
-  Args:
-    data (dict): A dictionary containing the MVS data.
-    archive_path (str): The path to save the MVS archive file.
-  """
-  with open(archive_path, 'wb') as mvs:
-    mvs.write('MVSI'.encode())
-    version = data.get('stream_version', 7)
-    mvs.write(np.array([version], dtype=np.uint32))
-    mvs.write(np.array([0], dtype=np.uint32))  # reserve
-
-    platforms_size = len(data['platforms'])
-    mvs.write(np.array([platforms_size], dtype=np.uint64))
-    for platform in data['platforms']:
-      platform_name = platform['name'].encode()
-      mvs.write(np.array([len(platform_name)], dtype=np.uint64))
-      mvs.write(platform_name)
-      cameras_size = len(platform['cameras'])
-      mvs.write(np.array([cameras_size], dtype=np.uint64))
-      for camera in platform['cameras']:
-        camera_name = camera['name'].encode()
-        mvs.write(np.array([len(camera_name)], dtype=np.uint64))
-        mvs.write(camera_name)
-        if 'band_name' in camera:
-          band_name = camera['band_name'].encode()
-          mvs.write(np.array([len(band_name)], dtype=np.uint64))
-          mvs.write(band_name)
-        if 'width' in camera and 'height' in camera:
-          mvs.write(np.array([camera['width'], camera['height']], dtype=np.uint32))
-        mvs.write(np.array(camera['K'], dtype=np.float64).tobytes())
-        mvs.write(np.array(camera['R'], dtype=np.float64).tobytes())
-        mvs.write(np.array(camera['C'], dtype=np.float64).tobytes())
-      poses_size = len(platform['poses'])
-      mvs.write(np.array([poses_size], dtype=np.uint64))
-      for pose in platform['poses']:
-        mvs.write(np.array(pose['R'], dtype=np.float64).tobytes())
-        mvs.write(np.array(pose['C'], dtype=np.float64).tobytes())
-
-    images_size = len(data['images'])
-    mvs.write(np.array([images_size], dtype=np.uint64))
-    for image in data['images']:
-      name = image['name'].encode()
-      mvs.write(np.array([len(name)], dtype=np.uint64))
-      mvs.write(name)
-      if 'mask_name' in image:
-        mask_name = image['mask_name'].encode()
-        mvs.write(np.array([len(mask_name)], dtype=np.uint64))
-        mvs.write(mask_name)
-      mvs.write(np.array([image['platform_id'], image['camera_id'], image['pose_id']], dtype=np.uint32))
-      if 'id' in image:
-        mvs.write(np.array([image['id']], dtype=np.uint32))
-      if 'min_depth' in image and 'avg_depth' in image and 'max_depth' in image:
-        mvs.write(np.array([image['min_depth'], image['avg_depth'], image['max_depth']], dtype=np.float32))
-        view_scores_size = len(image['view_scores'])
-        mvs.write(np.array([view_scores_size], dtype=np.uint64))
-        for view_score in image['view_scores']:
-          mvs.write(np.array([view_score['id'], view_score['points']], dtype=np.uint32))
-          mvs.write(np.array([view_score['scale'], view_score['angle'], view_score['area'], view_score['score']], dtype=np.float32))
-
-    vertices_size = len(data['vertices'])
-    mvs.write(np.array([vertices_size], dtype=np.uint64))
-    for vertex in data['vertices']:
-      mvs.write(np.array(vertex['X'], dtype=np.float32))
-      views_size = len(vertex['views'])
-      mvs.write(np.array([views_size], dtype=np.uint64))
-      for view in vertex['views']:
-        mvs.write(np.array([view['image_id']], dtype=np.uint32))
-        mvs.write(np.array([view['confidence']], dtype=np.float32))
-
-    vertices_normal_size = len(data['vertices_normal'])
-    mvs.write(np.array([vertices_normal_size], dtype=np.uint64))
-    for normal in data['vertices_normal']:
-      mvs.write(np.array(normal, dtype=np.float32))
-
-    vertices_color_size = len(data['vertices_color'])
-    mvs.write(np.array([vertices_color_size], dtype=np.uint64))
-    for color in data['vertices_color']:
-      mvs.write(np.array(color, dtype=np.uint8))
-
-    if 'lines' in data:
-      lines_size = len(data['lines'])
-      mvs.write(np.array([lines_size], dtype=np.uint64))
-      for line in data['lines']:
-        mvs.write(np.array(line['pt1'], dtype=np.float32))
-        mvs.write(np.array(line['pt2'], dtype=np.float32))
-        views_size = len(line['views'])
-        mvs.write(np.array([views_size], dtype=np.uint64))
-        for view in line['views']:
-          mvs.write(np.array([view['image_id']], dtype=np.uint32))
-          mvs.write(np.array([view['confidence']], dtype=np.float32))
-
-      lines_normal_size = len(data['lines_normal'])
-      mvs.write(np.array([lines_normal_size], dtype=np.uint64))
-      for normal in data['lines_normal']:
-        mvs.write(np.array(normal, dtype=np.float32))
-
-      lines_color_size = len(data['lines_color'])
-      mvs.write(np.array([lines_color_size], dtype=np.uint64))
-      for color in data['lines_color']:
-        mvs.write(np.array(color, dtype=np.uint8))
-
-    if 'transform' in data:
-      mvs.write(np.array(data['transform'], dtype=np.float64).tobytes())
-      if 'obb' in data:
-        mvs.write(np.array(data['obb']['rot'], dtype=np.float64).tobytes())
-        mvs.write(np.array(data['obb']['pt_min'], dtype=np.float64).tobytes())
-        mvs.write(np.array(data['obb']['pt_max'], dtype=np.float64).tobytes())
+#!/usr/bin/python3
+# -*- encoding: utf-8 -*-
+'''
+OpenMVS python utilities.
+
+Install:
+  pip install numpy
+
+Example usage:
+  from MvsUtils import loadDMAP, openDMAP, saveDMAP, loadMVSInterface, loadMVSScene, saveMVSScene
+'''
+
+import array
+import mmap
+import struct
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def scale_K(K, sx, sy):
+  '''
+  Scale the intrinsic camera matrix K.
+  Args:
+    K (numpy.ndarray): The intrinsic camera matrix (3x3).
+    sx (float): Scale factor for x-axis.
+    sy (float): Scale factor for y-axis.
+  Returns:
+    numpy.ndarray: The scaled intrinsic camera matrix (3x3).
+  '''
+  return np.array([
+    [K[0, 0]*sx, K[0, 1]*sx, (K[0, 2]+0.5)*sx-0.5],
+    [0.0,  K[1, 1]*sy, (K[1, 2]+0.5)*sy-0.5],
+    [0.0, 0.0, 1.0]
+  ], dtype=np.float64)
+
+
+def sample_depth_map(depth_map, x):
+  """
+  Sample the depth map at the given coordinates using bilinear interpolation.
+  Args:
+    depth_map (numpy.ndarray): The depth map.
+    x (numpy.ndarray): The real number coordinates to sample from.
+  Returns:
+    float: The sampled depth value;
+      0.0 if the coordinates are out of bounds or if the sampled depth is zero.
+  """
+  x0 = int(x[0])
+  y0 = int(x[1])
+  x1 = x0 + 1
+  y1 = y0 + 1
+  if x0 < 0 or y0 < 0 or x1 >= depth_map.shape[1] or y1 >= depth_map.shape[0]:
+    return 0.0
+  dx = x[0] - x0
+  dy = x[1] - y0
+  depth = (
+    (depth_map[y0, x0] * (1.0 - dx) + depth_map[y0, x1] * dx) * (1.0 - dy) +
+    (depth_map[y1, x0] * (1.0 - dx) + depth_map[y1, x1] * dx) * dy
+  )
+  return depth
+
+
+def sample_depth_map_batch(depth_map, xs):
+  """
+  Vectorized bilinear sampling of the depth map at many coordinates.
+  Args:
+    depth_map (numpy.ndarray): The depth map (H x W).
+    xs (numpy.ndarray): The real number coordinates to sample from (N x 2).
+  Returns:
+    numpy.ndarray: The sampled depth values (N,);
+      0.0 where the 2x2 neighborhood falls outside the depth map.
+  """
+  xs = np.asarray(xs, dtype=np.float64).reshape(-1, 2)
+  x0 = np.floor(xs[:, 0]).astype(np.int64)
+  y0 = np.floor(xs[:, 1]).astype(np.int64)
+  valid = (x0 >= 0) & (y0 >= 0) & (x0 + 1 < depth_map.shape[1]) & (y0 + 1 < depth_map.shape[0])
+  depths = np.zeros(len(xs), dtype=np.float64)
+  if not np.any(valid):
+    return depths
+  x0, y0 = x0[valid], y0[valid]
+  dx = xs[valid, 0] - x0
+  dy = xs[valid, 1] - y0
+  depths[valid] = (
+    (depth_map[y0, x0] * (1.0 - dx) + depth_map[y0, x0 + 1] * dx) * (1.0 - dy) +
+    (depth_map[y0 + 1, x0] * (1.0 - dx) + depth_map[y0 + 1, x0 + 1] * dx) * dy
+  )
+  return depths
+
+
+_DMAP_FIXED_HEADER = struct.Struct('<2sBB2I2I2fH')
+
+
+def _readDMAPHeader(dmap, dmap_path):
+  """
+  Parse the header of a DMAP file from an open binary stream positioned at its start.
+  Args:
+    dmap (file): The DMAP file object.
+    dmap_path (str): The path of the file, for error messages.
+  Returns:
+    A dictionary with the header fields (see loadDMAP) and 'data_offset', the byte offset
+    of the depth map; None if the file is not a valid DMAP.
+  """
+  (file_type, content_type, _, image_width, image_height, depth_width, depth_height,
+   depth_min, depth_max, file_name_size) = _DMAP_FIXED_HEADER.unpack(dmap.read(_DMAP_FIXED_HEADER.size))
+
+  has_depth = content_type > 0
+  has_normal = content_type in [3, 7, 11, 15]
+  has_conf = content_type in [5, 7, 13, 15]
+  has_views = content_type in [9, 11, 13, 15]
+
+  if (file_type != b'DR' or has_depth == False or depth_width <= 0 or depth_height <= 0 or image_width < depth_width or image_height < depth_height):
+    print('error: opening file \'{}\' for reading depth-data'.format(dmap_path))
+    return
+
+  file_name = dmap.read(file_name_size).decode()
+
+  view_ids_size = np.frombuffer(dmap.read(4), dtype=np.uint32)[0]
+  reference_view_id, *neighbor_view_ids = np.frombuffer(dmap.read(4 * view_ids_size), dtype=np.uint32)
+
+  K = np.frombuffer(dmap.read(72), dtype=np.float64).reshape(3, 3)
+  R = np.frombuffer(dmap.read(72), dtype=np.float64).reshape(3, 3)
+  C = np.frombuffer(dmap.read(24), dtype=np.float64)
+
+  depth_K = scale_K(K, depth_width / image_width, depth_height / image_height)
+
+  return {
+    'has_normal': has_normal,
+    'has_conf': has_conf,
+    'has_views': has_views,
+    'image_width': np.uint32(image_width),
+    'image_height': np.uint32(image_height),
+    'depth_width': np.uint32(depth_width),
+    'depth_height': np.uint32(depth_height),
+    'depth_min': np.float32(depth_min),
+    'depth_max': np.float32(depth_max),
+    'file_name': file_name,
+    'reference_view_id': reference_view_id,
+    'neighbor_view_ids': neighbor_view_ids,
+    'depth_K': depth_K,
+    'K': K,
+    'R': R,
+    'C': C,
+    'data_offset': dmap.tell()
+  }
+
+
+def _DMAPLayout(header):
+  """
+  Yield (name, dtype, shape) of the maps stored after the DMAP header, in file order.
+  """
+  width, height = int(header['depth_width']), int(header['depth_height'])
+  yield 'depth_map', np.float32, (height, width)
+  if header['has_normal']:
+    yield 'normal_map', np.float32, (height, width, 3)
+  if header['has_conf']:
+    yield 'confidence_map', np.float32, (height, width)
+  if header['has_views']:
+    yield 'views_map', np.uint8, (height, width, 4)
+
+
+def loadDMAPHeader(dmap_path: str):
+  """
+  Read only the header of a DMAP file (camera, sizes and depth range; no maps).
+  Args:
+    dmap_path (str): The path to the DMAP file.
+  Returns:
+    A dictionary with the DMAP fields of loadDMAP except the maps, plus 'data_offset'.
+  """
+  with open(dmap_path, 'rb') as dmap:
+    return _readDMAPHeader(dmap, dmap_path)
+
+
+def openDMAP(dmap_path: str):
+  """
+  Open a DMAP file lazily: the header is parsed eagerly, the maps are returned as
+  read-only memory-mapped views, so pixels are only read from disk when accessed.
+  Args:
+    dmap_path (str): The path to the DMAP file.
+  Returns:
+    A dictionary with the same keys as loadDMAP, where the maps are numpy.memmap views.
+  """
+  data = loadDMAPHeader(dmap_path)
+  if data is None:
+    return
+  offset = data['data_offset']
+  for name, dtype, shape in _DMAPLayout(data):
+    data[name] = np.memmap(dmap_path, dtype=dtype, mode='r', offset=offset, shape=shape)
+    offset += data[name].nbytes
+  return data
+
+
+def loadDMAP(dmap_path: str):
+  """
+  Load and parse a DMAP (Depth Map) file.
+  Args:
+    dmap_path (str): The path to the DMAP file.
+  Returns:
+    A dictionary containing the parsed DMAP data.
+  """
+  with open(dmap_path, 'rb') as dmap:
+    data = _readDMAPHeader(dmap, dmap_path)
+    if data is None:
+      return
+    for name, dtype, shape in _DMAPLayout(data):
+      size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+      data[name] = np.frombuffer(dmap.read(size), dtype=dtype).reshape(shape)
+  del data['data_offset']
+  return data
+
+
+def saveDMAP(data: dict, dmap_path: str):
+  """
+  Save a depth map (DMAP) file.
+  Args:
+    data (dict): A dictionary containing the depth map data.
+    dmap_path (str): The path to save the DMAP file.
+  """
+  assert 'depth_map' in data, 'depth_map is required'
+  assert 'image_width' in data and data['image_width'] > 0, 'image_width is required'
+  assert 'image_height' in data and data['image_height'] > 0, 'image_height is required'
+  assert 'depth_width' in data and data['depth_width'] > 0, 'depth_width is required'
+  assert 'depth_height' in data and data['depth_height'] > 0, 'depth_height is required'
+
+  assert 'depth_min' in data, 'depth_min is required'
+  assert 'depth_max' in data, 'depth_max is required'
+
+  assert 'file_name' in data, 'file_name is required'
+  assert 'reference_view_id' in data, 'reference_view_id is required'
+  assert 'neighbor_view_ids' in data, 'neighbor_view_ids is required'
+
+  assert 'K' in data, 'K is required'
+  assert 'R' in data, 'R is required'
+  assert 'C' in data, 'C is required'
+
+  content_type = 1
+  if 'normal_map' in data:
+    content_type += 2
+  if 'confidence_map' in data:
+    content_type += 4
+  if 'views_map' in data:
+    content_type += 8
+
+  with open(dmap_path, 'wb') as dmap:
+    dmap.write('DR'.encode())
+
+    dmap.write(np.array([content_type], dtype=np.uint8))
+    dmap.write(np.array([0], dtype=np.uint8))
+
+    dmap.write(np.array([data['image_width'], data['image_height']], dtype=np.uint32))
+    dmap.write(np.array([data['depth_width'], data['depth_height']], dtype=np.uint32))
+
+    dmap.write(np.array([data['depth_min'], data['depth_max']], dtype=np.float32))
+
+    file_name = data['file_name']
+    dmap.write(np.array([len(file_name)], dtype=np.uint16))
+    dmap.write(file_name.encode())
+
+    view_ids = [data['reference_view_id']] + data['neighbor_view_ids']
+    dmap.write(np.array([len(view_ids)], dtype=np.uint32))
+    dmap.write(np.array(view_ids, dtype=np.uint32))
+
+    np.array(data['K'], dtype=np.float64).tofile(dmap)
+    np.array(data['R'], dtype=np.float64).tofile(dmap)
+    np.array(data['C'], dtype=np.float64).tofile(dmap)
+
+    data['depth_map'].astype(np.float32).tofile(dmap)
+    if 'normal_map' in data:
+      data['normal_map'].astype(np.float32).tofile(dmap)
+    if 'confidence_map' in data:
+      data['confidence_map'].astype(np.float32).tofile(dmap)
+    if 'views_map' in data:
+      data['views_map'].astype(np.uint8).tofile(dmap)
+
+
+def _readMVSHeader(mvs, version):
+  """
+  Read the platforms and images sections of an MVS interface archive.
+  Args:
+    mvs: The archive file object, positioned after the stream version and reserve fields.
+    version (int): The stream version.
+  Returns:
+    tuple: The platforms and images lists (see loadMVSInterface).
+  """
+  platforms = []
+  images = []
+  platforms_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
+  for platform_index in range(platforms_size):
+    platform_name_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
+    platform_name = mvs.read(platform_name_size).decode()
+    platforms.append({'name': platform_name, 'cameras': [], 'poses': []})
+    cameras_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
+    for camera_index in range(cameras_size):
+      camera_name_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
+      camera_name = mvs.read(camera_name_size).decode()
+      platforms[platform_index]['cameras'].append({'name': camera_name})
+      if version > 3:
+        band_name_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
+        band_name = mvs.read(band_name_size).decode()
+        platforms[platform_index]['cameras'][camera_index].update({'band_name': band_name})
+      if version > 0:
+        width, height = np.frombuffer(mvs.read(8), dtype=np.uint32).tolist()
+        platforms[platform_index]['cameras'][camera_index].update({'width': width, 'height': height})
+      K = np.asarray(np.frombuffer(mvs.read(72), dtype=np.float64)).reshape(3, 3).tolist()
+      R = np.asarray(np.frombuffer(mvs.read(72), dtype=np.float64)).reshape(3, 3).tolist()
+      C = np.asarray(np.frombuffer(mvs.read(24), dtype=np.float64)).tolist()
+      platforms[platform_index]['cameras'][camera_index].update({'K': K, 'R': R, 'C': C})
+      poses_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
+      for _ in range(poses_size):
+        R = np.asarray(np.frombuffer(mvs.read(72), dtype=np.float64)).reshape(3, 3).tolist()
+        C = np.asarray(np.frombuffer(mvs.read(24), dtype=np.float64)).tolist()
+        platforms[platform_index]['poses'].append({'R': R, 'C': C})
+  
+  images_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
+  for image_index in range(images_size):
+    name_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
+    name = mvs.read(name_size).decode()
+    images.append({'name': name})
+    if version > 4:
+      mask_name_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
+      mask_name = mvs.read(mask_name_size).decode()
+      images[image_index].update({'mask_name': mask_name})
+    platform_id, camera_id, pose_id = np.frombuffer(mvs.read(12), dtype=np.uint32).tolist()
+    images[image_index].update({'platform_id': platform_id, 'camera_id': camera_id, 'pose_id': pose_id})
+    if version > 2:
+      id = np.frombuffer(mvs.read(4), dtype=np.uint32).tolist()[0]
+      images[image_index].update({'id': id})
+    if version > 6:
+      min_depth, avg_depth, max_depth = np.frombuffer(mvs.read(12), dtype=np.float32).tolist()
+      images[image_index].update({'min_depth': min_depth, 'avg_depth': avg_depth, 'max_depth': max_depth, 'view_scores': []})
+      view_score_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
+      for _ in range(view_score_size):
+        id, points = np.frombuffer(mvs.read(8), dtype=np.uint32).tolist()
+        scale, angle, area, score = np.frombuffer(mvs.read(16), dtype=np.float32).tolist()
+        images[image_index]['view_scores'].append({'id': id, 'points': points, 'scale': scale, 'angle': angle, 'area': area, 'score': score})
+  return platforms, images
+
+
+def loadMVSInterface(archive_path):
+  """
+  Load and parse an MVS (Multi-View Stereo) interface file.
+  Args:
+    archive_path (str): The path to the MVS archive file.
+  Returns:
+  A dictionary containing the parsed MVS data, including project stream version, platforms, images, vertices, vertices normal, vertices color, lines, lines normal, lines color, transform, and obb (oriented bounding box).
+  The dictionary structure includes:
+  - stream_version (int): The version of the MVS stream.
+  - platforms (list): A list of platforms, each containing:
+    - name (str): The name of the platform.
+    - cameras (list): A list of cameras, each containing:
+      - name (str): The name of the camera.
+      - band_name (str, optional): The band name (if version > 3).
+      - width (int, optional): The width of the camera image (if version > 0).
+      - height (int, optional): The height of the camera image (if version > 0).
+      - K (list): The intrinsic camera matrix.
+      - R (list): The rotation matrix relative to the platform.
+      - C (list): The camera center relative to the platform.
+    - poses (list): A list of poses, each containing:
+      - R (list): The rotation matrix.
+      - C (list): The camera center.
+  - images (list): A list of images, each containing:
+    - name (str): The name of the image.
+    - mask_name (str, optional): The mask name (if version > 4).
+    - platform_id (int): The platform ID.
+    - camera_id (int): The camera ID.
+    - pose_id (int): The pose ID.
+    - id (int, optional): The image ID (if version > 2).
+    - min_depth (float, optional): The minimum depth (if version > 6).
+    - avg_depth (float, optional): The average depth (if version > 6).
+    - max_depth (float, optional): The maximum depth (if version > 6).
+    - view_scores (list, optional): A list of view scores, each containing:
+      - id (int): The view score ID.
+      - points (int): The number of points.
+      - scale (float): The scale.
+      - angle (float): The angle.
+      - area (float): The area.
+      - score (float): The score.
+  - vertices (list): A list of vertices, each containing:
+    - X (list): The vertex coordinates.
+    - views (list): A list of views, each containing:
+      - image_id (int): The image ID.
+      - confidence (float): The confidence.
+  - vertices_normal (list): A list of vertex normals.
+  - vertices_color (list): A list of vertex colors.
+  - lines (list, optional): A list of lines (if version > 0), each containing:
+    - pt1 (list): The first point of the line.
+    - pt2 (list): The second point of the line.
+    - views (list): A list of views, each containing:
+      - image_id (int): The image ID.
+      - confidence (float): The confidence.
+  - lines_normal (list, optional): A list of line normals (if version > 0).
+  - lines_color (list, optional): A list of line colors (if version > 0).
+  - transform (list, optional): The transformation matrix (if version > 1).
+  - obb (dict, optional): The oriented bounding box (if version > 5), containing:
+    - rot (list): The rotation matrix.
+    - pt_min (list): The minimum point.
+    - pt_max (list): The maximum point.
+  """
+  with open(archive_path, 'rb') as mvs:
+    archive_type = mvs.read(4).decode()
+    if archive_type != 'MVSI':
+      print('error: opening file \'{}\''.format(archive_path))
+      return
+    
+    version = np.frombuffer(mvs.read(4), dtype=np.uint32).tolist()[0]
+    reserve = np.frombuffer(mvs.read(4), dtype=np.uint32)
+    
+    data = {
+      'stream_version': version,
+      'platforms': [],
+      'images': [],
+      'vertices': [],
+      'vertices_normal': [],
+      'vertices_color': []
+    }
+    
+    data['platforms'], data['images'] = _readMVSHeader(mvs, version)
+    
+    vertices_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
+    for vertex_index in range(vertices_size):
+      X = np.frombuffer(mvs.read(12), dtype=np.float32).tolist()
+      data['vertices'].append({'X': X, 'views': []})
+      views_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
+      for _ in range(views_size):
+        image_id = np.frombuffer(mvs.read(4), dtype=np.uint32).tolist()[0]
+        confidence = np.frombuffer(mvs.read(4), dtype=np.float32).tolist()[0]
+        data['vertices'][vertex_index]['views'].append({'image_id': image_id, 'confidence': confidence})
+    
+    vertices_normal_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
+    for _ in range(vertices_normal_size):
+      normal = np.frombuffer(mvs.read(12), dtype=np.float32).tolist()
+      data['vertices_normal'].append(normal)
+    
+    vertices_color_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
+    for _ in range(vertices_color_size):
+      color = np.frombuffer(mvs.read(3), dtype=np.uint8).tolist()
+      data['vertices_color'].append(color)
+    
+    if version > 0:
+      data.update({'lines': [], 'lines_normal': [], 'lines_color': []})
+      lines_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
+      for line_index in range(lines_size):
+        pt1 = np.frombuffer(mvs.read(12), dtype=np.float32).tolist()
+        pt2 = np.frombuffer(mvs.read(12), dtype=np.float32).tolist()
+        data['lines'].append({'pt1': pt1, 'pt2': pt2, 'views': []})
+        views_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
+        for _ in range(views_size):
+          image_id = np.frombuffer(mvs.read(4), dtype=np.uint32).tolist()[0]
+          confidence = np.frombuffer(mvs.read(4), dtype=np.float32).tolist()[0]
+          data['lines'][line_index]['views'].append({'image_id': image_id, 'confidence': confidence})
+      lines_normal_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
+      for _ in range(lines_normal_size):
+        normal = np.frombuffer(mvs.read(12), dtype=np.float32).tolist()
+        data['lines_normal'].append(normal)
+      lines_color_size = np.frombuffer(mvs.read(8), dtype=np.uint64)[0]
+      for _ in range(lines_color_size):
+        color = np.frombuffer(mvs.read(3), dtype=np.uint8).tolist()
+        data['lines_color'].append(color)
+
+    if version > 1:
+      transform = np.frombuffer(mvs.read(128), dtype=np.float64).reshape(4, 4).tolist()
+      data.update({'transform': transform})
+      if version > 5:
+        rot = np.frombuffer(mvs.read(72), dtype=np.float64).reshape(3, 3).tolist()
+        pt_min = np.frombuffer(mvs.read(24), dtype=np.float64).tolist()
+        pt_max = np.frombuffer(mvs.read(24), dtype=np.float64).tolist()
+        data.update({'obb': {'rot': rot, 'pt_min': pt_min, 'pt_max': pt_max}})
+  
+  return data
+
+
+def _writeMVSHeader(mvs, data):
+  """
+  Write the platforms and images sections of an MVS interface archive.
+  Args:
+    mvs: The archive file object, positioned after the stream version and reserve fields.
+    data (dict): A dictionary containing at least the 'platforms' and 'images' lists.
+  """
+  platforms_size = len(data['platforms'])
+  mvs.write(np.array([platforms_size], dtype=np.uint64))
+  for platform in data['platforms']:
+    platform_name = platform['name'].encode()
+    mvs.write(np.array([len(platform_name)], dtype=np.uint64))
+    mvs.write(platform_name)
+    cameras_size = len(platform['cameras'])
+    mvs.write(np.array([cameras_size], dtype=np.uint64))
+    for camera in platform['cameras']:
+      camera_name = camera['name'].encode()
+      mvs.write(np.array([len(camera_name)], dtype=np.uint64))
+      mvs.write(camera_name)
+      if 'band_name' in camera:
+        band_name = camera['band_name'].encode()
+        mvs.write(np.array([len(band_name)], dtype=np.uint64))
+        mvs.write(band_name)
+      if 'width' in camera and 'height' in camera:
+        mvs.write(np.array([camera['width'], camera['height']], dtype=np.uint32))
+      mvs.write(np.array(camera['K'], dtype=np.float64).tobytes())
+      mvs.write(np.array(camera['R'], dtype=np.float64).tobytes())
+      mvs.write(np.array(camera['C'], dtype=np.float64).tobytes())
+    poses_size = len(platform['poses'])
+    mvs.write(np.array([poses_size], dtype=np.uint64))
+    for pose in platform['poses']:
+      mvs.write(np.array(pose['R'], dtype=np.float64).tobytes())
+      mvs.write(np.array(pose['C'], dtype=np.float64).tobytes())
+
+  images_size = len(data['images'])
+  mvs.write(np.array([images_size], dtype=np.uint64))
+  for image in data['images']:
+    name = image['name'].encode()
+    mvs.write(np.array([len(name)], dtype=np.uint64))
+    mvs.write(name)
+    if 'mask_name' in image:
+      mask_name = image['mask_name'].encode()
+      mvs.write(np.array([len(mask_name)], dtype=np.uint64))
+      mvs.write(mask_name)
+    mvs.write(np.array([image['platform_id'], image['camera_id'], image['pose_id']], dtype=np.uint32))
+    if 'id' in image:
+      mvs.write(np.array([image['id']], dtype=np.uint32))
+    if 'min_depth' in image and 'avg_depth' in image and 'max_depth' in image:
+      mvs.write(np.array([image['min_depth'], image['avg_depth'], image['max_depth']], dtype=np.float32))
+      view_scores_size = len(image['view_scores'])
+      mvs.write(np.array([view_scores_size], dtype=np.uint64))
+      for view_score in image['view_scores']:
+        mvs.write(np.array([view_score['id'], view_score['points']], dtype=np.uint32))
+        mvs.write(np.array([view_score['scale'], view_score['angle'], view_score['area'], view_score['score']], dtype=np.float32))
+
+
+def saveMVSInterface(data: dict, archive_path: str):
+  """
+  Save a scene as an MVS (Multi-View Stereo) interface file.
+  Example:
+    scene = {
+      'stream_version': 3,
+      'platforms': [],
+      'images': [],
+      'vertices': [],
+      'vertices_normal': [],
+      'vertices_color': [],
+      'lines': [],
+      'lines_normal': [],
+      'lines_color': [],
+      'transform': np.eye(4, dtype=np.float32).tolist()
+    }
+    ... populate scene (at least with platforms/cameras and images) ...
+    saveMVSInterface(scene, 'scene.mvs')
+  Args:
+    data (dict): A dictionary containing the MVS data.
+    archive_path (str): The path to save the MVS archive file.
+  """
+  with open(archive_path, 'wb') as mvs:
+    mvs.write('MVSI'.encode())
+    version = data.get('stream_version', 7)
+    mvs.write(np.array([version], dtype=np.uint32))
+    mvs.write(np.array([0], dtype=np.uint32))  # reserve
+
+    _writeMVSHeader(mvs, data)
+
+    vertices_size = len(data['vertices'])
+    mvs.write(np.array([vertices_size], dtype=np.uint64))
+    for vertex in data['vertices']:
+      mvs.write(np.array(vertex['X'], dtype=np.float32))
+      views_size = len(vertex['views'])
+      mvs.write(np.array([views_size], dtype=np.uint64))
+      for view in vertex['views']:
+        mvs.write(np.array([view['image_id']], dtype=np.uint32))
+        mvs.write(np.array([view['confidence']], dtype=np.float32))
+
+    vertices_normal_size = len(data['vertices_normal'])
+    mvs.write(np.array([vertices_normal_size], dtype=np.uint64))
+    for normal in data['vertices_normal']:
+      mvs.write(np.array(normal, dtype=np.float32))
+
+    vertices_color_size = len(data['vertices_color'])
+    mvs.write(np.array([vertices_color_size], dtype=np.uint64))
+    for color in data['vertices_color']:
+      mvs.write(np.array(color, dtype=np.uint8))
+
+    if 'lines' in data:
+      lines_size = len(data['lines'])
+      mvs.write(np.array([lines_size], dtype=np.uint64))
+      for line in data['lines']:
+        mvs.write(np.array(line['pt1'], dtype=np.float32))
+        mvs.write(np.array(line['pt2'], dtype=np.float32))
+        views_size = len(line['views'])
+        mvs.write(np.array([views_size], dtype=np.uint64))
+        for view in line['views']:
+          mvs.write(np.array([view['image_id']], dtype=np.uint32))
+          mvs.write(np.array([view['confidence']], dtype=np.float32))
+
+      lines_normal_size = len(data['lines_normal'])
+      mvs.write(np.array([lines_normal_size], dtype=np.uint64))
+      for normal in data['lines_normal']:
+        mvs.write(np.array(normal, dtype=np.float32))
+
+      lines_color_size = len(data['lines_color'])
+      mvs.write(np.array([lines_color_size], dtype=np.uint64))
+      for color in data['lines_color']:
+        mvs.write(np.array(color, dtype=np.uint8))
+
+    if 'transform' in data:
+      mvs.write(np.array(data['transform'], dtype=np.float64).tobytes())
+      if 'obb' in data:
+        mvs.write(np.array(data['obb']['rot'], dtype=np.float64).tobytes())
+        mvs.write(np.array(data['obb']['pt_min'], dtype=np.float64).tobytes())
+        mvs.write(np.array(data['obb']['pt_max'], dtype=np.float64).tobytes())
+
+
+# Optional sections of an MVS interface archive, in stream order (platforms and images are always read)
+MVS_SECTIONS = ('vertices', 'vertices_normal', 'vertices_color', 'lines', 'lines_normal', 'lines_color', 'transform')
+
+_VIEW_DTYPE = np.dtype([('image_id', '<u4'), ('confidence', '<f4')])
+# Views gathered per step in _gatherMVSRecords (bounds its temporary arrays to ~100 MB)
+_GATHER_VIEWS = 1 << 22
+
+
+def _walkMVSRecords(buf, pos, count, prefix_size):
+  """
+  Locate `count` variable-size records, each made of `prefix_size` fixed bytes,
+  a uint64 views count and that many (image_id, confidence) views.
+  Only the counts are read here; the payload is gathered with NumPy afterwards.
+  Returns:
+    tuple: Record start offsets, views offsets (CSR, count+1) and the end position.
+  """
+  read_count = struct.Struct('<Q').unpack_from
+  starts = array.array('q', bytes(8 * count))
+  counts = array.array('q', bytes(8 * count))
+  for k in range(count):
+    starts[k] = pos
+    n = read_count(buf, pos + prefix_size)[0]
+    counts[k] = n
+    pos += prefix_size + 8 + 8 * n
+  offsets = np.zeros(count + 1, dtype=np.int64)
+  np.cumsum(np.frombuffer(counts, dtype=np.int64), out=offsets[1:])
+  return np.frombuffer(starts, dtype=np.int64), offsets, pos
+
+
+def _gatherMVSRecords(raw, starts, offsets, prefix_size):
+  """
+  Gather the fixed prefixes (as raw bytes, one row per record) and the CSR views of walked records.
+  Bytes are picked through sliding-window views of `raw` (no per-byte index arrays), and the
+  views are gathered in steps of _GATHER_VIEWS so the temporary offsets stay bounded.
+  """
+  prefix = sliding_window_view(raw, prefix_size)[starts]
+  view_bytes = sliding_window_view(raw, _VIEW_DTYPE.itemsize)
+  counts = np.diff(offsets)
+  # Byte offset of every view: record start + prefix + count field + 8 * (index inside the record)
+  view_base = starts + prefix_size + 8 - 8 * offsets[:-1]
+  image_ids = np.empty(offsets[-1], dtype=np.uint32)
+  confidences = np.empty(offsets[-1], dtype=np.float32)
+  lo = 0
+  while lo < len(starts):
+    hi = min(max(int(np.searchsorted(offsets, offsets[lo] + _GATHER_VIEWS, side='right')) - 1, lo + 1), len(starts))
+    first, last = offsets[lo], offsets[hi]
+    view_pos = np.repeat(view_base[lo:hi], counts[lo:hi]) + 8 * np.arange(first, last)
+    views = view_bytes[view_pos].reshape(-1).view(_VIEW_DTYPE)
+    image_ids[first:last] = views['image_id']
+    confidences[first:last] = views['confidence']
+    lo = hi
+  return prefix, image_ids, confidences
+
+
+def loadMVSScene(archive_path, sections=MVS_SECTIONS):
+  """
+  Load an MVS interface archive into NumPy arrays.
+  Platforms and images are parsed as in loadMVSInterface; the point cloud and lines
+  are returned as arrays, with their views in CSR layout (the views of vertex i are
+  vertices_views_image_id[vertices_views_offsets[i]:vertices_views_offsets[i+1]]).
+  Reading stops after the last requested section, so sections=() reads only the
+  header and images; sections that are not requested are skipped without decoding.
+  Args:
+    archive_path (str): The path to the MVS archive file.
+    sections (iterable): The optional sections to load (see MVS_SECTIONS).
+  Returns:
+    A dictionary with:
+    - stream_version (int), platforms (list), images (list): as in loadMVSInterface.
+    - vertices (N x 3 float32), vertices_views_offsets (N+1 int64),
+      vertices_views_image_id (uint32), vertices_views_confidence (float32).
+    - vertices_normal (N x 3 float32), vertices_color (N x 3 uint8).
+    - lines (L x 2 x 3 float32), lines_views_offsets, lines_views_image_id,
+      lines_views_confidence, lines_normal (L x 3 float32), lines_color (L x 3 uint8).
+    - transform (4 x 4 float64), obb (dict of arrays; if version > 5).
+    Only the requested sections are present.
+  """
+  sections = set(sections)
+  unknown = sections - set(MVS_SECTIONS)
+  assert not unknown, 'unknown MVS sections: {}'.format(sorted(unknown))
+  # Index of the last section to read; everything after it is never touched
+  last = max((MVS_SECTIONS.index(name) for name in sections), default=-1)
+
+  with open(archive_path, 'rb') as mvs:
+    archive_type = mvs.read(4).decode()
+    if archive_type != 'MVSI':
+      print('error: opening file \'{}\''.format(archive_path))
+      return
+    version = np.frombuffer(mvs.read(4), dtype=np.uint32).tolist()[0]
+    mvs.read(4)  # reserve
+    data = {'stream_version': version}
+    data['platforms'], data['images'] = _readMVSHeader(mvs, version)
+    if last < 0:
+      return data
+    pos = mvs.tell()
+
+    with mmap.mmap(mvs.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+      raw = np.frombuffer(buf, dtype=np.uint8)
+      read_size = struct.Struct('<Q').unpack_from
+
+      def read_fixed(pos, name, item_size, dtype, shape):
+        count = read_size(buf, pos)[0]
+        pos += 8
+        if name in sections:
+          data[name] = raw[pos:pos + count * item_size].view(dtype).reshape((count,) + shape).copy()
+        return pos + count * item_size
+
+      def read_records(pos, name, prefix_size, prefix_shape):
+        count = read_size(buf, pos)[0]
+        starts, offsets, pos = _walkMVSRecords(buf, pos + 8, count, prefix_size)
+        if name in sections:
+          prefix, image_ids, confidences = _gatherMVSRecords(raw, starts, offsets, prefix_size)
+          data[name] = prefix.reshape(-1).view('<f4').reshape((count,) + prefix_shape)
+          data[name + '_views_offsets'] = offsets
+          data[name + '_views_image_id'] = image_ids
+          data[name + '_views_confidence'] = confidences
+        return pos
+
+      pos = read_records(pos, 'vertices', 12, (3,))
+      if last >= 1:
+        pos = read_fixed(pos, 'vertices_normal', 12, '<f4', (3,))
+      if last >= 2:
+        pos = read_fixed(pos, 'vertices_color', 3, np.uint8, (3,))
+      if version > 0 and last >= 3:
+        pos = read_records(pos, 'lines', 24, (2, 3))
+        if last >= 4:
+          pos = read_fixed(pos, 'lines_normal', 12, '<f4', (3,))
+        if last >= 5:
+          pos = read_fixed(pos, 'lines_color', 3, np.uint8, (3,))
+        if version > 1 and last >= 6:
+          data['transform'] = raw[pos:pos + 128].view('<f8').reshape(4, 4).copy()
+          pos += 128
+          if version > 5:
+            obb = raw[pos:pos + 120].view('<f8').copy()
+            data['obb'] = {'rot': obb[:9].reshape(3, 3), 'pt_min': obb[9:12], 'pt_max': obb[12:15]}
+      # Release the buffer export before the mmap is closed
+      raw = None
+  return data
+
+
+def _packMVSRecords(prefix, offsets, image_ids, confidences):
+  """
+  Serialize variable-size records (fixed prefix, uint64 views count, views) in one buffer.
+  Args:
+    prefix (numpy.ndarray): The fixed part of each record as raw bytes (N x P uint8).
+    offsets, image_ids, confidences: The CSR views of the records.
+  Returns:
+    numpy.ndarray: The serialized records (uint8).
+  """
+  count, prefix_size = prefix.shape
+  counts = np.diff(offsets)
+  sizes = prefix_size + 8 + 8 * counts
+  starts = np.zeros(count, dtype=np.int64)
+  np.cumsum(sizes[:-1], out=starts[1:])
+  out = np.empty(int(sizes.sum()), dtype=np.uint8)
+  out[starts[:, None] + np.arange(prefix_size)] = prefix
+  out[starts[:, None] + prefix_size + np.arange(8)] = counts.astype('<u8').view(np.uint8).reshape(count, 8)
+  views = np.empty(int(offsets[-1]), dtype=_VIEW_DTYPE)
+  views['image_id'] = image_ids
+  views['confidence'] = confidences
+  view_pos = np.repeat(starts + prefix_size + 8 - 8 * offsets[:-1], counts) + 8 * np.arange(len(views))
+  out[view_pos[:, None] + np.arange(8)] = views.view(np.uint8).reshape(-1, 8)
+  return out
+
+
+def _writeMVSRecords(mvs, data, name, prefix_size):
+  points = np.ascontiguousarray(data.get(name, np.zeros(0)), dtype='<f4').reshape(-1, prefix_size // 4)
+  count = len(points)
+  offsets = np.asarray(data.get(name + '_views_offsets', np.zeros(count + 1)), dtype=np.int64)
+  image_ids = np.asarray(data.get(name + '_views_image_id', np.zeros(0)), dtype='<u4')
+  confidences = np.asarray(data.get(name + '_views_confidence', np.zeros(len(image_ids))), dtype='<f4')
+  assert len(offsets) == count + 1 and offsets[-1] == len(image_ids) == len(confidences), \
+    'inconsistent {} views'.format(name)
+  mvs.write(np.array([count], dtype=np.uint64))
+  _packMVSRecords(points.view(np.uint8), offsets, image_ids, confidences).tofile(mvs)
+
+
+def _writeMVSArray(mvs, data, name, dtype):
+  values = np.ascontiguousarray(data.get(name, np.zeros((0, 3))), dtype=dtype).reshape(-1, 3)
+  mvs.write(np.array([len(values)], dtype=np.uint64))
+  values.tofile(mvs)
+
+
+def saveMVSScene(data: dict, archive_path: str):
+  """
+  Save a scene in the array layout returned by loadMVSScene as an MVS interface file.
+  Sections required by the stream version but missing from data are written empty
+  (identity transform, zero OBB).
+  Args:
+    data (dict): The scene (platforms, images and any of the MVS_SECTIONS arrays).
+    archive_path (str): The path to save the MVS archive file.
+  """
+  version = data.get('stream_version', 7)
+  with open(archive_path, 'wb') as mvs:
+    mvs.write('MVSI'.encode())
+    mvs.write(np.array([version], dtype=np.uint32))
+    mvs.write(np.array([0], dtype=np.uint32))  # reserve
+    _writeMVSHeader(mvs, data)
+
+    _writeMVSRecords(mvs, data, 'vertices', 12)
+    _writeMVSArray(mvs, data, 'vertices_normal', '<f4')
+    _writeMVSArray(mvs, data, 'vertices_color', np.uint8)
+    if version > 0:
+      _writeMVSRecords(mvs, data, 'lines', 24)
+      _writeMVSArray(mvs, data, 'lines_normal', '<f4')
+      _writeMVSArray(mvs, data, 'lines_color', np.uint8)
+    if version > 1:
+      np.asarray(data.get('transform', np.eye(4)), dtype='<f8').tofile(mvs)
+      if version > 5:
+        obb = data.get('obb', {'rot': np.zeros((3, 3)), 'pt_min': np.zeros(3), 'pt_max': np.zeros(3)})
+        for key in ('rot', 'pt_min', 'pt_max'):
+          np.asarray(obb[key], dtype='<f8').tofile(mvs)